@@ -0,0 +1,175 @@
+"""
+Almacenamiento deduplicado por contenido para los archivos subidos.
+
+Las empresas vuelven a subir el mismo brochure o certificado en cada registro y
+edición, y cada copia quedaba con otro nombre (generar_nombre_catalogo). Los
+campos que usan AlmacenamientoDeduplicado calculan el SHA-256 mientras se
+escribe el archivo y lo guardan en contenido/ab/cd/<sha256>.<ext>: un contenido
+repetido no se vuelve a escribir y el campo apunta al archivo existente.
+
+Cada guardado suma una referencia en ArchivoContenido y cada delete() la resta;
+el archivo se borra del disco solo al quitar la última, y antes se verifica que
+ningún campo registrado en CAMPOS_DEDUPLICADOS lo siga usando (por ejemplo, si
+se copió el nombre de un modelo a otro sin pasar por el storage).
+
+El comando deduplicar_archivos migra los archivos existentes de MEDIA_ROOT.
+"""
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+
+from django.apps import apps
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from django.utils.deconstruct import deconstructible
+
+logger = logging.getLogger(__name__)
+
+PREFIJO = 'contenido'
+TAMANO_BLOQUE = 64 * 1024
+
+# Campos de archivo que usan el almacenamiento deduplicado: (modelo, campo)
+CAMPOS_DEDUPLICADOS = [
+    ('registro.SolicitudRegistro', 'catalogo_pdf'),
+    ('registro.DocumentoSolicitud', 'archivo'),
+    ('empresas.Empresa', 'brochure'),
+    ('empresas.Empresa', 'archivo_certificaciones'),
+]
+
+
+def nombre_por_contenido(sha256, nombre_original):
+    """Ruta del archivo según su hash, conservando la extensión original"""
+    extension = os.path.splitext(nombre_original)[1].lower()
+    return f'{PREFIJO}/{sha256[:2]}/{sha256[2:4]}/{sha256}{extension}'
+
+
+def referencias_en_uso(nombre):
+    """Cantidad de filas de CAMPOS_DEDUPLICADOS que apuntan a `nombre`"""
+    total = 0
+    for modelo, campo in CAMPOS_DEDUPLICADOS:
+        total += apps.get_model(modelo)._base_manager.filter(**{campo: nombre}).count()
+    return total
+
+
+@deconstructible
+class AlmacenamientoDeduplicado(FileSystemStorage):
+    """FileSystemStorage que guarda cada contenido una sola vez (ver el docstring del módulo)"""
+
+    def _copiar_con_hash(self, content):
+        """
+        Copiar el contenido a un temporal en el directorio del storage calculando el
+        SHA-256 en la misma pasada. Si ya es un archivo temporal en disco se lee sin copiarlo.
+        Devuelve (ruta temporal, sha256, tamaño, es_propia).
+        """
+        digest = hashlib.sha256()
+        if hasattr(content, 'temporary_file_path'):
+            ruta = content.temporary_file_path()
+            with open(ruta, 'rb') as archivo:
+                for bloque in iter(lambda: archivo.read(TAMANO_BLOQUE), b''):
+                    digest.update(bloque)
+            return ruta, digest.hexdigest(), os.path.getsize(ruta), False
+
+        directorio = os.path.join(self.location, PREFIJO)
+        os.makedirs(directorio, exist_ok=True)
+        descriptor, ruta = tempfile.mkstemp(dir=directorio, suffix='.tmp')
+        tamano = 0
+        with os.fdopen(descriptor, 'wb') as temporal:
+            if hasattr(content, 'seek'):
+                content.seek(0)
+            for bloque in content.chunks(TAMANO_BLOQUE):
+                digest.update(bloque)
+                temporal.write(bloque)
+                tamano += len(bloque)
+        return ruta, digest.hexdigest(), tamano, True
+
+    def _save(self, name, content):
+        from .models import ArchivoContenido
+
+        ruta, sha256, tamano, es_propia = self._copiar_con_hash(content)
+        nombre = nombre_por_contenido(sha256, name)
+        try:
+            with transaction.atomic():
+                archivo, _ = ArchivoContenido.objects.select_for_update().get_or_create(
+                    sha256=sha256, defaults={'nombre': nombre, 'tamano': tamano}
+                )
+                destino = self.path(archivo.nombre)
+                if not os.path.exists(destino):
+                    os.makedirs(os.path.dirname(destino), exist_ok=True)
+                    # Un temporal ajeno (upload de Django, subida en partes) se mueve como en FileSystemStorage
+                    file_move_safe(ruta, destino)
+                    if self.file_permissions_mode is not None:
+                        os.chmod(destino, self.file_permissions_mode)
+                else:
+                    logger.info(f"♻️ Contenido repetido, se reutiliza {archivo.nombre}")
+                ArchivoContenido.objects.filter(pk=archivo.pk).update(referencias=F('referencias') + 1)
+        finally:
+            if es_propia and os.path.exists(ruta):
+                os.remove(ruta)
+        return archivo.nombre
+
+    def delete(self, name):
+        from .models import ArchivoContenido
+
+        if not name:
+            return
+        if not name.startswith(f'{PREFIJO}/'):
+            # Archivo anterior a la deduplicación: tiene un único dueño
+            return super().delete(name)
+
+        with transaction.atomic():
+            archivo = ArchivoContenido.objects.select_for_update().filter(nombre=name).first()
+            if archivo is None:
+                return super().delete(name)
+            referencias = max(archivo.referencias - 1, 0)
+            # La fila que se está borrando todavía puede apuntar al archivo: se descuenta
+            if referencias == 0 and referencias_en_uso(name) <= 1:
+                archivo.delete()
+                super().delete(name)
+                logger.info(f"🗑️ Archivo {name} eliminado (sin referencias)")
+            else:
+                ArchivoContenido.objects.filter(pk=archivo.pk).update(referencias=max(referencias, 1))
+
+
+def storage_deduplicado():
+    """Storage de los campos en CAMPOS_DEDUPLICADOS (callable para que las migraciones no lo congelen)"""
+    return AlmacenamientoDeduplicado()
+
+
+def deduplicar_archivo(storage, nombre):
+    """
+    Dejar el contenido de un archivo existente (nombre anterior a la deduplicación)
+    en su ruta por contenido sin tocar el original: se enlaza (o copia) si el
+    contenido todavía no estaba. Quien actualiza las filas suma las referencias y
+    borra el original cuando ninguna lo usa, después del commit.
+    Devuelve (nombre nuevo, bytes que se liberan al borrar el original).
+    """
+    from .models import ArchivoContenido
+
+    ruta = storage.path(nombre)
+    digest = hashlib.sha256()
+    with open(ruta, 'rb') as archivo:
+        for bloque in iter(lambda: archivo.read(TAMANO_BLOQUE), b''):
+            digest.update(bloque)
+    sha256 = digest.hexdigest()
+    tamano = os.path.getsize(ruta)
+
+    with transaction.atomic():
+        contenido, _ = ArchivoContenido.objects.select_for_update().get_or_create(
+            sha256=sha256, defaults={'nombre': nombre_por_contenido(sha256, nombre), 'tamano': tamano}
+        )
+        destino = storage.path(contenido.nombre)
+        liberados = 0
+        if os.path.exists(destino):
+            liberados = tamano
+        else:
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            try:
+                # Un enlace no ocupa espacio extra mientras el original siga existiendo
+                os.link(ruta, destino)
+            except OSError:
+                shutil.copyfile(ruta, destino)
+    return contenido.nombre, liberados
@@ -9,7 +9,7 @@ from .views import (
 from .viewsets import (
     RolUsuarioViewSet, UsuarioViewSet,
     DptoViewSet, MunicipioViewSet, LocalidadesViewSet,
-    ConfiguracionSistemaViewSet
+    ConfiguracionSistemaViewSet, SubidaArchivoViewSet
 )
 
 router = DefaultRouter()
@@ -19,6 +19,7 @@ router.register(r'departamentos', DptoViewSet, basename='departamento')
 router.register(r'municipios', MunicipioViewSet, basename='municipio')
 router.register(r'localidades', LocalidadesViewSet, basename='localidad')
 router.register(r'configuracion', ConfiguracionSistemaViewSet, basename='configuracion')
+router.register(r'subidas', SubidaArchivoViewSet, basename='subida')
 
 urlpatterns = [
     # JWT Authentication con cookies HTTP-Only
@@ -0,0 +1,201 @@
+"""
+Soporte del header Idempotency-Key en los endpoints que modifican datos.
+
+Un cliente que reintenta un POST/PUT/PATCH lento (aprobar una solicitud, crear
+una empresa, notificar) envía la misma Idempotency-Key; la primera respuesta
+queda en la caché (Redis) durante IDEMPOTENCIA_TTL_SEGUNDOS y los reintentos
+la reciben sin volver a ejecutar la vista (header Idempotent-Replayed).
+
+Los duplicados concurrentes se serializan con un lock corto (cache.add): el
+segundo espera a que termine el primero y recibe su respuesta, o un 409 si el
+primero tarda más de IDEMPOTENCIA_ESPERA_SEGUNDOS. La clave se asocia a las
+credenciales (o a la IP en los pedidos anónimos), el método, la ruta y el
+contenido: reutilizarla con otro contenido devuelve 422.
+"""
+import hashlib
+import logging
+import tempfile
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+
+logger = logging.getLogger(__name__)
+
+HEADER = 'Idempotency-Key'
+METODOS = ('POST', 'PUT', 'PATCH')
+LONGITUD_MAXIMA = 255
+# Estados que no se guardan: el cliente puede reintentar con la misma clave
+ESTADOS_NO_GUARDADOS = {401, 403, 409, 429}
+# Headers de la respuesta original que se repiten al reproducirla
+HEADERS_REPETIDOS = ('Location', 'Content-Disposition')
+# Tamaño de bloque al copiar y resumir los cuerpos multipart
+BLOQUE_MULTIPART = 64 * 1024
+
+
+def _clave_cache(request, clave):
+    """
+    Clave de caché para la Idempotency-Key de este cliente, método y ruta.
+    Los pedidos anónimos (sin token ni sesión) se separan por IP: si no, todos
+    compartirían el mismo ámbito y uno podría recibir la respuesta de otro.
+    """
+    credenciales = request.META.get('HTTP_AUTHORIZATION') or request.COOKIES.get(settings.SESSION_COOKIE_NAME, '')
+    if not credenciales:
+        credenciales = f"anonimo:{request.META.get('REMOTE_ADDR', '')}"
+    partes = '\n'.join([credenciales, request.method, request.get_full_path(), clave])
+    return f"idempotencia:{hashlib.sha256(partes.encode()).hexdigest()}"
+
+
+def _huella_multipart(request):
+    """
+    Hash de los campos y el contenido de los archivos de un pedido multipart.
+    request.body rechaza los cuerpos mayores a DATA_UPLOAD_MAX_MEMORY_SIZE, así que
+    el cuerpo se copia por bloques a un archivo temporal, se parsea desde ahí (el
+    boundary cambia entre reintentos, el contenido no) y la copia reemplaza al
+    stream original para que la vista lo lea igual.
+    """
+    from django.core.files.uploadhandler import load_handler
+    from django.http.multipartparser import MultiPartParser
+
+    copia = tempfile.SpooledTemporaryFile(max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+    while True:
+        bloque = request.read(BLOQUE_MULTIPART)
+        if not bloque:
+            break
+        copia.write(bloque)
+
+    try:
+        copia.seek(0)
+        handlers = [load_handler(handler, request) for handler in settings.FILE_UPLOAD_HANDLERS]
+        campos, archivos = MultiPartParser(request.META, copia, handlers, request.encoding).parse()
+
+        digest = hashlib.sha256()
+        for nombre, valores in sorted(campos.lists()):
+            digest.update(repr((nombre, valores)).encode())
+        for nombre, lista in sorted(archivos.lists()):
+            for archivo in lista:
+                digest.update(repr((nombre, archivo.name, archivo.size)).encode())
+                for bloque in archivo.chunks(BLOQUE_MULTIPART):
+                    digest.update(bloque)
+                archivo.close()
+        return digest.hexdigest()
+    finally:
+        copia.seek(0)
+        request._stream = copia
+        request._read_started = False
+
+
+def _huella(request):
+    """Huella del contenido del pedido"""
+    if request.META.get('CONTENT_TYPE', '').startswith('multipart/'):
+        return _huella_multipart(request)
+    return hashlib.sha256(request.body).hexdigest()
+
+
+def _liberar_lock(clave_lock, token):
+    """
+    Borrar el lock solo si sigue siendo el nuestro: si venció durante un pedido
+    lento y lo tomó otro, borrarlo dejaría pasar un tercer duplicado.
+    """
+    if cache.get(clave_lock) == token:
+        cache.delete(clave_lock)
+
+
+def _reproducir(guardada):
+    respuesta = HttpResponse(guardada['contenido'], status=guardada['estado'], content_type=guardada['content_type'])
+    for nombre, valor in guardada['headers'].items():
+        respuesta[nombre] = valor
+    respuesta['Idempotent-Replayed'] = 'true'
+    return respuesta
+
+
+def _guardar(clave, huella, respuesta):
+    if respuesta.status_code >= 500 or respuesta.status_code in ESTADOS_NO_GUARDADOS:
+        return
+    if getattr(respuesta, 'streaming', False):
+        return
+    if hasattr(respuesta, 'render') and not respuesta.is_rendered:
+        respuesta.render()
+    cache.set(clave, {
+        'huella': huella,
+        'estado': respuesta.status_code,
+        'contenido': respuesta.content,
+        'content_type': respuesta.get('Content-Type', 'application/json'),
+        'headers': {nombre: respuesta[nombre] for nombre in HEADERS_REPETIDOS if respuesta.has_header(nombre)},
+    }, getattr(settings, 'IDEMPOTENCIA_TTL_SEGUNDOS', 86400))
+
+
+def _respuesta_guardada(clave, huella):
+    """Respuesta ya guardada para la clave (None si no hay), o 422 si el contenido no coincide"""
+    guardada = cache.get(clave)
+    if guardada is None:
+        return None
+    if guardada['huella'] != huella:
+        return JsonResponse(
+            {'error': f'La {HEADER} ya se usó con un contenido distinto'},
+            status=422
+        )
+    return _reproducir(guardada)
+
+
+class IdempotenciaMixin:
+    """
+    Mixin de ViewSet: los POST/PUT/PATCH con Idempotency-Key se ejecutan una sola
+    vez y los reintentos reciben la respuesta guardada.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        clave = request.headers.get(HEADER)
+        if request.method not in METODOS or not clave:
+            return super().dispatch(request, *args, **kwargs)
+        if len(clave) > LONGITUD_MAXIMA:
+            return JsonResponse(
+                {'error': f'La {HEADER} no puede superar {LONGITUD_MAXIMA} caracteres'},
+                status=400
+            )
+
+        try:
+            clave_cache = _clave_cache(request, clave)
+            huella = _huella(request)
+            guardada = _respuesta_guardada(clave_cache, huella)
+            if guardada is not None:
+                return guardada
+
+            clave_lock = f"{clave_cache}:lock"
+            token = uuid.uuid4().hex
+            espera = getattr(settings, 'IDEMPOTENCIA_ESPERA_SEGUNDOS', 10)
+            limite = time.monotonic() + espera
+            # El lock vence solo por si el proceso que lo tomó se cae
+            while not cache.add(clave_lock, token, getattr(settings, 'IDEMPOTENCIA_LOCK_SEGUNDOS', 60)):
+                if time.monotonic() >= limite:
+                    return JsonResponse(
+                        {'error': f'Hay un pedido con la misma {HEADER} en proceso, reintente más tarde'},
+                        status=409
+                    )
+                time.sleep(0.1)
+                guardada = _respuesta_guardada(clave_cache, huella)
+                if guardada is not None:
+                    return guardada
+        except Exception as e:
+            # Sin caché el pedido se procesa igual, sin protección ante reintentos
+            logger.warning(f"⚠️ Idempotency-Key no disponible, se procesa sin ella: {str(e)}")
+            return super().dispatch(request, *args, **kwargs)
+
+        try:
+            # Un pedido que esperó el lock puede encontrar la respuesta recién guardada
+            guardada = _respuesta_guardada(clave_cache, huella)
+            if guardada is not None:
+                return guardada
+            respuesta = super().dispatch(request, *args, **kwargs)
+            try:
+                _guardar(clave_cache, huella, respuesta)
+            except Exception as e:
+                logger.warning(f"⚠️ No se pudo guardar la respuesta de la Idempotency-Key: {str(e)}")
+            return respuesta
+        finally:
+            try:
+                _liberar_lock(clave_lock, token)
+            except Exception as e:
+                logger.warning(f"⚠️ No se pudo liberar el lock de la Idempotency-Key: {str(e)}")
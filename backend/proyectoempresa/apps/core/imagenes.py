@@ -0,0 +1,225 @@
+"""
+Miniaturas y WebP de las imágenes subidas (logo de empresa, avatar de usuario).
+
+Los listados y el mapa descargaban la imagen original a la resolución con que
+se subió. Al cambiar la imagen, un signal encola un TrabajoImagen; el comando
+procesar_imagenes genera una vez cada tamaño de IMAGENES_DERIVADAS_TAMANOS en
+WebP y en JPEG (PNG si la imagen tiene transparencia) y los guarda en el campo
+JSON <campo>_derivados, que los serializers exponen como URLs.
+
+Las rutas son deterministas (derivados/<ruta de la original>/<tamaño>.<formato>),
+así que regenerar una imagen reemplaza sus derivados. El comando
+generar_derivados_imagenes encola (o procesa) las imágenes ya existentes.
+"""
+import logging
+import os
+from datetime import timedelta
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import TrabajoImagen
+
+logger = logging.getLogger(__name__)
+
+# Campos de imagen con derivados: (modelo, campo, campo JSON de derivados)
+IMAGENES = [
+    ('empresas.Empresa', 'logo', 'logo_derivados'),
+    ('core.Usuario', 'avatar', 'avatar_derivados'),
+]
+
+TAMANOS_DEFAULT = {'miniatura': 64, 'pequena': 160, 'mediana': 480}
+
+
+class ImagenInvalida(Exception):
+    """El archivo no es una imagen que Pillow pueda abrir: no tiene sentido reintentar"""
+
+
+def tamanos():
+    return getattr(settings, 'IMAGENES_DERIVADAS_TAMANOS', TAMANOS_DEFAULT)
+
+
+def campos_de(modelo):
+    """(campo, campo de derivados) del modelo (los proxies usan los del modelo concreto)"""
+    etiqueta_modelo = modelo._meta.concrete_model._meta.label
+    return [(campo, derivados) for etiqueta, campo, derivados in IMAGENES if etiqueta == etiqueta_modelo]
+
+
+def ruta_derivado(origen, variante, formato):
+    return f'derivados/{os.path.splitext(origen)[0]}/{variante}.{formato}'
+
+
+def encolar_derivados(instancia, campo):
+    """Encolar la generación de derivados (una sola pendiente por imagen)"""
+    modelo = instancia._meta.concrete_model._meta.label
+    pendiente = TrabajoImagen.objects.filter(
+        modelo=modelo, objeto_id=instancia.pk, campo=campo, estado='pendiente'
+    ).exists()
+    if not pendiente:
+        TrabajoImagen.objects.create(modelo=modelo, objeto_id=instancia.pk, campo=campo)
+
+
+def necesita_derivados(instancia, campo, campo_derivados):
+    """La imagen cambió desde que se generaron sus derivados (o se quitó y quedan derivados)"""
+    nombre = getattr(instancia, campo).name or ''
+    derivados = getattr(instancia, campo_derivados) or {}
+    return nombre != derivados.get('origen', '')
+
+
+def encolar_si_cambio(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Receiver post_save: encolar los derivados de las imágenes que cambiaron"""
+    if raw:
+        return
+    for campo, campo_derivados in campos_de(sender):
+        if update_fields is not None and campo not in update_fields:
+            continue
+        if necesita_derivados(instance, campo, campo_derivados):
+            try:
+                encolar_derivados(instance, campo)
+            except Exception as e:
+                # Los derivados se pueden regenerar con generar_derivados_imagenes
+                logger.warning(f"⚠️ No se pudieron encolar los derivados de {sender.__name__} {instance.pk}: {str(e)}")
+
+
+def generar_derivados(storage, origen):
+    """
+    Generar los derivados de la imagen `origen` y devolver el dict que se guarda
+    en <campo>_derivados: {'origen': ..., '<tamaño>': {'webp': ruta, 'jpeg'|'png': ruta}}.
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        with storage.open(origen, 'rb') as archivo:
+            imagen = Image.open(archivo)
+            imagen.load()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        raise ImagenInvalida(f'No se pudo abrir la imagen {origen}: {str(e)}')
+
+    imagen = ImageOps.exif_transpose(imagen)
+    transparente = imagen.mode in ('RGBA', 'LA', 'PA') or (imagen.mode == 'P' and 'transparency' in imagen.info)
+    imagen = imagen.convert('RGBA' if transparente else 'RGB')
+    formato_alternativo = 'png' if transparente else 'jpeg'
+
+    derivados = {'origen': origen}
+    for variante, lado in tamanos().items():
+        copia = imagen.copy()
+        # thumbnail no agranda: una imagen chica queda con su tamaño
+        copia.thumbnail((lado, lado), Image.Resampling.LANCZOS)
+        derivados[variante] = {}
+        for formato, opciones in (('webp', {'quality': 80, 'method': 6}),
+                                  (formato_alternativo, {'optimize': True, **({'quality': 85} if formato_alternativo == 'jpeg' else {})})):
+            buffer = BytesIO()
+            copia.save(buffer, format=formato.upper(), **opciones)
+            ruta = ruta_derivado(origen, variante, formato)
+            if storage.exists(ruta):
+                storage.delete(ruta)
+            derivados[variante][formato] = storage.save(ruta, ContentFile(buffer.getvalue()))
+    return derivados
+
+
+def _eliminar_derivados(storage, derivados, conservar=()):
+    for variante, formatos in derivados.items():
+        if variante == 'origen':
+            continue
+        for ruta in formatos.values():
+            if ruta not in conservar and storage.exists(ruta):
+                storage.delete(ruta)
+
+
+def procesar_trabajo(trabajo):
+    """Generar (o quitar) los derivados de la imagen del trabajo y guardarlos en el modelo"""
+    modelo = apps.get_model(trabajo.modelo)
+    campo_derivados = dict(campos_de(modelo))[trabajo.campo]
+    instancia = modelo._base_manager.filter(pk=trabajo.objeto_id).first()
+    if instancia is not None:
+        archivo = getattr(instancia, trabajo.campo)
+        anteriores = getattr(instancia, campo_derivados) or {}
+        if archivo.name:
+            derivados = generar_derivados(archivo.storage, archivo.name)
+        else:
+            derivados = {}
+        # Si la imagen volvió a cambiar mientras tanto no se pisa: el trabajo nuevo guardará la suya.
+        # update() no dispara post_save, así que no se encola otro trabajo
+        if archivo.name:
+            misma_imagen = Q(**{trabajo.campo: archivo.name})
+        else:
+            misma_imagen = Q(**{trabajo.campo: ''}) | Q(**{f'{trabajo.campo}__isnull': True})
+        actualizada = modelo._base_manager.filter(misma_imagen, pk=instancia.pk).update(**{campo_derivados: derivados})
+        if actualizada and anteriores.get('origen') != derivados.get('origen'):
+            conservar = {ruta for variante, formatos in derivados.items() if variante != 'origen' for ruta in formatos.values()}
+            _eliminar_derivados(archivo.storage, anteriores, conservar)
+
+    trabajo.estado = 'completado'
+    trabajo.error = None
+    trabajo.fecha_fin = timezone.now()
+    trabajo.save(update_fields=['estado', 'error', 'fecha_fin'])
+    return trabajo
+
+
+def reclamar_trabajos(cantidad):
+    """
+    Tomar hasta `cantidad` trabajos pendientes (los más antiguos) y marcarlos
+    'procesando'. skip_locked permite correr varios workers.
+    """
+    ahora = timezone.now()
+    with transaction.atomic():
+        trabajos = list(
+            TrabajoImagen.objects.select_for_update(skip_locked=True)
+            .filter(estado='pendiente')
+            .order_by('fecha_creacion')[:cantidad]
+        )
+        if not trabajos:
+            return []
+        TrabajoImagen.objects.filter(pk__in=[trabajo.pk for trabajo in trabajos]).update(
+            estado='procesando', intentos=F('intentos') + 1, fecha_intento=ahora
+        )
+    for trabajo in trabajos:
+        trabajo.estado = 'procesando'
+        trabajo.intentos += 1
+        trabajo.fecha_intento = ahora
+    return trabajos
+
+
+def ejecutar_trabajo(trabajo):
+    """Procesar un trabajo reclamado registrando el error (se reintenta hasta IMAGENES_MAX_INTENTOS)"""
+    try:
+        return procesar_trabajo(trabajo)
+    except Exception as e:
+        definitivo = isinstance(e, ImagenInvalida) or trabajo.intentos >= getattr(settings, 'IMAGENES_MAX_INTENTOS', 3)
+        trabajo.estado = 'error' if definitivo else 'pendiente'
+        trabajo.error = str(e)
+        trabajo.fecha_fin = timezone.now() if definitivo else None
+        trabajo.save(update_fields=['estado', 'error', 'fecha_fin'])
+        logger.error(f"❌ Derivados de {trabajo}: {str(e)}", exc_info=not isinstance(e, ImagenInvalida))
+        return trabajo
+
+
+def liberar_trabajos_abandonados():
+    """Devolver a 'pendiente' los trabajos que quedaron 'procesando' por un worker caído"""
+    limite = timezone.now() - timedelta(minutes=getattr(settings, 'IMAGENES_TIMEOUT_MINUTOS', 10))
+    return TrabajoImagen.objects.filter(estado='procesando', fecha_intento__lt=limite).update(estado='pendiente')
+
+
+def purgar_trabajos_finalizados():
+    """Eliminar los trabajos finalizados hace más de IMAGENES_RETENCION_DIAS"""
+    limite = timezone.now() - timedelta(days=getattr(settings, 'IMAGENES_RETENCION_DIAS', 7))
+    eliminados, _ = TrabajoImagen.objects.filter(estado__in=['completado', 'error'], fecha_fin__lt=limite).delete()
+    return eliminados
+
+
+def urls_derivados(derivados, storage, request=None):
+    """{'<tamaño>': {'webp': url, ...}} a partir del dict guardado en <campo>_derivados"""
+    urls = {}
+    for variante, formatos in (derivados or {}).items():
+        if variante == 'origen':
+            continue
+        urls[variante] = {}
+        for formato, ruta in formatos.items():
+            url = storage.url(ruta)
+            urls[variante][formato] = request.build_absolute_uri(url) if request is not None else url
+    return urls
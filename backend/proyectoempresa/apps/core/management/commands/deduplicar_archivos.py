@@ -0,0 +1,86 @@
+import hashlib
+import os
+from collections import defaultdict
+from functools import partial
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+
+from apps.core.almacenamiento import (
+    CAMPOS_DEDUPLICADOS, PREFIJO, TAMANO_BLOQUE, deduplicar_archivo, referencias_en_uso
+)
+from apps.core.models import ArchivoContenido
+
+
+class Command(BaseCommand):
+    help = (
+        'Migra los archivos existentes de los campos deduplicados (catálogos, documentos, brochures y '
+        'certificaciones) a la ruta por contenido: cada contenido repetido queda una sola vez en disco'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo informar cuántos archivos repetidos hay y cuánto espacio se liberaría',
+        )
+
+    def _sha256(self, ruta):
+        digest = hashlib.sha256()
+        with open(ruta, 'rb') as archivo:
+            for bloque in iter(lambda: archivo.read(TAMANO_BLOQUE), b''):
+                digest.update(bloque)
+        return digest.hexdigest()
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        # Nombre anterior -> nombre por contenido (varias filas pueden compartir el mismo archivo)
+        migrados = {}
+        vistos = defaultdict(list)
+        filas = 0
+        faltantes = 0
+        liberados = 0
+
+        for etiqueta, campo in CAMPOS_DEDUPLICADOS:
+            modelo = apps.get_model(etiqueta)
+            storage = modelo._meta.get_field(campo).storage
+            pendientes = (
+                modelo._base_manager.exclude(Q(**{f'{campo}__isnull': True}) | Q(**{campo: ''}))
+                .exclude(**{f'{campo}__startswith': f'{PREFIJO}/'})
+                .values_list('pk', campo)
+            )
+            for pk, nombre in pendientes.iterator():
+                if nombre not in migrados and not storage.exists(nombre):
+                    faltantes += 1
+                    self.stdout.write(self.style.WARNING(f'⚠️ {etiqueta}.{campo} {pk}: no existe {nombre}'))
+                    continue
+
+                if dry_run:
+                    if nombre not in migrados:
+                        sha256 = self._sha256(storage.path(nombre))
+                        if vistos[sha256]:
+                            liberados += os.path.getsize(storage.path(nombre))
+                        vistos[sha256].append(nombre)
+                        migrados[nombre] = sha256
+                    filas += 1
+                    continue
+
+                # La fila, su referencia y el borrado del original se confirman juntos:
+                # si algo falla la fila sigue apuntando a un archivo que existe
+                with transaction.atomic():
+                    if nombre not in migrados:
+                        migrados[nombre], bytes_liberados = deduplicar_archivo(storage, nombre)
+                        liberados += bytes_liberados
+                    modelo._base_manager.filter(pk=pk).update(**{campo: migrados[nombre]})
+                    ArchivoContenido.objects.filter(nombre=migrados[nombre]).update(referencias=F('referencias') + 1)
+                    if not referencias_en_uso(nombre):
+                        transaction.on_commit(partial(storage.delete, nombre))
+                filas += 1
+
+        accion = 'Se liberarían' if dry_run else 'Liberados'
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {filas} referencias a {len(migrados)} archivos; {accion} {liberados / (1024 * 1024):.1f} MB'
+            + (f' ({faltantes} archivos no encontrados)' if faltantes else '')
+        ))
@@ -0,0 +1,44 @@
+from django.apps import apps
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from apps.core.imagenes import IMAGENES, encolar_derivados, necesita_derivados
+
+
+class Command(BaseCommand):
+    help = (
+        'Encola la generación de miniaturas y WebP de los logos y avatares existentes '
+        'que todavía no los tienen (o cuya imagen cambió)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--forzar',
+            action='store_true',
+            help='Regenerar también las imágenes que ya tienen derivados (por ejemplo, al cambiar los tamaños)',
+        )
+        parser.add_argument(
+            '--procesar',
+            action='store_true',
+            help='Procesar la cola en este mismo proceso en lugar de esperar al worker procesar_imagenes',
+        )
+
+    def handle(self, *args, **options):
+        forzar = options['forzar']
+        encolados = 0
+
+        for etiqueta, campo, campo_derivados in IMAGENES:
+            modelo = apps.get_model(etiqueta)
+            con_imagen = modelo._base_manager.exclude(Q(**{f'{campo}__isnull': True}) | Q(**{campo: ''}))
+            cantidad = 0
+            for instancia in con_imagen.only('pk', campo, campo_derivados).iterator():
+                if forzar or necesita_derivados(instancia, campo, campo_derivados):
+                    encolar_derivados(instancia, campo)
+                    cantidad += 1
+            self.stdout.write(f'{etiqueta}.{campo}: {cantidad} imágenes encoladas')
+            encolados += cantidad
+
+        self.stdout.write(self.style.SUCCESS(f'✅ {encolados} imágenes encoladas'))
+        if options['procesar'] and encolados:
+            call_command('procesar_imagenes', una_vez=True, stdout=self.stdout)
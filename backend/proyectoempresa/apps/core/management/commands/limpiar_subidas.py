@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.core.subidas import limpiar_subidas_abandonadas
+
+
+class Command(BaseCommand):
+    help = (
+        'Elimina las subidas en partes sin actividad por más de SUBIDAS_RETENCION_HORAS '
+        'y sus archivos temporales (programar con cron)'
+    )
+
+    def handle(self, *args, **options):
+        eliminadas = limpiar_subidas_abandonadas()
+        self.stdout.write(self.style.SUCCESS(f'🧹 Subidas abandonadas eliminadas: {eliminadas}'))
@@ -0,0 +1,70 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.core.imagenes import (
+    reclamar_trabajos,
+    ejecutar_trabajo,
+    liberar_trabajos_abandonados,
+    purgar_trabajos_finalizados,
+)
+
+
+class Command(BaseCommand):
+    help = 'Worker que genera las miniaturas y WebP de logos y avatares en segundo plano'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=5.0,
+            help='Segundos de espera cuando no hay imágenes pendientes (default: 5)',
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=20,
+            help='Trabajos que se reclaman por vez (default: 20)',
+        )
+        parser.add_argument(
+            '--una-vez',
+            action='store_true',
+            help='Procesar las imágenes pendientes y terminar',
+        )
+
+    def handle(self, *args, **options):
+        intervalo = options['intervalo']
+        lote = max(1, options['lote'])
+        una_vez = options['una_vez']
+
+        self.stdout.write(self.style.SUCCESS('🖼️ Worker de imágenes derivadas iniciado'))
+
+        while True:
+            abandonados = liberar_trabajos_abandonados()
+            if abandonados:
+                self.stdout.write(self.style.WARNING(f'⚠️ {abandonados} trabajos abandonados vuelven a la cola'))
+
+            purgados = purgar_trabajos_finalizados()
+            if purgados:
+                self.stdout.write(f'🗑️ {purgados} trabajos finalizados eliminados')
+
+            procesados = 0
+            errores = 0
+            while True:
+                trabajos = reclamar_trabajos(lote)
+                if not trabajos:
+                    break
+                for trabajo in trabajos:
+                    trabajo = ejecutar_trabajo(trabajo)
+                    if trabajo.estado == 'completado':
+                        procesados += 1
+                    else:
+                        errores += 1
+                        self.stdout.write(self.style.ERROR(f'❌ {trabajo}: {trabajo.error}'))
+
+            if procesados or una_vez:
+                self.stdout.write(self.style.SUCCESS(f'✅ Imágenes procesadas: {procesados} (errores: {errores})'))
+            if una_vez:
+                return
+
+            time.sleep(intervalo)
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.1 on 2026-10-19 18:00
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_usuario_token_recuperacion_password'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubidaArchivo',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('destino', models.CharField(choices=[('solicitud_catalogo', 'Catálogo PDF de Solicitud'), ('documento_solicitud', 'Documento de Solicitud'), ('empresa_brochure', 'Brochure de Empresa'), ('empresa_certificaciones', 'Archivo de Certificaciones de Empresa')], max_length=30, verbose_name='Destino')),
+                ('objeto_id', models.PositiveIntegerField(verbose_name='ID del Objeto Destino')),
+                ('parametros', models.JSONField(blank=True, default=dict, help_text='Datos extra del destino (tipo de documento, descripción)', verbose_name='Parámetros')),
+                ('nombre_archivo', models.CharField(max_length=255, verbose_name='Nombre del Archivo')),
+                ('tamano', models.PositiveBigIntegerField(verbose_name='Tamaño (bytes)')),
+                ('sha256', models.CharField(max_length=64, verbose_name='SHA-256 Esperado')),
+                ('recibido', models.PositiveBigIntegerField(default=0, verbose_name='Bytes Recibidos')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('completada', 'Completada'), ('cancelada', 'Cancelada')], default='pendiente', max_length=20, verbose_name='Estado')),
+                ('archivo', models.CharField(blank=True, max_length=255, null=True, verbose_name='Archivo Guardado')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True, verbose_name='Fecha de Actualización')),
+                ('fecha_completada', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de Finalización')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subidas_archivo', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Subida de Archivo',
+                'verbose_name_plural': 'Subidas de Archivos',
+                'db_table': 'subida_archivo',
+                'ordering': ['-fecha_creacion'],
+                'indexes': [models.Index(fields=['estado', 'fecha_actualizacion'], name='subida_arch_estado_ce50fb_idx')],
+            },
+        ),
+    ]
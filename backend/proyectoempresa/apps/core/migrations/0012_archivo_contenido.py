@@ -0,0 +1,30 @@
+# Generated by Django 5.2.1 on 2026-10-19 18:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_subida_archivo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivoContenido',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True, verbose_name='SHA-256')),
+                ('nombre', models.CharField(max_length=255, unique=True, verbose_name='Ruta en el Storage')),
+                ('tamano', models.PositiveBigIntegerField(default=0, verbose_name='Tamaño (bytes)')),
+                ('referencias', models.PositiveIntegerField(default=0, verbose_name='Referencias')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+            ],
+            options={
+                'verbose_name': 'Archivo por Contenido',
+                'verbose_name_plural': 'Archivos por Contenido',
+                'db_table': 'archivo_contenido',
+                'ordering': ['-fecha_creacion'],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.1 on 2026-10-19 18:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_archivo_contenido'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usuario',
+            name='avatar_derivados',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Miniaturas y WebP generados por el worker procesar_imagenes', verbose_name='Derivados del Avatar'),
+        ),
+        migrations.CreateModel(
+            name='TrabajoImagen',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(max_length=50, verbose_name='Modelo')),
+                ('objeto_id', models.PositiveIntegerField(verbose_name='ID del Objeto')),
+                ('campo', models.CharField(max_length=50, verbose_name='Campo de Imagen')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('completado', 'Completado'), ('error', 'Error')], default='pendiente', max_length=20, verbose_name='Estado')),
+                ('intentos', models.PositiveSmallIntegerField(default=0, verbose_name='Intentos')),
+                ('error', models.TextField(blank=True, null=True, verbose_name='Error')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('fecha_intento', models.DateTimeField(blank=True, null=True, verbose_name='Fecha del Último Intento')),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de Finalización')),
+            ],
+            options={
+                'verbose_name': 'Trabajo de Imagen',
+                'verbose_name_plural': 'Trabajos de Imágenes',
+                'db_table': 'trabajo_imagen',
+                'ordering': ['fecha_creacion'],
+                'indexes': [models.Index(fields=['estado', 'fecha_creacion'], name='trabajo_ima_estado_954143_idx'), models.Index(fields=['modelo', 'objeto_id', 'campo'], name='trabajo_ima_modelo_e5d983_idx')],
+            },
+        ),
+    ]
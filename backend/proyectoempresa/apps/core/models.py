@@ -2,6 +2,7 @@ from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 from django.utils import timezone
 from django.core.validators import RegexValidator
+import uuid
 
 class TimestampedModel(models.Model):
     """
@@ -183,6 +184,13 @@ class Usuario(AbstractBaseUser, PermissionsMixin):
         null=True, 
         verbose_name="Avatar"
     )
+    avatar_derivados = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name="Derivados del Avatar",
+        help_text="Miniaturas y WebP generados por el worker procesar_imagenes"
+    )
     
     # Campos adicionales importantes
     fecha_nacimiento = models.DateField(blank=True, null=True, verbose_name="Fecha de Nacimiento")
@@ -487,4 +495,118 @@ class ConfiguracionSistema(TimestampedModel):
     def save(self, *args, **kwargs):
         """Asegurar que solo exista una instancia"""
         self.pk = 1
-        super().save(*args, **kwargs)
\ No newline at end of file
+        super().save(*args, **kwargs)
+
+class SubidaArchivo(models.Model):
+    """
+    Subida de un archivo grande en partes (ver apps/core/subidas.py).
+    Las partes se escriben en un archivo temporal; al completarse se verifica el
+    SHA-256 y el archivo se asigna al campo del modelo destino.
+    """
+    DESTINO_CHOICES = [
+        ('solicitud_catalogo', 'Catálogo PDF de Solicitud'),
+        ('documento_solicitud', 'Documento de Solicitud'),
+        ('empresa_brochure', 'Brochure de Empresa'),
+        ('empresa_certificaciones', 'Archivo de Certificaciones de Empresa'),
+    ]
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('completada', 'Completada'),
+        ('cancelada', 'Cancelada'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    usuario = models.ForeignKey(
+        'core.Usuario',
+        on_delete=models.CASCADE,
+        related_name='subidas_archivo',
+        verbose_name="Usuario"
+    )
+    destino = models.CharField(max_length=30, choices=DESTINO_CHOICES, verbose_name="Destino")
+    objeto_id = models.PositiveIntegerField(verbose_name="ID del Objeto Destino")
+    parametros = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name="Parámetros",
+        help_text="Datos extra del destino (tipo de documento, descripción)"
+    )
+    nombre_archivo = models.CharField(max_length=255, verbose_name="Nombre del Archivo")
+    tamano = models.PositiveBigIntegerField(verbose_name="Tamaño (bytes)")
+    sha256 = models.CharField(max_length=64, verbose_name="SHA-256 Esperado")
+    recibido = models.PositiveBigIntegerField(default=0, verbose_name="Bytes Recibidos")
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='pendiente', verbose_name="Estado")
+    archivo = models.CharField(max_length=255, blank=True, null=True, verbose_name="Archivo Guardado")
+    fecha_creacion = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Creación")
+    fecha_actualizacion = models.DateTimeField(auto_now=True, verbose_name="Fecha de Actualización")
+    fecha_completada = models.DateTimeField(blank=True, null=True, verbose_name="Fecha de Finalización")
+
+    class Meta:
+        db_table = 'subida_archivo'
+        verbose_name = 'Subida de Archivo'
+        verbose_name_plural = 'Subidas de Archivos'
+        ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['estado', 'fecha_actualizacion']),
+        ]
+
+    def __str__(self):
+        return f"{self.nombre_archivo} ({self.get_destino_display()}) - {self.get_estado_display()}"
+
+
+class ArchivoContenido(models.Model):
+    """
+    Archivo guardado una sola vez según su contenido (ver apps/core/almacenamiento.py).
+    `referencias` cuenta los campos de archivo que lo usan: el archivo se borra
+    del disco recién cuando se elimina la última referencia.
+    """
+    sha256 = models.CharField(max_length=64, unique=True, verbose_name="SHA-256")
+    nombre = models.CharField(max_length=255, unique=True, verbose_name="Ruta en el Storage")
+    tamano = models.PositiveBigIntegerField(default=0, verbose_name="Tamaño (bytes)")
+    referencias = models.PositiveIntegerField(default=0, verbose_name="Referencias")
+    fecha_creacion = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Creación")
+
+    class Meta:
+        db_table = 'archivo_contenido'
+        verbose_name = 'Archivo por Contenido'
+        verbose_name_plural = 'Archivos por Contenido'
+        ordering = ['-fecha_creacion']
+
+    def __str__(self):
+        return f"{self.nombre} ({self.referencias} referencias)"
+
+
+class TrabajoImagen(models.Model):
+    """
+    Generación pendiente de las miniaturas y WebP de una imagen subida (logo de
+    empresa, avatar de usuario). La encolan los signals al cambiar la imagen y
+    la procesa el comando procesar_imagenes (ver apps/core/imagenes.py).
+    """
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('procesando', 'Procesando'),
+        ('completado', 'Completado'),
+        ('error', 'Error'),
+    ]
+
+    modelo = models.CharField(max_length=50, verbose_name="Modelo")
+    objeto_id = models.PositiveIntegerField(verbose_name="ID del Objeto")
+    campo = models.CharField(max_length=50, verbose_name="Campo de Imagen")
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='pendiente', verbose_name="Estado")
+    intentos = models.PositiveSmallIntegerField(default=0, verbose_name="Intentos")
+    error = models.TextField(blank=True, null=True, verbose_name="Error")
+    fecha_creacion = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Creación")
+    fecha_intento = models.DateTimeField(blank=True, null=True, verbose_name="Fecha del Último Intento")
+    fecha_fin = models.DateTimeField(blank=True, null=True, verbose_name="Fecha de Finalización")
+
+    class Meta:
+        db_table = 'trabajo_imagen'
+        verbose_name = 'Trabajo de Imagen'
+        verbose_name_plural = 'Trabajos de Imágenes'
+        ordering = ['fecha_creacion']
+        indexes = [
+            models.Index(fields=['estado', 'fecha_creacion']),
+            models.Index(fields=['modelo', 'objeto_id', 'campo']),
+        ]
+
+    def __str__(self):
+        return f"{self.modelo} {self.objeto_id}.{self.campo} - {self.get_estado_display()}"
@@ -65,6 +65,24 @@ class CanViewAuditoria(permissions.BasePermission):
         return request.user.rol.puede_ver_auditoria
 
 
+class CanImportData(permissions.BasePermission):
+    """
+    Permiso para importaciones masivas de datos
+    """
+    
+    def has_permission(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            return False
+        
+        if request.user.is_superuser:
+            return True
+        
+        if not request.user.rol:
+            return False
+        
+        return request.user.rol.puede_importar_datos
+
+
 class CanManageUsers(permissions.BasePermission):
     """
     Permiso para gestionar usuarios
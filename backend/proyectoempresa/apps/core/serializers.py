@@ -1,13 +1,36 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
-from .models import RolUsuario, ConfiguracionSistema
+from .models import RolUsuario, ConfiguracionSistema, SubidaArchivo
 from apps.geografia.models import Departamento, Municipio, Localidad
 
 
 User = get_user_model()
 
 
+class DerivadosImagenField(serializers.Field):
+    """
+    URLs de las miniaturas y WebP de un campo de imagen (ver apps/core/imagenes.py):
+    {'miniatura': {'webp': url, 'jpeg': url}, ...}. Mientras el worker no generó
+    los derivados de la imagen actual devuelve {} y el cliente usa la original.
+    """
+
+    def __init__(self, campo, **kwargs):
+        self.campo = campo
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, instancia):
+        from .imagenes import urls_derivados
+
+        archivo = getattr(instancia, self.campo)
+        derivados = getattr(instancia, f'{self.campo}_derivados', None) or {}
+        if not archivo.name or derivados.get('origen') != archivo.name:
+            return {}
+        return urls_derivados(derivados, archivo.storage, self.context.get('request'))
+
+
 class RolUsuarioSerializer(serializers.ModelSerializer):
     """Serializer para roles de usuario"""
     
@@ -188,13 +211,14 @@ class UsuarioSerializer(serializers.ModelSerializer):
     rol_detalle = RolUsuarioSerializer(source='rol', read_only=True)
     password = serializers.CharField(write_only=True, required=False)
     empresa = serializers.SerializerMethodField()
+    avatar_urls = DerivadosImagenField('avatar')
     
     class Meta:
         model = User
         fields = [
             'id', 'email', 'nombre', 'apellido', 'rol', 'rol_detalle',
             'is_active', 'is_staff', 'is_superuser', 'date_joined',
-            'last_login', 'telefono', 'avatar', 'fecha_nacimiento',
+            'last_login', 'telefono', 'avatar', 'avatar_urls', 'fecha_nacimiento',
             'genero', 'tipo_documento', 'numero_documento',
             'departamento', 'municipio', 'localidad', 'password',
             'debe_cambiar_password', 'empresa'
@@ -350,3 +374,33 @@ class ConfiguracionSistemaSerializer(serializers.ModelSerializer):
             'creado_por', 'actualizado_por'
         ]
         read_only_fields = ['id', 'fecha_creacion', 'fecha_actualizacion', 'creado_por', 'actualizado_por']
+
+
+class SubidaArchivoSerializer(serializers.ModelSerializer):
+    """Estado de una subida en partes"""
+    tamano_parte = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = SubidaArchivo
+        fields = [
+            'id', 'destino', 'objeto_id', 'parametros', 'nombre_archivo', 'tamano', 'sha256',
+            'recibido', 'estado', 'archivo', 'tamano_parte',
+            'fecha_creacion', 'fecha_actualizacion', 'fecha_completada'
+        ]
+        read_only_fields = fields
+    
+    def get_tamano_parte(self, obj):
+        """Tamaño máximo de cada parte"""
+        from django.conf import settings
+        return getattr(settings, 'SUBIDAS_TAMANO_PARTE_MAX', 10 * 1024 * 1024)
+
+
+class SubidaArchivoCreateSerializer(serializers.Serializer):
+    """Datos para iniciar una subida en partes"""
+    destino = serializers.ChoiceField(choices=SubidaArchivo.DESTINO_CHOICES)
+    objeto_id = serializers.IntegerField(min_value=1)
+    nombre_archivo = serializers.CharField(max_length=255)
+    tamano = serializers.IntegerField(min_value=1)
+    sha256 = serializers.RegexField(r'^[0-9a-fA-F]{64}$', error_messages={'invalid': 'Debe ser un SHA-256 en hexadecimal'})
+    tipo_documento = serializers.CharField(max_length=20, required=False)
+    descripcion = serializers.CharField(required=False, allow_blank=True)
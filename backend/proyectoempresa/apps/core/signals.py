@@ -2,11 +2,8 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
-# Acá van tus signals cuando los necesites
-# Por ahora dejalo vacío o con un comentario
+from .imagenes import encolar_si_cambio
+from .models import Usuario
 
-# Ejemplo de signal (comentado por ahora):
-# @receiver(post_save, sender=TuModelo)
-# def log_cambio(sender, instance, created, **kwargs):
-#     # Lógica de auditoría
-#     pass
\ No newline at end of file
+# Miniaturas y WebP del avatar (worker procesar_imagenes)
+post_save.connect(encolar_si_cambio, sender=Usuario, dispatch_uid='imagenes_derivadas_Usuario')
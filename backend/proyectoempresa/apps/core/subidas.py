@@ -0,0 +1,273 @@
+"""
+Subidas de archivos en partes, reanudables.
+
+Los catálogos PDF, documentos de solicitudes, brochures y certificaciones se
+subían en un único multipart que Django guarda completo antes de procesarlo:
+en conexiones lentas un corte obligaba a empezar de cero. Ahora el cliente:
+
+1. Inicia la subida (destino, objeto, nombre, tamaño y SHA-256 esperado).
+2. Envía las partes en orden (PUT con Content-Range); cada una se escribe en el
+   archivo temporal a medida que llega, sin quedar en memoria. Tras un corte
+   consulta `recibido` y sigue desde ahí.
+3. Completa la subida: se verifica el SHA-256 leyendo el archivo por bloques y
+   se asigna al campo del modelo destino moviendo el archivo temporal (no se
+   vuelve a copiar ni a cargar en memoria).
+
+Las subidas sin actividad por más de SUBIDAS_RETENCION_HORAS se eliminan con
+el comando limpiar_subidas.
+"""
+import hashlib
+import logging
+import os
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from .models import SubidaArchivo
+
+logger = logging.getLogger(__name__)
+
+TAMANO_BLOQUE = 64 * 1024
+
+# Modelo, campo de archivo, campo del propietario, permiso del rol y extensiones de cada destino.
+# Sin permiso (None) solo suben el propietario y los administradores, como IsOwnerOrAdmin:
+# todos los usuarios con rol Empresa tienen puede_editar_empresas para su propia empresa
+DESTINOS = {
+    'solicitud_catalogo': {
+        'modelo': 'registro.SolicitudRegistro', 'campo': 'catalogo_pdf', 'propietario': 'usuario_creado_id',
+        'permiso': 'puede_gestionar_usuarios', 'extensiones': ('.pdf',),
+    },
+    'documento_solicitud': {
+        'modelo': 'registro.SolicitudRegistro', 'campo': None, 'propietario': 'usuario_creado_id',
+        'permiso': 'puede_gestionar_usuarios', 'extensiones': ('.pdf', '.jpg', '.jpeg', '.png', '.doc', '.docx'),
+    },
+    'empresa_brochure': {
+        'modelo': 'empresas.Empresa', 'campo': 'brochure', 'propietario': 'id_usuario_id',
+        'permiso': None, 'extensiones': ('.pdf', '.jpg', '.jpeg', '.png'),
+    },
+    'empresa_certificaciones': {
+        'modelo': 'empresas.Empresa', 'campo': 'archivo_certificaciones', 'propietario': 'id_usuario_id',
+        'permiso': None, 'extensiones': ('.pdf', '.jpg', '.jpeg', '.png'),
+    },
+}
+
+
+class SubidaInvalida(Exception):
+    """Error del cliente al iniciar, enviar o completar una subida"""
+
+    def __init__(self, mensaje, conflicto=False):
+        super().__init__(mensaje)
+        # Un conflicto (409) indica que el cliente debe retomar desde `recibido`
+        self.conflicto = conflicto
+
+
+class ArchivoEnsamblado(File):
+    """
+    Archivo temporal ya completo. Al exponer temporary_file_path, FileSystemStorage
+    lo mueve al destino en lugar de copiarlo por bloques.
+    """
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def directorio_subidas():
+    directorio = getattr(settings, 'SUBIDAS_DIRECTORIO', os.path.join(settings.MEDIA_ROOT, '.subidas'))
+    os.makedirs(directorio, exist_ok=True)
+    return directorio
+
+
+def ruta_temporal(subida):
+    return os.path.join(directorio_subidas(), f'{subida.id}.part')
+
+
+def obtener_destino(destino, objeto_id):
+    """Instancia del modelo destino de la subida (None si no existe)"""
+    modelo = apps.get_model(DESTINOS[destino]['modelo'])
+    return modelo._default_manager.filter(pk=objeto_id).first()
+
+
+def puede_subir(usuario, destino, objeto):
+    """El propietario del objeto, un administrador o un usuario con el permiso del rol para ese destino"""
+    if usuario.is_superuser or usuario.is_staff:
+        return True
+    configuracion = DESTINOS[destino]
+    if getattr(objeto, configuracion['propietario'], None) == usuario.id:
+        return True
+    if configuracion['permiso'] is None:
+        return False
+    return bool(usuario.rol and getattr(usuario.rol, configuracion['permiso'], False))
+
+
+def iniciar_subida(usuario, destino, objeto_id, nombre_archivo, tamano, sha256, parametros=None):
+    """Registrar una subida nueva y crear su archivo temporal vacío"""
+    if destino not in DESTINOS:
+        raise SubidaInvalida(f'Destino desconocido: {destino}')
+    extension = os.path.splitext(nombre_archivo)[1].lower()
+    if extension not in DESTINOS[destino]['extensiones']:
+        raise SubidaInvalida(
+            f"Extensión no permitida para {destino}: {extension or '(sin extensión)'}. "
+            f"Permitidas: {', '.join(DESTINOS[destino]['extensiones'])}"
+        )
+    maximo = getattr(settings, 'SUBIDAS_TAMANO_MAX', 100 * 1024 * 1024)
+    if tamano > maximo:
+        raise SubidaInvalida(f'El archivo supera el tamaño máximo de {maximo // (1024 * 1024)} MB')
+
+    objeto = obtener_destino(destino, objeto_id)
+    if objeto is None:
+        raise SubidaInvalida('El objeto destino no existe')
+    if not puede_subir(usuario, destino, objeto):
+        raise PermissionError('No tiene permisos para subir archivos a este destino')
+
+    subida = SubidaArchivo.objects.create(
+        usuario=usuario,
+        destino=destino,
+        objeto_id=objeto_id,
+        parametros=parametros or {},
+        nombre_archivo=os.path.basename(nombre_archivo),
+        tamano=tamano,
+        sha256=sha256.lower(),
+    )
+    open(ruta_temporal(subida), 'wb').close()
+    logger.info(f"📤 Subida {subida.id} iniciada: {subida.nombre_archivo} ({tamano} bytes) para {destino} {objeto_id}")
+    return subida
+
+
+def recibir_parte(subida, inicio, stream, longitud):
+    """
+    Escribir en el archivo temporal los `longitud` bytes de `stream` a partir de
+    `inicio`, leyendo por bloques. Devuelve los bytes recibidos en total.
+    La parte debe empezar donde terminó la anterior; reenviar una parte ya
+    recibida no la vuelve a escribir.
+    """
+    if subida.estado != 'pendiente':
+        raise SubidaInvalida(f'La subida está {subida.get_estado_display().lower()}')
+    maximo = getattr(settings, 'SUBIDAS_TAMANO_PARTE_MAX', 10 * 1024 * 1024)
+    if longitud <= 0 or longitud > maximo:
+        raise SubidaInvalida(f'Cada parte debe tener entre 1 byte y {maximo // (1024 * 1024)} MB')
+    if inicio + longitud > subida.tamano:
+        raise SubidaInvalida('La parte excede el tamaño declarado del archivo')
+    if inicio + longitud <= subida.recibido:
+        return subida.recibido
+    if inicio != subida.recibido:
+        raise SubidaInvalida(f'Se esperaba la parte que empieza en el byte {subida.recibido}', conflicto=True)
+
+    escritos = 0
+    with open(ruta_temporal(subida), 'r+b') as destino:
+        destino.seek(inicio)
+        while escritos < longitud:
+            bloque = stream.read(min(TAMANO_BLOQUE, longitud - escritos))
+            if not bloque:
+                break
+            destino.write(bloque)
+            escritos += len(bloque)
+        destino.truncate()
+
+    if escritos < longitud:
+        # Conexión cortada a mitad de la parte: el cliente la reenvía desde `recibido`
+        raise SubidaInvalida(f'Parte incompleta: se recibieron {escritos} de {longitud} bytes', conflicto=True)
+
+    # Solo avanza si otra petición no escribió esta misma parte mientras tanto
+    actualizada = SubidaArchivo.objects.filter(pk=subida.pk, recibido=inicio, estado='pendiente').update(
+        recibido=inicio + longitud, fecha_actualizacion=timezone.now()
+    )
+    subida.refresh_from_db()
+    if not actualizada and subida.recibido < inicio + longitud:
+        raise SubidaInvalida(f'Se esperaba la parte que empieza en el byte {subida.recibido}', conflicto=True)
+    return subida.recibido
+
+
+def sha256_archivo(ruta):
+    """SHA-256 de un archivo leído por bloques"""
+    digest = hashlib.sha256()
+    with open(ruta, 'rb') as archivo:
+        for bloque in iter(lambda: archivo.read(TAMANO_BLOQUE), b''):
+            digest.update(bloque)
+    return digest.hexdigest()
+
+
+def _asignar_archivo(subida, objeto, ruta):
+    """Guardar el archivo ensamblado en el campo destino; devuelve el nombre en el storage"""
+    configuracion = DESTINOS[subida.destino]
+    with open(ruta, 'rb') as temporal:
+        archivo = ArchivoEnsamblado(temporal, name=subida.nombre_archivo)
+        if subida.destino == 'documento_solicitud':
+            from apps.registro.models import DocumentoSolicitud
+            documento = DocumentoSolicitud(
+                solicitud=objeto,
+                tipo_documento=subida.parametros.get('tipo_documento', 'otro'),
+                nombre_archivo=subida.nombre_archivo,
+                descripcion=subida.parametros.get('descripcion'),
+            )
+            documento.archivo.save(subida.nombre_archivo, archivo, save=True)
+            return documento.archivo.name
+
+        campo = getattr(objeto, configuracion['campo'])
+        campo.save(subida.nombre_archivo, archivo, save=False)
+        campos = [configuracion['campo']]
+        if subida.destino == 'solicitud_catalogo':
+            objeto.catalogo_pdf_nombre = subida.nombre_archivo
+            campos.append('catalogo_pdf_nombre')
+        objeto.save(update_fields=campos)
+        return campo.name
+
+
+def completar_subida(subida):
+    """Verificar tamaño y SHA-256 y asignar el archivo al modelo destino"""
+    if subida.estado != 'pendiente':
+        raise SubidaInvalida(f'La subida está {subida.get_estado_display().lower()}')
+    if subida.recibido != subida.tamano:
+        raise SubidaInvalida(f'Faltan bytes: se recibieron {subida.recibido} de {subida.tamano}', conflicto=True)
+
+    ruta = ruta_temporal(subida)
+    if sha256_archivo(ruta) != subida.sha256:
+        # El contenido no sirve: se descarta y el cliente vuelve a enviarlo
+        open(ruta, 'wb').close()
+        SubidaArchivo.objects.filter(pk=subida.pk).update(recibido=0, fecha_actualizacion=timezone.now())
+        subida.recibido = 0
+        raise SubidaInvalida('El SHA-256 del archivo recibido no coincide; vuelva a enviarlo desde el inicio')
+
+    objeto = obtener_destino(subida.destino, subida.objeto_id)
+    if objeto is None:
+        raise SubidaInvalida('El objeto destino ya no existe')
+
+    with transaction.atomic():
+        subida.archivo = _asignar_archivo(subida, objeto, ruta)
+        subida.estado = 'completada'
+        subida.fecha_completada = timezone.now()
+        subida.save(update_fields=['archivo', 'estado', 'fecha_completada', 'fecha_actualizacion'])
+
+    # Con FileSystemStorage el temporal ya se movió; con otros storages queda una copia
+    if os.path.exists(ruta):
+        os.remove(ruta)
+    logger.info(f"✅ Subida {subida.id} completada: {subida.archivo}")
+    return subida
+
+
+def cancelar_subida(subida):
+    """Cancelar una subida pendiente y eliminar su archivo temporal"""
+    if subida.estado == 'pendiente':
+        subida.estado = 'cancelada'
+        subida.save(update_fields=['estado', 'fecha_actualizacion'])
+    ruta = ruta_temporal(subida)
+    if os.path.exists(ruta):
+        os.remove(ruta)
+
+
+def limpiar_subidas_abandonadas():
+    """
+    Eliminar las subidas sin actividad por más de SUBIDAS_RETENCION_HORAS y sus
+    archivos temporales. Devuelve la cantidad eliminada.
+    """
+    limite = timezone.now() - timedelta(hours=getattr(settings, 'SUBIDAS_RETENCION_HORAS', 24))
+    vencidas = list(SubidaArchivo.objects.filter(fecha_actualizacion__lt=limite))
+    for subida in vencidas:
+        ruta = ruta_temporal(subida)
+        if os.path.exists(ruta):
+            os.remove(ruta)
+    SubidaArchivo.objects.filter(pk__in=[subida.pk for subida in vencidas]).delete()
+    return len(vencidas)
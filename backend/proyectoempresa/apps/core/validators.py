@@ -1,13 +1,33 @@
 from django.core.exceptions import ValidationError
 import re
 
+PESOS_CUIT = (5, 4, 3, 2, 7, 6, 5, 4, 3, 2)
+
+
+def normalizar_cuit(value):
+    """CUIT/CUIL sin guiones, espacios, puntos ni otros separadores"""
+    return re.sub(r'\D', '', str(value or ''))
+
+
+def cuit_verificador_valido(cuit):
+    """Dígito verificador (módulo 11) de un CUIT/CUIL de 11 dígitos ya normalizado"""
+    if not re.match(r'^\d{11}$', cuit):
+        return False
+    resto = sum(int(digito) * peso for digito, peso in zip(cuit[:10], PESOS_CUIT)) % 11
+    verificador = 11 - resto
+    if verificador == 11:
+        verificador = 0
+    # Con resto 1 AFIP cambia el prefijo (20 -> 23) en lugar de usar 10 como verificador
+    return verificador != 10 and verificador == int(cuit[10])
+
+
 def validate_cuit(value):
     """Validar CUIT/CUIL argentino"""
     if not re.match(r'^\d{11}$', value):
         raise ValidationError('CUIT debe tener exactamente 11 dígitos')
-    
-    # Validar dígito verificador
-    # ... lógica de validación CUIT ...
+
+    if not cuit_verificador_valido(value):
+        raise ValidationError('El dígito verificador del CUIT/CUIL no es válido')
 
 def validate_telefono_argentino(value):
     """Validar teléfono argentino"""
@@ -2,16 +2,17 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from django.utils import timezone
 from django.conf import settings
 import uuid
 import logging
-from .models import RolUsuario, ConfiguracionSistema
+from .models import RolUsuario, ConfiguracionSistema, SubidaArchivo
 from apps.geografia.models import Departamento, Municipio, Localidad
 from .serializers import (
     RolUsuarioSerializer, UsuarioSerializer, UsuarioListSerializer,
     DptoSerializer, MunicipioSerializer, LocalidadesSerializer,
-    ConfiguracionSistemaSerializer
+    ConfiguracionSistemaSerializer, SubidaArchivoSerializer, SubidaArchivoCreateSerializer
 )
 from .permissions import CanManageUsers, IsOwnerOrAdmin
 
@@ -152,25 +153,13 @@ class UsuarioViewSet(viewsets.ModelViewSet):
         if user.rol and user.rol.nombre == 'Empresa' and user.debe_cambiar_password:
             user.debe_cambiar_password = False
         
-        user.save()
-        
-        # Enviar email de confirmación si es empresa y era el primer cambio
-        if es_primer_cambio:
-            try:
-                # Intentar obtener la empresa asociada
-                empresa = None
-                try:
-                    from apps.empresas.models import Empresa
-                    empresa = Empresa.objects.filter(id_usuario=user).first()
-                except Exception:
-                    pass
-                
-                from apps.registro.services import enviar_email_cambio_password
-                enviar_email_cambio_password(user, empresa)
-            except Exception as email_error:
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.warning(f"Error enviando email de cambio de password: {str(email_error)}")
+        with transaction.atomic():
+            user.save()
+            
+            # Email de confirmación si es empresa y era el primer cambio (lo envía procesar_emails)
+            if es_primer_cambio:
+                from apps.registro.bandeja_salida import encolar_email
+                encolar_email('cambio_password', usuario=user)
         
         # Serializar el usuario actualizado
         serializer = UsuarioSerializer(user)
@@ -241,22 +230,18 @@ class UsuarioViewSet(viewsets.ModelViewSet):
         # Token válido por 24 horas
         expira = timezone.now() + timezone.timedelta(hours=24)
         
-        # Guardar token en el usuario
-        user.token_recuperacion_password = token
-        user.token_recuperacion_expira = expira
-        user.save()
-        
-        # Enviar email con el token
+        # Guardar token en el usuario y encolar el email en la misma transacción
+        # (lo envía el worker procesar_emails, con reintentos)
         try:
-            from apps.registro.services import enviar_email_recuperacion_password
-            enviar_email_recuperacion_password(user, token)
-            logger.info(f"✅ Email de recuperación enviado a: {email}")
+            from apps.registro.bandeja_salida import encolar_email
+            with transaction.atomic():
+                user.token_recuperacion_password = token
+                user.token_recuperacion_expira = expira
+                user.save()
+                encolar_email('recuperacion_password', usuario=user, parametros={'token': token})
+            logger.info(f"📥 Email de recuperación encolado para: {email}")
         except Exception as e:
-            logger.error(f"❌ Error enviando email de recuperación: {str(e)}", exc_info=True)
-            # Limpiar el token si falla el email
-            user.token_recuperacion_password = None
-            user.token_recuperacion_expira = None
-            user.save()
+            logger.error(f"❌ Error encolando email de recuperación: {str(e)}", exc_info=True)
             return Response(
                 {'error': 'Error al enviar el email. Por favor, intenta nuevamente más tarde.'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -429,3 +414,99 @@ class ConfiguracionSistemaViewSet(viewsets.ModelViewSet):
         kwargs['partial'] = True
         return self.update(request, *args, **kwargs)
 
+
+class SubidaArchivoViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Subidas de archivos en partes, reanudables (ver apps/core/subidas.py).
+    POST inicia, PUT {id}/parte/ con Content-Range envía cada parte,
+    POST {id}/completar/ verifica el SHA-256 y asigna el archivo, DELETE cancela.
+    """
+    serializer_class = SubidaArchivoSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        queryset = SubidaArchivo.objects.all()
+        if not self.request.user.is_superuser:
+            queryset = queryset.filter(usuario=self.request.user)
+        return queryset
+    
+    def create(self, request, *args, **kwargs):
+        """Iniciar una subida: destino, objeto_id, nombre_archivo, tamano y sha256"""
+        from .subidas import iniciar_subida, SubidaInvalida
+        
+        datos = SubidaArchivoCreateSerializer(data=request.data)
+        datos.is_valid(raise_exception=True)
+        parametros = {
+            clave: datos.validated_data[clave]
+            for clave in ('tipo_documento', 'descripcion') if clave in datos.validated_data
+        }
+        try:
+            subida = iniciar_subida(
+                request.user,
+                datos.validated_data['destino'],
+                datos.validated_data['objeto_id'],
+                datos.validated_data['nombre_archivo'],
+                datos.validated_data['tamano'],
+                datos.validated_data['sha256'],
+                parametros=parametros,
+            )
+        except SubidaInvalida as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except PermissionError as e:
+            return Response({'error': str(e)}, status=status.HTTP_403_FORBIDDEN)
+        return Response(self.get_serializer(subida).data, status=status.HTTP_201_CREATED)
+    
+    def destroy(self, request, *args, **kwargs):
+        """Cancelar la subida y eliminar el archivo temporal"""
+        from .subidas import cancelar_subida
+        
+        cancelar_subida(self.get_object())
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    
+    @action(detail=True, methods=['put'])
+    def parte(self, request, pk=None):
+        """
+        Recibir una parte del archivo (cuerpo binario, application/octet-stream).
+        Content-Range: bytes {inicio}-{fin}/{total} indica su posición; sin él se
+        usa ?inicio=. Responde 409 con `recibido` si la parte no es la esperada.
+        """
+        import re
+        from .subidas import recibir_parte, SubidaInvalida
+        
+        subida = self.get_object()
+        rango = request.headers.get('Content-Range', '')
+        coincidencia = re.match(r'^bytes (\d+)-(\d+)/(\d+)$', rango.strip())
+        try:
+            longitud = int(request.META.get('CONTENT_LENGTH') or 0)
+            if coincidencia:
+                inicio, fin, total = (int(valor) for valor in coincidencia.groups())
+                if total != subida.tamano or fin - inicio + 1 != longitud:
+                    raise SubidaInvalida('Content-Range no coincide con la subida o con el tamaño de la parte')
+            else:
+                inicio = int(request.query_params.get('inicio', subida.recibido))
+            # Se lee directamente del stream del request: la parte no pasa por los parsers de DRF
+            recibido = recibir_parte(subida, inicio, request.stream, longitud)
+        except ValueError:
+            return Response({'error': 'Posición de la parte inválida'}, status=status.HTTP_400_BAD_REQUEST)
+        except SubidaInvalida as e:
+            subida.refresh_from_db()
+            return Response(
+                {'error': str(e), 'recibido': subida.recibido},
+                status=status.HTTP_409_CONFLICT if e.conflicto else status.HTTP_400_BAD_REQUEST
+            )
+        return Response({'recibido': recibido, 'tamano': subida.tamano})
+    
+    @action(detail=True, methods=['post'])
+    def completar(self, request, pk=None):
+        """Verificar el SHA-256 y asignar el archivo al modelo destino"""
+        from .subidas import completar_subida, SubidaInvalida
+        
+        subida = self.get_object()
+        try:
+            completar_subida(subida)
+        except SubidaInvalida as e:
+            return Response(
+                {'error': str(e), 'recibido': subida.recibido},
+                status=status.HTTP_409_CONFLICT if e.conflicto else status.HTTP_400_BAD_REQUEST
+            )
+        return Response(self.get_serializer(subida).data)
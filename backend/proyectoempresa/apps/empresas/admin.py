@@ -3,7 +3,8 @@ from django.utils.html import format_html
 from .models import (
     Rubro, UnidadMedida, Otrorubro, Empresaproducto, Empresaservicio, EmpresaMixta,
     ProductoEmpresa, ServicioEmpresa, PosicionArancelaria, MatrizClasificacionExportador,
-    ProductoEmpresaMixta, ServicioEmpresaMixta, PosicionArancelariaMixta, TipoEmpresa
+    ProductoEmpresaMixta, ServicioEmpresaMixta, PosicionArancelariaMixta, TipoEmpresa,
+    ExportacionPDF, PDFCache, CampanaNotificacion, DestinatarioCampana, ImportacionEmpresas
 )
 
 @admin.register(TipoEmpresa)
@@ -190,4 +191,43 @@ class MatrizClasificacionExportadorAdmin(admin.ModelAdmin):
     def get_empresa_nombre(self, obj):
         empresa = obj.get_empresa()
         return empresa.razon_social if empresa else "Sin empresa"
-    get_empresa_nombre.short_description = 'Empresa'
\ No newline at end of file
+    get_empresa_nombre.short_description = 'Empresa'
+
+@admin.register(ExportacionPDF)
+class ExportacionPDFAdmin(admin.ModelAdmin):
+    list_display = ['id', 'usuario', 'tipo', 'estado', 'progreso', 'fecha_creacion', 'fecha_fin']
+    list_filter = ['tipo', 'estado', 'fecha_creacion']
+    search_fields = ['usuario__email', 'nombre_archivo']
+    ordering = ['-fecha_creacion']
+    readonly_fields = ['fecha_creacion', 'fecha_inicio', 'fecha_fin']
+
+@admin.register(PDFCache)
+class PDFCacheAdmin(admin.ModelAdmin):
+    list_display = ['generador', 'nombre_archivo', 'tamano', 'accesos', 'ultimo_acceso', 'fecha_creacion']
+    list_filter = ['generador']
+    search_fields = ['clave', 'nombre_archivo']
+    ordering = ['-ultimo_acceso']
+    readonly_fields = ['clave', 'tamano', 'accesos', 'fecha_creacion', 'ultimo_acceso']
+
+@admin.register(CampanaNotificacion)
+class CampanaNotificacionAdmin(admin.ModelAdmin):
+    list_display = ['id', 'creado_por', 'estado', 'total', 'enviados', 'fallidos', 'omitidos', 'fecha_creacion', 'fecha_fin']
+    list_filter = ['estado', 'fecha_creacion']
+    search_fields = ['creado_por__email']
+    ordering = ['-fecha_creacion']
+    readonly_fields = ['fecha_creacion', 'fecha_inicio', 'fecha_fin']
+
+@admin.register(DestinatarioCampana)
+class DestinatarioCampanaAdmin(admin.ModelAdmin):
+    list_display = ['campana', 'empresa', 'email', 'estado', 'intentos', 'fecha_envio']
+    list_filter = ['estado']
+    search_fields = ['email', 'empresa__razon_social']
+    raw_id_fields = ['campana', 'empresa']
+
+@admin.register(ImportacionEmpresas)
+class ImportacionEmpresasAdmin(admin.ModelAdmin):
+    list_display = ['id', 'usuario', 'nombre_archivo', 'simulacion', 'estado', 'total_filas', 'creadas', 'actualizadas', 'con_errores', 'fecha_creacion']
+    list_filter = ['estado', 'simulacion', 'formato', 'fecha_creacion']
+    search_fields = ['usuario__email', 'nombre_archivo']
+    ordering = ['-fecha_creacion']
+    readonly_fields = ['fecha_creacion', 'fecha_inicio', 'fecha_fin']
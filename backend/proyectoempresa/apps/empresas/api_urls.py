@@ -7,7 +7,10 @@ from .viewsets import (
     ProductoEmpresaViewSet, ServicioEmpresaViewSet,
     ProductoEmpresaMixtaViewSet, ServicioEmpresaMixtaViewSet,
     PosicionArancelariaViewSet, PosicionArancelariaMixtaViewSet,
-    MatrizClasificacionExportadorViewSet
+    MatrizClasificacionExportadorViewSet,
+    ExportacionPDFViewSet,
+    CampanaNotificacionViewSet,
+    ImportacionEmpresasViewSet
 )
 
 router = DefaultRouter()
@@ -27,6 +30,12 @@ router.register(r'servicios-mixta', ServicioEmpresaMixtaViewSet, basename='servi
 router.register(r'posiciones-arancelarias', PosicionArancelariaViewSet, basename='posicion-arancelaria')
 router.register(r'posiciones-arancelarias-mixta', PosicionArancelariaMixtaViewSet, basename='posicion-arancelaria-mixta')
 router.register(r'matriz-clasificacion', MatrizClasificacionExportadorViewSet, basename='matriz-clasificacion')
+# Exportaciones PDF en segundo plano (crear, consultar progreso y descargar)
+router.register(r'exportaciones', ExportacionPDFViewSet, basename='exportacion-pdf')
+# Campañas de notificación de credenciales (progreso y cancelación)
+router.register(r'campanas-notificacion', CampanaNotificacionViewSet, basename='campana-notificacion')
+# Importación masiva de empresas desde CSV/XLSX (simulación, confirmación y reporte de errores)
+router.register(r'importaciones', ImportacionEmpresasViewSet, basename='importacion-empresas')
 # ✅ Nuevo endpoint unificado (recomendado) - AL FINAL para evitar conflictos
 # Usar r'' para que la URL final sea /api/empresas/ en lugar de /api/empresas/empresas/
 router.register(r'', EmpresaViewSet, basename='empresa')
@@ -0,0 +1,273 @@
+"""
+Benchmark de los generadores PDF de utils.py.
+
+Genera empresas sintéticas, ejecuta cada generador y mide páginas por segundo,
+tiempo total, pico de RSS, cantidad de consultas y tamaño del PDF. Los
+resultados se comparan contra una baseline guardada en JSON; una métrica que
+empeora más allá de su tolerancia es una regresión.
+
+Lo usan el comando `benchmark_pdf` y los tests de tests/benchmarks. Los tiempos
+y la memoria dependen de la máquina: la baseline se regenera con
+`python manage.py benchmark_pdf --guardar-baseline` en la misma máquina (o
+runner de CI) donde se compara. Consultas y tamaño no dependen de la máquina.
+"""
+import json
+import os
+import platform
+import resource
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+TAMANOS_BENCHMARK = [10, 100, 1000, 5000]
+GENERADORES_BENCHMARK = ['aprobadas', 'seleccionadas', 'empresas']
+
+RUTA_BASELINE = settings.BASE_DIR / 'tests' / 'benchmarks' / 'baseline_pdf.json'
+
+PREFIJO_SINTETICAS = 'Benchmark PDF'
+
+# Tolerancia relativa por métrica y si un valor mayor es mejor
+TOLERANCIAS = {
+    'paginas_por_segundo': (0.30, True),
+    'segundos': (0.50, False),
+    'incremento_rss_mb': (0.50, False),
+    'consultas': (0.0, False),
+    'tamano_bytes': (0.20, False),
+}
+# Por debajo de este tiempo el ruido domina: no se comparan métricas de tiempo
+SEGUNDOS_MINIMOS_COMPARABLES = 1.0
+METRICAS_DE_TIEMPO = {'paginas_por_segundo', 'segundos'}
+# El RSS del proceso no baja al liberar memoria, así que el pico absoluto depende de lo
+# que se ejecutó antes: se compara el incremento durante la medición, con margen absoluto
+MARGEN_RSS_MB = 20
+
+
+def _rss_actual():
+    """RSS actual del proceso en bytes (Linux); None si no se puede leer"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class MuestreoRSS:
+    """
+    Pico de RSS durante un bloque, muestreando /proc/self/statm en un hilo.
+    Donde no existe /proc se usa ru_maxrss, que es el pico de todo el proceso
+    (el incremento queda medido desde cero).
+    """
+
+    INTERVALO = 0.02
+
+    def __init__(self):
+        self.inicial = _rss_actual() or 0
+        self.pico = self.inicial
+        self._detener = threading.Event()
+        self._hilo = None
+
+    def _muestrear(self):
+        while not self._detener.is_set():
+            self.pico = max(self.pico, _rss_actual() or 0)
+            self._detener.wait(self.INTERVALO)
+
+    def __enter__(self):
+        if _rss_actual() is not None:
+            self._hilo = threading.Thread(target=self._muestrear, daemon=True)
+            self._hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._hilo:
+            self._detener.set()
+            self._hilo.join()
+            self.pico = max(self.pico, _rss_actual() or 0)
+        else:
+            # ru_maxrss está en KB en Linux y en bytes en macOS
+            maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            self.pico = maximo if platform.system() == 'Darwin' else maximo * 1024
+        return False
+
+
+def crear_empresas_sinteticas(cantidad):
+    """
+    Crear `cantidad` empresas sintéticas (tipos alternados, con matriz y actividades)
+    y devolver sus IDs ordenados. Pensado para correr dentro de una transacción que
+    luego se revierte, o en una base de tests.
+    """
+    from django.contrib.auth import get_user_model
+    from apps.geografia.models import Provincia, Departamento
+    from .models import TipoEmpresa, Rubro, Empresa, MatrizClasificacionExportador, ProductoEmpresa
+
+    usuario, _ = get_user_model().objects.get_or_create(
+        email='benchmark-pdf@example.com', defaults={'nombre': 'Benchmark', 'apellido': 'PDF'}
+    )
+    provincia, _ = Provincia.objects.get_or_create(id='10', defaults={'nombre': 'Catamarca'})
+    departamento, _ = Departamento.objects.get_or_create(
+        id='10049', defaults={'nombre': 'Capital', 'provincia': provincia}
+    )
+    rubro, _ = Rubro.objects.get_or_create(nombre='Alimentos', tipo='producto')
+    tipo, _ = TipoEmpresa.objects.get_or_create(nombre='Producto')
+
+    empresas = Empresa.objects.bulk_create([
+        Empresa(
+            razon_social=f'{PREFIJO_SINTETICAS} {i:05d} SRL',
+            nombre_fantasia=f'Fantasía {i}',
+            cuit_cuil=f'33{i:09d}',
+            direccion=f'Calle {i} - San Fernando del Valle de Catamarca',
+            departamento=departamento,
+            telefono='3834000000',
+            correo=f'benchmark{i}@example.com',
+            id_rubro=rubro,
+            tipo_empresa=tipo,
+            tipo_empresa_valor=['producto', 'servicio', 'mixta'][i % 3],
+            exporta='Sí' if i % 2 else 'No, solo ventas nacionales',
+            actividades_promocion_internacional={'ferias': [{'nombre': 'SIAL'}], 'rondas': [], 'misiones': []},
+            id_usuario=usuario,
+        )
+        for i in range(cantidad)
+    ], batch_size=1000)
+
+    # bulk_create no devuelve IDs en todos los motores: se releen por el prefijo
+    ids = list(Empresa.objects.filter(
+        razon_social__startswith=PREFIJO_SINTETICAS
+    ).order_by('id').values_list('id', flat=True))
+
+    MatrizClasificacionExportador.objects.bulk_create([
+        MatrizClasificacionExportador(empresa_id=empresa_id, categoria='etapa_inicial')
+        for empresa_id in ids[::2]
+    ], batch_size=1000)
+    ProductoEmpresa.objects.bulk_create([
+        ProductoEmpresa(empresa_id=empresa.id, nombre_producto='Dulce de membrillo', descripcion='Artesanal')
+        for empresa in Empresa.objects.filter(id__in=ids, tipo_empresa_valor='producto').only('id')
+    ], batch_size=1000)
+    return ids
+
+
+def _ejecutar(generador, ids):
+    """Invocar un generador sobre las empresas `ids` y devolver su respuesta"""
+    from .extraccion import CAMPOS_EXPORTACION
+    from .exportaciones import CAMPOS_APROBADAS_DEFAULT, CAMPOS_EMPRESAS_DEFAULT
+    from .models import Empresa
+    from .utils import (
+        generate_empresas_pdf, generate_empresas_aprobadas_pdf, generate_empresas_seleccionadas_pdf
+    )
+
+    empresas = Empresa.objects.filter(id__range=(ids[0], ids[-1]), razon_social__startswith=PREFIJO_SINTETICAS)
+
+    if generador == 'aprobadas':
+        empresas = empresas.select_related('tipo_empresa', 'id_rubro', 'departamento')
+        return generate_empresas_aprobadas_pdf(
+            empresas.filter(tipo_empresa_valor='producto'),
+            empresas.filter(tipo_empresa_valor='servicio'),
+            empresas.filter(tipo_empresa_valor='mixta'),
+            CAMPOS_APROBADAS_DEFAULT,
+            procesos=1,  # un solo proceso: consultas y memoria medidas en este proceso
+        )
+    if generador == 'seleccionadas':
+        return generate_empresas_seleccionadas_pdf(list(ids), list(CAMPOS_EXPORTACION))
+    if generador == 'empresas':
+        empresas = empresas.filter(tipo_empresa_valor='producto').select_related(
+            'departamento', 'municipio', 'localidad', 'id_rubro', 'tipo_empresa'
+        )
+        return generate_empresas_pdf(empresas, CAMPOS_EMPRESAS_DEFAULT, 'producto')
+    raise ValueError(f'Generador desconocido: {generador}')
+
+
+def medir_generador(generador, ids):
+    """Ejecutar un generador una vez y devolver sus métricas"""
+    from pypdf import PdfReader
+
+    with CaptureQueriesContext(connection) as consultas, MuestreoRSS() as rss:
+        inicio = time.perf_counter()
+        response = _ejecutar(generador, ids)
+        segundos = time.perf_counter() - inicio
+
+    # Se cierra solo el archivo: response.close() emite request_finished, que cierra
+    # la conexión a la base dentro de la transacción del comando
+    archivo = response.file_to_stream
+    try:
+        archivo.seek(0, os.SEEK_END)
+        tamano = archivo.tell()
+        archivo.seek(0)
+        paginas = len(PdfReader(archivo).pages)
+    finally:
+        archivo.close()
+
+    return {
+        'empresas': len(ids),
+        'paginas': paginas,
+        'segundos': round(segundos, 3),
+        'paginas_por_segundo': round(paginas / segundos, 2) if segundos else 0,
+        'pico_rss_mb': round(rss.pico / 1024 / 1024, 1),
+        'incremento_rss_mb': round(max(rss.pico - rss.inicial, 0) / 1024 / 1024, 1),
+        'consultas': len(consultas),
+        'tamano_bytes': tamano,
+    }
+
+
+def comparar_con_baseline(metricas, baseline):
+    """
+    Lista de regresiones (textos) de `metricas` respecto de la `baseline` del mismo
+    generador y tamaño. Métricas ausentes en la baseline no se comparan.
+    """
+    regresiones = []
+    comparar_tiempo = baseline.get('segundos', 0) >= SEGUNDOS_MINIMOS_COMPARABLES
+
+    for metrica, (tolerancia, mayor_es_mejor) in TOLERANCIAS.items():
+        if metrica not in baseline or metrica not in metricas:
+            continue
+        if metrica in METRICAS_DE_TIEMPO and not comparar_tiempo:
+            continue
+
+        referencia = baseline[metrica]
+        valor = metricas[metrica]
+        if mayor_es_mejor:
+            limite = referencia * (1 - tolerancia)
+            empeoro = valor < limite
+        else:
+            limite = referencia * (1 + tolerancia)
+            if metrica == 'incremento_rss_mb':
+                limite = max(limite, referencia + MARGEN_RSS_MB)
+            empeoro = valor > limite
+
+        if empeoro:
+            regresiones.append(f'{metrica}: {valor} (baseline {referencia}, límite {round(limite, 2)})')
+    return regresiones
+
+
+def cargar_baseline(ruta=RUTA_BASELINE):
+    """Baseline guardada como {generador: {tamaño: métricas}}; vacía si no existe"""
+    try:
+        with open(ruta, encoding='utf-8') as archivo:
+            return json.load(archivo).get('resultados', {})
+    except FileNotFoundError:
+        return {}
+
+
+def guardar_baseline(resultados, ruta=RUTA_BASELINE):
+    """
+    Guardar los resultados como nueva baseline junto con datos del entorno.
+    Los generadores y tamaños no medidos conservan su baseline anterior.
+    """
+    combinados = cargar_baseline(ruta)
+    for generador, por_tamano in resultados.items():
+        combinados.setdefault(generador, {}).update(por_tamano)
+
+    contenido = {
+        'generada': timezone.now().isoformat(),
+        'entorno': {
+            'python': platform.python_version(),
+            'maquina': platform.machine(),
+            'cpus': os.cpu_count(),
+            'base_de_datos': connection.vendor,
+        },
+        'resultados': combinados,
+    }
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump(contenido, archivo, indent=2, ensure_ascii=False)
+        archivo.write('\n')
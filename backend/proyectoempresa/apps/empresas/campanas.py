@@ -0,0 +1,284 @@
+"""
+Campañas de notificación de credenciales en segundo plano.
+
+El endpoint notificar solo crea una CampanaNotificacion con un
+DestinatarioCampana por empresa; el comando procesar_campanas toma los
+destinatarios pendientes y envía cada email cuando el TokenBucket lo permite,
+según la cuota diaria del servidor SMTP (Gmail: 500/día en cuentas gratuitas).
+
+El estado se guarda por destinatario, así un reinicio del worker no reenvía lo
+ya enviado: los destinatarios que quedaron 'enviando' se vuelven a encolar al
+arrancar y el resto sigue pendiente. Los tokens disponibles se aprovechan en
+lotes que se envían por una misma conexión SMTP (EMAIL_LOTE_TAMANO).
+"""
+import logging
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import CampanaNotificacion, DestinatarioCampana
+
+logger = logging.getLogger(__name__)
+
+
+def email_valido(email):
+    """Validación básica de formato (la misma que usaba el envío síncrono)"""
+    return bool(email) and '@' in email and '.' in email.split('@')[-1]
+
+
+def describir_error_smtp(error_msg, email):
+    """Mensaje legible para errores de dirección inexistente (5.1.1, ver es_direccion_inexistente)"""
+    from apps.registro.services import es_direccion_inexistente
+
+    if es_direccion_inexistente(error_msg):
+        return f'Dirección de email no existe o no es válida: {email}'
+    return error_msg
+
+
+class TokenBucket:
+    """
+    Limitador de tasa: `capacidad` tokens como máximo, que se recargan a `tasa`
+    tokens por segundo. Cada email consume un token; sin tokens se espera.
+    """
+
+    def __init__(self, capacidad, tasa, tokens=None, reloj=time.monotonic, dormir=time.sleep):
+        self.capacidad = capacidad
+        self.tasa = tasa
+        self.tokens = capacidad if tokens is None else min(tokens, capacidad)
+        self._reloj = reloj
+        self._dormir = dormir
+        self._ultima_recarga = reloj()
+
+    def _recargar(self):
+        ahora = self._reloj()
+        self.tokens = min(self.capacidad, self.tokens + (ahora - self._ultima_recarga) * self.tasa)
+        self._ultima_recarga = ahora
+
+    def espera_necesaria(self):
+        """Segundos hasta que haya un token disponible (0 si ya lo hay)"""
+        self._recargar()
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / self.tasa
+
+    def disponibles(self):
+        """Tokens enteros disponibles ahora"""
+        self._recargar()
+        return int(self.tokens)
+
+    def esperar(self):
+        """Bloquear hasta que haya un token disponible, sin consumirlo"""
+        espera = self.espera_necesaria()
+        while espera > 0:
+            self._dormir(espera)
+            espera = self.espera_necesaria()
+
+    def consumir(self):
+        """Esperar un token y consumirlo"""
+        self.esperar()
+        self.tokens -= 1
+
+    @classmethod
+    def desde_configuracion(cls, **kwargs):
+        """
+        Bucket según NOTIFICACIONES_EMAILS_POR_DIA y NOTIFICACIONES_RAFAGA.
+        La ráfaga se descuenta de la tasa para que en 24 h no se supere la cuota, y los
+        tokens iniciales descuentan los emails enviados en la última ventana de recarga
+        (reiniciar el worker no regala una ráfaga nueva).
+        """
+        por_dia = getattr(settings, 'NOTIFICACIONES_EMAILS_POR_DIA', 500)
+        capacidad = max(1, min(getattr(settings, 'NOTIFICACIONES_RAFAGA', 10), por_dia))
+        tasa = max(por_dia - capacidad, 1) / 86400
+
+        ventana = timezone.now() - timedelta(seconds=capacidad / tasa)
+        recientes = DestinatarioCampana.objects.filter(estado='enviado', fecha_envio__gte=ventana).count()
+        return cls(capacidad, tasa, tokens=max(capacidad - recientes, 0), **kwargs)
+
+
+def crear_campana(usuario, empresas):
+    """
+    Crear una campaña para las empresas dadas (con id_usuario cargado).
+    Las empresas con email inválido quedan como fallidas desde el inicio y las
+    direcciones de la lista de supresión (una sola consulta) como omitidas.
+    """
+    from apps.registro.services import ERROR_SUPRIMIDO, emails_suprimidos
+
+    empresas = list(empresas)
+    suprimidos = emails_suprimidos(empresa.id_usuario.email or '' for empresa in empresas)
+
+    destinatarios = []
+    for empresa in empresas:
+        email = (empresa.id_usuario.email or '').strip()
+        if not email_valido(email):
+            destinatarios.append(DestinatarioCampana(
+                empresa=empresa, email=email, estado='fallido',
+                error=f'Email con formato inválido: {email}'
+            ))
+        elif email.lower() in suprimidos:
+            destinatarios.append(DestinatarioCampana(
+                empresa=empresa, email=email, estado='omitido', error=ERROR_SUPRIMIDO
+            ))
+        else:
+            destinatarios.append(DestinatarioCampana(empresa=empresa, email=email))
+
+    with transaction.atomic():
+        campana = CampanaNotificacion.objects.create(
+            creado_por=usuario,
+            total=len(destinatarios),
+            fallidos=sum(1 for destinatario in destinatarios if destinatario.estado == 'fallido'),
+            omitidos=sum(1 for destinatario in destinatarios if destinatario.estado == 'omitido'),
+        )
+        for destinatario in destinatarios:
+            destinatario.campana = campana
+        DestinatarioCampana.objects.bulk_create(destinatarios, batch_size=1000)
+
+    logger.info(
+        f"📧 Campaña {campana.id} encolada: {campana.total} empresas "
+        f"({campana.fallidos} con email inválido, {campana.omitidos} suprimidas)"
+    )
+    return campana
+
+
+def cancelar_campana(campana):
+    """Cancelar una campaña activa; los destinatarios pendientes quedan omitidos"""
+    with transaction.atomic():
+        actualizada = CampanaNotificacion.objects.filter(
+            pk=campana.pk, estado__in=['pendiente', 'procesando']
+        ).update(estado='cancelada', fecha_fin=timezone.now())
+        if actualizada:
+            omitidos = DestinatarioCampana.objects.filter(campana=campana, estado='pendiente').update(estado='omitido')
+            CampanaNotificacion.objects.filter(pk=campana.pk).update(omitidos=F('omitidos') + omitidos)
+    campana.refresh_from_db()
+    return bool(actualizada)
+
+
+def reclamar_destinatarios(cantidad):
+    """
+    Tomar hasta `cantidad` destinatarios pendientes de campañas activas (los más antiguos)
+    y marcarlos 'enviando'. skip_locked permite correr varios workers sin enviar dos
+    veces el mismo email.
+    """
+    if cantidad < 1:
+        return []
+    ahora = timezone.now()
+    with transaction.atomic():
+        destinatarios = list(
+            DestinatarioCampana.objects.select_for_update(skip_locked=True, of=('self',))
+            .filter(estado='pendiente', campana__estado__in=['pendiente', 'procesando'])
+            .order_by('campana__fecha_creacion', 'id')[:cantidad]
+        )
+        if not destinatarios:
+            return []
+        DestinatarioCampana.objects.filter(pk__in=[d.pk for d in destinatarios]).update(
+            estado='enviando', intentos=F('intentos') + 1, fecha_intento=ahora
+        )
+        CampanaNotificacion.objects.filter(
+            pk__in={d.campana_id for d in destinatarios}, estado='pendiente'
+        ).update(estado='procesando', fecha_inicio=ahora)
+
+    for destinatario in destinatarios:
+        destinatario.estado = 'enviando'
+        destinatario.intentos += 1
+        destinatario.fecha_intento = ahora
+    return destinatarios
+
+
+def reclamar_siguiente_destinatario():
+    """Tomar un único destinatario pendiente (ver reclamar_destinatarios)"""
+    destinatarios = reclamar_destinatarios(1)
+    return destinatarios[0] if destinatarios else None
+
+
+def enviar_destinatarios(destinatarios):
+    """
+    Enviar el email de credenciales a destinatarios ya reclamados por una misma
+    conexión SMTP y registrar el resultado de cada uno.
+    """
+    from apps.registro.services import ERROR_SUPRIMIDO, enviar_emails_notificacion_empresas
+    from .models import Empresa
+
+    empresas = Empresa.objects.select_related('id_usuario').in_bulk(
+        [destinatario.empresa_id for destinatario in destinatarios]
+    )
+    lista_empresas = [empresas[destinatario.empresa_id] for destinatario in destinatarios]
+    errores = enviar_emails_notificacion_empresas(lista_empresas)
+
+    ahora = timezone.now()
+    enviados_por_campana = Counter()
+    fallidos_por_campana = Counter()
+    omitidos_por_campana = Counter()
+    with transaction.atomic():
+        for destinatario, empresa, error in zip(destinatarios, lista_empresas, errores):
+            if error is None:
+                destinatario.estado = 'enviado'
+                destinatario.fecha_envio = ahora
+                enviados_por_campana[destinatario.campana_id] += 1
+                # Los usuarios creados por una importación masiva no tienen contraseña: se les
+                # asigna el CUIT, la contraseña inicial que informa el email, solo si se envió
+                usuario = empresa.id_usuario
+                if not usuario.has_usable_password():
+                    usuario.set_password(empresa.cuit_cuil)
+                    usuario.save(update_fields=['password'])
+                logger.info(f"✅ Email enviado a {empresa.razon_social} ({destinatario.email})")
+            elif error == ERROR_SUPRIMIDO:
+                # Suprimida por un rebote posterior a la creación de la campaña
+                destinatario.estado = 'omitido'
+                destinatario.error = error
+                omitidos_por_campana[destinatario.campana_id] += 1
+            else:
+                destinatario.estado = 'fallido'
+                destinatario.error = describir_error_smtp(error, destinatario.email)
+                fallidos_por_campana[destinatario.campana_id] += 1
+                logger.warning(f"⚠️ Error al notificar empresa {empresa.id} ({empresa.razon_social}): {destinatario.error}")
+
+        DestinatarioCampana.objects.bulk_update(destinatarios, ['estado', 'error', 'fecha_envio'])
+        Empresa.objects.filter(
+            pk__in=[d.empresa_id for d in destinatarios if d.estado == 'enviado']
+        ).update(ultima_notificacion_credenciales=ahora)
+        for campana_id in {destinatario.campana_id for destinatario in destinatarios}:
+            CampanaNotificacion.objects.filter(pk=campana_id).update(
+                enviados=F('enviados') + enviados_por_campana[campana_id],
+                fallidos=F('fallidos') + fallidos_por_campana[campana_id],
+                omitidos=F('omitidos') + omitidos_por_campana[campana_id],
+            )
+    return destinatarios
+
+
+def enviar_destinatario(destinatario):
+    """Enviar a un único destinatario reclamado (ver enviar_destinatarios)"""
+    return enviar_destinatarios([destinatario])[0]
+
+
+def liberar_destinatarios_abandonados():
+    """
+    Devolver a 'pendiente' los destinatarios que quedaron 'enviando' por un worker caído.
+    Tras NOTIFICACIONES_MAX_INTENTOS intentos se marcan como fallidos.
+    """
+    limite = timezone.now() - timedelta(minutes=getattr(settings, 'NOTIFICACIONES_TIMEOUT_MINUTOS', 10))
+    max_intentos = getattr(settings, 'NOTIFICACIONES_MAX_INTENTOS', 3)
+    abandonados = DestinatarioCampana.objects.filter(estado='enviando', fecha_intento__lt=limite)
+
+    with transaction.atomic():
+        agotados = list(abandonados.filter(intentos__gte=max_intentos).values_list('campana_id', flat=True))
+        abandonados.filter(intentos__gte=max_intentos).update(
+            estado='fallido', error='Envío interrumpido: se agotaron los reintentos'
+        )
+        for campana_id in agotados:
+            CampanaNotificacion.objects.filter(pk=campana_id).update(fallidos=F('fallidos') + 1)
+        reencolados = abandonados.update(estado='pendiente')
+    return reencolados + len(agotados)
+
+
+def finalizar_campanas():
+    """Marcar como completadas las campañas activas sin destinatarios por enviar"""
+    por_enviar = DestinatarioCampana.objects.filter(estado__in=['pendiente', 'enviando'])
+    return CampanaNotificacion.objects.filter(
+        estado__in=['pendiente', 'procesando']
+    ).exclude(
+        id__in=por_enviar.values('campana_id')
+    ).update(estado='completada', fecha_fin=timezone.now())
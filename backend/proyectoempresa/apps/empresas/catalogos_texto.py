@@ -0,0 +1,224 @@
+"""
+Extracción e indexación del texto de los catálogos y brochures PDF.
+
+Los catálogos (SolicitudRegistro.catalogo_pdf, Empresa.brochure) tienen la
+información de productos, pero no se podían buscar: había que abrirlos de a uno.
+Al subir un PDF, un signal crea su TextoCatalogo pendiente; el comando
+indexar_catalogos extrae el texto una sola vez con pypdf, lo guarda en la tabla
+texto_catalogo y calcula el tsvector en español (índice GIN). buscar_empresas
+consulta solo ese índice: no se lee ningún PDF durante la búsqueda.
+
+Los archivos se guardan por contenido, así que el catálogo de la solicitud y el
+brochure de la empresa creada al aprobarla (el mismo archivo) se extraen una vez.
+"""
+import logging
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, FloatField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import TextoCatalogo
+
+logger = logging.getLogger(__name__)
+
+# Campos de archivo cuyo texto se indexa: (modelo, campo)
+CATALOGOS = [
+    ('empresas.Empresa', 'brochure'),
+    ('registro.SolicitudRegistro', 'catalogo_pdf'),
+]
+
+CONFIGURACION_FTS = 'spanish'
+
+
+class CatalogoInvalido(Exception):
+    """El archivo no es un PDF legible: no tiene sentido reintentar"""
+
+
+def es_pdf(nombre):
+    return bool(nombre) and nombre.lower().endswith('.pdf')
+
+
+def encolar_catalogo(nombre):
+    """Crear el TextoCatalogo pendiente del archivo si todavía no se indexó"""
+    if es_pdf(nombre):
+        TextoCatalogo.objects.get_or_create(archivo=nombre)
+
+
+def encolar_si_cambio(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Receiver post_save: encolar los catálogos PDF del modelo"""
+    if raw:
+        return
+    etiqueta_modelo = sender._meta.concrete_model._meta.label
+    for etiqueta, campo in CATALOGOS:
+        if etiqueta != etiqueta_modelo or (update_fields is not None and campo not in update_fields):
+            continue
+        try:
+            encolar_catalogo(getattr(instance, campo).name)
+        except Exception as e:
+            # Se puede volver a encolar con indexar_catalogos --encolar-existentes
+            logger.warning(f"⚠️ No se pudo encolar el catálogo de {sender.__name__} {instance.pk}: {str(e)}")
+
+
+def extraer_texto(archivo):
+    """Texto y cantidad de páginas de un PDF (hasta CATALOGOS_TEXTO_MAX_PAGINAS y _MAX_CARACTERES)"""
+    from pypdf import PdfReader
+    from pypdf.errors import PdfReadError
+
+    max_paginas = getattr(settings, 'CATALOGOS_TEXTO_MAX_PAGINAS', 300)
+    max_caracteres = getattr(settings, 'CATALOGOS_TEXTO_MAX_CARACTERES', 500_000)
+    try:
+        lector = PdfReader(archivo)
+        if lector.is_encrypted:
+            lector.decrypt('')
+        paginas = lector.pages
+        partes = []
+        total = 0
+        for pagina in paginas[:max_paginas]:
+            texto = pagina.extract_text() or ''
+            partes.append(texto)
+            total += len(texto)
+            if total >= max_caracteres:
+                break
+    except (PdfReadError, ValueError, KeyError, TypeError) as e:
+        raise CatalogoInvalido(f'No se pudo leer el PDF: {str(e)}')
+
+    # PostgreSQL no acepta NUL en text y to_tsvector tiene un límite de 1 MB
+    texto = '\n'.join(partes).replace('\x00', '')[:max_caracteres]
+    return texto, len(paginas)
+
+
+def storage_catalogos():
+    """Storage de los campos de CATALOGOS (todos usan el almacenamiento deduplicado)"""
+    etiqueta, campo = CATALOGOS[0]
+    return apps.get_model(etiqueta)._meta.get_field(campo).storage
+
+
+def procesar_texto(texto_catalogo):
+    """Extraer el texto del archivo y actualizar el vector de búsqueda"""
+    storage = storage_catalogos()
+    if not storage.exists(texto_catalogo.archivo):
+        raise CatalogoInvalido(f'El archivo {texto_catalogo.archivo} no existe')
+    with storage.open(texto_catalogo.archivo, 'rb') as archivo:
+        texto, paginas = extraer_texto(archivo)
+
+    texto_catalogo.texto = texto
+    texto_catalogo.paginas = paginas
+    texto_catalogo.estado = 'completado'
+    texto_catalogo.error = None
+    texto_catalogo.fecha_fin = timezone.now()
+    with transaction.atomic():
+        texto_catalogo.save(update_fields=['texto', 'paginas', 'estado', 'error', 'fecha_fin'])
+        if connection.vendor == 'postgresql':
+            from django.contrib.postgres.search import SearchVector
+            TextoCatalogo.objects.filter(pk=texto_catalogo.pk).update(
+                busqueda=SearchVector('texto', config=CONFIGURACION_FTS)
+            )
+    logger.info(f"📚 Catálogo {texto_catalogo.archivo} indexado ({paginas} páginas, {len(texto)} caracteres)")
+    return texto_catalogo
+
+
+def reclamar_textos(cantidad):
+    """Tomar hasta `cantidad` catálogos pendientes y marcarlos 'procesando' (skip_locked)"""
+    ahora = timezone.now()
+    with transaction.atomic():
+        textos = list(
+            TextoCatalogo.objects.select_for_update(skip_locked=True)
+            .filter(estado='pendiente')
+            .order_by('fecha_creacion')
+            .defer('texto')[:cantidad]
+        )
+        if not textos:
+            return []
+        TextoCatalogo.objects.filter(pk__in=[texto.pk for texto in textos]).update(
+            estado='procesando', intentos=F('intentos') + 1, fecha_intento=ahora
+        )
+    for texto in textos:
+        texto.estado = 'procesando'
+        texto.intentos += 1
+        texto.fecha_intento = ahora
+    return textos
+
+
+def ejecutar_texto(texto_catalogo):
+    """Procesar un catálogo reclamado registrando el error (se reintenta hasta CATALOGOS_TEXTO_MAX_INTENTOS)"""
+    try:
+        return procesar_texto(texto_catalogo)
+    except Exception as e:
+        definitivo = (
+            isinstance(e, CatalogoInvalido)
+            or texto_catalogo.intentos >= getattr(settings, 'CATALOGOS_TEXTO_MAX_INTENTOS', 3)
+        )
+        texto_catalogo.estado = 'error' if definitivo else 'pendiente'
+        texto_catalogo.error = str(e)
+        texto_catalogo.fecha_fin = timezone.now() if definitivo else None
+        texto_catalogo.save(update_fields=['estado', 'error', 'fecha_fin'])
+        logger.error(f"❌ Catálogo {texto_catalogo.archivo}: {str(e)}", exc_info=not isinstance(e, CatalogoInvalido))
+        return texto_catalogo
+
+
+def liberar_textos_abandonados():
+    """Devolver a 'pendiente' los catálogos que quedaron 'procesando' por un worker caído"""
+    limite = timezone.now() - timedelta(minutes=getattr(settings, 'CATALOGOS_TEXTO_TIMEOUT_MINUTOS', 15))
+    return TextoCatalogo.objects.filter(estado='procesando', fecha_intento__lt=limite).update(estado='pendiente')
+
+
+def archivos_en_uso():
+    """Subconsultas con los nombres de archivo de cada campo de CATALOGOS"""
+    subconsultas = []
+    for etiqueta, campo in CATALOGOS:
+        con_archivo = apps.get_model(etiqueta)._base_manager.exclude(Q(**{f'{campo}__isnull': True}) | Q(**{campo: ''}))
+        subconsultas.append(con_archivo.values_list(campo, flat=True))
+    return subconsultas
+
+
+def purgar_textos_huerfanos():
+    """Eliminar el texto de los archivos que ya no usa ningún catálogo ni brochure"""
+    huerfanos = TextoCatalogo.objects.exclude(estado__in=['pendiente', 'procesando'])
+    for en_uso in archivos_en_uso():
+        huerfanos = huerfanos.exclude(archivo__in=en_uso)
+    eliminados, _ = huerfanos.delete()
+    return eliminados
+
+
+def encolar_existentes():
+    """Encolar los catálogos PDF ya subidos que todavía no tienen texto. Devuelve cuántos"""
+    existentes = set(TextoCatalogo.objects.values_list('archivo', flat=True))
+    nuevos = {
+        nombre for en_uso in archivos_en_uso() for nombre in en_uso.iterator()
+        if es_pdf(nombre) and nombre not in existentes
+    }
+    TextoCatalogo.objects.bulk_create([TextoCatalogo(archivo=nombre) for nombre in nuevos], ignore_conflicts=True)
+    return len(nuevos)
+
+
+def buscar_empresas(queryset, consulta):
+    """
+    Filtrar `queryset` (empresas) a las que tienen un catálogo cuyo texto coincide
+    con `consulta` (sintaxis de búsqueda web: palabras, "frases", -exclusiones),
+    ordenadas por relevancia.
+    """
+    from apps.registro.models import SolicitudRegistro
+
+    textos = TextoCatalogo.objects.filter(estado='completado')
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+        query = SearchQuery(consulta, config=CONFIGURACION_FTS, search_type='websearch')
+        textos = textos.filter(busqueda=query).annotate(relevancia=SearchRank(F('busqueda'), query))
+    else:
+        # Sin PostgreSQL (desarrollo y tests) no hay tsvector: coincidencia simple
+        textos = textos.filter(texto__icontains=consulta).annotate(relevancia=Value(1.0, output_field=FloatField()))
+
+    archivos = textos.values('archivo')
+    desde_solicitudes = SolicitudRegistro.objects.filter(
+        catalogo_pdf__in=archivos, empresa_creada__isnull=False
+    ).values('empresa_creada_id')
+    relevancia = Subquery(textos.filter(archivo=OuterRef('brochure')).values('relevancia')[:1])
+    return (
+        queryset.filter(Q(brochure__in=archivos) | Q(id__in=desde_solicitudes))
+        .annotate(relevancia_catalogo=Coalesce(relevancia, Value(0.0), output_field=FloatField()))
+        .order_by('-relevancia_catalogo', 'razon_social')
+    )
@@ -0,0 +1,142 @@
+"""
+Exportación de empresas a Excel (.xlsx).
+
+Usa un workbook de openpyxl en modo write_only: las filas se escriben a disco a
+medida que se agregan y nunca se arma la hoja completa en memoria. Las filas
+salen de la base con .iterator() (cursor del lado del servidor en PostgreSQL),
+así una hoja de 50.000 filas usa la misma memoria que una de 500.
+
+Hojas: una por tipo_empresa_valor con los campos seleccionados (mismo
+PlanExtraccion que el PDF y el CSV), más 'Productos' y 'Servicios' con una
+fila por producto/servicio y la columna 'ID Empresa' para cruzarlas.
+"""
+import logging
+import tempfile
+from datetime import datetime
+
+from django.db.models import OuterRef, Subquery
+
+from .extraccion import PlanExtraccion, preparar_queryset
+
+logger = logging.getLogger(__name__)
+
+# Filas por bloque al recorrer los querysets
+CHUNK_SIZE_XLSX = 2000
+
+HOJAS_POR_TIPO = [
+    ('producto', 'Empresas Producto'),
+    ('servicio', 'Empresas Servicio'),
+    ('mixta', 'Empresas Mixtas'),
+]
+
+ENCABEZADOS_PRODUCTOS = [
+    'ID Empresa', 'Razón Social', 'Producto', 'Descripción', 'Capacidad Productiva',
+    'Unidad de Medida', 'Período', 'Principal', 'Posición Arancelaria',
+]
+ENCABEZADOS_SERVICIOS = [
+    'ID Empresa', 'Razón Social', 'Servicio', 'Descripción', 'Tipo de Servicio',
+    'Sector Atendido', 'Alcance', 'Países', 'Principal',
+]
+
+CAMPOS_PRODUCTO = [
+    'empresa_id', 'empresa__razon_social', 'nombre_producto', 'descripcion', 'capacidad_productiva',
+    'unidad_medida', 'periodo_capacidad', 'es_principal',
+]
+CAMPOS_SERVICIO = [
+    'empresa_id', 'empresa__razon_social', 'nombre_servicio', 'descripcion', 'tipo_servicio',
+    'sector_atendido', 'alcance_servicio', 'paises_trabaja', 'es_principal',
+]
+
+
+def _celda(value):
+    """Valor de celda: números como números, booleanos como Sí/No y None vacío"""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return 'Sí' if value else 'No'
+    return value
+
+
+def _escribir_empresas(hoja, plan, empresas):
+    hoja.append(['ID Empresa'] + plan.encabezados)
+    filas = 0
+    for empresa in empresas.iterator(chunk_size=CHUNK_SIZE_XLSX):
+        hoja.append([empresa.id] + plan.textos(empresa))
+        filas += 1
+    return filas
+
+
+def _escribir_filas(hoja, encabezados, querysets):
+    """Escribir las tuplas de varios querysets values_list en una misma hoja"""
+    hoja.append(encabezados)
+    for filas in querysets:
+        for fila in filas.iterator(chunk_size=CHUNK_SIZE_XLSX):
+            hoja.append([_celda(value) for value in fila])
+
+
+def _productos(empresas_ids):
+    """Productos de empresas producto y mixtas como tuplas en el orden de ENCABEZADOS_PRODUCTOS"""
+    from .models import ProductoEmpresa, ProductoEmpresaMixta, PosicionArancelariaMixta
+
+    simples = ProductoEmpresa.objects.filter(empresa_id__in=empresas_ids).values_list(
+        *CAMPOS_PRODUCTO, 'posicion_arancelaria__codigo_arancelario'
+    ).order_by('empresa_id', '-es_principal', 'nombre_producto')
+
+    # Los productos de empresas mixtas pueden tener varias posiciones: se muestra la principal
+    posicion_principal = PosicionArancelariaMixta.objects.filter(
+        producto=OuterRef('pk')
+    ).order_by('-es_principal', 'id').values('codigo_arancelario')[:1]
+    mixtos = ProductoEmpresaMixta.objects.filter(empresa_id__in=empresas_ids).annotate(
+        posicion_principal=Subquery(posicion_principal)
+    ).values_list(
+        *CAMPOS_PRODUCTO, 'posicion_principal'
+    ).order_by('empresa_id', '-es_principal', 'nombre_producto')
+
+    return [simples, mixtos]
+
+
+def _servicios(empresas_ids):
+    """Servicios de empresas servicio y mixtas como tuplas en el orden de ENCABEZADOS_SERVICIOS"""
+    from .models import ServicioEmpresa, ServicioEmpresaMixta
+
+    return [
+        modelo.objects.filter(empresa_id__in=empresas_ids).values_list(*CAMPOS_SERVICIO).order_by(
+            'empresa_id', '-es_principal', 'nombre_servicio'
+        )
+        for modelo in (ServicioEmpresa, ServicioEmpresaMixta)
+    ]
+
+
+def generate_empresas_xlsx(empresas, campos_seleccionados):
+    """
+    Generar un .xlsx con las empresas del queryset `empresas` y los campos seleccionados.
+    Devuelve un FileResponse sobre un archivo temporal.
+    """
+    from django.http import FileResponse
+    from openpyxl import Workbook
+
+    plan = PlanExtraccion(campos_seleccionados)
+    empresas = preparar_queryset(empresas).order_by('razon_social', 'id')
+    # Productos y servicios se filtran con una subconsulta, sin traer los IDs a memoria
+    empresas_ids = empresas.order_by().values('id')
+
+    workbook = Workbook(write_only=True)
+    total = 0
+    for tipo, titulo in HOJAS_POR_TIPO:
+        total += _escribir_empresas(workbook.create_sheet(titulo), plan, empresas.filter(tipo_empresa_valor=tipo))
+
+    _escribir_filas(workbook.create_sheet('Productos'), ENCABEZADOS_PRODUCTOS, _productos(empresas_ids))
+    _escribir_filas(workbook.create_sheet('Servicios'), ENCABEZADOS_SERVICIOS, _servicios(empresas_ids))
+
+    archivo = tempfile.TemporaryFile(suffix='.xlsx')
+    workbook.save(archivo)
+    archivo.seek(0)
+    logger.info(f"📊 Exportación XLSX generada: {total} empresas")
+
+    filename = f'empresas_exportacion_{datetime.now().strftime("%Y%m%d_%H%M")}.xlsx'
+    return FileResponse(
+        archivo,
+        as_attachment=True,
+        filename=filename,
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
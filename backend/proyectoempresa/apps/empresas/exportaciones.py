@@ -0,0 +1,304 @@
+"""
+Exportaciones PDF en segundo plano.
+
+Las vistas solo crean un ExportacionPDF en estado 'pendiente'; el comando
+procesar_exportaciones toma los trabajos de la cola, genera el PDF con los
+mismos generadores de utils.py y lo guarda en MEDIA_ROOT para su descarga.
+"""
+import logging
+import re
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Empresa, ExportacionPDF, MatrizClasificacionExportador
+
+logger = logging.getLogger(__name__)
+
+# Campos por defecto de cada tipo de exportación (mismos que las vistas síncronas)
+CAMPOS_APROBADAS_DEFAULT = ['exporta', 'importa', 'certificadopyme']
+CAMPOS_EMPRESAS_DEFAULT = [
+    'razon_social', 'nombre_fantasia', 'cuit_cuil', 'tipo_sociedad',
+    'direccion', 'departamento', 'municipio', 'localidad',
+    'telefono', 'correo', 'sitioweb',
+    'contacto_principal', 'rubro', 'tipo_empresa',
+    'exporta', 'destinoexporta', 'tipoexporta',
+    'importa', 'frecuenciaimporta',
+    'certificadopyme', 'certificacionesbool', 'certificaciones',
+    'capacidadproductiva', 'promo2idiomas', 'idiomas_trabaja',
+    'participoferianacional', 'participoferiainternacional',
+    'categoria_matriz', 'puntaje'
+]
+
+
+# Filtros que admite la exportación de empresas aprobadas (ver filtrar_empresas_aprobadas).
+# La vista arma los parámetros y pdf_cache la clave con esta misma lista
+FILTROS_APROBADAS = ['search', 'tipo_empresa', 'exporta', 'departamento', 'rubro', 'categoria_matriz']
+
+# Segundos máximos entre dos latidos de un worker aunque el progreso no avance
+# (liberar_exportaciones_abandonadas mide el tiempo desde el último latido)
+LATIDO_SEGUNDOS = 60
+
+
+class LimiteExportacionesError(Exception):
+    """El usuario alcanzó el máximo de exportaciones simultáneas"""
+
+
+def filtrar_empresas_aprobadas(parametros):
+    """
+    Aplicar los filtros del listado de empresas aprobadas.
+    `parametros` es un dict con search, tipo_empresa, exporta, departamento, rubro y categoria_matriz.
+    """
+    search = parametros.get('search', '')
+    tipo_empresa = parametros.get('tipo_empresa', '')
+    exporta = parametros.get('exporta', '')
+    departamento = parametros.get('departamento', '')
+    rubro = parametros.get('rubro', '')
+    categoria_matriz = parametros.get('categoria_matriz', '')
+
+    empresas = Empresa.objects.select_related(
+        'tipo_empresa', 'id_rubro', 'departamento', 'municipio', 'localidad', 'id_usuario'
+    ).prefetch_related('productos_empresa', 'servicios_empresa', 'productos_mixta', 'servicios_mixta')
+
+    if search:
+        empresas = empresas.filter(
+            Q(razon_social__icontains=search) |
+            Q(cuit_cuil__icontains=search) |
+            Q(correo__icontains=search) |
+            Q(nombre_fantasia__icontains=search)
+        )
+
+    if tipo_empresa:
+        empresas = empresas.filter(tipo_empresa_valor=tipo_empresa)
+
+    if exporta:
+        if exporta == 'si' or exporta == 'exportadoras':
+            empresas = empresas.filter(exporta='Sí')
+        elif exporta == 'no':
+            empresas = empresas.filter(exporta__in=['No, solo ventas nacionales', 'No, solo ventas locales'])
+        elif exporta == 'potenciales':
+            empresas_ids = MatrizClasificacionExportador.objects.filter(
+                categoria='potencial_exportadora'
+            ).values_list('empresa_id', flat=True)
+            empresas = empresas.filter(id__in=empresas_ids)
+
+    if departamento:
+        empresas = empresas.filter(departamento__nombre__icontains=departamento)
+
+    if rubro:
+        empresas = empresas.filter(id_rubro__nombre__icontains=rubro)
+
+    if categoria_matriz:
+        empresas_ids = MatrizClasificacionExportador.objects.filter(
+            categoria=categoria_matriz
+        ).values_list('empresa_id', flat=True)
+        empresas = empresas.filter(id__in=empresas_ids)
+
+    return empresas
+
+
+def crear_exportacion(usuario, tipo, parametros):
+    """
+    Encolar una exportación respetando el límite de trabajos activos por usuario.
+    Se bloquea la fila del usuario para que dos pedidos simultáneos no superen el límite.
+    """
+    from apps.core.models import Usuario
+
+    limite = getattr(settings, 'EXPORTACIONES_PDF_MAX_POR_USUARIO', 2)
+
+    with transaction.atomic():
+        Usuario.objects.select_for_update().filter(pk=usuario.pk).first()
+        activas = ExportacionPDF.objects.filter(
+            usuario=usuario, estado__in=['pendiente', 'procesando']
+        ).count()
+        if activas >= limite:
+            raise LimiteExportacionesError(
+                f'Ya tienes {activas} exportaciones en curso. Espera a que finalicen (máximo {limite}).'
+            )
+        exportacion = ExportacionPDF.objects.create(usuario=usuario, tipo=tipo, parametros=parametros)
+
+    logger.info(f"📄 Exportación {exportacion.id} ({tipo}) encolada para {usuario.email}")
+    return exportacion
+
+
+def reclamar_siguiente_exportacion():
+    """
+    Tomar la exportación pendiente más antigua y marcarla como 'procesando'.
+    skip_locked permite correr varios workers sin que procesen el mismo trabajo.
+    """
+    with transaction.atomic():
+        exportacion = (
+            ExportacionPDF.objects.select_for_update(skip_locked=True)
+            .filter(estado='pendiente')
+            .order_by('fecha_creacion')
+            .first()
+        )
+        if exportacion is None:
+            return None
+        exportacion.estado = 'procesando'
+        exportacion.progreso = 0
+        exportacion.fecha_inicio = exportacion.fecha_latido = timezone.now()
+        exportacion.save(update_fields=['estado', 'progreso', 'fecha_inicio', 'fecha_latido'])
+    return exportacion
+
+
+def _crear_callback_progreso(exportacion):
+    """
+    Adaptar el callback de progreso de ReportLab a ExportacionPDF.progreso.
+    El armado del documento ocupa el rango 10-95%; solo se escribe en la base
+    cuando el porcentaje avanza al menos 5 puntos o pasaron LATIDO_SEGUNDOS
+    desde la última escritura (el latido indica que el worker sigue vivo).
+    """
+    estado = {'total': 0, 'ultimo': exportacion.progreso, 'latido': time.monotonic()}
+
+    def callback(tipo, valor):
+        if tipo == 'SIZE_EST':
+            estado['total'] = valor or 0
+        elif tipo == 'PROGRESS' and estado['total']:
+            porcentaje = 10 + int(85 * min(valor, estado['total']) / estado['total'])
+            ahora = time.monotonic()
+            if porcentaje - estado['ultimo'] >= 5 or ahora - estado['latido'] >= LATIDO_SEGUNDOS:
+                estado['ultimo'] = max(porcentaje, estado['ultimo'])
+                estado['latido'] = ahora
+                ExportacionPDF.objects.filter(pk=exportacion.pk).update(
+                    progreso=estado['ultimo'], fecha_latido=timezone.now()
+                )
+
+    return callback
+
+
+def _generar_pdf(exportacion, progress_callback):
+    """
+    Invocar el generador correspondiente al tipo de exportación.
+    Si ya existe un PDF con los mismos parámetros y datos se reutiliza (ver pdf_cache).
+    """
+    from .pdf_cache import obtener_pdf
+    from .pdf_paralelo import procesos_para
+    from .utils import (
+        generate_empresas_pdf, generate_empresas_aprobadas_pdf, generate_empresas_seleccionadas_pdf
+    )
+
+    parametros = exportacion.parametros or {}
+
+    if exportacion.tipo == 'aprobadas':
+        empresas = filtrar_empresas_aprobadas(parametros)
+        campos = parametros.get('campos') or CAMPOS_APROBADAS_DEFAULT
+        return obtener_pdf('aprobadas', {**parametros, 'campos': campos}, lambda: generate_empresas_aprobadas_pdf(
+            empresas.filter(tipo_empresa_valor='producto'),
+            empresas.filter(tipo_empresa_valor='servicio'),
+            empresas.filter(tipo_empresa_valor='mixta'),
+            campos,
+            progress_callback=progress_callback,
+            procesos=procesos_para(empresas.count()),
+        ))
+
+    if exportacion.tipo == 'seleccionadas':
+        empresas_ids = [int(id) for id in parametros.get('empresas_ids', [])]
+        campos = parametros.get('campos', [])
+        return obtener_pdf(
+            'seleccionadas',
+            {'empresas_ids': empresas_ids, 'campos': campos},
+            lambda: generate_empresas_seleccionadas_pdf(empresas_ids, campos, progress_callback=progress_callback)
+        )
+
+    if exportacion.tipo == 'empresas':
+        tipo_empresa = parametros.get('tipo', 'producto')
+        empresas = Empresa.objects.filter(tipo_empresa_valor=tipo_empresa).select_related(
+            'departamento', 'municipio', 'localidad', 'id_rubro', 'tipo_empresa'
+        )
+        return obtener_pdf(
+            'empresas',
+            {'tipo': tipo_empresa, 'campos': CAMPOS_EMPRESAS_DEFAULT},
+            lambda: generate_empresas_pdf(
+                empresas, CAMPOS_EMPRESAS_DEFAULT, tipo_empresa, progress_callback=progress_callback
+            )
+        )
+
+    raise ValueError(f'Tipo de exportación desconocido: {exportacion.tipo}')
+
+
+def ejecutar_exportacion(exportacion):
+    """
+    Generar el PDF de una exportación ya reclamada y guardarlo en MEDIA_ROOT.
+    El resultado solo se guarda si la exportación sigue 'procesando': si entretanto
+    se la dio por abandonada se descarta el archivo generado.
+    """
+    try:
+        ExportacionPDF.objects.filter(pk=exportacion.pk).update(progreso=10, fecha_latido=timezone.now())
+        response = _generar_pdf(exportacion, _crear_callback_progreso(exportacion))
+
+        # Reutilizar el nombre que el generador pone en Content-Disposition
+        match = re.search(r'filename="([^"]+)"', response.get('Content-Disposition', ''))
+        nombre = match.group(1) if match else f'exportacion_{exportacion.id}.pdf'
+
+        # Los generadores escriben en un archivo temporal: copiarlo al storage sin leerlo entero.
+        # Se cierra solo el archivo: response.close() emite request_finished, que cierra
+        # la conexión a la base en medio del trabajo (ver benchmark_pdf)
+        archivo = response.file_to_stream
+        try:
+            exportacion.archivo.save(nombre, File(archivo), save=False)
+        finally:
+            archivo.close()
+        exportacion.nombre_archivo = nombre
+        exportacion.estado = 'completada'
+        exportacion.progreso = 100
+        exportacion.error = None
+        logger.info(f"✅ Exportación {exportacion.id} completada: {exportacion.archivo.name}")
+    except Exception as e:
+        logger.error(f"❌ Error en exportación {exportacion.id}: {str(e)}", exc_info=True)
+        exportacion.estado = 'error'
+        exportacion.error = str(e)
+
+    exportacion.fecha_fin = timezone.now()
+    guardada = ExportacionPDF.objects.filter(pk=exportacion.pk, estado='procesando').update(
+        archivo=exportacion.archivo.name or None,
+        nombre_archivo=exportacion.nombre_archivo,
+        estado=exportacion.estado,
+        progreso=exportacion.progreso,
+        error=exportacion.error,
+        fecha_fin=exportacion.fecha_fin,
+    )
+    if not guardada:
+        logger.warning(f"⚠️ Exportación {exportacion.id} liberada durante el proceso: se descarta el resultado")
+        if exportacion.archivo:
+            exportacion.archivo.delete(save=False)
+        exportacion.refresh_from_db()
+    return exportacion
+
+
+def liberar_exportaciones_abandonadas():
+    """
+    Marcar como error las exportaciones 'procesando' cuyo worker dejó de dar
+    latidos (ver _crear_callback_progreso) durante EXPORTACIONES_PDF_TIMEOUT_MINUTOS.
+    """
+    minutos = getattr(settings, 'EXPORTACIONES_PDF_TIMEOUT_MINUTOS', 30)
+    limite = timezone.now() - timedelta(minutes=minutos)
+    return ExportacionPDF.objects.alias(
+        ultimo_latido=Coalesce('fecha_latido', 'fecha_inicio')
+    ).filter(estado='procesando', ultimo_latido__lt=limite).update(
+        estado='error',
+        error='La exportación excedió el tiempo máximo de procesamiento',
+        fecha_fin=timezone.now(),
+    )
+
+
+def purgar_exportaciones_vencidas():
+    """Eliminar exportaciones finalizadas (y sus archivos) más antiguas que la retención configurada"""
+    horas = getattr(settings, 'EXPORTACIONES_PDF_RETENCION_HORAS', 24)
+    limite = timezone.now() - timedelta(hours=horas)
+    vencidas = ExportacionPDF.objects.filter(
+        estado__in=['completada', 'error'], fecha_creacion__lt=limite
+    )
+    eliminadas = 0
+    for exportacion in vencidas.iterator():
+        if exportacion.archivo:
+            exportacion.archivo.delete(save=False)
+        exportacion.delete()
+        eliminadas += 1
+    return eliminadas
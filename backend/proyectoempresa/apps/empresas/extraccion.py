@@ -0,0 +1,380 @@
+"""
+Extracción de valores de empresas para las exportaciones (PDF, CSV, XLSX).
+
+Los campos seleccionados se compilan una sola vez en un PlanExtraccion: cada
+columna queda resuelta a una función que recibe la fila y devuelve el valor,
+sin recorrer la cadena de casos por cada celda. Los valores derivados que
+comparten varias columnas (actividades de promoción, matriz de clasificación)
+se calculan una vez por fila en FilaEmpresa.
+"""
+import csv
+
+# Mapeo de campos del frontend a campos de la base de datos y secciones
+CAMPOS_EXPORTACION = {
+    # Información Básica
+    'razon_social': {'field': 'razon_social', 'section': 'basica', 'label': 'Razón Social'},
+    'nombre_fantasia': {'field': 'nombre_fantasia', 'section': 'basica', 'label': 'Nombre de Fantasía'},
+    'cuit_cuil': {'field': 'cuit_cuil', 'section': 'basica', 'label': 'CUIT/CUIL'},
+    'tipo_sociedad': {'field': 'tipo_sociedad', 'section': 'basica', 'label': 'Tipo de Sociedad'},
+    'tipo_empresa': {'field': 'tipo_empresa', 'section': 'basica', 'label': 'Tipo de Empresa'},
+    'fecha_creacion': {'field': 'fecha_creacion', 'section': 'basica', 'label': 'Fecha de Registro'},
+
+    # Rubro y Categorización
+    'rubro_principal': {'field': 'rubro_nombre', 'section': 'basica', 'label': 'Rubro Principal'},
+    'categoria_matriz': {'field': 'categoria_matriz', 'section': 'basica', 'label': 'Categoría Matriz'},
+
+    # Ubicación
+    'departamento': {'field': 'departamento_nombre', 'section': 'basica', 'label': 'Departamento'},
+    'municipio': {'field': 'municipio_nombre', 'section': 'basica', 'label': 'Municipio'},
+    'localidad': {'field': 'localidad_nombre', 'section': 'basica', 'label': 'Localidad'},
+    'direccion': {'field': 'direccion', 'section': 'basica', 'label': 'Dirección'},
+    'codigo_postal': {'field': 'codigo_postal', 'section': 'basica', 'label': 'Código Postal'},
+    'provincia': {'field': 'provincia', 'section': 'basica', 'label': 'Provincia'},
+    'geolocalizacion': {'field': 'geolocalizacion', 'section': 'basica', 'label': 'Geolocalización'},
+
+    # Contacto
+    'telefono': {'field': 'telefono', 'section': 'contacto', 'label': 'Teléfono'},
+    'correo': {'field': 'correo', 'section': 'contacto', 'label': 'Email'},
+    'sitioweb': {'field': 'sitioweb', 'section': 'contacto', 'label': 'Sitio Web'},
+    'email_secundario': {'field': 'email_secundario', 'section': 'contacto', 'label': 'Email Secundario'},
+    'email_terciario': {'field': 'email_terciario', 'section': 'contacto', 'label': 'Email Terciario'},
+
+    # Contacto Principal
+    'contacto_principal_nombre': {'field': 'contacto_principal_nombre', 'section': 'contacto', 'label': 'Contacto Principal - Nombre'},
+    'contacto_principal_apellido': {'field': 'contacto_principal_apellido', 'section': 'contacto', 'label': 'Contacto Principal - Apellido'},
+    'contacto_principal_cargo': {'field': 'contacto_principal_cargo', 'section': 'contacto', 'label': 'Contacto Principal - Cargo'},
+    'contacto_principal_telefono': {'field': 'contacto_principal_telefono', 'section': 'contacto', 'label': 'Contacto Principal - Teléfono'},
+    'contacto_principal_email': {'field': 'contacto_principal_email', 'section': 'contacto', 'label': 'Contacto Principal - Email'},
+
+    # Contacto Secundario
+    'contacto_secundario_nombre': {'field': 'contacto_secundario_nombre', 'section': 'contacto', 'label': 'Contacto Secundario - Nombre'},
+    'contacto_secundario_apellido': {'field': 'contacto_secundario_apellido', 'section': 'contacto', 'label': 'Contacto Secundario - Apellido'},
+    'contacto_secundario_cargo': {'field': 'contacto_secundario_cargo', 'section': 'contacto', 'label': 'Contacto Secundario - Cargo'},
+    'contacto_secundario_telefono': {'field': 'contacto_secundario_telefono', 'section': 'contacto', 'label': 'Contacto Secundario - Teléfono'},
+    'contacto_secundario_email': {'field': 'contacto_secundario_email', 'section': 'contacto', 'label': 'Contacto Secundario - Email'},
+
+    # Actividad Comercial
+    'exporta': {'field': 'exporta', 'section': 'comercial', 'label': '¿Exporta?'},
+    'destinoexporta': {'field': 'destinoexporta', 'section': 'comercial', 'label': 'Destino de Exportación'},
+    'importa': {'field': 'importa', 'section': 'comercial', 'label': '¿Importa?'},
+    'interes_exportar': {'field': 'interes_exportar', 'section': 'comercial', 'label': 'Interés en Exportar'},
+
+    # Certificaciones
+    'certificadopyme': {'field': 'certificadopyme', 'section': 'comercial', 'label': 'Certificado MiPYME'},
+    'certificaciones': {'field': 'certificaciones', 'section': 'comercial', 'label': 'Certificaciones'},
+
+    # Promoción y Material
+    'promo2idiomas': {'field': 'promo2idiomas', 'section': 'comercial', 'label': 'Material en Múltiples Idiomas'},
+    'idiomas_trabaja': {'field': 'idiomas_trabaja', 'section': 'comercial', 'label': 'Idiomas de Trabajo'},
+
+    # Actividades de Internacionalización
+    'ferias': {'field': 'ferias', 'section': 'comercial', 'label': 'Ferias'},
+    'rondas': {'field': 'rondas', 'section': 'comercial', 'label': 'Rondas de Negocios'},
+    'misiones': {'field': 'misiones', 'section': 'comercial', 'label': 'Misiones Comerciales'},
+
+    # Otros
+    'observaciones': {'field': 'observaciones', 'section': 'comercial', 'label': 'Observaciones'},
+}
+
+SECCIONES_EXPORTACION = ('basica', 'contacto', 'comercial')
+
+# Campos que se muestran en minúsculas (correos y sitios web)
+CAMPOS_EN_MINUSCULAS = {
+    'correo', 'sitioweb', 'email_secundario', 'email_terciario',
+    'contacto_principal_email', 'contacto_secundario_email',
+}
+
+
+def resolver_campo(campo_id):
+    """Información de columna (field, section, label) para un campo pedido por el frontend"""
+    if campo_id in CAMPOS_EXPORTACION:
+        return dict(CAMPOS_EXPORTACION[campo_id])
+
+    # Si viene un campo que no está en el mapeo, inferir la sección por el nombre
+    section = 'basica'
+    if campo_id in ['correo', 'telefono', 'sitioweb', 'contacto_principal_nombre', 'contacto_principal_email']:
+        section = 'contacto'
+    elif campo_id in ['exporta', 'importa', 'destinoexporta', 'certificadopyme', 'certificaciones']:
+        section = 'comercial'
+
+    return {
+        'field': campo_id,
+        'section': section,
+        'label': campo_id.replace('_', ' ').title()
+    }
+
+
+# Atributo donde prefetch_matrices deja las matrices de cada empresa (la más reciente primero)
+ATRIBUTO_MATRICES = 'matrices_recientes'
+
+
+def prefetch_matrices():
+    """Prefetch de clasificaciones_exportador que comparten la extracción y los generadores de PDF"""
+    from django.db.models import Prefetch
+    from .models import MatrizClasificacionExportador
+
+    return Prefetch(
+        'clasificaciones_exportador',
+        queryset=MatrizClasificacionExportador.objects.order_by('-fecha_evaluacion'),
+        to_attr=ATRIBUTO_MATRICES,
+    )
+
+
+def con_matrices(empresas):
+    """Agregar prefetch_matrices a un queryset si todavía no lo tiene (otros iterables se devuelven igual)"""
+    if not hasattr(empresas, 'prefetch_related'):
+        return empresas
+    if any(getattr(lookup, 'prefetch_to', None) == ATRIBUTO_MATRICES for lookup in empresas._prefetch_related_lookups):
+        return empresas
+    return empresas.prefetch_related(prefetch_matrices())
+
+
+def matriz_reciente(empresa):
+    """
+    Matriz de clasificación más reciente de la empresa (o None).
+    Con prefetch_matrices no consulta la base; .first() haría una consulta por fila.
+    """
+    matrices = getattr(empresa, ATRIBUTO_MATRICES, None)
+    if matrices is None:
+        # Sin el prefetch compartido .all() aprovecha un prefetch_related('clasificaciones_exportador')
+        matrices = empresa.clasificaciones_exportador.all()
+    return matrices[0] if matrices else None
+
+
+def preparar_queryset(empresas):
+    """
+    Cargar en `empresas` solo las relaciones que leen los accesores, para que la
+    extracción no haga consultas por fila: una consulta de empresas más una de matrices
+    (por cada bloque si se recorre con .iterator(chunk_size=...)).
+    """
+    return empresas.select_related(
+        'tipo_empresa', 'id_rubro', 'id_subrubro', 'id_subrubro_producto', 'id_subrubro_servicio',
+        'departamento__provincia', 'municipio', 'localidad'
+    ).prefetch_related(None).prefetch_related(prefetch_matrices())
+
+
+class FilaEmpresa:
+    """Una empresa durante la extracción: memoriza los valores derivados que usan varias columnas"""
+
+    __slots__ = ('empresa', '_actividades', '_matriz')
+
+    _SIN_CALCULAR = object()
+
+    def __init__(self, empresa):
+        self.empresa = empresa
+        self._actividades = None
+        self._matriz = self._SIN_CALCULAR
+
+    @property
+    def actividades(self):
+        if self._actividades is None:
+            from .utils import extraer_actividades_promocion
+            self._actividades = extraer_actividades_promocion(self.empresa)
+        return self._actividades
+
+    @property
+    def matriz(self):
+        if self._matriz is self._SIN_CALCULAR:
+            self._matriz = matriz_reciente(self.empresa)
+        return self._matriz
+
+
+# Accesores de campos que no son atributos directos de Empresa
+
+def _nombre_relacion(atributo):
+    def accesor(fila):
+        relacion = getattr(fila.empresa, atributo)
+        if relacion:
+            return getattr(relacion, 'nombre', None) or str(relacion)
+        return '-'
+    return accesor
+
+
+def _actividad(tipo):
+    def accesor(fila):
+        items = fila.actividades.get(tipo, [])
+        return ', '.join(items) if items else '-'
+    return accesor
+
+
+def _sub_rubro_nombre(fila):
+    empresa = fila.empresa
+    # Para empresas mixtas, mostrar ambos subrubros si existen
+    if empresa.tipo_empresa_valor == 'mixta':
+        sub_prod = empresa.id_subrubro_producto.nombre if empresa.id_subrubro_producto else None
+        sub_serv = empresa.id_subrubro_servicio.nombre if empresa.id_subrubro_servicio else None
+        if sub_prod and sub_serv:
+            return f"{sub_prod} / {sub_serv}"
+        return sub_prod or sub_serv or '-'
+    return empresa.id_subrubro.nombre if empresa.id_subrubro else '-'
+
+
+def _tipo_empresa(fila):
+    empresa = fila.empresa
+    if empresa.tipo_empresa:
+        return empresa.tipo_empresa.nombre
+    return empresa.tipo_empresa_valor or '-'
+
+
+def _provincia(fila):
+    # La provincia viene del departamento
+    departamento = fila.empresa.departamento
+    if departamento and departamento.provincia:
+        return departamento.provincia.nombre
+    return 'Catamarca'  # Valor por defecto
+
+
+def _categoria_matriz(fila):
+    matriz = fila.matriz
+    if matriz:
+        return matriz.get_categoria_display()
+    return 'N/A'
+
+
+def _actividades_promocion(fila):
+    actividades = fila.actividades
+    result = []
+    if actividades['ferias']:
+        result.append(f"Ferias: {', '.join(actividades['ferias'])}")
+    if actividades['rondas']:
+        result.append(f"Rondas: {', '.join(actividades['rondas'])}")
+    if actividades['misiones']:
+        result.append(f"Misiones: {', '.join(actividades['misiones'])}")
+    return '; '.join(result) if result else '-'
+
+
+def _estado(fila):
+    # Empresa no guarda relación con la solicitud de registro: toda empresa exportada está aprobada
+    return 'Aprobada'
+
+
+ACCESORES_ESPECIALES = {
+    'ferias': _actividad('ferias'),
+    'rondas': _actividad('rondas'),
+    'misiones': _actividad('misiones'),
+    'rubro_nombre': _nombre_relacion('id_rubro'),
+    'sub_rubro_nombre': _sub_rubro_nombre,
+    'departamento_nombre': _nombre_relacion('departamento'),
+    'municipio_nombre': _nombre_relacion('municipio'),
+    'localidad_nombre': _nombre_relacion('localidad'),
+    'tipo_empresa': _tipo_empresa,
+    'provincia': _provincia,
+    'categoria_matriz': _categoria_matriz,
+    'actividades_promocion_internacional': _actividades_promocion,
+    'estado': _estado,
+}
+
+
+_SIN_VALOR = object()
+
+
+def _formatear_dinamico(value):
+    """Formato para atributos cuyo tipo no se conoce de antemano"""
+    if hasattr(value, 'strftime'):
+        return value.strftime('%d/%m/%Y')
+    if isinstance(value, bool):
+        return 'Sí' if value else 'No'
+    if value.__class__.__name__ == 'Decimal':
+        return str(value)
+    return value
+
+
+def _atributo(field_name):
+    """Accesor para un atributo directo de Empresa, con el formato elegido según el tipo de campo"""
+    from django.core.exceptions import FieldDoesNotExist
+    from .models import Empresa
+
+    try:
+        campo = Empresa._meta.get_field(field_name)
+    except FieldDoesNotExist:
+        campo = None
+    tipo = campo.get_internal_type() if campo is not None and campo.concrete else None
+
+    if tipo in ('DateField', 'DateTimeField'):
+        def accesor(fila):
+            value = getattr(fila.empresa, field_name)
+            return value.strftime('%d/%m/%Y') if value is not None else value
+    elif tipo == 'BooleanField':
+        def accesor(fila):
+            value = getattr(fila.empresa, field_name)
+            if value is None:
+                return value
+            return 'Sí' if value else 'No'
+    elif tipo == 'DecimalField':
+        def accesor(fila):
+            value = getattr(fila.empresa, field_name)
+            return str(value) if value is not None else value
+    elif tipo is not None and not campo.is_relation:
+        def accesor(fila):
+            return getattr(fila.empresa, field_name)
+    else:
+        # Propiedades, relaciones o atributos desconocidos: se resuelven por fila
+        def accesor(fila):
+            value = getattr(fila.empresa, field_name, _SIN_VALOR)
+            if value is _SIN_VALOR:
+                return '-'
+            return _formatear_dinamico(value)
+    return accesor
+
+
+def compilar_accesor(field_name):
+    """Función fila -> valor para un campo (field de CAMPOS_EXPORTACION)"""
+    if field_name in ACCESORES_ESPECIALES:
+        return ACCESORES_ESPECIALES[field_name]
+    return _atributo(field_name)
+
+
+def a_texto(value):
+    """Valor extraído como texto plano (CSV, XLSX)"""
+    if value is None:
+        return '-'
+    if isinstance(value, bool):
+        return 'Sí' if value else 'No'
+    if isinstance(value, (list, tuple)):
+        return ', '.join(str(item) for item in value)
+    return str(value)
+
+
+class PlanExtraccion:
+    """
+    Campos seleccionados compilados una sola vez.
+    `columnas` mantiene el orden pedido; cada columna tiene 'indice' dentro de los valores de la fila.
+    `secciones` agrupa las mismas columnas por sección, como las presenta el PDF.
+    """
+
+    def __init__(self, campos_seleccionados):
+        self.columnas = []
+        self.secciones = {seccion: [] for seccion in SECCIONES_EXPORTACION}
+        for indice, campo_id in enumerate(campos_seleccionados):
+            columna = resolver_campo(campo_id)
+            columna['indice'] = indice
+            self.columnas.append(columna)
+            self.secciones[columna['section']].append(columna)
+        self._accesores = [compilar_accesor(columna['field']) for columna in self.columnas]
+
+    @property
+    def encabezados(self):
+        return [columna['label'] for columna in self.columnas]
+
+    def valores(self, empresa):
+        """Valores de todas las columnas para una empresa"""
+        fila = FilaEmpresa(empresa)
+        return [accesor(fila) for accesor in self._accesores]
+
+    def textos(self, empresa):
+        """Valores de todas las columnas como texto plano"""
+        return [a_texto(value) for value in self.valores(empresa)]
+
+
+def escribir_csv(archivo, plan, empresas):
+    """
+    Escribir en `archivo` (modo texto) una fila por empresa con las columnas del plan.
+    `empresas` es un iterable de (tipo, empresa). Retorna la cantidad de filas escritas.
+    """
+    writer = csv.writer(archivo)
+    writer.writerow(['Tipo'] + plan.encabezados)
+    filas = 0
+    for tipo, empresa in empresas:
+        writer.writerow([tipo] + plan.textos(empresa))
+        filas += 1
+    return filas
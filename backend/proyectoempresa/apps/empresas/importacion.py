@@ -0,0 +1,651 @@
+"""
+Importación masiva de empresas desde CSV o XLSX.
+
+Las vistas solo guardan el archivo y crean una ImportacionEmpresas pendiente;
+el comando procesar_importaciones la procesa en segundo plano:
+
+1. El archivo se lee en streaming (csv.reader sobre el archivo abierto u
+   openpyxl en modo read_only): nunca se arma la planilla completa en memoria.
+2. Las filas se validan por lotes de IMPORTACION_TAMANO_LOTE con los mismos
+   campos del modelo; geografía (nomenclador), rubros y tipos de empresa se
+   resuelven en memoria y los CUITs/emails existentes con una consulta por lote.
+3. En PostgreSQL las filas válidas se cargan con COPY en una tabla temporal y se
+   pasan a `empresa` con un único INSERT ... ON CONFLICT (cuit_cuil): decenas de
+   miles de empresas se cargan en segundos. En otros motores (tests) se usan
+   bulk_create/bulk_update.
+
+En modo simulación solo se valida y se informa cuántas empresas se crearían,
+actualizarían u omitirían, con los errores de cada fila. La carga es atómica:
+si falla, no queda ninguna empresa a medias.
+
+Los usuarios de las empresas nuevas se crean sin contraseña utilizable (hashear
+el CUIT de cada fila llevaría minutos); la campaña de notificación de
+credenciales les asigna el CUIT como contraseña inicial al enviarles el email.
+"""
+import csv
+import io
+import logging
+import re
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.core.validators import normalizar_cuit, cuit_verificador_valido
+from apps.geografia.nomenclador import normalizar_nombre, obtener_nomenclador
+from .extraccion import CAMPOS_EXPORTACION
+from .models import Empresa, ImportacionEmpresas, Rubro, TipoEmpresa
+
+logger = logging.getLogger(__name__)
+
+# Columnas que se copian a la empresa validadas con el campo del modelo
+CAMPOS_DIRECTOS = [
+    'razon_social', 'nombre_fantasia', 'tipo_sociedad',
+    'direccion', 'codigo_postal', 'direccion_comercial', 'codigo_postal_comercial', 'geolocalizacion',
+    'telefono', 'correo', 'sitioweb', 'email_secundario', 'email_terciario',
+    'contacto_principal_nombre', 'contacto_principal_apellido', 'contacto_principal_cargo',
+    'contacto_principal_telefono', 'contacto_principal_email',
+    'contacto_secundario_nombre', 'contacto_secundario_apellido', 'contacto_secundario_cargo',
+    'contacto_secundario_telefono', 'contacto_secundario_email',
+    'exporta', 'destinoexporta', 'tipoexporta', 'certificaciones', 'idiomas_trabaja',
+    'descripcion', 'observaciones',
+]
+CAMPOS_BOOLEANOS = [
+    'importa', 'interes_exportar', 'certificadopyme', 'certificacionesbool', 'promo2idiomas',
+    'participoferianacional', 'participoferiainternacional',
+]
+CAMPOS_TELEFONO = ['telefono', 'contacto_principal_telefono', 'contacto_secundario_telefono']
+
+# Columnas que se resuelven contra otras tablas y campos de la empresa que escriben
+CAMPOS_RELACIONADOS = {
+    'tipo_empresa': ['tipo_empresa_id', 'tipo_empresa_valor'],
+    'rubro_principal': ['id_rubro_id'],
+    'departamento': ['departamento_id'],
+    'municipio': ['municipio_id'],
+    'localidad': ['localidad_id'],
+}
+
+COLUMNAS = ['cuit_cuil', *CAMPOS_DIRECTOS, *CAMPOS_BOOLEANOS, *CAMPOS_RELACIONADOS]
+
+OBLIGATORIAS = [
+    'cuit_cuil', 'razon_social', 'direccion', 'departamento', 'rubro_principal', 'tipo_empresa',
+    'contacto_principal_nombre', 'contacto_principal_cargo',
+    'contacto_principal_telefono', 'contacto_principal_email',
+]
+
+TIPOS_EMPRESA = {
+    'producto': 'producto', 'productos': 'producto', 'solo productos': 'producto',
+    'servicio': 'servicio', 'servicios': 'servicio', 'solo servicios': 'servicio',
+    'mixta': 'mixta', 'productos y servicios': 'mixta',
+}
+VERDADEROS = {'si', 's', 'true', 'verdadero', '1', 'x'}
+FALSOS = {'no', 'n', 'false', 'falso', '0'}
+
+
+class ArchivoInvalido(Exception):
+    """El archivo no se puede importar (formato, encabezados o tamaño): no se procesa ninguna fila"""
+
+
+def formato_de(nombre):
+    """'csv' o 'xlsx' según la extensión del archivo"""
+    extension = (nombre or '').rsplit('.', 1)[-1].lower()
+    if extension not in ('csv', 'xlsx'):
+        raise ArchivoInvalido('El archivo debe ser .csv o .xlsx')
+    return extension
+
+
+def _alias_encabezados():
+    """Encabezado normalizado -> columna: nombre del campo, etiqueta de la exportación o verbose_name"""
+    alias = {}
+    for columna in COLUMNAS:
+        nombres = [columna, columna.replace('_', ' ')]
+        if columna in CAMPOS_EXPORTACION:
+            nombres.append(CAMPOS_EXPORTACION[columna]['label'])
+        if columna not in CAMPOS_RELACIONADOS:
+            nombres.append(str(Empresa._meta.get_field(columna).verbose_name))
+        for nombre in nombres:
+            alias.setdefault(normalizar_nombre(nombre), columna)
+    alias['rubro'] = 'rubro_principal'
+    return alias
+
+
+def _texto(valor):
+    """Valor de una celda como texto (los números de Excel llegan como int o float)"""
+    if valor is None:
+        return ''
+    if isinstance(valor, bool):
+        return 'Sí' if valor else 'No'
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    return str(valor).strip()
+
+
+def _filas_csv(archivo):
+    """Filas de un CSV: detecta UTF-8 / Windows-1252 (Excel en español) y el separador"""
+    inicio = archivo.read(64 * 1024)
+    archivo.seek(0)
+    try:
+        inicio.decode('utf-8')
+        encoding = 'utf-8-sig'
+    except UnicodeDecodeError as e:
+        # Un corte a la mitad de un carácter multibyte al final del bloque no cuenta
+        encoding = 'utf-8-sig' if e.start >= len(inicio) - 3 else 'cp1252'
+    texto = io.TextIOWrapper(archivo, encoding=encoding, newline='')
+    muestra = inicio.decode(encoding, errors='ignore')
+    try:
+        dialecto = csv.Sniffer().sniff(muestra.split('\n', 1)[0], delimiters=',;\t')
+    except csv.Error:
+        dialecto = csv.excel
+    try:
+        yield from csv.reader(texto, dialecto)
+    finally:
+        texto.detach()
+
+
+def _filas_xlsx(archivo):
+    """Filas de la primera hoja de un XLSX leída en modo read_only"""
+    from openpyxl import load_workbook
+
+    try:
+        libro = load_workbook(archivo, read_only=True, data_only=True)
+    except Exception as e:
+        raise ArchivoInvalido(f'No se pudo leer el archivo Excel: {str(e)}')
+    try:
+        yield from libro.worksheets[0].iter_rows(values_only=True)
+    finally:
+        libro.close()
+
+
+def _columnas(encabezados):
+    """Columna importable de cada encabezado (None si no corresponde a ninguna)"""
+    alias = _alias_encabezados()
+    return [alias.get(normalizar_nombre(_texto(encabezado))) for encabezado in encabezados]
+
+
+def leer_filas(archivo, formato):
+    """
+    (número de fila, {columna: texto}) por cada fila con datos. La primera fila son
+    los encabezados; los que no corresponden a una columna importable se ignoran.
+    """
+    filas = _filas_xlsx(archivo) if formato == 'xlsx' else _filas_csv(archivo)
+    encabezados = next(filas, None)
+    if not encabezados:
+        raise ArchivoInvalido('El archivo está vacío')
+
+    columnas = _columnas(encabezados)
+    faltantes = [columna for columna in OBLIGATORIAS if columna not in columnas]
+    if faltantes:
+        raise ArchivoInvalido(f'Faltan columnas obligatorias: {", ".join(faltantes)}')
+
+    maximo = getattr(settings, 'IMPORTACION_MAX_FILAS', 100_000)
+    leidas = 0
+    for numero, fila in enumerate(filas, start=2):
+        datos = {
+            columna: _texto(valor)
+            for columna, valor in zip(columnas, fila) if columna
+        }
+        if not any(datos.values()):
+            continue
+        leidas += 1
+        if leidas > maximo:
+            raise ArchivoInvalido(f'El archivo supera el máximo de {maximo} filas')
+        yield numero, datos
+
+
+def columnas_presentes(archivo, formato):
+    """Columnas importables del encabezado (las que se actualizan en empresas existentes)"""
+    filas = _filas_xlsx(archivo) if formato == 'xlsx' else _filas_csv(archivo)
+    try:
+        encabezados = next(filas, None) or []
+    finally:
+        filas.close()
+    return {columna for columna in _columnas(encabezados) if columna}
+
+
+class Referencias:
+    """Rubros, tipos de empresa y geografía resueltos en memoria durante la importación"""
+
+    def __init__(self, crear_tipos):
+        self.nomenclador = obtener_nomenclador()
+        self.rubros = {}
+        # Si hay rubros con el mismo nombre se prefiere el activo
+        for id, nombre, activo in Rubro.objects.order_by('activo', '-id').values_list('id', 'nombre', 'activo'):
+            self.rubros[normalizar_nombre(nombre)] = id
+        self.tipos = {
+            tipo.nombre.lower(): tipo.id
+            for tipo in TipoEmpresa.objects.filter(nombre__in=['Producto', 'Servicio', 'Mixta'])
+        }
+        self.crear_tipos = crear_tipos
+
+    def tipo_empresa(self, valor):
+        """id del TipoEmpresa (como lo crea el registro: 'Producto', 'Servicio', 'Mixta')"""
+        if valor not in self.tipos and self.crear_tipos:
+            tipo, _ = TipoEmpresa.objects.get_or_create(nombre=valor.title())
+            self.tipos[valor] = tipo.id
+        return self.tipos.get(valor)
+
+
+def _opciones(campo):
+    """Valor normalizado o etiqueta -> valor de las choices del campo"""
+    opciones = {}
+    for valor, etiqueta in campo.choices:
+        opciones[normalizar_nombre(valor)] = valor
+        opciones[normalizar_nombre(etiqueta)] = valor
+    return opciones
+
+
+def _validar_directo(campo, texto):
+    if campo.name in CAMPOS_TELEFONO:
+        texto = re.sub(r'[\s\-().]', '', texto)
+    if campo.name == 'sitioweb' and texto and '://' not in texto:
+        texto = f'https://{texto}'
+    if campo.choices and texto:
+        texto = _opciones(campo).get(normalizar_nombre(texto), texto)
+    if texto == '' and campo.null:
+        return None
+    return campo.clean(texto, None)
+
+
+def validar_fila(datos, referencias):
+    """
+    Validar una fila. Devuelve (valores, errores): valores por attname de Empresa
+    y errores {columna: mensaje}.
+    """
+    valores = {}
+    errores = {}
+
+    cuit = normalizar_cuit(datos.get('cuit_cuil'))
+    if not cuit:
+        errores['cuit_cuil'] = 'Campo obligatorio'
+    elif not cuit_verificador_valido(cuit):
+        errores['cuit_cuil'] = 'CUIT/CUIL inválido'
+    valores['cuit_cuil'] = cuit
+
+    for nombre in CAMPOS_DIRECTOS:
+        if nombre not in datos:
+            continue
+        campo = Empresa._meta.get_field(nombre)
+        try:
+            valores[nombre] = _validar_directo(campo, datos[nombre])
+        except ValidationError as e:
+            errores[nombre] = ' '.join(e.messages)
+
+    for nombre in CAMPOS_BOOLEANOS:
+        if nombre not in datos:
+            continue
+        texto = normalizar_nombre(datos[nombre])
+        if texto in VERDADEROS:
+            valores[nombre] = True
+        elif texto in FALSOS:
+            valores[nombre] = False
+        elif not texto:
+            valores[nombre] = None
+        else:
+            errores[nombre] = f'Valor no reconocido: {datos[nombre]} (usar Sí o No)'
+
+    tipo = TIPOS_EMPRESA.get(normalizar_nombre(datos.get('tipo_empresa')))
+    if tipo is None:
+        errores['tipo_empresa'] = f'Tipo de empresa no válido: {datos.get("tipo_empresa")} (producto, servicio o mixta)'
+    else:
+        valores['tipo_empresa_valor'] = tipo
+        valores['tipo_empresa_id'] = referencias.tipo_empresa(tipo)
+
+    rubro = datos.get('rubro_principal')
+    valores['id_rubro_id'] = referencias.rubros.get(normalizar_nombre(rubro))
+    if valores['id_rubro_id'] is None:
+        errores['rubro_principal'] = f'Rubro desconocido: {rubro}' if rubro else 'Campo obligatorio'
+
+    nomenclador = referencias.nomenclador
+    departamento = nomenclador.resolver('departamento', datos.get('departamento'))
+    if departamento is None:
+        errores['departamento'] = f'Departamento desconocido: {datos.get("departamento")}' if datos.get('departamento') else 'Campo obligatorio'
+    else:
+        valores['departamento_id'] = departamento.id
+        for nivel in ('municipio', 'localidad'):
+            if nivel not in datos:
+                continue
+            lugar = nomenclador.resolver(nivel, datos[nivel], departamento.id) if datos[nivel] else None
+            if datos[nivel] and lugar is None:
+                errores[nivel] = f'{datos[nivel]} no pertenece al departamento {departamento.nombre}'
+            valores[f'{nivel}_id'] = lugar.id if lugar else None
+
+    return valores, errores
+
+
+class Resumen:
+    """Contadores y errores por fila de una importación"""
+
+    def __init__(self):
+        self.total_filas = 0
+        self.validas = 0
+        self.creadas = 0
+        self.actualizadas = 0
+        self.omitidas = 0
+        self.con_errores = 0
+        self.errores = []
+        self.max_errores = getattr(settings, 'IMPORTACION_MAX_ERRORES', 1000)
+
+    def error(self, fila, cuit, errores):
+        self.con_errores += 1
+        if len(self.errores) < self.max_errores:
+            self.errores.append({'fila': fila, 'cuit_cuil': cuit, 'errores': errores})
+
+
+def _lotes(iterable, tamano):
+    iterador = iter(iterable)
+    while lote := list(islice(iterador, tamano)):
+        yield lote
+
+
+def _usuarios_por_email(filas):
+    """
+    id del usuario de cada email (el correo de la empresa o el del contacto principal).
+    Los que no existen se crean con rol Empresa y sin contraseña utilizable.
+    """
+    from apps.core.models import Usuario
+    from apps.registro.views import obtener_rol_empresa
+
+    por_email = {}
+    for valores in filas:
+        email = (valores.get('correo') or valores['contacto_principal_email']).lower()
+        por_email.setdefault(email, valores)
+
+    ids = dict(Usuario.objects.filter(email__in=list(por_email)).values_list('email', 'id'))
+    rol_empresa = obtener_rol_empresa()
+    nuevos = [
+        Usuario(
+            email=email,
+            nombre=(valores['contacto_principal_nombre'] or '')[:50],
+            apellido=(valores.get('contacto_principal_apellido') or '')[:50],
+            telefono=valores['contacto_principal_telefono'],
+            rol=rol_empresa,
+            is_active=True,
+            debe_cambiar_password=True,
+            password=make_password(None),
+        )
+        for email, valores in por_email.items() if email not in ids
+    ]
+    if nuevos:
+        # ignore_conflicts: otro proceso pudo crear el mismo usuario mientras tanto
+        Usuario.objects.bulk_create(nuevos, batch_size=1000, ignore_conflicts=True)
+        ids.update(Usuario.objects.filter(email__in=[u.email for u in nuevos]).values_list('email', 'id'))
+        logger.info(f"👤 {len(nuevos)} usuarios de empresa creados por la importación")
+    return ids
+
+
+class CargaCopy:
+    """
+    Carga en PostgreSQL: COPY a una tabla temporal con las mismas columnas que
+    `empresa` y un único INSERT ... SELECT ... ON CONFLICT (cuit_cuil).
+    """
+    TABLA = 'importacion_empresas_staging'
+
+    def __init__(self, campos_actualizar, actualizar_existentes):
+        self.campos = [campo for campo in Empresa._meta.concrete_fields if not campo.primary_key]
+        self.campos_actualizar = campos_actualizar
+        self.actualizar_existentes = actualizar_existentes
+        quote = connection.ops.quote_name
+        self.columnas = ', '.join(quote(campo.column) for campo in self.campos)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMP TABLE {self.TABLA} ON COMMIT DROP AS '
+                f'SELECT {self.columnas} FROM {quote(Empresa._meta.db_table)} WITH NO DATA'
+            )
+
+    def agregar(self, empresas):
+        with connection.cursor() as cursor:
+            with cursor.copy(f'COPY {self.TABLA} ({self.columnas}) FROM STDIN') as copia:
+                for empresa in empresas:
+                    # Igual que bulk_create: pre_save completa auto_now y get_db_prep_save adapta el valor
+                    copia.write_row([
+                        campo.get_db_prep_save(campo.pre_save(empresa, True), connection)
+                        for campo in self.campos
+                    ])
+
+    def finalizar(self):
+        """Pasar la tabla temporal a `empresa`. Devuelve (creadas, actualizadas, CUITs creados)"""
+        quote = connection.ops.quote_name
+        tabla = quote(Empresa._meta.db_table)
+        if self.actualizar_existentes:
+            asignaciones = ', '.join(
+                f'{quote(campo.column)} = EXCLUDED.{quote(campo.column)}'
+                for campo in self.campos if campo.attname in self.campos_actualizar
+            )
+            conflicto = f'DO UPDATE SET {asignaciones} WHERE {tabla}.{quote("eliminado")} = false'
+        else:
+            conflicto = 'DO NOTHING'
+        with connection.cursor() as cursor:
+            # xmax = 0 solo en las filas insertadas (en las actualizadas es el id de la transacción)
+            cursor.execute(
+                f'INSERT INTO {tabla} ({self.columnas}) SELECT {self.columnas} FROM {self.TABLA} '
+                f'ON CONFLICT ({quote("cuit_cuil")}) {conflicto} '
+                f'RETURNING {quote("cuit_cuil")}, (xmax = 0)'
+            )
+            resultado = cursor.fetchall()
+        creados = [cuit for cuit, insertada in resultado if insertada]
+        return len(creados), len(resultado) - len(creados), creados
+
+
+class CargaORM:
+    """Carga con bulk_create/bulk_update para motores sin COPY"""
+
+    def __init__(self, campos_actualizar, actualizar_existentes):
+        self.campos_actualizar = [campo for campo in campos_actualizar if campo != 'cuit_cuil']
+        self.creadas = []
+        self.actualizadas = 0
+
+    def agregar(self, empresas):
+        nuevas = [empresa for empresa in empresas if empresa.pk is None]
+        existentes = [empresa for empresa in empresas if empresa.pk is not None]
+        Empresa.objects.bulk_create(nuevas, batch_size=500)
+        if existentes:
+            Empresa.all_objects.bulk_update(existentes, self.campos_actualizar, batch_size=500)
+        self.creadas.extend(empresa.cuit_cuil for empresa in nuevas)
+        self.actualizadas += len(existentes)
+
+    def finalizar(self):
+        return len(self.creadas), self.actualizadas, self.creadas
+
+
+def procesar_importacion(importacion):
+    """
+    Validar (y si no es simulación, cargar) el archivo de una importación.
+    Devuelve el Resumen; lanza ArchivoInvalido si el archivo no se puede importar.
+    """
+    from apps.registro.cuits import agregar_cuits
+    from .pdf_cache import invalidar_version_datos
+
+    tamano = getattr(settings, 'IMPORTACION_TAMANO_LOTE', 2000)
+    actualizar = importacion.actualizar_existentes
+    resumen = Resumen()
+    vistos = {}
+
+    with importacion.archivo.open('rb') as archivo:
+        presentes = columnas_presentes(archivo, importacion.formato)
+        archivo.seek(0)
+        # Solo se actualizan las columnas que trae el archivo
+        campos_actualizar = ['fecha_actualizacion', 'actualizado_por_id']
+        for columna in presentes:
+            campos_actualizar.extend(CAMPOS_RELACIONADOS.get(columna, [columna]))
+
+        with transaction.atomic():
+            referencias = Referencias(crear_tipos=not importacion.simulacion)
+            carga = None
+            if not importacion.simulacion:
+                clase = CargaCopy if connection.vendor == 'postgresql' else CargaORM
+                carga = clase(campos_actualizar, actualizar)
+
+            for lote in _lotes(leer_filas(archivo, importacion.formato), tamano):
+                resumen.total_filas += len(lote)
+                validas = []
+                for numero, datos in lote:
+                    valores, errores = validar_fila(datos, referencias)
+                    cuit = valores['cuit_cuil']
+                    if cuit in vistos:
+                        errores['cuit_cuil'] = f'CUIT repetido en el archivo (fila {vistos[cuit]})'
+                    if errores:
+                        resumen.error(numero, datos.get('cuit_cuil', ''), errores)
+                        continue
+                    vistos[cuit] = numero
+                    validas.append((numero, valores))
+
+                existentes = {
+                    cuit: (id, id_usuario, eliminado)
+                    for cuit, id, id_usuario, eliminado in Empresa.all_objects.filter(
+                        cuit_cuil__in=[valores['cuit_cuil'] for _, valores in validas]
+                    ).values_list('cuit_cuil', 'id', 'id_usuario_id', 'eliminado')
+                }
+                a_cargar = []
+                for numero, valores in validas:
+                    existente = existentes.get(valores['cuit_cuil'])
+                    if existente and existente[2]:
+                        resumen.error(numero, valores['cuit_cuil'], {
+                            'cuit_cuil': 'El CUIT pertenece a una empresa eliminada'
+                        })
+                        continue
+                    resumen.validas += 1
+                    if existente and not actualizar:
+                        resumen.omitidas += 1
+                        continue
+                    if importacion.simulacion:
+                        if existente:
+                            resumen.actualizadas += 1
+                        else:
+                            resumen.creadas += 1
+                        continue
+                    a_cargar.append((valores, existente))
+
+                if carga is None or not a_cargar:
+                    continue
+                usuarios = _usuarios_por_email([v for v, existente in a_cargar if not existente])
+                ahora = timezone.now()
+                empresas = []
+                for valores, existente in a_cargar:
+                    if existente:
+                        id, id_usuario, _ = existente
+                    else:
+                        id = None
+                        id_usuario = usuarios[(valores.get('correo') or valores['contacto_principal_email']).lower()]
+                    empresas.append(Empresa(
+                        id=id,
+                        id_usuario_id=id_usuario,
+                        creado_por_id=importacion.usuario_id,
+                        actualizado_por_id=importacion.usuario_id,
+                        fecha_actualizacion=ahora,
+                        **valores,
+                    ))
+                carga.agregar(empresas)
+
+            if carga is not None:
+                creadas, actualizadas, cuits_creados = carga.finalizar()
+                resumen.creadas = creadas
+                resumen.actualizadas = actualizadas
+                resumen.omitidas = resumen.validas - creadas - actualizadas
+                # Los INSERT masivos no emiten post_save: agregar los CUITs al set de la consulta
+                # pública e invalidar los PDF cacheados
+                agregar_cuits(cuits_creados)
+                invalidar_version_datos()
+
+    return resumen
+
+
+def crear_importacion(usuario, archivo, simulacion=True, actualizar_existentes=False):
+    """Guardar el archivo subido y encolar la importación"""
+    formato = formato_de(archivo.name)
+    maximo_mb = getattr(settings, 'IMPORTACION_MAX_MB', 20)
+    if archivo.size > maximo_mb * 1024 * 1024:
+        raise ArchivoInvalido(f'El archivo supera el máximo de {maximo_mb} MB')
+    importacion = ImportacionEmpresas.objects.create(
+        usuario=usuario,
+        archivo=archivo,
+        nombre_archivo=archivo.name[:255],
+        formato=formato,
+        simulacion=simulacion,
+        actualizar_existentes=actualizar_existentes,
+    )
+    logger.info(f"📥 Importación {importacion.id} ({importacion.nombre_archivo}) encolada para {usuario.email}")
+    return importacion
+
+
+def confirmar_importacion(importacion):
+    """
+    Volver a encolar una simulación completada para cargar los datos.
+    Devuelve False si la importación no es una simulación completada.
+    """
+    actualizadas = ImportacionEmpresas.objects.filter(
+        pk=importacion.pk, simulacion=True, estado='completada'
+    ).update(
+        simulacion=False, estado='pendiente', error=None,
+        fecha_inicio=None, fecha_fin=None,
+    )
+    importacion.refresh_from_db()
+    return bool(actualizadas)
+
+
+def reclamar_siguiente_importacion():
+    """Tomar la importación pendiente más antigua (skip_locked permite varios workers)"""
+    with transaction.atomic():
+        importacion = (
+            ImportacionEmpresas.objects.select_for_update(skip_locked=True)
+            .filter(estado='pendiente')
+            .order_by('fecha_creacion')
+            .first()
+        )
+        if importacion is None:
+            return None
+        importacion.estado = 'procesando'
+        importacion.fecha_inicio = timezone.now()
+        importacion.save(update_fields=['estado', 'fecha_inicio'])
+    return importacion
+
+
+def ejecutar_importacion(importacion):
+    """Procesar una importación reclamada y guardar el reporte"""
+    campos = ['total_filas', 'validas', 'creadas', 'actualizadas', 'omitidas', 'con_errores', 'errores']
+    try:
+        resumen = procesar_importacion(importacion)
+        for campo in campos:
+            setattr(importacion, campo, getattr(resumen, campo))
+        importacion.estado = 'completada'
+        importacion.error = None
+        modo = 'simulación' if importacion.simulacion else 'carga'
+        logger.info(
+            f"✅ Importación {importacion.id} ({modo}): {resumen.creadas} nuevas, "
+            f"{resumen.actualizadas} actualizadas, {resumen.omitidas} omitidas, {resumen.con_errores} con errores"
+        )
+    except Exception as e:
+        logger.error(f"❌ Error en importación {importacion.id}: {str(e)}", exc_info=not isinstance(e, ArchivoInvalido))
+        importacion.estado = 'error'
+        importacion.error = str(e)
+
+    importacion.fecha_fin = timezone.now()
+    importacion.save(update_fields=[*campos, 'estado', 'error', 'fecha_fin'])
+    return importacion
+
+
+def liberar_importaciones_abandonadas():
+    """Marcar como error las importaciones que quedaron 'procesando' tras la caída de un worker"""
+    limite = timezone.now() - timedelta(minutes=getattr(settings, 'IMPORTACION_TIMEOUT_MINUTOS', 30))
+    return ImportacionEmpresas.objects.filter(estado='procesando', fecha_inicio__lt=limite).update(
+        estado='error',
+        error='La importación excedió el tiempo máximo de procesamiento',
+        fecha_fin=timezone.now(),
+    )
+
+
+def purgar_importaciones_vencidas():
+    """Eliminar los archivos de las importaciones finalizadas más antiguas que la retención configurada"""
+    limite = timezone.now() - timedelta(days=getattr(settings, 'IMPORTACION_RETENCION_DIAS', 7))
+    vencidas = ImportacionEmpresas.objects.filter(
+        estado__in=['completada', 'error'], fecha_creacion__lt=limite
+    )
+    eliminadas = 0
+    for importacion in vencidas.iterator():
+        importacion.archivo.delete(save=False)
+        importacion.delete()
+        eliminadas += 1
+    return eliminadas
@@ -3,6 +3,7 @@ Management command para actualizar las ubicaciones de todas las empresas a Catam
 """
 from django.core.management.base import BaseCommand
 from apps.empresas.models import Empresa
+from apps.empresas.pdf_cache import invalidar_version_datos
 from apps.geografia.models import Departamento, Municipio, Localidad
 import random
 
@@ -125,6 +126,10 @@ class Command(BaseCommand):
                     self.style.ERROR(f'✗ Error actualizando {empresa.razon_social}: {str(e)}')
                 )
         
+        if actualizadas:
+            # update() no emite signals: invalidar los PDF cacheados
+            invalidar_version_datos()
+
         self.stdout.write(self.style.SUCCESS(
             f'\n✓ Proceso completado: {actualizadas} empresas actualizadas, {errores} errores'
         ))
@@ -0,0 +1,92 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.empresas.benchmark_pdf import (
+    TAMANOS_BENCHMARK,
+    GENERADORES_BENCHMARK,
+    RUTA_BASELINE,
+    crear_empresas_sinteticas,
+    medir_generador,
+    comparar_con_baseline,
+    cargar_baseline,
+    guardar_baseline,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide los generadores PDF con empresas sintéticas (páginas/s, tiempo, pico de RSS, '
+        'consultas y tamaño) y falla si alguna métrica empeora respecto de la baseline. '
+        'Los datos sintéticos se crean en una transacción que se revierte al terminar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tamanos',
+            type=int,
+            nargs='+',
+            default=TAMANOS_BENCHMARK,
+            help=f'Cantidades de empresas a medir (default: {" ".join(map(str, TAMANOS_BENCHMARK))})',
+        )
+        parser.add_argument(
+            '--generadores',
+            nargs='+',
+            choices=GENERADORES_BENCHMARK,
+            default=GENERADORES_BENCHMARK,
+            help='Generadores a medir (default: todos)',
+        )
+        parser.add_argument(
+            '--baseline',
+            default=str(RUTA_BASELINE),
+            help='Archivo JSON de baseline',
+        )
+        parser.add_argument(
+            '--guardar-baseline',
+            action='store_true',
+            help='Guardar los resultados como nueva baseline en lugar de compararlos',
+        )
+
+    def handle(self, *args, **options):
+        tamanos = sorted(set(options['tamanos']))
+        generadores = options['generadores']
+        ruta = options['baseline']
+        baseline = {} if options['guardar_baseline'] else cargar_baseline(ruta)
+
+        resultados = {}
+        regresiones = []
+        with transaction.atomic():
+            ids = crear_empresas_sinteticas(tamanos[-1])
+            for generador in generadores:
+                resultados[generador] = {}
+                for cantidad in tamanos:
+                    metricas = medir_generador(generador, ids[:cantidad])
+                    resultados[generador][str(cantidad)] = metricas
+
+                    referencia = baseline.get(generador, {}).get(str(cantidad))
+                    fallas = comparar_con_baseline(metricas, referencia) if referencia else []
+                    regresiones.extend(f'{generador} x{cantidad} {falla}' for falla in fallas)
+
+                    linea = (
+                        f'{generador:>13} {cantidad:>6} empresas: {metricas["paginas"]:>5} págs '
+                        f'{metricas["segundos"]:8.2f}s {metricas["paginas_por_segundo"]:8.1f} págs/s '
+                        f'RSS {metricas["pico_rss_mb"]:7.1f} MB (+{metricas["incremento_rss_mb"]:.1f}) {metricas["consultas"]:>5} consultas '
+                        f'{metricas["tamano_bytes"] / 1024:9.1f} KB'
+                    )
+                    if fallas:
+                        self.stdout.write(self.style.ERROR(f'{linea}  ❌'))
+                    elif referencia:
+                        self.stdout.write(self.style.SUCCESS(f'{linea}  ✅'))
+                    else:
+                        self.stdout.write(f'{linea}  (sin baseline)')
+
+            # Los datos sintéticos no deben quedar en la base
+            transaction.set_rollback(True)
+
+        if options['guardar_baseline']:
+            guardar_baseline(resultados, ruta)
+            self.stdout.write(self.style.SUCCESS(f'💾 Baseline guardada en {ruta}'))
+            return
+
+        if regresiones:
+            raise CommandError('Regresiones de rendimiento:\n' + '\n'.join(regresiones))
+        self.stdout.write(self.style.SUCCESS('✅ Sin regresiones respecto de la baseline'))
@@ -117,6 +117,7 @@ class Command(BaseCommand):
         
         # Verificar si hay empresas usando el rubro duplicado
         from apps.empresas.models import Empresa, Empresaproducto, Empresaservicio, EmpresaMixta
+        from apps.empresas.pdf_cache import invalidar_version_datos
         
         empresas_producto = Empresaproducto.objects.filter(id_rubro=rubro_duplicado).count()
         empresas_mixta = EmpresaMixta.objects.filter(id_rubro=rubro_duplicado).count()
@@ -128,6 +129,8 @@ class Command(BaseCommand):
             # Migrar empresas al rubro principal
             Empresaproducto.objects.filter(id_rubro=rubro_duplicado).update(id_rubro=rubro_principal)
             EmpresaMixta.objects.filter(id_rubro=rubro_duplicado).update(id_rubro=rubro_principal)
+            # update() no emite signals: invalidar los PDF cacheados
+            invalidar_version_datos()
             
             self.stdout.write(self.style.SUCCESS(f"   ✅ Empresas migradas"))
         
@@ -0,0 +1,77 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.empresas.catalogos_texto import (
+    reclamar_textos,
+    ejecutar_texto,
+    liberar_textos_abandonados,
+    purgar_textos_huerfanos,
+    encolar_existentes,
+)
+
+
+class Command(BaseCommand):
+    help = 'Worker que extrae e indexa el texto de los catálogos y brochures PDF para la búsqueda'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=10.0,
+            help='Segundos de espera cuando no hay catálogos pendientes (default: 10)',
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=10,
+            help='Catálogos que se reclaman por vez (default: 10)',
+        )
+        parser.add_argument(
+            '--una-vez',
+            action='store_true',
+            help='Procesar los catálogos pendientes y terminar',
+        )
+        parser.add_argument(
+            '--encolar-existentes',
+            action='store_true',
+            help='Antes de empezar, encolar los catálogos ya subidos que todavía no tienen texto',
+        )
+
+    def handle(self, *args, **options):
+        intervalo = options['intervalo']
+        lote = max(1, options['lote'])
+        una_vez = options['una_vez']
+
+        self.stdout.write(self.style.SUCCESS('📚 Worker de indexación de catálogos iniciado'))
+
+        if options['encolar_existentes']:
+            self.stdout.write(f'{encolar_existentes()} catálogos existentes encolados')
+
+        while True:
+            abandonados = liberar_textos_abandonados()
+            if abandonados:
+                self.stdout.write(self.style.WARNING(f'⚠️ {abandonados} catálogos abandonados vuelven a la cola'))
+
+            purgados = purgar_textos_huerfanos()
+            if purgados:
+                self.stdout.write(f'🗑️ {purgados} textos de catálogos que ya no se usan eliminados')
+
+            procesados = 0
+            while True:
+                textos = reclamar_textos(lote)
+                if not textos:
+                    break
+                for texto in textos:
+                    texto = ejecutar_texto(texto)
+                    if texto.estado == 'completado':
+                        self.stdout.write(self.style.SUCCESS(f'✅ {texto.archivo}: {texto.paginas} páginas'))
+                    elif texto.estado == 'error':
+                        self.stdout.write(self.style.ERROR(f'❌ {texto.archivo}: {texto.error}'))
+                    procesados += 1
+
+            if una_vez:
+                self.stdout.write(self.style.SUCCESS(f'Catálogos procesados: {procesados}'))
+                return
+
+            time.sleep(intervalo)
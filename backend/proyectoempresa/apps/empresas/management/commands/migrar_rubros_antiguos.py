@@ -4,6 +4,7 @@ Comando para migrar empresas que usan rubros desactivados a rubros correctos
 
 from django.core.management.base import BaseCommand
 from apps.empresas.models import Rubro, Empresa
+from apps.empresas.pdf_cache import invalidar_version_datos
 from django.db import transaction
 
 
@@ -80,6 +81,10 @@ class Command(BaseCommand):
             except Exception as e:
                 self.stdout.write(self.style.ERROR(f"  ✗ Error migrando 'Servicios': {e}"))
         
+        if migradas:
+            # update() no emite signals: invalidar los PDF cacheados
+            invalidar_version_datos()
+        
         # Resumen
         self.stdout.write("\n" + "=" * 60)
         self.stdout.write(self.style.SUCCESS("✓ MIGRACIÓN COMPLETADA"))
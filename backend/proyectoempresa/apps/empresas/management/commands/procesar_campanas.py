@@ -0,0 +1,78 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.empresas.campanas import (
+    TokenBucket,
+    reclamar_destinatarios,
+    enviar_destinatarios,
+    liberar_destinatarios_abandonados,
+    finalizar_campanas,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Worker que envía las campañas de notificación de credenciales respetando la cuota SMTP '
+        '(NOTIFICACIONES_EMAILS_POR_DIA y NOTIFICACIONES_RAFAGA). El límite es por proceso: '
+        'correr un solo worker o repartir la cuota entre ellos.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=5.0,
+            help='Segundos de espera cuando no hay destinatarios pendientes (default: 5)',
+        )
+        parser.add_argument(
+            '--una-vez',
+            action='store_true',
+            help='Enviar los destinatarios pendientes y terminar',
+        )
+
+    def handle(self, *args, **options):
+        intervalo = options['intervalo']
+        una_vez = options['una_vez']
+
+        bucket = TokenBucket.desde_configuracion()
+        tamano_lote = getattr(settings, 'EMAIL_LOTE_TAMANO', 50)
+        self.stdout.write(self.style.SUCCESS(
+            f'📧 Worker de campañas iniciado ({bucket.tasa * 86400:.0f} emails/día, ráfaga {bucket.capacidad})'
+        ))
+
+        while True:
+            liberados = liberar_destinatarios_abandonados()
+            if liberados:
+                self.stdout.write(self.style.WARNING(f'⚠️ {liberados} destinatarios abandonados reencolados'))
+
+            enviados = 0
+            fallidos = 0
+            while True:
+                # Esperar el token antes de reclamar: los destinatarios no quedan 'enviando' durante
+                # la espera. Con la ráfaga disponible se reclama un lote que sale por una sola conexión
+                bucket.esperar()
+                destinatarios = reclamar_destinatarios(min(bucket.disponibles(), tamano_lote))
+                if not destinatarios:
+                    break
+                for _ in destinatarios:
+                    bucket.consumir()
+                for destinatario in enviar_destinatarios(destinatarios):
+                    if destinatario.estado == 'enviado':
+                        enviados += 1
+                    elif destinatario.estado == 'omitido':
+                        self.stdout.write(self.style.WARNING(f'🚫 {destinatario.email}: {destinatario.error}'))
+                    else:
+                        fallidos += 1
+                        self.stdout.write(self.style.ERROR(f'❌ {destinatario.email}: {destinatario.error}'))
+
+            completadas = finalizar_campanas()
+            if completadas:
+                self.stdout.write(self.style.SUCCESS(f'✅ {completadas} campañas completadas'))
+
+            if una_vez:
+                self.stdout.write(self.style.SUCCESS(f'Emails enviados: {enviados}, fallidos: {fallidos}'))
+                return
+
+            time.sleep(intervalo)
@@ -0,0 +1,66 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.empresas.pdf_assets import obtener_marca_de_agua, obtener_header_footer
+from apps.empresas.exportaciones import (
+    reclamar_siguiente_exportacion,
+    ejecutar_exportacion,
+    liberar_exportaciones_abandonadas,
+    purgar_exportaciones_vencidas,
+)
+
+
+class Command(BaseCommand):
+    help = 'Worker que procesa la cola de exportaciones PDF en segundo plano'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=2.0,
+            help='Segundos de espera cuando no hay exportaciones pendientes (default: 2)',
+        )
+        parser.add_argument(
+            '--una-vez',
+            action='store_true',
+            help='Procesar las exportaciones pendientes y terminar',
+        )
+
+    def handle(self, *args, **options):
+        intervalo = options['intervalo']
+        una_vez = options['una_vez']
+
+        # Precargar las imágenes institucionales una sola vez para todo el proceso
+        obtener_marca_de_agua()
+        obtener_header_footer()
+
+        self.stdout.write(self.style.SUCCESS('📄 Worker de exportaciones PDF iniciado'))
+
+        while True:
+            abandonadas = liberar_exportaciones_abandonadas()
+            if abandonadas:
+                self.stdout.write(self.style.WARNING(f'⚠️ {abandonadas} exportaciones abandonadas marcadas como error'))
+
+            purgadas = purgar_exportaciones_vencidas()
+            if purgadas:
+                self.stdout.write(f'🗑️ {purgadas} exportaciones vencidas eliminadas')
+
+            procesadas = 0
+            while True:
+                exportacion = reclamar_siguiente_exportacion()
+                if exportacion is None:
+                    break
+                self.stdout.write(f'Procesando exportación {exportacion.id} ({exportacion.tipo})...')
+                exportacion = ejecutar_exportacion(exportacion)
+                if exportacion.estado == 'completada':
+                    self.stdout.write(self.style.SUCCESS(f'✅ Exportación {exportacion.id} completada'))
+                else:
+                    self.stdout.write(self.style.ERROR(f'❌ Exportación {exportacion.id}: {exportacion.error}'))
+                procesadas += 1
+
+            if una_vez:
+                self.stdout.write(self.style.SUCCESS(f'Exportaciones procesadas: {procesadas}'))
+                return
+
+            time.sleep(intervalo)
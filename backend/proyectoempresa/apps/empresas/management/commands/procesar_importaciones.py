@@ -0,0 +1,66 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.empresas.importacion import (
+    reclamar_siguiente_importacion,
+    ejecutar_importacion,
+    liberar_importaciones_abandonadas,
+    purgar_importaciones_vencidas,
+)
+
+
+class Command(BaseCommand):
+    help = 'Worker que procesa la cola de importaciones masivas de empresas (CSV/XLSX)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=2.0,
+            help='Segundos de espera cuando no hay importaciones pendientes (default: 2)',
+        )
+        parser.add_argument(
+            '--una-vez',
+            action='store_true',
+            help='Procesar las importaciones pendientes y terminar',
+        )
+
+    def handle(self, *args, **options):
+        intervalo = options['intervalo']
+        una_vez = options['una_vez']
+
+        self.stdout.write(self.style.SUCCESS('📥 Worker de importaciones de empresas iniciado'))
+
+        while True:
+            abandonadas = liberar_importaciones_abandonadas()
+            if abandonadas:
+                self.stdout.write(self.style.WARNING(f'⚠️ {abandonadas} importaciones abandonadas marcadas como error'))
+
+            purgadas = purgar_importaciones_vencidas()
+            if purgadas:
+                self.stdout.write(f'🗑️ {purgadas} importaciones vencidas eliminadas')
+
+            procesadas = 0
+            while True:
+                importacion = reclamar_siguiente_importacion()
+                if importacion is None:
+                    break
+                modo = 'simulación' if importacion.simulacion else 'carga'
+                self.stdout.write(f'Procesando importación {importacion.id} ({importacion.nombre_archivo}, {modo})...')
+                importacion = ejecutar_importacion(importacion)
+                if importacion.estado == 'completada':
+                    self.stdout.write(self.style.SUCCESS(
+                        f'✅ Importación {importacion.id}: {importacion.creadas} nuevas, '
+                        f'{importacion.actualizadas} actualizadas, {importacion.omitidas} omitidas, '
+                        f'{importacion.con_errores} filas con errores'
+                    ))
+                else:
+                    self.stdout.write(self.style.ERROR(f'❌ Importación {importacion.id}: {importacion.error}'))
+                procesadas += 1
+
+            if una_vez:
+                self.stdout.write(self.style.SUCCESS(f'Importaciones procesadas: {procesadas}'))
+                return
+
+            time.sleep(intervalo)
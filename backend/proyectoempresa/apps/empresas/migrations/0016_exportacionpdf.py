@@ -0,0 +1,40 @@
+# Generated by Django 5.2.1 on 2026-10-19 15:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresas', '0015_empresa_anos_etapa_inicial_empresa_anos_exportadora_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportacionPDF',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('aprobadas', 'Empresas aprobadas (con filtros)'), ('seleccionadas', 'Empresas seleccionadas'), ('empresas', 'Empresas por tipo')], max_length=20, verbose_name='Tipo de Exportación')),
+                ('parametros', models.JSONField(blank=True, default=dict, help_text='Filtros, IDs de empresas y campos seleccionados', verbose_name='Parámetros')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('completada', 'Completada'), ('error', 'Error')], default='pendiente', max_length=20, verbose_name='Estado')),
+                ('progreso', models.PositiveSmallIntegerField(default=0, verbose_name='Progreso (%)')),
+                ('archivo', models.FileField(blank=True, null=True, upload_to='exportaciones/%Y/%m/', verbose_name='Archivo PDF')),
+                ('nombre_archivo', models.CharField(blank=True, max_length=255, null=True, verbose_name='Nombre del Archivo')),
+                ('error', models.TextField(blank=True, null=True, verbose_name='Error')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('fecha_inicio', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de Inicio')),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de Finalización')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exportaciones_pdf', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Exportación PDF',
+                'verbose_name_plural': 'Exportaciones PDF',
+                'db_table': 'exportacion_pdf',
+                'ordering': ['-fecha_creacion'],
+                'indexes': [models.Index(fields=['estado', 'fecha_creacion'], name='exportacion_estado_58a8da_idx'), models.Index(fields=['usuario', 'estado'], name='exportacion_usuario_b58de4_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.1 on 2026-10-19 16:54
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresas', '0016_exportacionpdf'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PDFCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(max_length=64, unique=True, verbose_name='Clave')),
+                ('generador', models.CharField(max_length=20, verbose_name='Generador')),
+                ('archivo', models.FileField(upload_to='exportaciones/cache/', verbose_name='Archivo PDF')),
+                ('nombre_archivo', models.CharField(max_length=255, verbose_name='Nombre del Archivo')),
+                ('tamano', models.PositiveBigIntegerField(default=0, verbose_name='Tamaño (bytes)')),
+                ('accesos', models.PositiveIntegerField(default=0, verbose_name='Accesos')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('ultimo_acceso', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Último Acceso')),
+            ],
+            options={
+                'verbose_name': 'PDF en Caché',
+                'verbose_name_plural': 'PDF en Caché',
+                'db_table': 'pdf_cache',
+                'ordering': ['-ultimo_acceso'],
+            },
+        ),
+    ]
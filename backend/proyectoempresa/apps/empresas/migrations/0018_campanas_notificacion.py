@@ -0,0 +1,72 @@
+# Generated by Django 5.2.1 on 2026-10-19 17:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresas', '0017_pdfcache'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CampanaNotificacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('completada', 'Completada'), ('cancelada', 'Cancelada')], default='pendiente', max_length=20, verbose_name='Estado')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Total de Destinatarios')),
+                ('enviados', models.PositiveIntegerField(default=0, verbose_name='Enviados')),
+                ('fallidos', models.PositiveIntegerField(default=0, verbose_name='Fallidos')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('fecha_inicio', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de Inicio')),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de Finalización')),
+                ('creado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='campanas_notificacion', to=settings.AUTH_USER_MODEL, verbose_name='Creado por')),
+            ],
+            options={
+                'verbose_name': 'Campaña de Notificación',
+                'verbose_name_plural': 'Campañas de Notificación',
+                'db_table': 'campana_notificacion',
+                'ordering': ['-fecha_creacion'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DestinatarioCampana',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(max_length=254, verbose_name='Email')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('enviando', 'Enviando'), ('enviado', 'Enviado'), ('fallido', 'Fallido'), ('omitido', 'Omitido')], default='pendiente', max_length=20, verbose_name='Estado')),
+                ('intentos', models.PositiveSmallIntegerField(default=0, verbose_name='Intentos')),
+                ('error', models.TextField(blank=True, null=True, verbose_name='Error')),
+                ('fecha_intento', models.DateTimeField(blank=True, null=True, verbose_name='Fecha del Último Intento')),
+                ('fecha_envio', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de Envío')),
+                ('campana', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='destinatarios', to='empresas.campananotificacion', verbose_name='Campaña')),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notificaciones_campana', to='empresas.empresa', verbose_name='Empresa')),
+            ],
+            options={
+                'verbose_name': 'Destinatario de Campaña',
+                'verbose_name_plural': 'Destinatarios de Campaña',
+                'db_table': 'destinatario_campana',
+                'ordering': ['campana', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='campananotificacion',
+            index=models.Index(fields=['estado', 'fecha_creacion'], name='campana_not_estado_b22074_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='destinatariocampana',
+            index=models.Index(fields=['estado', 'campana'], name='destinatari_estado_cb8fdb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='destinatariocampana',
+            index=models.Index(fields=['estado', 'fecha_envio'], name='destinatari_estado_993340_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='destinatariocampana',
+            unique_together={('campana', 'empresa')},
+        ),
+    ]
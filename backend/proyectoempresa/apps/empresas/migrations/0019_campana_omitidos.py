@@ -0,0 +1,30 @@
+# Generated by Django 5.2.1 on 2026-10-19 17:43
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def contar_omitidos(apps, schema_editor):
+    """Los destinatarios omitidos de campañas canceladas antes de existir el contador"""
+    CampanaNotificacion = apps.get_model('empresas', 'CampanaNotificacion')
+    campanas = CampanaNotificacion.objects.annotate(
+        cantidad=Count('destinatarios', filter=Q(destinatarios__estado='omitido'))
+    ).filter(cantidad__gt=0)
+    for campana in campanas:
+        CampanaNotificacion.objects.filter(pk=campana.pk).update(omitidos=campana.cantidad)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresas', '0018_campanas_notificacion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='campananotificacion',
+            name='omitidos',
+            field=models.PositiveIntegerField(default=0, help_text='Direcciones suprimidas por rebotes o destinatarios de una campaña cancelada', verbose_name='Omitidos'),
+        ),
+        migrations.RunPython(contar_omitidos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.1 on 2026-10-19 18:02
+
+import apps.core.almacenamiento
+import apps.empresas.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresas', '0019_campana_omitidos'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='empresa',
+            name='archivo_certificaciones',
+            field=models.FileField(blank=True, help_text='Subir archivo PDF o imagen de las certificaciones', null=True, storage=apps.core.almacenamiento.storage_deduplicado, upload_to='certificaciones/%Y/%m/', verbose_name='Archivo de Certificaciones'),
+        ),
+        migrations.AlterField(
+            model_name='empresa',
+            name='brochure',
+            field=models.FileField(blank=True, help_text='Subir archivo PDF o imagen del brochure/catálogo', null=True, storage=apps.core.almacenamiento.storage_deduplicado, upload_to=apps.empresas.models.generar_nombre_catalogo, verbose_name='Brochure o Catálogo'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-19 18:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresas', '0020_almacenamiento_deduplicado'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='empresa',
+            name='logo_derivados',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Miniaturas y WebP generados por el worker procesar_imagenes', verbose_name='Derivados del Logo'),
+        ),
+    ]
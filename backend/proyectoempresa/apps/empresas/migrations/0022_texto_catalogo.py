@@ -0,0 +1,38 @@
+# Generated by Django 5.2.1 on 2026-10-19 18:10
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresas', '0021_imagenes_derivadas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TextoCatalogo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('archivo', models.CharField(max_length=255, unique=True, verbose_name='Archivo')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('completado', 'Completado'), ('error', 'Error')], default='pendiente', max_length=20, verbose_name='Estado')),
+                ('intentos', models.PositiveSmallIntegerField(default=0, verbose_name='Intentos')),
+                ('error', models.TextField(blank=True, null=True, verbose_name='Error')),
+                ('texto', models.TextField(blank=True, default='', verbose_name='Texto Extraído')),
+                ('paginas', models.PositiveIntegerField(default=0, verbose_name='Páginas')),
+                ('busqueda', django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Vector de Búsqueda')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('fecha_intento', models.DateTimeField(blank=True, null=True, verbose_name='Fecha del Último Intento')),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de Finalización')),
+            ],
+            options={
+                'verbose_name': 'Texto de Catálogo',
+                'verbose_name_plural': 'Textos de Catálogos',
+                'db_table': 'texto_catalogo',
+                'ordering': ['fecha_creacion'],
+                'indexes': [models.Index(fields=['estado', 'fecha_creacion'], name='texto_catal_estado_c67f11_idx'), django.contrib.postgres.indexes.GinIndex(fields=['busqueda'], name='texto_catalogo_busqueda_gin')],
+            },
+        ),
+    ]
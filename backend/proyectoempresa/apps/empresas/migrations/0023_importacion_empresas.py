@@ -0,0 +1,47 @@
+# Generated by Django 5.2.1 on 2026-10-19 18:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresas', '0022_texto_catalogo'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportacionEmpresas',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('archivo', models.FileField(upload_to='importaciones/%Y/%m/', verbose_name='Archivo')),
+                ('nombre_archivo', models.CharField(max_length=255, verbose_name='Nombre del Archivo')),
+                ('formato', models.CharField(choices=[('csv', 'CSV'), ('xlsx', 'Excel (XLSX)')], max_length=10, verbose_name='Formato')),
+                ('simulacion', models.BooleanField(default=True, help_text='Solo validar y generar el reporte, sin guardar empresas', verbose_name='Simulación')),
+                ('actualizar_existentes', models.BooleanField(default=False, help_text='Actualizar las empresas cuyo CUIT ya está registrado (si no, se omiten)', verbose_name='Actualizar Existentes')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('completada', 'Completada'), ('error', 'Error')], default='pendiente', max_length=20, verbose_name='Estado')),
+                ('total_filas', models.PositiveIntegerField(default=0, verbose_name='Filas Leídas')),
+                ('validas', models.PositiveIntegerField(default=0, verbose_name='Filas Válidas')),
+                ('creadas', models.PositiveIntegerField(default=0, verbose_name='Empresas Creadas')),
+                ('actualizadas', models.PositiveIntegerField(default=0, verbose_name='Empresas Actualizadas')),
+                ('omitidas', models.PositiveIntegerField(default=0, verbose_name='Empresas Omitidas')),
+                ('con_errores', models.PositiveIntegerField(default=0, verbose_name='Filas con Errores')),
+                ('errores', models.JSONField(blank=True, default=list, help_text='Lista de {fila, cuit_cuil, errores: {campo: mensaje}} (hasta IMPORTACION_MAX_ERRORES)', verbose_name='Errores por Fila')),
+                ('error', models.TextField(blank=True, null=True, verbose_name='Error')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('fecha_inicio', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de Inicio')),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de Finalización')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='importaciones_empresas', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Importación de Empresas',
+                'verbose_name_plural': 'Importaciones de Empresas',
+                'db_table': 'importacion_empresas',
+                'ordering': ['-fecha_creacion'],
+                'indexes': [models.Index(fields=['estado', 'fecha_creacion'], name='importacion_estado_13e4c8_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-19 18:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresas', '0023_importacion_empresas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportacionpdf',
+            name='fecha_latido',
+            field=models.DateTimeField(blank=True, help_text='Última señal del worker; sin latidos la exportación se da por abandonada', null=True, verbose_name='Último Latido'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.1 on 2026-10-19 19:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresas', '0024_exportacion_latido'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionDatosPDF',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('valor', models.PositiveBigIntegerField(default=0, verbose_name='Versión')),
+            ],
+            options={
+                'verbose_name': 'Versión de Datos de PDF',
+                'verbose_name_plural': 'Versión de Datos de PDF',
+                'db_table': 'pdf_version_datos',
+            },
+        ),
+    ]
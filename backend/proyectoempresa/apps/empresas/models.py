@@ -1,7 +1,11 @@
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.utils import timezone
 from django.core.validators import RegexValidator
 from django.core.exceptions import ValidationError
 from apps.core.models import Usuario, TimestampedModel, SoftDeleteModel
+from apps.core.almacenamiento import storage_deduplicado
 from apps.geografia.models import Departamento, Municipio, Localidad
 import re
 from datetime import datetime
@@ -472,6 +476,7 @@ class Empresa(TimestampedModel, SoftDeleteModel):
     # Archivos de certificaciones - OPTIMIZADO PARA MÉTRICAS
     archivo_certificaciones = models.FileField(
         upload_to='certificaciones/%Y/%m/',
+        storage=storage_deduplicado,
         blank=True,
         null=True,
         verbose_name="Archivo de Certificaciones",
@@ -612,8 +617,16 @@ class Empresa(TimestampedModel, SoftDeleteModel):
         null=True,
         verbose_name="Logo de la Empresa"
     )
+    logo_derivados = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name="Derivados del Logo",
+        help_text="Miniaturas y WebP generados por el worker procesar_imagenes"
+    )
     brochure = models.FileField(
         upload_to=generar_nombre_catalogo,
+        storage=storage_deduplicado,
         blank=True,
         null=True,
         verbose_name="Brochure o Catálogo",
@@ -1548,3 +1561,317 @@ class PosicionArancelariaMixta(models.Model):
     
     def __str__(self):
         return f"{self.codigo_arancelario} - {self.producto.nombre_producto}"
+
+
+class ExportacionPDF(models.Model):
+    """
+    Trabajo de exportación PDF procesado en segundo plano.
+    El cliente crea el trabajo, consulta estado/progreso y descarga el archivo
+    generado por el comando procesar_exportaciones.
+    """
+    TIPO_CHOICES = [
+        ('aprobadas', 'Empresas aprobadas (con filtros)'),
+        ('seleccionadas', 'Empresas seleccionadas'),
+        ('empresas', 'Empresas por tipo'),
+    ]
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('procesando', 'Procesando'),
+        ('completada', 'Completada'),
+        ('error', 'Error'),
+    ]
+
+    usuario = models.ForeignKey(
+        'core.Usuario',
+        on_delete=models.CASCADE,
+        related_name='exportaciones_pdf',
+        verbose_name="Usuario"
+    )
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES, verbose_name="Tipo de Exportación")
+    parametros = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name="Parámetros",
+        help_text="Filtros, IDs de empresas y campos seleccionados"
+    )
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='pendiente', verbose_name="Estado")
+    progreso = models.PositiveSmallIntegerField(default=0, verbose_name="Progreso (%)")
+    archivo = models.FileField(upload_to='exportaciones/%Y/%m/', blank=True, null=True, verbose_name="Archivo PDF")
+    nombre_archivo = models.CharField(max_length=255, blank=True, null=True, verbose_name="Nombre del Archivo")
+    error = models.TextField(blank=True, null=True, verbose_name="Error")
+    fecha_creacion = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Creación")
+    fecha_inicio = models.DateTimeField(blank=True, null=True, verbose_name="Fecha de Inicio")
+    fecha_latido = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name="Último Latido",
+        help_text="Última señal del worker; sin latidos la exportación se da por abandonada"
+    )
+    fecha_fin = models.DateTimeField(blank=True, null=True, verbose_name="Fecha de Finalización")
+
+    class Meta:
+        db_table = 'exportacion_pdf'
+        verbose_name = 'Exportación PDF'
+        verbose_name_plural = 'Exportaciones PDF'
+        ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['estado', 'fecha_creacion']),
+            models.Index(fields=['usuario', 'estado']),
+        ]
+
+    def __str__(self):
+        return f"Exportación {self.id} ({self.get_tipo_display()}) - {self.get_estado_display()}"
+
+    @property
+    def activa(self):
+        return self.estado in ('pendiente', 'procesando')
+
+
+class PDFCache(models.Model):
+    """
+    PDF ya generado que se reutiliza mientras no cambien los parámetros, los datos
+    ni la identidad visual (ver pdf_cache.py). La clave es un hash de todo eso.
+    """
+    clave = models.CharField(max_length=64, unique=True, verbose_name="Clave")
+    generador = models.CharField(max_length=20, verbose_name="Generador")
+    archivo = models.FileField(upload_to='exportaciones/cache/', verbose_name="Archivo PDF")
+    nombre_archivo = models.CharField(max_length=255, verbose_name="Nombre del Archivo")
+    tamano = models.PositiveBigIntegerField(default=0, verbose_name="Tamaño (bytes)")
+    accesos = models.PositiveIntegerField(default=0, verbose_name="Accesos")
+    fecha_creacion = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Creación")
+    ultimo_acceso = models.DateTimeField(default=timezone.now, db_index=True, verbose_name="Último Acceso")
+
+    class Meta:
+        db_table = 'pdf_cache'
+        verbose_name = 'PDF en Caché'
+        verbose_name_plural = 'PDF en Caché'
+        ordering = ['-ultimo_acceso']
+
+    def __str__(self):
+        return f"{self.generador} - {self.nombre_archivo}"
+
+
+class VersionDatosPDF(models.Model):
+    """
+    Contador (una sola fila) de cambios en datos de los PDF que no se reflejan en
+    Empresa.fecha_actualizacion (ver pdf_cache.invalidar_version_datos). Vive en la base,
+    junto a las entradas de PDFCache, para que un reinicio de la caché no repita versiones.
+    """
+    valor = models.PositiveBigIntegerField(default=0, verbose_name="Versión")
+
+    class Meta:
+        db_table = 'pdf_version_datos'
+        verbose_name = 'Versión de Datos de PDF'
+        verbose_name_plural = 'Versión de Datos de PDF'
+
+    def __str__(self):
+        return f"Versión {self.valor}"
+
+
+class CampanaNotificacion(models.Model):
+    """
+    Envío masivo de credenciales a empresas, procesado en segundo plano.
+    El endpoint notificar crea la campaña con un DestinatarioCampana por empresa;
+    el comando procesar_campanas los envía respetando la cuota SMTP.
+    """
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('procesando', 'Procesando'),
+        ('completada', 'Completada'),
+        ('cancelada', 'Cancelada'),
+    ]
+
+    creado_por = models.ForeignKey(
+        'core.Usuario',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='campanas_notificacion',
+        verbose_name="Creado por"
+    )
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='pendiente', verbose_name="Estado")
+    total = models.PositiveIntegerField(default=0, verbose_name="Total de Destinatarios")
+    enviados = models.PositiveIntegerField(default=0, verbose_name="Enviados")
+    fallidos = models.PositiveIntegerField(default=0, verbose_name="Fallidos")
+    omitidos = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Omitidos",
+        help_text="Direcciones suprimidas por rebotes o destinatarios de una campaña cancelada"
+    )
+    fecha_creacion = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Creación")
+    fecha_inicio = models.DateTimeField(blank=True, null=True, verbose_name="Fecha de Inicio")
+    fecha_fin = models.DateTimeField(blank=True, null=True, verbose_name="Fecha de Finalización")
+
+    class Meta:
+        db_table = 'campana_notificacion'
+        verbose_name = 'Campaña de Notificación'
+        verbose_name_plural = 'Campañas de Notificación'
+        ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['estado', 'fecha_creacion']),
+        ]
+
+    def __str__(self):
+        return f"Campaña {self.id} ({self.total} empresas) - {self.get_estado_display()}"
+
+    @property
+    def pendientes(self):
+        return max(self.total - self.enviados - self.fallidos - self.omitidos, 0)
+
+    @property
+    def activa(self):
+        return self.estado in ('pendiente', 'procesando')
+
+
+class DestinatarioCampana(models.Model):
+    """Estado del envío de una campaña a una empresa"""
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('enviando', 'Enviando'),
+        ('enviado', 'Enviado'),
+        ('fallido', 'Fallido'),
+        ('omitido', 'Omitido'),
+    ]
+
+    campana = models.ForeignKey(
+        CampanaNotificacion,
+        on_delete=models.CASCADE,
+        related_name='destinatarios',
+        verbose_name="Campaña"
+    )
+    empresa = models.ForeignKey(
+        Empresa,
+        on_delete=models.CASCADE,
+        related_name='notificaciones_campana',
+        verbose_name="Empresa"
+    )
+    email = models.EmailField(verbose_name="Email")
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='pendiente', verbose_name="Estado")
+    intentos = models.PositiveSmallIntegerField(default=0, verbose_name="Intentos")
+    error = models.TextField(blank=True, null=True, verbose_name="Error")
+    fecha_intento = models.DateTimeField(blank=True, null=True, verbose_name="Fecha del Último Intento")
+    fecha_envio = models.DateTimeField(blank=True, null=True, verbose_name="Fecha de Envío")
+
+    class Meta:
+        db_table = 'destinatario_campana'
+        verbose_name = 'Destinatario de Campaña'
+        verbose_name_plural = 'Destinatarios de Campaña'
+        ordering = ['campana', 'id']
+        unique_together = ['campana', 'empresa']
+        indexes = [
+            models.Index(fields=['estado', 'campana']),
+            models.Index(fields=['estado', 'fecha_envio']),
+        ]
+
+    def __str__(self):
+        return f"{self.email} - {self.get_estado_display()}"
+
+
+class TextoCatalogo(models.Model):
+    """
+    Texto extraído de un catálogo o brochure PDF, indexado para búsqueda de texto
+    completo en español. Una fila por archivo: como los catálogos se guardan por
+    contenido (AlmacenamientoDeduplicado), el catálogo de la solicitud y el
+    brochure de la empresa aprobada comparten la misma fila. La extrae el
+    comando indexar_catalogos (ver catalogos_texto.py).
+    """
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('procesando', 'Procesando'),
+        ('completado', 'Completado'),
+        ('error', 'Error'),
+    ]
+
+    archivo = models.CharField(max_length=255, unique=True, verbose_name="Archivo")
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='pendiente', verbose_name="Estado")
+    intentos = models.PositiveSmallIntegerField(default=0, verbose_name="Intentos")
+    error = models.TextField(blank=True, null=True, verbose_name="Error")
+    texto = models.TextField(blank=True, default='', verbose_name="Texto Extraído")
+    paginas = models.PositiveIntegerField(default=0, verbose_name="Páginas")
+    busqueda = SearchVectorField(null=True, editable=False, verbose_name="Vector de Búsqueda")
+    fecha_creacion = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Creación")
+    fecha_intento = models.DateTimeField(blank=True, null=True, verbose_name="Fecha del Último Intento")
+    fecha_fin = models.DateTimeField(blank=True, null=True, verbose_name="Fecha de Finalización")
+
+    class Meta:
+        db_table = 'texto_catalogo'
+        verbose_name = 'Texto de Catálogo'
+        verbose_name_plural = 'Textos de Catálogos'
+        ordering = ['fecha_creacion']
+        indexes = [
+            models.Index(fields=['estado', 'fecha_creacion']),
+            GinIndex(fields=['busqueda'], name='texto_catalogo_busqueda_gin'),
+        ]
+
+    def __str__(self):
+        return f"{self.archivo} - {self.get_estado_display()}"
+
+
+class ImportacionEmpresas(models.Model):
+    """
+    Importación masiva de empresas desde un CSV o XLSX, procesada en segundo
+    plano por el comando procesar_importaciones (ver importacion.py). En modo
+    simulación solo se valida el archivo y se informa qué se crearía, qué se
+    actualizaría y los errores por fila; confirmarla la vuelve a encolar para
+    cargar los datos.
+    """
+    FORMATO_CHOICES = [
+        ('csv', 'CSV'),
+        ('xlsx', 'Excel (XLSX)'),
+    ]
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('procesando', 'Procesando'),
+        ('completada', 'Completada'),
+        ('error', 'Error'),
+    ]
+
+    usuario = models.ForeignKey(
+        'core.Usuario',
+        on_delete=models.CASCADE,
+        related_name='importaciones_empresas',
+        verbose_name="Usuario"
+    )
+    archivo = models.FileField(upload_to='importaciones/%Y/%m/', verbose_name="Archivo")
+    nombre_archivo = models.CharField(max_length=255, verbose_name="Nombre del Archivo")
+    formato = models.CharField(max_length=10, choices=FORMATO_CHOICES, verbose_name="Formato")
+    simulacion = models.BooleanField(
+        default=True,
+        verbose_name="Simulación",
+        help_text="Solo validar y generar el reporte, sin guardar empresas"
+    )
+    actualizar_existentes = models.BooleanField(
+        default=False,
+        verbose_name="Actualizar Existentes",
+        help_text="Actualizar las empresas cuyo CUIT ya está registrado (si no, se omiten)"
+    )
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='pendiente', verbose_name="Estado")
+    total_filas = models.PositiveIntegerField(default=0, verbose_name="Filas Leídas")
+    validas = models.PositiveIntegerField(default=0, verbose_name="Filas Válidas")
+    creadas = models.PositiveIntegerField(default=0, verbose_name="Empresas Creadas")
+    actualizadas = models.PositiveIntegerField(default=0, verbose_name="Empresas Actualizadas")
+    omitidas = models.PositiveIntegerField(default=0, verbose_name="Empresas Omitidas")
+    con_errores = models.PositiveIntegerField(default=0, verbose_name="Filas con Errores")
+    errores = models.JSONField(
+        default=list,
+        blank=True,
+        verbose_name="Errores por Fila",
+        help_text="Lista de {fila, cuit_cuil, errores: {campo: mensaje}} (hasta IMPORTACION_MAX_ERRORES)"
+    )
+    error = models.TextField(blank=True, null=True, verbose_name="Error")
+    fecha_creacion = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Creación")
+    fecha_inicio = models.DateTimeField(blank=True, null=True, verbose_name="Fecha de Inicio")
+    fecha_fin = models.DateTimeField(blank=True, null=True, verbose_name="Fecha de Finalización")
+
+    class Meta:
+        db_table = 'importacion_empresas'
+        verbose_name = 'Importación de Empresas'
+        verbose_name_plural = 'Importaciones de Empresas'
+        ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['estado', 'fecha_creacion']),
+        ]
+
+    def __str__(self):
+        modo = 'simulación' if self.simulacion else 'carga'
+        return f"Importación {self.id} ({self.nombre_archivo}, {modo}) - {self.get_estado_display()}"
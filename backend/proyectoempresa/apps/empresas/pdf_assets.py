@@ -0,0 +1,167 @@
+"""
+Caché de recursos gráficos institucionales para los PDF.
+
+Las imágenes (marca de agua y header/footer) se buscan una sola vez, se
+preprocesan una sola vez (opacidad de la marca de agua, escalado del header)
+y se mantienen en memoria como ImageReader de ReportLab compartidos por todos
+los generadores de utils.py. Dentro de cada documento la imagen se registra
+como un Form XObject, de modo que en cada página solo se ejecuta doForm.
+"""
+import logging
+import os
+import threading
+
+from django.conf import settings
+from reportlab.lib.utils import ImageReader
+
+logger = logging.getLogger(__name__)
+
+HEADER_FOOTER = 'header_y_footer.png'
+MARCA_DE_AGUA = 'marca_de_agua.png'
+
+# Opacidad aplicada a la marca de agua (15%)
+OPACIDAD_MARCA_DE_AGUA = 0.15
+# Resolución máxima con la que se embeben las imágenes en el PDF
+DPI_MAXIMO = 200
+
+# Tamaño máximo (en puntos) con el que se dibuja cada imagen: landscape(A4) de
+# ancho x 2cm de alto para el header/footer, 15cm x 15cm para la marca de agua
+_TAMANO_MAXIMO_PT = {
+    HEADER_FOOTER: (841.89, 56.69),
+    MARCA_DE_AGUA: (425.20, 425.20),
+}
+
+_lock = threading.Lock()
+_imagenes = {}
+
+
+def _rutas_busqueda():
+    """Ubicaciones donde pueden estar las imágenes institucionales"""
+    return [
+        os.path.join(settings.BASE_DIR, 'static', 'images'),
+        os.path.join(settings.BASE_DIR.parent.parent, 'backend', 'proyectoempresa', 'static', 'images'),
+        os.path.join(settings.BASE_DIR.parent.parent),  # Raíz del proyecto
+    ]
+
+
+def _buscar_imagen(nombre):
+    """Devolver la primera ruta existente para la imagen o None"""
+    for path_base in _rutas_busqueda():
+        ruta = os.path.join(path_base, nombre)
+        if os.path.exists(ruta):
+            return ruta
+    return None
+
+
+def _escalar(img, nombre):
+    """Reducir la imagen al tamaño máximo en el que se dibuja (a DPI_MAXIMO)"""
+    ancho_pt, alto_pt = _TAMANO_MAXIMO_PT[nombre]
+    max_ancho = int(ancho_pt / 72 * DPI_MAXIMO)
+    max_alto = int(alto_pt / 72 * DPI_MAXIMO)
+    escala = min(max_ancho / img.width, max_alto / img.height, 1)
+    if escala < 1:
+        from PIL import Image as PILImage
+        img = img.resize(
+            (max(1, int(img.width * escala)), max(1, int(img.height * escala))),
+            PILImage.LANCZOS
+        )
+    return img
+
+
+def _cargar(nombre):
+    """Cargar y preprocesar una imagen; devuelve un ImageReader o None"""
+    ruta = _buscar_imagen(nombre)
+    if ruta is None:
+        logger.warning(f"⚠️ Imagen institucional no encontrada: {nombre}")
+        return None
+
+    try:
+        from PIL import Image as PILImage
+
+        img = PILImage.open(ruta)
+        img.load()
+        if img.mode != 'RGBA':
+            img = img.convert('RGBA')
+        img = _escalar(img, nombre)
+
+        if nombre == MARCA_DE_AGUA:
+            alpha = img.split()[3].point(lambda p: int(p * OPACIDAD_MARCA_DE_AGUA))
+            img.putalpha(alpha)
+
+        reader = ImageReader(img)
+        # Forzar la decodificación ahora para que los hilos que comparten el
+        # ImageReader solo lean datos ya calculados
+        reader.getRGBData()
+        if reader._dataA is not None:
+            reader._dataA.getRGBData()
+        return reader
+    except Exception as e:
+        logger.error(f"❌ Error preprocesando imagen {nombre}: {str(e)}")
+        return None
+
+
+def obtener_imagen(nombre):
+    """Obtener el ImageReader preprocesado de una imagen institucional"""
+    if nombre not in _imagenes:
+        with _lock:
+            if nombre not in _imagenes:
+                _imagenes[nombre] = _cargar(nombre)
+    return _imagenes[nombre]
+
+
+def obtener_marca_de_agua():
+    return obtener_imagen(MARCA_DE_AGUA)
+
+
+def obtener_header_footer():
+    return obtener_imagen(HEADER_FOOTER)
+
+
+def version_recursos():
+    """
+    Versión de la identidad visual: nombre, tamaño y fecha de modificación de cada
+    imagen institucional y los parámetros de preprocesado. Se usa como parte de la
+    clave de la caché de PDF (pdf_cache.py).
+    """
+    version = [OPACIDAD_MARCA_DE_AGUA, DPI_MAXIMO]
+    for nombre in (HEADER_FOOTER, MARCA_DE_AGUA):
+        ruta = _buscar_imagen(nombre)
+        if ruta is None:
+            version.append([nombre, None])
+        else:
+            estado = os.stat(ruta)
+            version.append([nombre, estado.st_size, int(estado.st_mtime)])
+    return version
+
+
+def limpiar_cache():
+    """Descartar las imágenes cargadas (por ejemplo si cambian los archivos)"""
+    with _lock:
+        _imagenes.clear()
+
+
+def dibujar_imagen(canvas, nombre, x, y, width, height):
+    """
+    Dibujar una imagen institucional en la posición indicada.
+    La primera vez en cada documento se crea un Form XObject con la imagen;
+    en las páginas siguientes solo se reutiliza con doForm.
+    Devuelve False si la imagen no está disponible.
+    """
+    imagen = obtener_imagen(nombre)
+    if imagen is None:
+        return False
+
+    form = f"img_{os.path.splitext(nombre)[0]}_{int(x)}_{int(y)}_{int(width)}_{int(height)}"
+    if not canvas.hasForm(form):
+        canvas.beginForm(form)
+        canvas.drawImage(
+            imagen,
+            x, y,
+            width=width,
+            height=height,
+            preserveAspectRatio=True,
+            mask='auto'
+        )
+        canvas.endForm()
+    canvas.doForm(form)
+    return True
@@ -0,0 +1,186 @@
+"""
+Caché de PDF generados, direccionada por contenido.
+
+Cada PDF terminado se guarda en el storage de media con una clave que resume
+el generador, los parámetros normalizados (IDs ordenados, filtros, campos), la
+versión de los datos y la versión de la identidad visual. Un pedido repetido
+con los mismos parámetros se sirve directamente desde el archivo guardado; si
+cambian los datos o las imágenes institucionales la clave cambia sola. Las
+entradas menos usadas se eliminan cuando se supera EXPORTACIONES_PDF_CACHE_MAX_MB.
+"""
+import hashlib
+import json
+import logging
+
+from django.conf import settings
+from django.core.files import File
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Sum
+from django.http import FileResponse
+from django.utils import timezone
+
+from .exportaciones import FILTROS_APROBADAS
+from .models import Empresa, PDFCache, VersionDatosPDF
+
+logger = logging.getLogger(__name__)
+
+# Incrementar cuando cambie el diseño de los PDF para invalidar lo cacheado
+VERSION_DISENO = 1
+
+# Fila de VersionDatosPDF con el contador de cambios que no se ven en fecha_actualizacion
+# de Empresa: modelos relacionados (signals.py) y .update()/cargas masivas, que no emiten signals
+ID_VERSION_DATOS = 1
+
+
+def _incrementar_version_datos():
+    version = VersionDatosPDF.objects.filter(pk=ID_VERSION_DATOS)
+    if not version.update(valor=F('valor') + 1):
+        _, creada = VersionDatosPDF.objects.get_or_create(pk=ID_VERSION_DATOS, defaults={'valor': 1})
+        if not creada:
+            version.update(valor=F('valor') + 1)
+
+
+def invalidar_version_datos():
+    """
+    Marcar que cambiaron datos que aparecen en los PDF.
+    Quien use QuerySet.update(), bulk_create/bulk_update o SQL directo sobre esos
+    datos debe llamarla: no emiten signals ni actualizan fecha_actualizacion.
+    La versión se incrementa recién al confirmar la transacción en curso: antes una
+    exportación concurrente podía leer la versión nueva con los datos viejos y
+    cachearlos bajo esa clave. Un error al incrementarla se registra sin afectar al llamador.
+    """
+    transaction.on_commit(_incrementar_version_datos, robust=True)
+
+
+def version_datos():
+    """
+    Resumen de la versión de los datos exportables.
+    Las empresas guardadas con save() se resumen con agregados (fecha_actualizacion
+    y cantidad). Lo demás incrementa VersionDatosPDF: los modelos relacionados
+    (matriz, productos, servicios, rubros, geografía) vía signals y los .update()
+    y cargas masivas llamando a invalidar_version_datos().
+    """
+    empresas = Empresa.all_objects.aggregate(ultima=Max('fecha_actualizacion'), total=Count('id'))
+    version = VersionDatosPDF.objects.filter(pk=ID_VERSION_DATOS).values_list('valor', flat=True).first()
+    return [str(empresas['ultima']), empresas['total'], version or 0]
+
+
+def normalizar_parametros(generador, parametros):
+    """Dejar los parámetros en una forma canónica para que pedidos equivalentes compartan clave"""
+    parametros = parametros or {}
+    campos = list(parametros.get('campos') or [])
+
+    if generador == 'seleccionadas':
+        return {
+            'empresas_ids': sorted({int(id) for id in parametros.get('empresas_ids', [])}),
+            'campos': campos,
+        }
+
+    if generador == 'aprobadas':
+        filtros = {}
+        for filtro in FILTROS_APROBADAS:
+            valor = str(parametros.get(filtro, '') or '').strip()
+            if valor:
+                filtros[filtro] = valor
+        return {'filtros': filtros, 'campos': campos}
+
+    return {'tipo': parametros.get('tipo', 'producto'), 'campos': campos}
+
+
+def clave_cache(generador, parametros):
+    """Hash SHA-256 de (generador, parámetros normalizados, versión de datos, versión de marca)"""
+    from .pdf_assets import version_recursos
+
+    contenido = json.dumps({
+        'generador': generador,
+        'parametros': normalizar_parametros(generador, parametros),
+        'datos': version_datos(),
+        'marca': version_recursos(),
+        'diseno': VERSION_DISENO,
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+def _respuesta(entrada):
+    return FileResponse(
+        entrada.archivo.open('rb'),
+        as_attachment=True,
+        filename=entrada.nombre_archivo,
+        content_type='application/pdf'
+    )
+
+
+def desalojar(max_bytes=None, conservar=None):
+    """
+    Eliminar las entradas usadas hace más tiempo hasta quedar por debajo del tamaño máximo.
+    `conservar` es una entrada que no se elimina aunque sea la única (la que se está sirviendo).
+    """
+    if max_bytes is None:
+        max_bytes = getattr(settings, 'EXPORTACIONES_PDF_CACHE_MAX_MB', 500) * 1024 * 1024
+
+    total = PDFCache.objects.aggregate(total=Sum('tamano'))['total'] or 0
+    eliminadas = 0
+    if total <= max_bytes:
+        return eliminadas
+
+    candidatas = PDFCache.objects.order_by('ultimo_acceso')
+    if conservar is not None:
+        candidatas = candidatas.exclude(pk=conservar.pk)
+    for entrada in candidatas.iterator():
+        if total <= max_bytes:
+            break
+        total -= entrada.tamano
+        entrada.archivo.delete(save=False)
+        entrada.delete()
+        eliminadas += 1
+
+    logger.info(f"🗑️ Caché de PDF: {eliminadas} entradas eliminadas por tamaño")
+    return eliminadas
+
+
+def obtener_pdf(generador, parametros, generar):
+    """
+    Devolver el PDF de la caché o generarlo con `generar()` y guardarlo.
+    `generar` debe devolver la FileResponse de alguno de los generadores de utils.py.
+    Con EXPORTACIONES_PDF_CACHE_MAX_MB = 0 la caché queda desactivada.
+    """
+    if not getattr(settings, 'EXPORTACIONES_PDF_CACHE_MAX_MB', 500):
+        return generar()
+
+    clave = clave_cache(generador, parametros)
+
+    entrada = PDFCache.objects.filter(clave=clave).first()
+    if entrada is not None:
+        try:
+            response = _respuesta(entrada)
+        except (FileNotFoundError, OSError):
+            # El archivo se borró del storage: descartar la entrada y regenerar
+            entrada.delete()
+        else:
+            PDFCache.objects.filter(pk=entrada.pk).update(
+                ultimo_acceso=timezone.now(), accesos=F('accesos') + 1
+            )
+            logger.info(f"♻️ PDF {generador} servido desde caché ({clave[:12]})")
+            return response
+
+    response = generar()
+    entrada = PDFCache(clave=clave, generador=generador, nombre_archivo=response.filename)
+    # Cerrar solo el archivo: response.close() emite request_finished y cierra la
+    # conexión a la base en medio del pedido (ver exportaciones.ejecutar_exportacion)
+    archivo = response.file_to_stream
+    try:
+        entrada.archivo.save(f'{clave}.pdf', File(archivo), save=False)
+    finally:
+        archivo.close()
+    entrada.tamano = entrada.archivo.size
+
+    try:
+        with transaction.atomic():
+            entrada.save()
+    except IntegrityError:
+        # Otro proceso generó el mismo PDF al mismo tiempo: usar el suyo
+        entrada.archivo.delete(save=False)
+        entrada = PDFCache.objects.get(clave=clave)
+
+    desalojar(conservar=entrada)
+    return _respuesta(entrada)
@@ -0,0 +1,143 @@
+"""
+Renderizado de PDF en paralelo.
+
+Un documento grande se divide en partes independientes (secciones o rangos de
+filas) que se renderizan cada una en su propio archivo, opcionalmente en un
+pool de procesos, y luego se unen con pypdf. Cuando se renderiza en un solo
+proceso no hace falta unir nada: el documento se arma de una vez, así la
+memoria no crece con el tamaño.
+
+El pool solo se usa desde el worker de exportaciones (procesar_exportaciones):
+levantar procesos 'spawn' dentro de una request web bloquearía al servidor.
+"""
+import logging
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Tope de procesos cuando EXPORTACIONES_PDF_PROCESOS = 0 (automático)
+MAX_PROCESOS_AUTOMATICOS = 4
+
+
+def procesos_disponibles():
+    """
+    Procesos a usar según EXPORTACIONES_PDF_PROCESOS
+    (0 = los núcleos disponibles, hasta MAX_PROCESOS_AUTOMATICOS)
+    """
+    procesos = getattr(settings, 'EXPORTACIONES_PDF_PROCESOS', 0)
+    if procesos <= 0:
+        procesos = min(os.cpu_count() or 1, MAX_PROCESOS_AUTOMATICOS)
+    return procesos
+
+
+def procesos_para(total_empresas):
+    """Procesos para un PDF de `total_empresas`: en paralelo solo desde EXPORTACIONES_PDF_PARALELO_MIN_EMPRESAS"""
+    minimo = getattr(settings, 'EXPORTACIONES_PDF_PARALELO_MIN_EMPRESAS', 1000)
+    return procesos_disponibles() if total_empresas >= minimo else 1
+
+
+def _inicializar_worker(nombre_base):
+    """
+    Cada proceso del pool arranca con 'spawn' y necesita su propio setup de Django.
+    Usa la misma base que el proceso padre (que puede no ser la de settings, p. ej. en tests).
+    """
+    import django
+    django.setup()
+
+    from django.db import connection
+    connection.settings_dict['NAME'] = nombre_base
+
+
+def _renderizar_parte(funcion, parte):
+    """Renderizar una parte en un archivo temporal y devolver su ruta"""
+    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as archivo:
+        try:
+            funcion(archivo, parte)
+        except Exception:
+            archivo.close()
+            os.unlink(archivo.name)
+            raise
+    return archivo.name
+
+
+def eliminar_archivos(rutas):
+    """Borrar los archivos temporales de las partes ignorando los que ya no existen"""
+    for ruta in rutas:
+        if ruta:
+            try:
+                os.unlink(ruta)
+            except OSError:
+                pass
+
+
+def renderizar_partes(funcion, partes, procesos=1, al_terminar=None):
+    """
+    Renderizar cada parte con funcion(archivo, parte) y devolver las rutas en el orden de `partes`.
+    `funcion` y las partes deben poder serializarse con pickle cuando procesos > 1.
+    Se usa el contexto 'spawn' para no heredar conexiones a la base ni hilos del proceso padre.
+    al_terminar(cantidad_terminadas) se invoca cada vez que finaliza una parte.
+    """
+    rutas = [None] * len(partes)
+    terminadas = 0
+
+    if procesos <= 1 or len(partes) <= 1:
+        try:
+            for indice, parte in enumerate(partes):
+                rutas[indice] = _renderizar_parte(funcion, parte)
+                terminadas += 1
+                if al_terminar:
+                    al_terminar(terminadas)
+        except Exception:
+            eliminar_archivos(rutas)
+            raise
+        return rutas
+
+    from django.db import connection
+
+    errores = []
+    contexto = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(
+        max_workers=min(procesos, len(partes)),
+        mp_context=contexto,
+        initializer=_inicializar_worker,
+        initargs=(connection.settings_dict['NAME'],),
+    ) as pool:
+        futuros = {pool.submit(_renderizar_parte, funcion, parte): indice for indice, parte in enumerate(partes)}
+        # Esperar todas las partes aunque alguna falle para poder limpiar sus archivos
+        for futuro in as_completed(futuros):
+            try:
+                rutas[futuros[futuro]] = futuro.result()
+            except Exception as e:
+                errores.append(e)
+                continue
+            terminadas += 1
+            if al_terminar:
+                al_terminar(terminadas)
+
+    if errores:
+        eliminar_archivos(rutas)
+        raise errores[0]
+
+    logger.info(f"📄 {len(partes)} partes de PDF renderizadas con {min(procesos, len(partes))} procesos")
+    return rutas
+
+
+def unir_pdfs(rutas, destino):
+    """
+    Unir los PDF de `rutas` (en orden) en el archivo abierto `destino`.
+    pypdf mantiene todas las páginas en memoria hasta escribir: es el costo de renderizar en paralelo.
+    """
+    from pypdf import PdfReader, PdfWriter
+
+    writer = PdfWriter()
+    for ruta in rutas:
+        for pagina in PdfReader(ruta).pages:
+            writer.add_page(pagina)
+
+    writer.write(destino)
+    return len(writer.pages)
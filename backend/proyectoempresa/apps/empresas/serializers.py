@@ -6,9 +6,13 @@ from .models import (
     ProductoEmpresa, ServicioEmpresa,
     ProductoEmpresaMixta, ServicioEmpresaMixta,
     PosicionArancelaria, PosicionArancelariaMixta,
-    MatrizClasificacionExportador
+    MatrizClasificacionExportador,
+    ExportacionPDF,
+    CampanaNotificacion,
+    ImportacionEmpresas
 )
 from apps.geografia.models import Departamento, Municipio, Localidad
+from apps.core.serializers import DerivadosImagenField
 
 
 class TipoEmpresaSerializer(serializers.ModelSerializer):
@@ -240,6 +244,7 @@ class ServicioEmpresaSerializer(serializers.ModelSerializer):
 
 class EmpresaproductoListSerializer(serializers.ModelSerializer):
     """Serializer simplificado para listas de empresas de producto"""
+    logo_urls = DerivadosImagenField('logo')
     tipo_empresa_nombre = serializers.CharField(source='tipo_empresa.nombre', read_only=True)
     tipo_empresa = serializers.SerializerMethodField()
     rubro_nombre = serializers.CharField(source='id_rubro.nombre', read_only=True)
@@ -284,12 +289,13 @@ class EmpresaproductoListSerializer(serializers.ModelSerializer):
             'departamento_nombre', 'telefono', 'correo',
             'tipo_empresa_nombre','tipo_empresa', 'rubro_nombre', 'id_subrubro',
             'exporta', 'interes_exportar', 'importa', 'fecha_creacion', 'categoria_matriz',
-            'geolocalizacion', 'municipio_nombre', 'localidad_nombre'
+            'geolocalizacion', 'logo_urls', 'municipio_nombre', 'localidad_nombre'
         ]
 
 
 class EmpresaproductoSerializer(serializers.ModelSerializer):
     """Serializer completo para empresas de producto"""
+    logo_urls = DerivadosImagenField('logo')
     productos = ProductoEmpresaSerializer(source='productos_empresa', many=True, read_only=True)
     # Incluir también servicios si existen para esta empresa (no rompe los campos actuales)
     # El related_name en el modelo es `servicios_empresa`, por eso usamos `source`.
@@ -844,6 +850,7 @@ class EmpresaproductoSerializer(serializers.ModelSerializer):
 
 class EmpresaservicioListSerializer(serializers.ModelSerializer):
     """Serializer simplificado para listas de empresas de servicio"""
+    logo_urls = DerivadosImagenField('logo')
     tipo_empresa_nombre = serializers.CharField(source='tipo_empresa.nombre', read_only=True)
     tipo_empresa = serializers.SerializerMethodField()
     rubro_nombre = serializers.CharField(source='id_rubro.nombre', read_only=True)
@@ -889,12 +896,13 @@ class EmpresaservicioListSerializer(serializers.ModelSerializer):
             'departamento_nombre', 'telefono', 'correo',
             'tipo_empresa_nombre', 'tipo_empresa', 'rubro_nombre', 'id_subrubro',  
             'exporta', 'interes_exportar', 'importa', 'fecha_creacion', 'categoria_matriz',
-            'geolocalizacion', 'municipio_nombre', 'localidad_nombre'
+            'geolocalizacion', 'logo_urls', 'municipio_nombre', 'localidad_nombre'
         ]
 
 
 class EmpresaservicioSerializer(serializers.ModelSerializer):
     """Serializer completo para empresas de servicio"""
+    logo_urls = DerivadosImagenField('logo')
     # El related_name en el modelo ServicioEmpresa es `servicios_empresa`.
     servicios = ServicioEmpresaSerializer(source='servicios_empresa', many=True, read_only=True)
     tipo_empresa_detalle = TipoEmpresaSerializer(source='tipo_empresa', read_only=True)
@@ -1383,6 +1391,7 @@ class ServicioEmpresaMixtaSerializer(serializers.ModelSerializer):
 
 class EmpresaMixtaListSerializer(serializers.ModelSerializer):
     """Serializer simplificado para listas de empresas mixtas"""
+    logo_urls = DerivadosImagenField('logo')
     tipo_empresa_nombre = serializers.CharField(source='tipo_empresa.nombre', read_only=True)
     tipo_empresa = serializers.SerializerMethodField()
     rubro_nombre = serializers.CharField(source='id_rubro.nombre', read_only=True)
@@ -1431,12 +1440,13 @@ class EmpresaMixtaListSerializer(serializers.ModelSerializer):
             'id_subrubro_producto', 'id_subrubro_servicio',  
             'exporta', 'interes_exportar', 'importa', 'fecha_creacion', 'categoria_matriz',
             'actividades_promocion_internacional',
-            'geolocalizacion', 'municipio_nombre', 'localidad_nombre'
+            'geolocalizacion', 'logo_urls', 'municipio_nombre', 'localidad_nombre'
         ]
 
 
 class EmpresaMixtaSerializer(serializers.ModelSerializer):
     """Serializer completo para empresas mixtas"""
+    logo_urls = DerivadosImagenField('logo')
     productos = ProductoEmpresaMixtaSerializer(source='productos_mixta', many=True, read_only=True)
     # El related_name en ServicioEmpresaMixta es `servicios_mixta`.
     servicios = ServicioEmpresaMixtaSerializer(source='servicios_mixta', many=True, read_only=True)
@@ -2021,6 +2031,7 @@ class EmpresaMixtaSerializer(serializers.ModelSerializer):
 
 class EmpresaListSerializer(serializers.ModelSerializer):
     """Serializer simplificado unificado para listas de empresas (todos los tipos)"""
+    logo_urls = DerivadosImagenField('logo')
     tipo_empresa_nombre = serializers.CharField(source='tipo_empresa.nombre', read_only=True)
     tipo_empresa = serializers.SerializerMethodField()
     tipo_empresa_valor = serializers.CharField(read_only=True)
@@ -2079,7 +2090,7 @@ class EmpresaListSerializer(serializers.ModelSerializer):
             'tipo_empresa_nombre', 'tipo_empresa', 'tipo_empresa_valor', 
             'tipo_sociedad', 'codigo_postal', 'rubro_nombre', 'id_subrubro', 'id_subrubro_producto', 'id_subrubro_servicio',
             'sub_rubro_nombre', 'exporta', 'interes_exportar', 'importa', 'fecha_creacion', 
-            'categoria_matriz', 'geolocalizacion', 'municipio_nombre', 'localidad_nombre',
+            'categoria_matriz', 'geolocalizacion', 'logo_urls', 'municipio_nombre', 'localidad_nombre',
             'sitioweb', 'email_secundario', 'email_terciario',
             'contacto_principal_nombre', 'contacto_principal_apellido', 'contacto_principal_cargo', 'contacto_principal_telefono', 'contacto_principal_email',
             'contacto_secundario_nombre', 'contacto_secundario_apellido', 'contacto_secundario_cargo', 'contacto_secundario_telefono', 'contacto_secundario_email',
@@ -2092,6 +2103,7 @@ class EmpresaListSerializer(serializers.ModelSerializer):
 
 class EmpresaSerializer(serializers.ModelSerializer):
     """Serializer completo unificado para empresas (todos los tipos)"""
+    logo_urls = DerivadosImagenField('logo')
     # Relaciones
     productos = ProductoEmpresaSerializer(source='productos_empresa', many=True, read_only=True)
     servicios = ServicioEmpresaSerializer(source='servicios_empresa', many=True, read_only=True)
@@ -2698,3 +2710,84 @@ class MatrizClasificacionExportadorSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError('Debe asignar una empresa')
         return data
 
+
+
+class ExportacionPDFSerializer(serializers.ModelSerializer):
+    """Serializer para consultar el estado de una exportación PDF"""
+    url_descarga = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = ExportacionPDF
+        fields = [
+            'id', 'tipo', 'parametros', 'estado', 'progreso', 'nombre_archivo',
+            'error', 'fecha_creacion', 'fecha_inicio', 'fecha_fin', 'url_descarga'
+        ]
+        read_only_fields = fields
+    
+    def get_url_descarga(self, obj):
+        """URL de descarga, solo disponible cuando el PDF está listo"""
+        if obj.estado != 'completada' or not obj.archivo:
+            return None
+        from django.urls import reverse
+        url = reverse('exportacion-pdf-descargar', kwargs={'pk': obj.pk})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+
+class CampanaNotificacionSerializer(serializers.ModelSerializer):
+    """Serializer para consultar el progreso de una campaña de notificación"""
+    creado_por_email = serializers.EmailField(source='creado_por.email', read_only=True, default=None)
+    pendientes = serializers.IntegerField(read_only=True)
+    progreso = serializers.SerializerMethodField()
+    errores = serializers.SerializerMethodField()
+
+    class Meta:
+        model = CampanaNotificacion
+        fields = [
+            'id', 'estado', 'creado_por_email', 'total', 'enviados', 'fallidos', 'omitidos', 'pendientes',
+            'progreso', 'errores', 'fecha_creacion', 'fecha_inicio', 'fecha_fin'
+        ]
+        read_only_fields = fields
+
+    def get_progreso(self, obj):
+        """Porcentaje de destinatarios ya procesados (enviados, fallidos u omitidos)"""
+        if not obj.total:
+            return 100
+        return round((obj.total - obj.pendientes) * 100 / obj.total)
+
+    def get_errores(self, obj):
+        """Destinatarios fallidos (precargados por la vista en destinatarios_fallidos)"""
+        fallidos = getattr(obj, 'destinatarios_fallidos', None)
+        if fallidos is None:
+            fallidos = obj.destinatarios.filter(estado='fallido').select_related('empresa')
+        return [
+            {
+                'empresa_id': destinatario.empresa_id,
+                'razon_social': destinatario.empresa.razon_social,
+                'email': destinatario.email,
+                'error': destinatario.error,
+            }
+            for destinatario in fallidos
+        ] or None
+
+
+class ImportacionEmpresasSerializer(serializers.ModelSerializer):
+    """Serializer para consultar el estado y el resumen de una importación de empresas"""
+    usuario_email = serializers.EmailField(source='usuario.email', read_only=True)
+
+    class Meta:
+        model = ImportacionEmpresas
+        fields = [
+            'id', 'usuario_email', 'nombre_archivo', 'formato', 'simulacion', 'actualizar_existentes',
+            'estado', 'total_filas', 'validas', 'creadas', 'actualizadas', 'omitidas', 'con_errores',
+            'error', 'fecha_creacion', 'fecha_inicio', 'fecha_fin'
+        ]
+        read_only_fields = fields
+
+
+class ImportacionEmpresasDetalleSerializer(ImportacionEmpresasSerializer):
+    """Incluye los errores por fila (solo en el detalle: pueden ser cientos)"""
+
+    class Meta(ImportacionEmpresasSerializer.Meta):
+        fields = ImportacionEmpresasSerializer.Meta.fields + ['errores']
+        read_only_fields = fields
@@ -2,11 +2,40 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
-# Acá van tus signals cuando los necesites
-# Por ahora dejalo vacío o con un comentario
-
-# Ejemplo de signal (comentado por ahora):
-# @receiver(post_save, sender=TuModelo)
-# def log_cambio(sender, instance, created, **kwargs):
-#     # Lógica de auditoría
-#     pass
\ No newline at end of file
+from apps.core.imagenes import encolar_si_cambio
+from .catalogos_texto import encolar_si_cambio as encolar_catalogo_si_cambio
+
+from apps.geografia.models import Provincia, Departamento, Municipio, Localidad
+from .models import (
+    Empresa, Empresaproducto, Empresaservicio, EmpresaMixta,
+    TipoEmpresa, Rubro, SubRubro, UnidadMedida, MatrizClasificacionExportador,
+    ProductoEmpresa, ServicioEmpresa, PosicionArancelaria,
+    ProductoEmpresaMixta, ServicioEmpresaMixta, PosicionArancelariaMixta,
+)
+
+# Modelos que aparecen en los PDF además de Empresa (Empresa se versiona con
+# fecha_actualizacion, ver pdf_cache.version_datos)
+MODELOS_EN_PDF = [
+    TipoEmpresa, Rubro, SubRubro, UnidadMedida, MatrizClasificacionExportador,
+    ProductoEmpresa, ServicioEmpresa, PosicionArancelaria,
+    ProductoEmpresaMixta, ServicioEmpresaMixta, PosicionArancelariaMixta,
+    Provincia, Departamento, Municipio, Localidad,
+]
+
+
+def invalidar_pdf_cache(sender, **kwargs):
+    """Cualquier cambio en estos modelos invalida los PDF cacheados (al confirmar la transacción)"""
+    from .pdf_cache import invalidar_version_datos
+    invalidar_version_datos()
+
+
+for modelo in MODELOS_EN_PDF:
+    post_save.connect(invalidar_pdf_cache, sender=modelo, dispatch_uid=f'pdf_cache_save_{modelo.__name__}')
+    post_delete.connect(invalidar_pdf_cache, sender=modelo, dispatch_uid=f'pdf_cache_delete_{modelo.__name__}')
+
+# Miniaturas y WebP del logo (worker procesar_imagenes) y texto del brochure PDF
+# para la búsqueda en catálogos (worker indexar_catalogos). post_save se emite con
+# la clase guardada, por eso se conectan también los proxies
+for modelo in (Empresa, Empresaproducto, Empresaservicio, EmpresaMixta):
+    post_save.connect(encolar_si_cambio, sender=modelo, dispatch_uid=f'imagenes_derivadas_{modelo.__name__}')
+    post_save.connect(encolar_catalogo_si_cambio, sender=modelo, dispatch_uid=f'catalogo_texto_{modelo.__name__}')
@@ -1,4 +1,3 @@
-from django.http import HttpResponse
 from reportlab.lib.pagesizes import letter, A4, landscape
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, Image
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -6,9 +5,12 @@ from reportlab.lib import colors
 from reportlab.lib.units import inch, cm
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 from datetime import datetime
-from io import BytesIO
+import io
 import os
-from django.conf import settings
+import tempfile
+import zlib
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.pdfbase.pdfdoc import PDFArray, PDFDictionary, PDFName, PDFStream
 
 def extraer_actividades_promocion(empresa):
     """
@@ -130,21 +132,153 @@ def format_geolocalizacion_as_link(geolocalizacion_value):
         # Si no se puede parsear, devolver el valor original
         return str(geolocalizacion_value)
 
-def generate_empresas_pdf(empresas, campos_seleccionados, tipo_empresa):
+# ---------------------------------------------------------------------------
+# Renderizado por bloques (memoria acotada para exportaciones grandes)
+# ---------------------------------------------------------------------------
+
+# Filas por tabla: ReportLab parte las tablas enormes de forma superlineal, así que
+# en lugar de una única tabla se emiten tablas acotadas (cada una con su encabezado).
+# Debe ser par para que las filas alternadas sigan el mismo patrón entre bloques.
+FILAS_POR_TABLA = 150
+
+# Tamaño de lote para recorrer los querysets con .iterator()
+CHUNK_SIZE_QUERYSET = 500
+
+
+class HistoriaPorBloques(list):
+    """
+    Story de ReportLab que se completa a demanda desde un generador.
+    doc.build consume los flowables del principio de la lista; solo se mantienen
+    en memoria unos pocos a la vez en lugar del documento completo.
+    """
+
+    def __init__(self, generador, minimo=8):
+        super().__init__()
+        self._generador = iter(generador)
+        self._minimo = minimo
+        self._agotado = False
+
+    def _rellenar(self):
+        while not self._agotado and list.__len__(self) < self._minimo:
+            try:
+                self.append(next(self._generador))
+            except StopIteration:
+                self._agotado = True
+
+    def __len__(self):
+        self._rellenar()
+        return list.__len__(self)
+
+    def __getitem__(self, indice):
+        self._rellenar()
+        return list.__getitem__(self, indice)
+
+
+class ProgresoFilas:
+    """Reportar progreso por filas procesadas con la misma firma que el callback de ReportLab"""
+
+    def __init__(self, callback, total):
+        self.callback = callback
+        self.procesadas = 0
+        if callback:
+            callback('SIZE_EST', total)
+
+    def avanzar(self):
+        self.procesadas += 1
+        if self.callback and self.procesadas % FILAS_POR_TABLA == 0:
+            self.callback('PROGRESS', self.procesadas)
+
+
+class CanvasPaginasComprimidas(Canvas):
+    """
+    Canvas que comprime el contenido de cada página apenas se cierra.
+    ReportLab conserva los streams de todas las páginas sin comprimir hasta save();
+    comprimiéndolos en showPage la memoria retenida por página es mucho menor.
+    """
+
+    def showPage(self):
+        super().showPage()
+        if not self._pageCompression:
+            return
+        pagina = self._doc.Pages.pages[-1]
+        if pagina.Contents or not pagina.stream:
+            return
+        contenido = pagina.stream
+        if isinstance(contenido, str):
+            contenido = contenido.encode('utf8')
+        stream = PDFStream(
+            PDFDictionary({'Filter': PDFArray([PDFName('FlateDecode')])}),
+            zlib.compress(contenido)
+        )
+        stream.__Comment__ = 'page stream'
+        pagina.Contents = stream
+        pagina.stream = None
+
+
+def iterar_queryset(empresas):
+    """Recorrer un queryset en lotes (sin cachear todos los objetos) o cualquier iterable"""
+    if hasattr(empresas, 'iterator'):
+        return empresas.iterator(chunk_size=CHUNK_SIZE_QUERYSET)
+    return iter(empresas)
+
+
+def iterar_por_ids(queryset, ids):
+    """
+    Recorrer los objetos de `queryset` en el orden de `ids`, consultando de a
+    CHUNK_SIZE_QUERYSET. Los IDs fijan el conjunto de filas: un alta o baja posterior
+    no desplaza ni repite filas (las que ya no existen se omiten).
+    """
+    for inicio in range(0, len(ids), CHUNK_SIZE_QUERYSET):
+        bloque = ids[inicio:inicio + CHUNK_SIZE_QUERYSET]
+        objetos = queryset.filter(id__in=bloque).in_bulk()
+        for id in bloque:
+            objeto = objetos.get(id)
+            if objeto is not None:
+                yield objeto
+
+
+def tablas_por_bloques(headers, filas, col_widths, estilo):
+    """Emitir las filas en tablas de FILAS_POR_TABLA filas con el encabezado repetido"""
+    table_style = TableStyle(estilo)
+    bloque = []
+    emitidas = 0
+    for fila in filas:
+        bloque.append(fila)
+        if len(bloque) >= FILAS_POR_TABLA:
+            tabla = Table([headers] + bloque, colWidths=col_widths, repeatRows=1)
+            tabla.setStyle(table_style)
+            yield tabla
+            emitidas += 1
+            bloque = []
+    if bloque or not emitidas:
+        tabla = Table([headers] + bloque, colWidths=col_widths, repeatRows=1)
+        tabla.setStyle(table_style)
+        yield tabla
+
+
+def respuesta_pdf(archivo, filename):
+    """Servir un PDF escrito en un archivo temporal sin cargarlo en memoria"""
+    from django.http import FileResponse
+    archivo.seek(0)
+    return FileResponse(archivo, as_attachment=True, filename=filename, content_type='application/pdf')
+
+
+def generate_empresas_pdf(empresas, campos_seleccionados, tipo_empresa, progress_callback=None):
     """
-    Generar PDF con empresas filtradas usando la identidad visual institucional
+    Generar PDF con empresas filtradas usando la identidad visual institucional.
+    Las empresas se recorren con .iterator() y se escriben por bloques en un archivo temporal.
     """
-    buffer = BytesIO()
+    from .extraccion import con_matrices, matriz_reciente
+
+    archivo = tempfile.TemporaryFile(suffix='.pdf')
     doc = SimpleDocTemplate(
-        buffer, 
+        archivo, 
         pagesize=landscape(A4),
         rightMargin=1*cm,
         leftMargin=1*cm,
         topMargin=1.5*cm,
         bottomMargin=1*cm
     )
-    story = []
-    
     # Estilos personalizados
     styles = getSampleStyleSheet()
     
@@ -181,40 +315,7 @@ def generate_empresas_pdf(empresas, campos_seleccionados, tipo_empresa):
     spaceAfter=6
 )
     
-    # Header institucional
-    header_text = Paragraph(
-        "Dirección de Intercambio Comercial Internacional y Regional<br/>"
-        "Provincia de Catamarca",
-        header_style
-    )
-    story.append(header_text)
-    
-    # Línea decorativa (usando tabla como workaround)
-    line_data = [['']]
-    line_table = Table(line_data, colWidths=[27*cm])
-    line_table.setStyle(TableStyle([
-        ('LINEBELOW', (0, 0), (-1, -1), 2, COLOR_VERDE_INSTITUCIONAL),
-        ('TOPPADDING', (0, 0), (-1, -1), 0),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
-    ]))
-    story.append(line_table)
-    story.append(Spacer(1, 0.2*inch))
-    
-    # Título del reporte
-    title = Paragraph(f"Reporte de Empresas - {tipo_empresa.title()}", title_style)
-    story.append(title)
-    
-    # Fecha de generación
-    fecha = datetime.now().strftime("%d/%m/%Y %H:%M")
-    fecha_text = Paragraph(f"Generado el: {fecha}", subtitle_style)
-    story.append(fecha_text)
-    
-    story.append(Spacer(1, 0.3*inch))
-    
-    # Datos de la tabla
-    data = []
-    
-    # Encabezados
+    # Los encabezados no dependen de las filas
     headers = [
     'Razón Social', 'Nombre Fantasía', 'CUIT', 'Tipo Sociedad',
     'Dirección', 'Departamento', 
@@ -234,16 +335,10 @@ def generate_empresas_pdf(empresas, campos_seleccionados, tipo_empresa):
             'Ferias Nac.', 'Ferias Intern.', 'Categoría Matriz'
 ])
     
-    data.append(headers)
-    
-    # Datos de las empresas
-    # Datos de las empresas
-    for empresa in empresas:
-        # Obtener la matriz de clasificación si existe
-        try:
-            matriz = empresa.clasificaciones_exportador.first()
-        except:
-            matriz = None
+    def fila_empresa(empresa):
+        """Construir la fila de la tabla para una empresa"""
+        # Matriz de clasificación más reciente, del prefetch compartido (ver extraccion)
+        matriz = matriz_reciente(empresa)
     
         row = [
             # Datos básicos
@@ -267,7 +362,7 @@ def generate_empresas_pdf(empresas, campos_seleccionados, tipo_empresa):
             empresa.tipo_empresa.nombre if empresa.tipo_empresa else '',
         ]
         
-        # Exportación (IMPORTANTE: Debe estar INDENTADO dentro del for)
+        # Exportación
         if 'exporta' in campos_seleccionados or True:
             row.extend([
                 empresa.exporta or 'No',
@@ -275,14 +370,14 @@ def generate_empresas_pdf(empresas, campos_seleccionados, tipo_empresa):
                 empresa.tipoexporta or '',
             ])
         
-        # Importación (IMPORTANTE: Debe estar INDENTADO dentro del for)
+        # Importación
         if 'importa' in campos_seleccionados or True:
             row.extend([
                 'Sí' if empresa.importa else 'No',
                 empresa.frecuenciaimporta or '',
             ])
         
-        # Certificaciones (IMPORTANTE: Debe estar INDENTADO dentro del for)
+        # Certificaciones
         if 'certificadopyme' in campos_seleccionados or True:
             row.extend([
                 'Sí' if empresa.certificadopyme else 'No',
@@ -290,7 +385,7 @@ def generate_empresas_pdf(empresas, campos_seleccionados, tipo_empresa):
                 Paragraph(empresa.certificaciones or '', styles['Normal']),
             ])
         
-        # Capacidad, idiomas, ferias (IMPORTANTE: Debe estar INDENTADO dentro del for)
+        # Capacidad, idiomas, ferias
         capacidad_str = f"{empresa.capacidadproductiva} {empresa.tiempocapacidad}" if empresa.capacidadproductiva else ''
         row.extend([
             capacidad_str,
@@ -301,8 +396,7 @@ def generate_empresas_pdf(empresas, campos_seleccionados, tipo_empresa):
             matriz.get_categoria_display() if matriz else '',
             str(matriz.puntaje_total) if matriz else '',
         ])
-        
-        data.append(row)  # ← Esta línea DEBE estar dentro del for
+        return row
 
         # Calcular anchos de columna según campos seleccionados
     num_columnas = len(headers)
@@ -354,9 +448,6 @@ def generate_empresas_pdf(empresas, campos_seleccionados, tipo_empresa):
         # Fallback: distribuir equitativamente
         col_widths = [ancho_disponible/num_columnas] * num_columnas
     
-    # Crear tabla con estilos institucionales
-    table = Table(data, colWidths=col_widths, repeatRows=1)
-    
     # Estilos de la tabla
     table_style = [
         # Encabezado
@@ -377,64 +468,334 @@ def generate_empresas_pdf(empresas, campos_seleccionados, tipo_empresa):
         ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
     ]
     
-    table.setStyle(TableStyle(table_style))
+    progreso = ProgresoFilas(progress_callback, empresas.count() if progress_callback and hasattr(empresas, 'count') else 0)
     
-    story.append(table)
+    def filas():
+        for empresa in iterar_queryset(con_matrices(empresas)):
+            progreso.avanzar()
+            yield fila_empresa(empresa)
     
-    # Footer con información institucional
-    story.append(Spacer(1, 0.3*inch))
-    footer_style = ParagraphStyle(
-        'FooterStyle',
-        parent=styles['Normal'],
-        fontSize=8,
-        textColor=COLOR_GRIS_NEUTRO,
-        fontName='Helvetica',
-        alignment=TA_CENTER,
-        spaceBefore=10
-    )
-    footer_text = Paragraph(
-        "Dirección de Intercambio Comercial Internacional y Regional - "
-        "San Martín 320, San Fernando del Valle de Catamarca - "
-        "Tel: (0383) 4437390",
-        footer_style
-    )
-    story.append(footer_text)
-    
-    # Construir PDF
-    doc.build(story)
-    
-    # Obtener PDF
-    pdf = buffer.getvalue()
-    buffer.close()
+    def historia():
+        # Header institucional
+        yield Paragraph(
+            "Dirección de Intercambio Comercial Internacional y Regional<br/>"
+            "Provincia de Catamarca",
+            header_style
+        )
+        
+        # Línea decorativa (usando tabla como workaround)
+        line_data = [['']]
+        line_table = Table(line_data, colWidths=[27*cm])
+        line_table.setStyle(TableStyle([
+            ('LINEBELOW', (0, 0), (-1, -1), 2, COLOR_VERDE_INSTITUCIONAL),
+            ('TOPPADDING', (0, 0), (-1, -1), 0),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
+        ]))
+        yield line_table
+        yield Spacer(1, 0.2*inch)
+        
+        # Título del reporte
+        yield Paragraph(f"Reporte de Empresas - {tipo_empresa.title()}", title_style)
+        
+        # Fecha de generación
+        fecha = datetime.now().strftime("%d/%m/%Y %H:%M")
+        yield Paragraph(f"Generado el: {fecha}", subtitle_style)
+        
+        yield Spacer(1, 0.3*inch)
+        
+        # Datos de las empresas en tablas acotadas
+        yield from tablas_por_bloques(headers, filas(), col_widths, table_style)
+        
+        # Footer con información institucional
+        yield Spacer(1, 0.3*inch)
+        footer_style = ParagraphStyle(
+            'FooterStyle',
+            parent=styles['Normal'],
+            fontSize=8,
+            textColor=COLOR_GRIS_NEUTRO,
+            fontName='Helvetica',
+            alignment=TA_CENTER,
+            spaceBefore=10
+        )
+        yield Paragraph(
+            "Dirección de Intercambio Comercial Internacional y Regional - "
+            "San Martín 320, San Fernando del Valle de Catamarca - "
+            "Tel: (0383) 4437390",
+            footer_style
+        )
     
-    # Crear respuesta HTTP
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="empresas_aprobadas_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf"'
-    response.write(pdf)
+    # Construir PDF consumiendo la historia a demanda
+    doc.build(HistoriaPorBloques(historia()), canvasmaker=CanvasPaginasComprimidas)
     
-    return response
+    return respuesta_pdf(archivo, f'empresas_aprobadas_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf')
+
+
+# Secciones del reporte de empresas aprobadas, en orden; cada una empieza en una página nueva
+SECCIONES_APROBADAS = ['basico', 'contacto', 'comercial']
 
+# Empresas por parte cuando el reporte de aprobadas se divide para renderizarlo en paralelo.
+# Cada parte empieza en una página nueva; debe ser par (ver FILAS_POR_TABLA).
+FILAS_POR_PARTE = 1000
 
-def generate_empresas_aprobadas_pdf(empresas_producto, empresas_servicio, empresas_mixta, campos_seleccionados=None):
+
+class ConsultaDiferida:
     """
-    Genera un PDF con todas las empresas aprobadas, optimizado para orientación landscape
+    Referencia a un QuerySet que puede enviarse a otro proceso sin evaluarlo.
+    Al serializar un QuerySet con pickle Django trae todos los resultados;
+    acá solo viajan el modelo, la consulta y los prefetch.
+    """
+
+    def __init__(self, queryset):
+        self.modelo = queryset.model
+        self.query = queryset.query
+        self.prefetch = queryset._prefetch_related_lookups
+
+    def queryset(self):
+        queryset = self.modelo._default_manager.all()
+        queryset.query = self.query
+        return queryset.prefetch_related(*self.prefetch)
+
+
+def _estilos_aprobadas():
+    """Estilos de párrafo y de tabla del reporte de empresas aprobadas"""
+    styles = getSampleStyleSheet()
+    return {
+        'normal': styles['Normal'],
+        # Estilo para título
+        'titulo': ParagraphStyle(
+            'TitleStyle',
+            parent=styles['Heading1'],
+            fontSize=18,
+            textColor=colors.HexColor('#222A59'),
+            spaceAfter=12,
+            alignment=TA_CENTER,
+            fontName='Helvetica-Bold'
+        ),
+        # Estilo para subtítulos
+        'subtitulo': ParagraphStyle(
+            'SubtitleStyle',
+            parent=styles['Normal'],
+            fontSize=10,
+            textColor=colors.HexColor('#6B7280'),
+            spaceAfter=12,
+            alignment=TA_CENTER
+        ),
+        # Estilo para encabezado
+        'encabezado': ParagraphStyle(
+            'HeaderStyle',
+            parent=styles['Normal'],
+            fontSize=14,
+            textColor=colors.HexColor('#222A59'),
+            alignment=TA_CENTER,
+            fontName='Helvetica-Bold',
+            spaceAfter=6
+        ),
+        # Estilo para footer
+        'footer': ParagraphStyle(
+            'FooterStyle',
+            parent=styles['Normal'],
+            fontSize=8,
+            textColor=colors.HexColor('#6B7280'),
+            alignment=TA_CENTER
+        ),
+        # Mismo estilo para las tres tablas
+        'tabla': [
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#222A59')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+            ('TOPPADDING', (0, 0), (-1, 0), 8),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F3F4F6')]),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 10),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#6B7280')),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ],
+    }
+
+
+def _fila_basico(tipo, empresa, estilos):
+    normal = estilos['normal']
+    return [
+        tipo,
+        Paragraph(normalize_text(empresa.razon_social), normal),
+        Paragraph(normalize_text(empresa.nombre_fantasia), normal),
+        empresa.cuit_cuil or '-',
+        empresa.tipo_sociedad if empresa.tipo_sociedad else '-',
+        Paragraph(normalize_text(empresa.direccion), normal),
+        normalize_text(empresa.departamento.nombre) if empresa.departamento else '-',
+    ]
+
+
+def _fila_contacto(tipo, empresa, estilos):
+    normal = estilos['normal']
+    return [
+        Paragraph(normalize_text(empresa.razon_social), normal),
+        empresa.telefono or '-',
+        Paragraph((empresa.correo or '-').lower(), normal),  # emails en minúscula
+        Paragraph((empresa.sitioweb or '-').lower(), normal),  # URLs en minúscula
+        Paragraph(normalize_text(empresa.contacto_principal_nombre), normal),
+        normalize_text(empresa.contacto_principal_cargo) if empresa.contacto_principal_cargo else '-',
+    ]
+
+
+def _fila_comercial(tipo, empresa, estilos):
+    from .extraccion import matriz_reciente
+
+    normal = estilos['normal']
+    matriz = matriz_reciente(empresa)
+    categoria = matriz.get_categoria_display() if matriz else 'N/A'
+
+    return [
+        Paragraph(normalize_text(empresa.razon_social), normal),
+        Paragraph(normalize_text(empresa.id_rubro.nombre) if empresa.id_rubro else '-', normal),
+        normalize_text(empresa.tipo_empresa.nombre) if empresa.tipo_empresa else '-',
+        'Sí' if empresa.exporta == 'Sí' else 'No',
+        Paragraph(normalize_text(empresa.destinoexporta) if empresa.destinoexporta else '-', normal),
+        'Sí' if empresa.importa else 'No',
+        'Sí' if empresa.certificadopyme else 'No',
+        categoria,
+    ]
+
+
+# Título, encabezados, anchos (fracción del ancho disponible) y constructor de filas de cada sección
+DEFINICION_SECCIONES_APROBADAS = {
+    'basico': (
+        "Información Básica de Empresas",
+        ['Tipo', 'Razón Social', 'Nombre Fantasía', 'CUIT', 'Tipo Sociedad', 'Dirección', 'Departamento'],
+        [0.07, 0.18, 0.15, 0.10, 0.10, 0.15, 0.10],
+        _fila_basico,
+    ),
+    'contacto': (
+        "Información de Contacto",
+        ['Razón Social', 'Teléfono', 'Email', 'Sitio Web', 'Contacto Principal', 'Cargo'],
+        [0.20, 0.10, 0.15, 0.15, 0.15, 0.10],
+        _fila_contacto,
+    ),
+    'comercial': (
+        "Información Comercial y Clasificación",
+        ['Razón Social', 'Rubro', 'Tipo Empresa', 'Exporta', 'Destino Export.', 'Importa', 'Certif. MiPYME', 'Categoría'],
+        [0.20, 0.15, 0.08, 0.06, 0.15, 0.06, 0.06, 0.10],
+        _fila_comercial,
+    ),
+}
+
+# Columnas que dependen de los campos seleccionados (el resto se muestra siempre)
+CAMPOS_COLUMNAS_APROBADAS = {
+    'Exporta': 'exporta',
+    'Destino Export.': 'exporta',
+    'Importa': 'importa',
+    'Certif. MiPYME': 'certificadopyme',
+}
+
+
+def columnas_seccion_aprobadas(seccion, campos_seleccionados=None):
+    """
+    Título, encabezados, anchos, índices de columna y constructor de filas de una sección,
+    quitando las columnas de campos no seleccionados (None = todos).
+    Los anchos de las columnas que quedan se reescalan para ocupar el mismo ancho.
+    """
+    titulo, headers, anchos, construir_fila = DEFINICION_SECCIONES_APROBADAS[seccion]
+    indices = [
+        indice for indice, header in enumerate(headers)
+        if campos_seleccionados is None
+        or CAMPOS_COLUMNAS_APROBADAS.get(header) in (None, *campos_seleccionados)
+    ]
+    escala = sum(anchos) / sum(anchos[indice] for indice in indices)
+    return (
+        titulo,
+        [headers[indice] for indice in indices],
+        [anchos[indice] * escala for indice in indices],
+        indices,
+        construir_fila,
+    )
+
+
+def planificar_partes_aprobadas(empresas_por_tipo, filas_por_parte=FILAS_POR_PARTE, campos_seleccionados=None):
+    """
+    Dividir el reporte de aprobadas en partes independientes.
+    Los IDs de las empresas (en orden Mixta, Producto, Servicio y por razón social) se
+    leen una sola vez y se cortan en rangos de `filas_por_parte`; cada sección se
+    renderiza con esos mismos rangos. Cada rango lleva sus IDs explícitos, así los
+    procesos no dependen de un OFFSET sobre datos que pueden cambiar mientras tanto.
+    Cada parte tiene un único segmento (sección + rangos); la primera lleva el
+    encabezado del documento y la última el footer. Todas llevan los mismos
+    `campos_seleccionados`, así el resultado no depende de cómo se renderice.
+    """
+    from .extraccion import con_matrices
+
+    rangos_por_parte = [[]]
+    ocupadas = 0
+    for tipo, queryset in empresas_por_tipo:
+        consulta = ConsultaDiferida(con_matrices(queryset))
+        ids = list(queryset.order_by('razon_social', 'id').values_list('id', flat=True))
+        desde = 0
+        while desde < len(ids):
+            if ocupadas == filas_por_parte:
+                rangos_por_parte.append([])
+                ocupadas = 0
+            hasta = min(len(ids), desde + filas_por_parte - ocupadas)
+            rangos_por_parte[-1].append((tipo, consulta, ids[desde:hasta]))
+            ocupadas += hasta - desde
+            desde = hasta
+
+    fecha = datetime.now().strftime('%d/%m/%Y %H:%M')
+    partes = []
+    for seccion in SECCIONES_APROBADAS:
+        for indice, rangos in enumerate(rangos_por_parte):
+            partes.append({
+                'segmentos': [{'seccion': seccion, 'rangos': rangos, 'inicio_seccion': indice == 0}],
+                'filas': sum(len(ids) for _, _, ids in rangos),
+                'inicio_documento': False,
+                'fin_documento': False,
+                'campos': campos_seleccionados,
+                'fecha': fecha,
+            })
+    partes[0]['inicio_documento'] = True
+    partes[-1]['fin_documento'] = True
+    return partes
+
+
+def combinar_partes(partes):
+    """
+    Juntar las partes en una sola para renderizar el documento completo en un proceso.
+    Cada sección queda en un único segmento (sin cortes de página entre rangos).
+    """
+    segmentos = []
+    for parte in partes:
+        for segmento in parte['segmentos']:
+            if segmentos and segmentos[-1]['seccion'] == segmento['seccion']:
+                rangos = segmentos[-1]['rangos']
+                for rango in segmento['rangos']:
+                    # Unir los rangos consecutivos del mismo tipo en uno solo
+                    if rangos and rangos[-1][0] == rango[0]:
+                        rangos[-1] = (rangos[-1][0], rangos[-1][1], rangos[-1][2] + rango[2])
+                    else:
+                        rangos.append(rango)
+            else:
+                segmentos.append({**segmento, 'rangos': list(segmento['rangos'])})
+
+    return {
+        'segmentos': segmentos,
+        'filas': sum(parte['filas'] for parte in partes),
+        'inicio_documento': True,
+        'fin_documento': True,
+        'campos': partes[0]['campos'],
+        'fecha': partes[0]['fecha'],
+    }
+
+
+def renderizar_parte_aprobadas(archivo, parte, progreso=None):
+    """
+    Renderizar una parte del reporte de empresas aprobadas en `archivo`.
+    Es una función de módulo para que el pool de procesos pueda ejecutarla (ver pdf_paralelo).
+    Cada segmento empieza en una página nueva; `progreso` es un ProgresoFilas opcional.
     """
-    from django.http import HttpResponse
-    from reportlab.lib import colors
-    from reportlab.lib.pagesizes import A4, landscape
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.units import cm
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-    from reportlab.lib.enums import TA_CENTER, TA_LEFT
-    from io import BytesIO
-    from datetime import datetime
-    
-    # Buffer para el PDF
-    buffer = BytesIO()
-    
     # CAMBIO CRÍTICO: Usar orientación LANDSCAPE (horizontal) para más espacio
     doc = SimpleDocTemplate(
-        buffer,
+        archivo,
         pagesize=landscape(A4),  # Orientación horizontal
         rightMargin=1*cm,
         leftMargin=1*cm,
@@ -442,548 +803,210 @@ def generate_empresas_aprobadas_pdf(empresas_producto, empresas_servicio, empres
         bottomMargin=1.5*cm,
         title='Reporte de Empresas Aprobadas'
     )
-    
-    # Estilos
-    styles = getSampleStyleSheet()
-    
-    # Estilo para título
-    title_style = ParagraphStyle(
-        'TitleStyle',
-        parent=styles['Heading1'],
-        fontSize=18,
-        textColor=colors.HexColor('#222A59'),
-        spaceAfter=12,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold'
-    )
-    
-    # Estilo para subtítulos
-    subtitle_style = ParagraphStyle(
-        'SubtitleStyle',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor=colors.HexColor('#6B7280'),
-        spaceAfter=12,
-        alignment=TA_CENTER
-    )
-    
-    # Estilo para encabezado
-    header_style = ParagraphStyle(
-        'HeaderStyle',
-        parent=styles['Normal'],
-        fontSize=14,
-        textColor=colors.HexColor('#222A59'),
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold',
-        spaceAfter=6
-    )
-    
-    # Estilo para footer
-    footer_style = ParagraphStyle(
-        'FooterStyle',
-        parent=styles['Normal'],
-        fontSize=8,
-        textColor=colors.HexColor('#6B7280'),
-        alignment=TA_CENTER
-    )
-    
-    # Story
-    story = []
-    
-    # Encabezado institucional
-    header_text = Paragraph(
-        "Dirección de Intercambio Comercial Internacional y Regional<br/>Provincia de Catamarca",
-        header_style
-    )
-    story.append(header_text)
-    story.append(Spacer(1, 0.3*cm))
-    
-    # Título
-    title = Paragraph("Reporte de Empresas Aprobadas", title_style)
-    story.append(title)
-    
-    # Fecha de generación
-    fecha = datetime.now().strftime('%d/%m/%Y %H:%M')
-    fecha_text = Paragraph(f"Generado el: {fecha}", subtitle_style)
-    story.append(fecha_text)
-    story.append(Spacer(1, 0.5*cm))
-    
-    # SECCIÓN 1: INFORMACIÓN BÁSICA
-    story.append(Paragraph("Información Básica de Empresas", title_style))
-    story.append(Spacer(1, 0.3*cm))
-    
-    headers_basico = [
-        'Tipo',
-        'Razón Social',
-        'Nombre Fantasía',
-        'CUIT',
-        'Tipo Sociedad',
-        'Dirección',
-        'Departamento',
-    ]
-    
-    # Combinar todas las empresas
-    todas_empresas = []
-    for empresa in empresas_producto:
-        todas_empresas.append(('Producto', empresa))
-    for empresa in empresas_servicio:
-        todas_empresas.append(('Servicio', empresa))
-    for empresa in empresas_mixta:
-        todas_empresas.append(('Mixta', empresa))
-    
-    todas_empresas.sort(key=lambda x: (x[0], x[1].razon_social))
-    
-    # Tabla 1: Datos Básicos
-    data_basico = [headers_basico]
-    for tipo, empresa in todas_empresas:
-        row = [
-            tipo,
-            Paragraph(normalize_text(empresa.razon_social), styles['Normal']),
-            Paragraph(normalize_text(empresa.nombre_fantasia), styles['Normal']),
-            empresa.cuit_cuil or '-',
-            empresa.tipo_sociedad if empresa.tipo_sociedad else '-',
-            Paragraph(normalize_text(empresa.direccion), styles['Normal']),
-            normalize_text(empresa.departamento.nombre) if empresa.departamento else '-',
-        ]
-        data_basico.append(row)
-    
+
+    estilos = _estilos_aprobadas()
     ancho_disponible = landscape(A4)[0] - 2*cm
-    col_widths_basico = [
-        ancho_disponible * 0.07,  # Tipo
-        ancho_disponible * 0.18,  # Razón Social
-        ancho_disponible * 0.15,  # Nombre Fantasía
-        ancho_disponible * 0.10,  # CUIT
-        ancho_disponible * 0.10,  # Tipo Sociedad
-        ancho_disponible * 0.15,  # Dirección
-        ancho_disponible * 0.10,  # Departamento
-    ]
-    
-    table_basico = Table(data_basico, colWidths=col_widths_basico, repeatRows=1)
-    table_basico.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#222A59')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-        ('TOPPADDING', (0, 0), (-1, 0), 8),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F3F4F6')]),
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 1), (-1, -1), 10),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#6B7280')),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-    ]))
-    story.append(table_basico)
-    
-    # NUEVA PÁGINA - SECCIÓN 2: CONTACTO
-    story.append(PageBreak())
-    story.append(Paragraph("Información de Contacto", title_style))
-    story.append(Spacer(1, 0.3*cm))
-    
-    headers_contacto = [
-        'Razón Social',
-        'Teléfono',
-        'Email',
-        'Sitio Web',
-        'Contacto Principal',
-        'Cargo'
-    ]
-    
-    data_contacto = [headers_contacto]
-    for tipo, empresa in todas_empresas:
-        row = [
-            Paragraph(normalize_text(empresa.razon_social), styles['Normal']),
-            empresa.telefono or '-',
-            Paragraph((empresa.correo or '-').lower(), styles['Normal']),  # emails en minúscula
-            Paragraph((empresa.sitioweb or '-').lower(), styles['Normal']),  # URLs en minúscula
-            Paragraph(normalize_text(empresa.contacto_principal_nombre), styles['Normal']),
-            normalize_text(empresa.contacto_principal_cargo) if empresa.contacto_principal_cargo else '-',
-            ]
-        data_contacto.append(row)
-    
-    col_widths_contacto = [
-        ancho_disponible * 0.20,  # Razón Social
-        ancho_disponible * 0.10,  # Teléfono
-        ancho_disponible * 0.15,  # Email
-        ancho_disponible * 0.15,  # Sitio Web
-        ancho_disponible * 0.15,  # Contacto
-        ancho_disponible * 0.10,  # Cargo
+
+    def filas(rangos, construir_fila, indices):
+        for tipo, consulta, ids in rangos:
+            for empresa in iterar_por_ids(consulta.queryset(), ids):
+                if progreso:
+                    progreso.avanzar()
+                fila = construir_fila(tipo, empresa, estilos)
+                yield [fila[indice] for indice in indices]
+
+    def historia():
+        if parte['inicio_documento']:
+            # Encabezado institucional
+            yield Paragraph(
+                "Dirección de Intercambio Comercial Internacional y Regional<br/>Provincia de Catamarca",
+                estilos['encabezado']
+            )
+            yield Spacer(1, 0.3*cm)
+
+            # Título y fecha de generación
+            yield Paragraph("Reporte de Empresas Aprobadas", estilos['titulo'])
+            yield Paragraph(f"Generado el: {parte['fecha']}", estilos['subtitulo'])
+            yield Spacer(1, 0.5*cm)
+
+        for indice, segmento in enumerate(parte['segmentos']):
+            titulo, headers, anchos, indices, construir_fila = columnas_seccion_aprobadas(
+                segmento['seccion'], parte['campos']
+            )
+
+            # NUEVA PÁGINA para cada sección
+            if indice > 0:
+                yield PageBreak()
+
+            if segmento['inicio_seccion']:
+                yield Paragraph(titulo, estilos['titulo'])
+                yield Spacer(1, 0.3*cm)
+
+            yield from tablas_por_bloques(
+                headers,
+                filas(segmento['rangos'], construir_fila, indices),
+                [ancho_disponible * ancho for ancho in anchos],
+                estilos['tabla']
+            )
+
+        if parte['fin_documento']:
+            yield Spacer(1, 0.3*cm)
+            yield Paragraph(
+                "Dirección de Intercambio Comercial Internacional y Regional - "
+                "San Martín 320, San Fernando del Valle de Catamarca - "
+                "Tel: (0383) 4437390",
+                estilos['footer']
+            )
+
+    doc.build(HistoriaPorBloques(historia()), canvasmaker=CanvasPaginasComprimidas)
+
+
+def generate_empresas_aprobadas_pdf(empresas_producto, empresas_servicio, empresas_mixta, campos_seleccionados=None, progress_callback=None, procesos=1):
+    """
+    Genera un PDF con todas las empresas aprobadas, optimizado para orientación landscape.
+    Por defecto se renderiza en un solo documento con memoria acotada. Con procesos > 1
+    el reporte se divide en partes (secciones y rangos de empresas) que se renderizan en
+    un pool de procesos y luego se unen; solo lo pide el worker de exportaciones (ver
+    pdf_paralelo.procesos_para), nunca una request web.
+    `campos_seleccionados` decide las columnas opcionales (None = todas).
+    """
+    from .pdf_paralelo import renderizar_partes, unir_pdfs, eliminar_archivos
+
+    # Orden por (tipo, razón social): Mixta, Producto, Servicio
+    empresas_por_tipo = [
+        ('Mixta', empresas_mixta),
+        ('Producto', empresas_producto),
+        ('Servicio', empresas_servicio),
     ]
-    
-    table_contacto = Table(data_contacto, colWidths=col_widths_contacto, repeatRows=1)
-    table_contacto.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#222A59')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-        ('TOPPADDING', (0, 0), (-1, 0), 8),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F3F4F6')]),
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 1), (-1, -1), 10),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#6B7280')),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-    ]))
-    story.append(table_contacto)
-    
-    # NUEVA PÁGINA - SECCIÓN 3: COMERCIAL
-    story.append(PageBreak())
-    story.append(Paragraph("Información Comercial y Clasificación", title_style))
-    story.append(Spacer(1, 0.3*cm))
-    
-    headers_comercial = [
-    'Razón Social',
-    'Rubro',
-    'Tipo Empresa',
-    'Exporta',
-    'Destino Export.',
-    'Importa',
-    'Certif. MiPYME',
-    'Categoría',
-]
-    
-    data_comercial = [headers_comercial]
-    for tipo, empresa in todas_empresas:
+    partes = planificar_partes_aprobadas(empresas_por_tipo, campos_seleccionados=campos_seleccionados)
+
+    # El PDF final se escribe en un archivo temporal en lugar de un buffer en memoria
+    archivo = tempfile.TemporaryFile(suffix='.pdf')
+
+    if procesos <= 1 or len(partes) <= 1:
+        parte = combinar_partes(partes)
+        renderizar_parte_aprobadas(archivo, parte, progreso=ProgresoFilas(progress_callback, parte['filas']))
+    else:
+        al_terminar = None
+        if progress_callback:
+            # En paralelo el progreso se reporta por partes terminadas
+            progress_callback('SIZE_EST', len(partes))
+            al_terminar = lambda terminadas: progress_callback('PROGRESS', terminadas)
+
+        rutas = renderizar_partes(renderizar_parte_aprobadas, partes, procesos, al_terminar=al_terminar)
         try:
-            matriz = empresa.clasificaciones_exportador.first()
-            categoria = matriz.get_categoria_display() if matriz else 'N/A'
-        except:
-            categoria = 'N/A'
-        
-        row = [
-    Paragraph(normalize_text(empresa.razon_social), styles['Normal']),
-    Paragraph(normalize_text(empresa.id_rubro.nombre) if empresa.id_rubro else '-', styles['Normal']),
-    normalize_text(empresa.tipo_empresa.nombre) if empresa.tipo_empresa else '-',
-    'Sí' if empresa.exporta == 'Sí' else 'No',
-    Paragraph(normalize_text(empresa.destinoexporta) if empresa.destinoexporta else '-', styles['Normal']),
-    'Sí' if empresa.importa else 'No',
-    'Sí' if empresa.certificadopyme else 'No',
-    categoria,
-]
-        data_comercial.append(row)
-    
-    col_widths_comercial = [
-    ancho_disponible * 0.20,  # Razón Social
-    ancho_disponible * 0.15,  # Rubro
-    ancho_disponible * 0.08,  # Tipo Empresa
-    ancho_disponible * 0.06,  # Exporta
-    ancho_disponible * 0.15,  # Destino
-    ancho_disponible * 0.06,  # Importa
-    ancho_disponible * 0.06,  # Certif
-    ancho_disponible * 0.10,  # Categoría
-]
+            unir_pdfs(rutas, archivo)
+        finally:
+            eliminar_archivos(rutas)
+
+    return respuesta_pdf(archivo, f'empresas_aprobadas_{datetime.now().strftime("%Y%m%d_%H%M")}.pdf')
+
+
+# Orden y etiqueta de cada tipo en las exportaciones de empresas seleccionadas
+TIPOS_SELECCIONADAS = {'producto': 'Producto', 'servicio': 'Servicio', 'mixta': 'Mixta'}
+
+
+def obtener_empresas_seleccionadas(empresas_ids):
+    """
+    Empresas seleccionadas como lista de (tipo, empresa) ordenada por tipo y razón social.
+    Compartida por las exportaciones CSV y XLSX de empresas seleccionadas; el PDF
+    las recorre por bloques (ver iterar_empresas_seleccionadas).
     
-    table_comercial = Table(data_comercial, colWidths=col_widths_comercial, repeatRows=1)
-    table_comercial.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#222A59')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-        ('TOPPADDING', (0, 0), (-1, 0), 8),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F3F4F6')]),
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 1), (-1, -1), 10),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#6B7280')),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-    ]))
-    story.append(table_comercial)
-    
-    # Footer
-    story.append(Spacer(1, 0.3*cm))
-    footer_text = Paragraph(
-        "Dirección de Intercambio Comercial Internacional y Regional - "
-        "San Martín 320, San Fernando del Valle de Catamarca - "
-        "Tel: (0383) 4437390",
-        footer_style
-    )
-    story.append(footer_text)
+    Se consulta una sola vez y se agrupa en memoria: la cantidad de consultas es
+    fija (empresas + matrices) sin importar cuántas empresas se seleccionen.
+    """
+    from apps.empresas.models import Empresa
+    from .extraccion import preparar_queryset
     
-    # Construir PDF
-    doc.build(story)
+    empresas = preparar_queryset(Empresa.objects.filter(
+        id__in=empresas_ids,
+        tipo_empresa_valor__in=list(TIPOS_SELECCIONADAS),
+    ))
     
-    # Obtener PDF
-    pdf = buffer.getvalue()
-    buffer.close()
+    todas_empresas = [(TIPOS_SELECCIONADAS[empresa.tipo_empresa_valor], empresa) for empresa in empresas]
+    if not todas_empresas:
+        raise ValueError("No se encontraron empresas con los IDs proporcionados")
     
-    # Crear respuesta HTTP
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="empresas_aprobadas_{datetime.now().strftime("%Y%m%d_%H%M")}.pdf"'
-    response.write(pdf)
+    todas_empresas.sort(key=lambda x: (x[0], x[1].razon_social))
+    return todas_empresas
+
+
+def ids_empresas_seleccionadas(empresas_ids):
+    """IDs de las empresas seleccionadas ordenados por tipo y razón social (ver obtener_empresas_seleccionadas)"""
+    from django.db.models import Case, Value, When
+    from apps.empresas.models import Empresa
     
-    return response
+    orden_tipo = Case(*[
+        When(tipo_empresa_valor=valor, then=Value(etiqueta)) for valor, etiqueta in TIPOS_SELECCIONADAS.items()
+    ])
+    ids = list(Empresa.objects.filter(
+        id__in=empresas_ids,
+        tipo_empresa_valor__in=list(TIPOS_SELECCIONADAS),
+    ).order_by(orden_tipo, 'razon_social', 'id').values_list('id', flat=True))
+    if not ids:
+        raise ValueError("No se encontraron empresas con los IDs proporcionados")
+    return ids
 
 
-def generate_empresas_seleccionadas_pdf(empresas_ids, campos_seleccionados):
+def iterar_empresas_seleccionadas(ids):
+    """
+    Recorrer (tipo, empresa) en el orden de `ids` (ver iterar_por_ids): la memoria no
+    crece con la selección y cada tabla recorre las mismas empresas.
+    """
+    from apps.empresas.models import Empresa
+    from .extraccion import preparar_queryset
+    
+    for empresa in iterar_por_ids(preparar_queryset(Empresa.objects.all()), ids):
+        yield TIPOS_SELECCIONADAS[empresa.tipo_empresa_valor], empresa
+
+
+def generate_empresas_seleccionadas_pdf(empresas_ids, campos_seleccionados, progress_callback=None):
     """
     Genera un PDF con empresas específicas y campos seleccionados, manteniendo la estética institucional
     y organizando los campos en secciones
     """
-    from apps.empresas.models import Empresa
-    from django.http import HttpResponse
     from reportlab.lib import colors
     from reportlab.lib.pagesizes import A4, landscape
     from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
     from reportlab.lib.units import cm
     from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
     from reportlab.lib.enums import TA_CENTER, TA_LEFT
-    from io import BytesIO
     from datetime import datetime
+    from .extraccion import PlanExtraccion, CAMPOS_EN_MINUSCULAS
     
-    # Obtener las empresas por sus IDs
-    empresas = Empresa.objects.filter(id__in=empresas_ids).select_related(
-        'tipo_empresa', 'id_rubro', 'departamento', 'municipio', 'localidad', 'id_usuario'
-    ).prefetch_related('productos_empresa', 'servicios_empresa', 'productos_mixta', 'servicios_mixta', 'clasificaciones_exportador')
-    
-    if not empresas.exists():
-        raise ValueError("No se encontraron empresas con los IDs proporcionados")
-    
-    # Separar empresas por tipo
-    empresas_producto = empresas.filter(tipo_empresa_valor='producto')
-    empresas_servicio = empresas.filter(tipo_empresa_valor='servicio')
-    empresas_mixta = empresas.filter(tipo_empresa_valor='mixta')
-    
-    # Combinar todas las empresas
-    todas_empresas = []
-    for empresa in empresas_producto:
-        todas_empresas.append(('Producto', empresa))
-    for empresa in empresas_servicio:
-        todas_empresas.append(('Servicio', empresa))
-    for empresa in empresas_mixta:
-        todas_empresas.append(('Mixta', empresa))
-    
-    todas_empresas.sort(key=lambda x: (x[0], x[1].razon_social))
-    
-    # Mapeo de campos del frontend a campos de la base de datos y secciones
-    campos_map = {
-        # Información Básica
-        'razon_social': {'field': 'razon_social', 'section': 'basica', 'label': 'Razón Social'},
-        'nombre_fantasia': {'field': 'nombre_fantasia', 'section': 'basica', 'label': 'Nombre de Fantasía'},
-        'cuit_cuil': {'field': 'cuit_cuil', 'section': 'basica', 'label': 'CUIT/CUIL'},
-        'tipo_sociedad': {'field': 'tipo_sociedad', 'section': 'basica', 'label': 'Tipo de Sociedad'},
-        'tipo_empresa': {'field': 'tipo_empresa', 'section': 'basica', 'label': 'Tipo de Empresa'},
-        'fecha_creacion': {'field': 'fecha_creacion', 'section': 'basica', 'label': 'Fecha de Registro'},
-        
-        # Rubro y Categorización
-        'rubro_principal': {'field': 'rubro_nombre', 'section': 'basica', 'label': 'Rubro Principal'},
-        'categoria_matriz': {'field': 'categoria_matriz', 'section': 'basica', 'label': 'Categoría Matriz'},
-        
-        # Ubicación
-        'departamento': {'field': 'departamento_nombre', 'section': 'basica', 'label': 'Departamento'},
-        'municipio': {'field': 'municipio_nombre', 'section': 'basica', 'label': 'Municipio'},
-        'localidad': {'field': 'localidad_nombre', 'section': 'basica', 'label': 'Localidad'},
-        'direccion': {'field': 'direccion', 'section': 'basica', 'label': 'Dirección'},
-        'codigo_postal': {'field': 'codigo_postal', 'section': 'basica', 'label': 'Código Postal'},
-        'provincia': {'field': 'provincia', 'section': 'basica', 'label': 'Provincia'},
-        'geolocalizacion': {'field': 'geolocalizacion', 'section': 'basica', 'label': 'Geolocalización'},
-        
-        # Contacto
-        'telefono': {'field': 'telefono', 'section': 'contacto', 'label': 'Teléfono'},
-        'correo': {'field': 'correo', 'section': 'contacto', 'label': 'Email'},
-        'sitioweb': {'field': 'sitioweb', 'section': 'contacto', 'label': 'Sitio Web'},
-        'email_secundario': {'field': 'email_secundario', 'section': 'contacto', 'label': 'Email Secundario'},
-        'email_terciario': {'field': 'email_terciario', 'section': 'contacto', 'label': 'Email Terciario'},
-        
-        # Contacto Principal
-        'contacto_principal_nombre': {'field': 'contacto_principal_nombre', 'section': 'contacto', 'label': 'Contacto Principal - Nombre'},
-        'contacto_principal_apellido': {'field': 'contacto_principal_apellido', 'section': 'contacto', 'label': 'Contacto Principal - Apellido'},
-        'contacto_principal_cargo': {'field': 'contacto_principal_cargo', 'section': 'contacto', 'label': 'Contacto Principal - Cargo'},
-        'contacto_principal_telefono': {'field': 'contacto_principal_telefono', 'section': 'contacto', 'label': 'Contacto Principal - Teléfono'},
-        'contacto_principal_email': {'field': 'contacto_principal_email', 'section': 'contacto', 'label': 'Contacto Principal - Email'},
-        
-        # Contacto Secundario
-        'contacto_secundario_nombre': {'field': 'contacto_secundario_nombre', 'section': 'contacto', 'label': 'Contacto Secundario - Nombre'},
-        'contacto_secundario_apellido': {'field': 'contacto_secundario_apellido', 'section': 'contacto', 'label': 'Contacto Secundario - Apellido'},
-        'contacto_secundario_cargo': {'field': 'contacto_secundario_cargo', 'section': 'contacto', 'label': 'Contacto Secundario - Cargo'},
-        'contacto_secundario_telefono': {'field': 'contacto_secundario_telefono', 'section': 'contacto', 'label': 'Contacto Secundario - Teléfono'},
-        'contacto_secundario_email': {'field': 'contacto_secundario_email', 'section': 'contacto', 'label': 'Contacto Secundario - Email'},
-        
-        # Actividad Comercial
-        'exporta': {'field': 'exporta', 'section': 'comercial', 'label': '¿Exporta?'},
-        'destinoexporta': {'field': 'destinoexporta', 'section': 'comercial', 'label': 'Destino de Exportación'},
-        'importa': {'field': 'importa', 'section': 'comercial', 'label': '¿Importa?'},
-        'interes_exportar': {'field': 'interes_exportar', 'section': 'comercial', 'label': 'Interés en Exportar'},
-        
-        # Certificaciones
-        'certificadopyme': {'field': 'certificadopyme', 'section': 'comercial', 'label': 'Certificado MiPYME'},
-        'certificaciones': {'field': 'certificaciones', 'section': 'comercial', 'label': 'Certificaciones'},
-        
-        # Promoción y Material
-        'promo2idiomas': {'field': 'promo2idiomas', 'section': 'comercial', 'label': 'Material en Múltiples Idiomas'},
-        'idiomas_trabaja': {'field': 'idiomas_trabaja', 'section': 'comercial', 'label': 'Idiomas de Trabajo'},
-        
-        # Actividades de Internacionalización
-        'ferias': {'field': 'ferias', 'section': 'comercial', 'label': 'Ferias'},
-        'rondas': {'field': 'rondas', 'section': 'comercial', 'label': 'Rondas de Negocios'},
-        'misiones': {'field': 'misiones', 'section': 'comercial', 'label': 'Misiones Comerciales'},
-        
-        # Otros
-        'observaciones': {'field': 'observaciones', 'section': 'comercial', 'label': 'Observaciones'},
-    }
-    
-    # Expandir campos disponibles basándose en los campos seleccionados
-    # Si viene un campo que no está en el mapeo, intentar obtenerlo directamente
-    campos_expandidos = []
-    for campo_id in campos_seleccionados:
-        if campo_id in campos_map:
-            campos_expandidos.append(campos_map[campo_id])
-        else:
-            # Intentar inferir la sección basándose en el nombre del campo
-            section = 'basica'
-            if campo_id in ['correo', 'telefono', 'sitioweb', 'contacto_principal_nombre', 'contacto_principal_email']:
-                section = 'contacto'
-            elif campo_id in ['exporta', 'importa', 'destinoexporta', 'certificadopyme', 'certificaciones']:
-                section = 'comercial'
-            
-            campos_expandidos.append({
-                'field': campo_id,
-                'section': section,
-                'label': campo_id.replace('_', ' ').title()
-            })
-    
-    # Reorganizar campos por sección
-    secciones = {
-        'basica': [],
-        'contacto': [],
-        'comercial': []
-    }
-    
-    for campo_info in campos_expandidos:
-        secciones[campo_info['section']].append(campo_info)
-    
-    # Función helper para obtener el valor de un campo
-    def get_field_value(empresa, field_name):
-        """Obtiene el valor de un campo de la empresa, manejando relaciones"""
-        # ✅ MANEJAR FERIAS, RONDAS Y MISIONES
-        if field_name in ['ferias', 'rondas', 'misiones']:
-            actividades = extraer_actividades_promocion(empresa)
-            items = actividades.get(field_name, [])
-            if items:
-                return ', '.join(items)
-            return '-'
-        
-        # Campos que requieren acceso a relaciones
-        if field_name == 'rubro_nombre':
-            if empresa.id_rubro:
-                return empresa.id_rubro.nombre if hasattr(empresa.id_rubro, 'nombre') else str(empresa.id_rubro)
-            return '-'
-        elif field_name == 'sub_rubro_nombre':
-            # Para empresas mixtas, mostrar ambos subrubros si existen
-            if empresa.tipo_empresa_valor == 'mixta':
-                sub_prod = empresa.id_subrubro_producto.nombre if empresa.id_subrubro_producto else None
-                sub_serv = empresa.id_subrubro_servicio.nombre if empresa.id_subrubro_servicio else None
-                if sub_prod and sub_serv:
-                    return f"{sub_prod} / {sub_serv}"
-                return sub_prod or sub_serv or '-'
-            else:
-                # Para empresas de producto o servicio único
-                return empresa.id_subrubro.nombre if empresa.id_subrubro else '-'
-        elif field_name == 'departamento_nombre':
-            if empresa.departamento:
-                return empresa.departamento.nombre if hasattr(empresa.departamento, 'nombre') else str(empresa.departamento)
-            return '-'
-        elif field_name == 'municipio_nombre':
-            if empresa.municipio:
-                return empresa.municipio.nombre if hasattr(empresa.municipio, 'nombre') else str(empresa.municipio)
-            return '-'
-        elif field_name == 'localidad_nombre':
-            if empresa.localidad:
-                return empresa.localidad.nombre if hasattr(empresa.localidad, 'nombre') else str(empresa.localidad)
-            return '-'
-        elif field_name == 'tipo_empresa':
-            if empresa.tipo_empresa:
-                return empresa.tipo_empresa.nombre if hasattr(empresa.tipo_empresa, 'nombre') else str(empresa.tipo_empresa)
-            elif empresa.tipo_empresa_valor:
-                return empresa.tipo_empresa_valor
-            return '-'
-        elif field_name == 'provincia':
-            # La provincia generalmente viene del departamento
-            if empresa.departamento and hasattr(empresa.departamento, 'provincia'):
-                return empresa.departamento.provincia.nombre if hasattr(empresa.departamento.provincia, 'nombre') else 'Catamarca'
-            return 'Catamarca'  # Valor por defecto
-        elif field_name == 'categoria_matriz':
-            try:
-                matriz = empresa.clasificaciones_exportador.first()
-                if matriz:
-                    return matriz.get_categoria_display() if hasattr(matriz, 'get_categoria_display') else str(matriz.categoria) if hasattr(matriz, 'categoria') else 'N/A'
-            except:
-                pass
-            return 'N/A'
-        elif field_name == 'actividades_promocion_internacional':
-            # Devolver el JSON como string formateado
-            actividades = extraer_actividades_promocion(empresa)
-            if any(actividades.values()):
-                result = []
-                if actividades['ferias']:
-                    result.append(f"Ferias: {', '.join(actividades['ferias'])}")
-                if actividades['rondas']:
-                    result.append(f"Rondas: {', '.join(actividades['rondas'])}")
-                if actividades['misiones']:
-                    result.append(f"Misiones: {', '.join(actividades['misiones'])}")
-                return '; '.join(result) if result else '-'
-            return '-'
-        elif field_name == 'estado':
-            # El estado puede venir de la solicitud de registro
-            try:
-                solicitud = empresa.solicitudes_registro.first()
-                if solicitud:
-                    return solicitud.get_estado_display() if hasattr(solicitud, 'get_estado_display') else str(solicitud.estado) if hasattr(solicitud, 'estado') else 'Aprobada'
-            except:
-                pass
-            return 'Aprobada'  # Valor por defecto para empresas aprobadas
-        # Campos directos del modelo
-        elif hasattr(empresa, field_name):
-            value = getattr(empresa, field_name)
-            # Formatear fechas
-            if hasattr(value, 'strftime'):
-                return value.strftime('%d/%m/%Y')
-            # Formatear booleanos
-            if isinstance(value, bool):
-                return 'Sí' if value else 'No'
-            # Formatear Decimal
-            if hasattr(value, '__class__') and 'Decimal' in str(value.__class__):
-                return str(value)
-            return value
-        return '-'
+    # Solo los IDs quedan en memoria; cada tabla recorre las empresas por bloques
+    ids = ids_empresas_seleccionadas(empresas_ids)
     
+    # Campos compilados una sola vez (ver extraccion.py); las secciones toman los
+    # valores de cada empresa por índice
+    plan = PlanExtraccion(campos_seleccionados)
+    secciones = plan.secciones
     
-    # Buffer para el PDF
-    buffer = BytesIO()
+    # Determinar si usar formato compacto (muchas empresas) o detallado (pocas empresas)
+    usar_formato_compacto = len(ids) >= 5
     
-    # Obtener rutas de las imágenes - buscar en múltiples ubicaciones
-    possible_paths = [
-        os.path.join(settings.BASE_DIR, 'static', 'images'),
-        os.path.join(settings.BASE_DIR.parent.parent, 'backend', 'proyectoempresa', 'static', 'images'),
-        os.path.join(settings.BASE_DIR.parent.parent),  # Raíz del proyecto
-    ]
+    # Cada sección se parte en tablas de max_cols - 1 campos (7 en formato compacto, 5 en detallado)
+    # y cada tabla recorre todas las empresas
+    campos_por_tabla = 7 if usar_formato_compacto else 5
+    tablas = sum(-(-len(campos) // campos_por_tabla) for campos in secciones.values())
+    progreso = ProgresoFilas(progress_callback, len(ids) * tablas)
     
-    header_footer_path = None
-    watermark_path = None
+    def filas_empresas():
+        for tipo, empresa in iterar_empresas_seleccionadas(ids):
+            progreso.avanzar()
+            yield tipo, empresa, plan.valores(empresa)
     
-    for path_base in possible_paths:
-        hf_path = os.path.join(path_base, 'header_y_footer.png')
-        wm_path = os.path.join(path_base, 'marca_de_agua.png')
-        
-        if header_footer_path is None and os.path.exists(hf_path):
-            header_footer_path = hf_path
-        if watermark_path is None and os.path.exists(wm_path):
-            watermark_path = wm_path
-        
-        if header_footer_path and watermark_path:
-            break
+    # El PDF se escribe en un archivo temporal en lugar de un buffer en memoria
+    archivo = tempfile.TemporaryFile(suffix='.pdf')
     
-    # Verificar que las imágenes existan
-    header_footer_exists = header_footer_path and os.path.exists(header_footer_path)
-    watermark_exists = watermark_path and os.path.exists(watermark_path)
+    # Imágenes institucionales: se cargan y preprocesan una sola vez por proceso
+    # (ver pdf_assets); acá solo se dibujan
+    from .pdf_assets import dibujar_imagen, obtener_header_footer, HEADER_FOOTER, MARCA_DE_AGUA
+    header_footer_exists = obtener_header_footer() is not None
     
     # Función para agregar marca de agua (se usa en todas las páginas)
     def add_watermark(canvas):
         """Agrega marca de agua en el centro de la página"""
-        if not watermark_exists:
-            return
-        
         try:
             page_width, page_height = landscape(A4)
             # Calcular posición centrada
@@ -991,63 +1014,7 @@ def generate_empresas_seleccionadas_pdf(empresas_ids, campos_seleccionados):
             watermark_height = 15 * cm
             x = (page_width - watermark_width) / 2
             y = (page_height - watermark_height) / 2
-            
-            # Agregar imagen con opacidad (marca de agua)
-            # Usar PIL para ajustar la opacidad si está disponible
-            try:
-                from PIL import Image as PILImage
-                from PIL import ImageEnhance
-                
-                # Cargar imagen y ajustar opacidad
-                img = PILImage.open(watermark_path)
-                # Convertir a RGBA si no lo es
-                if img.mode != 'RGBA':
-                    img = img.convert('RGBA')
-                
-                # Crear una nueva imagen con opacidad reducida
-                alpha = img.split()[3] if len(img.split()) == 4 else None
-                if alpha:
-                    # Reducir opacidad al 15%
-                    alpha = alpha.point(lambda p: int(p * 0.15))
-                    img.putalpha(alpha)
-                
-                # Guardar temporalmente
-                import tempfile
-                temp_path = os.path.join(tempfile.gettempdir(), f'watermark_temp_{os.getpid()}.png')
-                img.save(temp_path, 'PNG')
-                
-                canvas.drawImage(
-                    temp_path,
-                    x, y,
-                    width=watermark_width,
-                    height=watermark_height,
-                    preserveAspectRatio=True,
-                    mask='auto'
-                )
-                
-                # Limpiar archivo temporal
-                try:
-                    os.remove(temp_path)
-                except:
-                    pass
-            except ImportError:
-                # Si PIL no está disponible, usar método alternativo
-                canvas.saveState()
-                # Dibujar rectángulo semitransparente primero
-                canvas.setFillColor(colors.white)
-                canvas.setFillAlpha(0.85)
-                canvas.rect(x, y, watermark_width, watermark_height, fill=1, stroke=0)
-                canvas.restoreState()
-                
-                # Dibujar imagen encima (con opacidad reducida visualmente)
-                canvas.drawImage(
-                    watermark_path,
-                    x, y,
-                    width=watermark_width,
-                    height=watermark_height,
-                    preserveAspectRatio=True,
-                    mask='auto'
-                )
+            dibujar_imagen(canvas, MARCA_DE_AGUA, x, y, watermark_width, watermark_height)
         except Exception as e:
             print(f"Error agregando marca de agua: {e}")
     
@@ -1066,14 +1033,7 @@ def generate_empresas_seleccionadas_pdf(empresas_ids, campos_seleccionados):
                 header_margin_top = 0.5 * cm  # Margen arriba para que no toque el borde
                 header_width = page_width
                 header_y = page_height - header_height - header_margin_top
-                canvas.drawImage(
-                    header_footer_path,
-                    0, header_y,
-                    width=header_width,
-                    height=header_height,
-                    preserveAspectRatio=True,
-                    mask='auto'
-                )
+                dibujar_imagen(canvas, HEADER_FOOTER, 0, header_y, header_width, header_height)
             except Exception as e:
                 print(f"Error agregando header: {e}")
     
@@ -1117,14 +1077,7 @@ def generate_empresas_seleccionadas_pdf(empresas_ids, campos_seleccionados):
             footer_margin_bottom = 0.5 * cm  # Margen abajo para que no toque el borde
             footer_y = footer_margin_bottom
             
-            canvas.drawImage(
-                header_footer_path,
-                footer_x, footer_y,
-                width=footer_width,
-                height=footer_height,
-                preserveAspectRatio=True,
-                mask='auto'
-            )
+            dibujar_imagen(canvas, HEADER_FOOTER, footer_x, footer_y, footer_width, footer_height)
         except Exception as e:
             print(f"Error agregando footer y contacto: {e}")
     
@@ -1183,7 +1136,7 @@ def generate_empresas_seleccionadas_pdf(empresas_ids, campos_seleccionados):
             super().__init__(*args, **kwargs)
     
     doc = CustomDocTemplate(
-        buffer,
+        archivo,
         pagesize=landscape(A4),
         rightMargin=1*cm,
         leftMargin=1*cm,
@@ -1232,472 +1185,470 @@ def generate_empresas_seleccionadas_pdf(empresas_ids, campos_seleccionados):
         alignment=TA_CENTER
     )
     
-    story = []
-    
-    # Encabezado institucional
-    header_text = Paragraph(
-        "Dirección de Intercambio Comercial Internacional y Regional<br/>Provincia de Catamarca",
-        header_style
-    )
-    story.append(header_text)
-    story.append(Spacer(1, 0.3*cm))
+    def historia():
+        # Encabezado institucional
+        header_text = Paragraph(
+            "Dirección de Intercambio Comercial Internacional y Regional<br/>Provincia de Catamarca",
+            header_style
+        )
+        yield header_text
+        yield Spacer(1, 0.3*cm)
     
-    # Título
-    title = Paragraph("Exportación de Empresas", title_style)
-    story.append(title)
+        # Título
+        title = Paragraph("Exportación de Empresas", title_style)
+        yield title
     
-    # Fecha de generación
-    fecha = datetime.now().strftime('%d/%m/%Y %H:%M')
-    fecha_text = Paragraph(f"Generado el: {fecha}", subtitle_style)
-    story.append(fecha_text)
-    story.append(Spacer(1, 0.5*cm))
+        # Fecha de generación
+        fecha = datetime.now().strftime('%d/%m/%Y %H:%M')
+        fecha_text = Paragraph(f"Generado el: {fecha}", subtitle_style)
+        yield fecha_text
+        yield Spacer(1, 0.5*cm)
     
-    ancho_disponible = landscape(A4)[0] - 2*cm
-    num_empresas = len(todas_empresas)
+        ancho_disponible = landscape(A4)[0] - 2*cm
     
-    # Determinar si usar formato compacto (muchas empresas) o detallado (pocas empresas)
-    usar_formato_compacto = num_empresas >= 5
-    
-    # SECCIÓN 1: INFORMACIÓN BÁSICA
-    if secciones['basica']:
-        story.append(Paragraph("Datos Generales", title_style))
-        story.append(Spacer(1, 0.3*cm))
+        # SECCIÓN 1: INFORMACIÓN BÁSICA
+        if secciones['basica']:
+            yield Paragraph("Datos Generales", title_style)
+            yield Spacer(1, 0.3*cm)
         
-        campos_basicos = secciones['basica']
+            campos_basicos = secciones['basica']
         
-        if usar_formato_compacto:
-            # Formato compacto: todas las columnas en una tabla, dividida en grupos si es necesario
-            max_cols = 8  # Máximo de columnas por tabla (incluyendo "Tipo")
+            if usar_formato_compacto:
+                # Formato compacto: todas las columnas en una tabla, dividida en grupos si es necesario
+                max_cols = 8  # Máximo de columnas por tabla (incluyendo "Tipo")
             
-            for i in range(0, len(campos_basicos), max_cols - 1):
-                grupo_campos = campos_basicos[i:i + max_cols - 1]
-                headers_basico = ['Tipo', 'Razón Social'] + [campo['label'] for campo in grupo_campos]
-                data_basico = [headers_basico]
-                
-                for tipo, empresa in todas_empresas:
-                    row = [tipo, Paragraph(normalize_text(empresa.razon_social), styles['Normal'])]
-                    for campo in grupo_campos:
-                        value = get_field_value(empresa, campo['field'])
+                for i in range(0, len(campos_basicos), max_cols - 1):
+                    grupo_campos = campos_basicos[i:i + max_cols - 1]
+                    headers_basico = ['Tipo', 'Razón Social'] + [campo['label'] for campo in grupo_campos]
+                    def filas_basico():
+                        for tipo, empresa, valores in filas_empresas():
+                            row = [tipo, Paragraph(normalize_text(empresa.razon_social), styles['Normal'])]
+                            for campo in grupo_campos:
+                                value = valores[campo['indice']]
                         
-                        # Manejar geolocalización como enlace de Google Maps
-                        if campo['field'] == 'geolocalizacion':
-                            link_text = format_geolocalizacion_as_link(value)
-                            if link_text != '-':
-                                row.append(Paragraph(link_text, styles['Normal']))
-                            else:
-                                row.append(Paragraph('-', styles['Normal']))
-                            continue
+                                # Manejar geolocalización como enlace de Google Maps
+                                if campo['field'] == 'geolocalizacion':
+                                    link_text = format_geolocalizacion_as_link(value)
+                                    if link_text != '-':
+                                        row.append(Paragraph(link_text, styles['Normal']))
+                                    else:
+                                        row.append(Paragraph('-', styles['Normal']))
+                                    continue
                         
-                        if isinstance(value, bool):
-                            value = 'Sí' if value else 'No'
-                        elif value is None:
-                            value = '-'
-                        else:
-                            value = str(value)
+                                if isinstance(value, bool):
+                                    value = 'Sí' if value else 'No'
+                                elif value is None:
+                                    value = '-'
+                                else:
+                                    value = str(value)
                         
-                        # Truncar valores muy largos para formato compacto
-                        if len(value) > 30:
-                            value = value[:27] + '...'
+                                # Truncar valores muy largos para formato compacto
+                                if len(value) > 30:
+                                    value = value[:27] + '...'
                         
-                        row.append(Paragraph(normalize_text(value), styles['Normal']))
-                    data_basico.append(row)
+                                row.append(Paragraph(normalize_text(value), styles['Normal']))
+                            yield row
                 
-                num_cols = len(headers_basico)
-                # Calcular anchos: Tipo pequeño, Razón Social más grande, resto igual
-                if num_cols == 2:
-                    col_widths_basico = [ancho_disponible * 0.15, ancho_disponible * 0.85]
-                else:
-                    col_widths_basico = [
-                        ancho_disponible * 0.08,  # Tipo
-                        ancho_disponible * 0.20,  # Razón Social
-                    ] + [ancho_disponible * 0.72 / (num_cols - 2)] * (num_cols - 2)
+                    num_cols = len(headers_basico)
+                    # Calcular anchos: Tipo pequeño, Razón Social más grande, resto igual
+                    if num_cols == 2:
+                        col_widths_basico = [ancho_disponible * 0.15, ancho_disponible * 0.85]
+                    else:
+                        col_widths_basico = [
+                            ancho_disponible * 0.08,  # Tipo
+                            ancho_disponible * 0.20,  # Razón Social
+                        ] + [ancho_disponible * 0.72 / (num_cols - 2)] * (num_cols - 2)
                 
-                table_basico = Table(data_basico, colWidths=col_widths_basico, repeatRows=1)
-                table_basico.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#222A59')),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, 0), 8),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
-                    ('TOPPADDING', (0, 0), (-1, 0), 6),
-                    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F3F4F6')]),
-                    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                    ('FONTSIZE', (0, 1), (-1, -1), 7),
-                    ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#6B7280')),
-                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                    ('TOPPADDING', (0, 1), (-1, -1), 4),
-                    ('BOTTOMPADDING', (0, 1), (-1, -1), 4),
-                ]))
-                story.append(table_basico)
+                    # Tablas acotadas: evita el particionado superlineal de una tabla enorme
+                    yield from tablas_por_bloques(headers_basico, filas_basico(), col_widths_basico, [
+                        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#222A59')),
+                        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                        ('FONTSIZE', (0, 0), (-1, 0), 8),
+                        ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
+                        ('TOPPADDING', (0, 0), (-1, 0), 6),
+                        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F3F4F6')]),
+                        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+                        ('FONTSIZE', (0, 1), (-1, -1), 7),
+                        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#6B7280')),
+                        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+                        ('TOPPADDING', (0, 1), (-1, -1), 4),
+                        ('BOTTOMPADDING', (0, 1), (-1, -1), 4),
+                    ])
                 
-                # Agregar espacio entre tablas si hay más grupos
-                if i + max_cols - 1 < len(campos_basicos):
-                    story.append(Spacer(1, 0.2*cm))
-        else:
-            # Formato detallado: menos columnas, más espacio
-            max_cols = 6  # Incluyendo la columna "Tipo"
+                    # Agregar espacio entre tablas si hay más grupos
+                    if i + max_cols - 1 < len(campos_basicos):
+                        yield Spacer(1, 0.2*cm)
+            else:
+                # Formato detallado: menos columnas, más espacio
+                max_cols = 6  # Incluyendo la columna "Tipo"
             
-            for i in range(0, len(campos_basicos), max_cols - 1):
-                grupo_campos = campos_basicos[i:i + max_cols - 1]
-                headers_basico = ['Tipo'] + [campo['label'] for campo in grupo_campos]
-                data_basico = [headers_basico]
-                
-                for tipo, empresa in todas_empresas:
-                    row = [tipo]
-                    for campo in grupo_campos:
-                        value = get_field_value(empresa, campo['field'])
+                for i in range(0, len(campos_basicos), max_cols - 1):
+                    grupo_campos = campos_basicos[i:i + max_cols - 1]
+                    headers_basico = ['Tipo'] + [campo['label'] for campo in grupo_campos]
+                    def filas_basico():
+                        for tipo, empresa, valores in filas_empresas():
+                            row = [tipo]
+                            for campo in grupo_campos:
+                                value = valores[campo['indice']]
                         
-                        # Manejar geolocalización como enlace de Google Maps
-                        if campo['field'] == 'geolocalizacion':
-                            link_text = format_geolocalizacion_as_link(value)
-                            if link_text != '-':
-                                row.append(Paragraph(link_text, styles['Normal']))
-                            else:
-                                row.append(Paragraph('-', styles['Normal']))
-                            continue
+                                # Manejar geolocalización como enlace de Google Maps
+                                if campo['field'] == 'geolocalizacion':
+                                    link_text = format_geolocalizacion_as_link(value)
+                                    if link_text != '-':
+                                        row.append(Paragraph(link_text, styles['Normal']))
+                                    else:
+                                        row.append(Paragraph('-', styles['Normal']))
+                                    continue
                         
-                        if isinstance(value, bool):
-                            value = 'Sí' if value else 'No'
-                        elif value is None:
-                            value = '-'
-                        else:
-                            value = str(value)
+                                if isinstance(value, bool):
+                                    value = 'Sí' if value else 'No'
+                                elif value is None:
+                                    value = '-'
+                                else:
+                                    value = str(value)
                         
-                        row.append(Paragraph(normalize_text(value), styles['Normal']))
-                    data_basico.append(row)
+                                row.append(Paragraph(normalize_text(value), styles['Normal']))
+                            yield row
                 
-                num_cols = len(headers_basico)
-                if num_cols <= 4:
-                    col_widths_basico = [ancho_disponible * 0.15] + [ancho_disponible * 0.85 / (num_cols - 1)] * (num_cols - 1)
-                else:
-                    col_width = ancho_disponible / num_cols
-                    col_widths_basico = [col_width] * num_cols
+                    num_cols = len(headers_basico)
+                    if num_cols <= 4:
+                        col_widths_basico = [ancho_disponible * 0.15] + [ancho_disponible * 0.85 / (num_cols - 1)] * (num_cols - 1)
+                    else:
+                        col_width = ancho_disponible / num_cols
+                        col_widths_basico = [col_width] * num_cols
                 
-                table_basico = Table(data_basico, colWidths=col_widths_basico, repeatRows=1)
-                table_basico.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#222A59')),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, 0), 9),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-                    ('TOPPADDING', (0, 0), (-1, 0), 8),
-                    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F3F4F6')]),
-                    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                    ('FONTSIZE', (0, 1), (-1, -1), 8),
-                    ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#6B7280')),
-                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                    ('TOPPADDING', (0, 1), (-1, -1), 6),
-                    ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
-                ]))
-                story.append(table_basico)
+                    # Tablas acotadas: evita el particionado superlineal de una tabla enorme
+                    yield from tablas_por_bloques(headers_basico, filas_basico(), col_widths_basico, [
+                        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#222A59')),
+                        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                        ('FONTSIZE', (0, 0), (-1, 0), 9),
+                        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+                        ('TOPPADDING', (0, 0), (-1, 0), 8),
+                        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F3F4F6')]),
+                        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+                        ('FONTSIZE', (0, 1), (-1, -1), 8),
+                        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#6B7280')),
+                        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+                        ('TOPPADDING', (0, 1), (-1, -1), 6),
+                        ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
+                    ])
                 
-                if i + max_cols - 1 < len(campos_basicos):
-                    story.append(Spacer(1, 0.3*cm))
+                    if i + max_cols - 1 < len(campos_basicos):
+                        yield Spacer(1, 0.3*cm)
         
-        story.append(Spacer(1, 0.5*cm))
-    
-    # SECCIÓN 2: CONTACTO
-    if secciones['contacto']:
-        # Nueva página para la sección de contacto
-        story.append(PageBreak())
-        story.append(Paragraph("Información de Contacto", title_style))
-        story.append(Spacer(1, 0.3*cm))
+            yield Spacer(1, 0.5*cm)
+    
+        # SECCIÓN 2: CONTACTO
+        if secciones['contacto']:
+            # Nueva página para la sección de contacto
+            yield PageBreak()
+            yield Paragraph("Información de Contacto", title_style)
+            yield Spacer(1, 0.3*cm)
         
-        campos_contacto = secciones['contacto']
+            campos_contacto = secciones['contacto']
         
-        if usar_formato_compacto:
-            # Formato compacto
-            max_cols = 8  # Máximo de columnas por tabla (incluyendo "Razón Social")
+            if usar_formato_compacto:
+                # Formato compacto
+                max_cols = 8  # Máximo de columnas por tabla (incluyendo "Razón Social")
             
-            for i in range(0, len(campos_contacto), max_cols - 1):
-                grupo_campos = campos_contacto[i:i + max_cols - 1]
-                headers_contacto = ['Razón Social'] + [campo['label'] for campo in grupo_campos]
-                data_contacto = [headers_contacto]
-                
-                for tipo, empresa in todas_empresas:
-                    row = [Paragraph(normalize_text(empresa.razon_social), styles['Normal'])]
-                    for campo in grupo_campos:
-                        value = get_field_value(empresa, campo['field'])
+                for i in range(0, len(campos_contacto), max_cols - 1):
+                    grupo_campos = campos_contacto[i:i + max_cols - 1]
+                    headers_contacto = ['Razón Social'] + [campo['label'] for campo in grupo_campos]
+                    def filas_contacto():
+                        for tipo, empresa, valores in filas_empresas():
+                            row = [Paragraph(normalize_text(empresa.razon_social), styles['Normal'])]
+                            for campo in grupo_campos:
+                                value = valores[campo['indice']]
                         
-                        # Manejar geolocalización como enlace de Google Maps
-                        if campo['field'] == 'geolocalizacion':
-                            link_text = format_geolocalizacion_as_link(value)
-                            if link_text != '-':
-                                row.append(Paragraph(link_text, styles['Normal']))
-                            else:
-                                row.append(Paragraph('-', styles['Normal']))
-                            continue
+                                # Manejar geolocalización como enlace de Google Maps
+                                if campo['field'] == 'geolocalizacion':
+                                    link_text = format_geolocalizacion_as_link(value)
+                                    if link_text != '-':
+                                        row.append(Paragraph(link_text, styles['Normal']))
+                                    else:
+                                        row.append(Paragraph('-', styles['Normal']))
+                                    continue
                         
-                        if isinstance(value, bool):
-                            value = 'Sí' if value else 'No'
-                        elif value is None or value == '-':
-                            value = '-'
-                        else:
-                            value = str(value).lower() if campo['field'] in ['correo', 'sitioweb', 'email_secundario', 'email_terciario', 'contacto_principal_email', 'contacto_secundario_email'] else str(value)
+                                if isinstance(value, bool):
+                                    value = 'Sí' if value else 'No'
+                                elif value is None or value == '-':
+                                    value = '-'
+                                else:
+                                    value = str(value).lower() if campo['field'] in CAMPOS_EN_MINUSCULAS else str(value)
                         
-                        # Truncar valores muy largos
-                        if len(value) > 30:
-                            value = value[:27] + '...'
+                                # Truncar valores muy largos
+                                if len(value) > 30:
+                                    value = value[:27] + '...'
                         
-                        row.append(Paragraph(normalize_text(value), styles['Normal']))
-                    data_contacto.append(row)
+                                row.append(Paragraph(normalize_text(value), styles['Normal']))
+                            yield row
                 
-                num_cols = len(headers_contacto)
-                col_widths_contacto = [ancho_disponible * 0.20] + [ancho_disponible * 0.80 / (num_cols - 1)] * (num_cols - 1)
+                    num_cols = len(headers_contacto)
+                    col_widths_contacto = [ancho_disponible * 0.20] + [ancho_disponible * 0.80 / (num_cols - 1)] * (num_cols - 1)
                 
-                table_contacto = Table(data_contacto, colWidths=col_widths_contacto, repeatRows=1)
-                table_contacto.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#222A59')),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, 0), 8),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
-                    ('TOPPADDING', (0, 0), (-1, 0), 6),
-                    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F3F4F6')]),
-                    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                    ('FONTSIZE', (0, 1), (-1, -1), 7),
-                    ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#6B7280')),
-                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                    ('TOPPADDING', (0, 1), (-1, -1), 4),
-                    ('BOTTOMPADDING', (0, 1), (-1, -1), 4),
-                ]))
-                story.append(table_contacto)
+                    # Tablas acotadas: evita el particionado superlineal de una tabla enorme
+                    yield from tablas_por_bloques(headers_contacto, filas_contacto(), col_widths_contacto, [
+                        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#222A59')),
+                        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                        ('FONTSIZE', (0, 0), (-1, 0), 8),
+                        ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
+                        ('TOPPADDING', (0, 0), (-1, 0), 6),
+                        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F3F4F6')]),
+                        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+                        ('FONTSIZE', (0, 1), (-1, -1), 7),
+                        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#6B7280')),
+                        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+                        ('TOPPADDING', (0, 1), (-1, -1), 4),
+                        ('BOTTOMPADDING', (0, 1), (-1, -1), 4),
+                    ])
                 
-                if i + max_cols - 1 < len(campos_contacto):
-                    story.append(Spacer(1, 0.2*cm))
-        else:
-            # Formato detallado
-            max_cols = 6  # Incluyendo la columna "Razón Social"
+                    if i + max_cols - 1 < len(campos_contacto):
+                        yield Spacer(1, 0.2*cm)
+            else:
+                # Formato detallado
+                max_cols = 6  # Incluyendo la columna "Razón Social"
             
-            for i in range(0, len(campos_contacto), max_cols - 1):
-                grupo_campos = campos_contacto[i:i + max_cols - 1]
-                headers_contacto = ['Razón Social'] + [campo['label'] for campo in grupo_campos]
-                data_contacto = [headers_contacto]
-                
-                for tipo, empresa in todas_empresas:
-                    row = [Paragraph(normalize_text(empresa.razon_social), styles['Normal'])]
-                    for campo in grupo_campos:
-                        value = get_field_value(empresa, campo['field'])
+                for i in range(0, len(campos_contacto), max_cols - 1):
+                    grupo_campos = campos_contacto[i:i + max_cols - 1]
+                    headers_contacto = ['Razón Social'] + [campo['label'] for campo in grupo_campos]
+                    def filas_contacto():
+                        for tipo, empresa, valores in filas_empresas():
+                            row = [Paragraph(normalize_text(empresa.razon_social), styles['Normal'])]
+                            for campo in grupo_campos:
+                                value = valores[campo['indice']]
                         
-                        # Manejar geolocalización como enlace de Google Maps
-                        if campo['field'] == 'geolocalizacion':
-                            link_text = format_geolocalizacion_as_link(value)
-                            if link_text != '-':
-                                row.append(Paragraph(link_text, styles['Normal']))
-                            else:
-                                row.append(Paragraph('-', styles['Normal']))
-                            continue
+                                # Manejar geolocalización como enlace de Google Maps
+                                if campo['field'] == 'geolocalizacion':
+                                    link_text = format_geolocalizacion_as_link(value)
+                                    if link_text != '-':
+                                        row.append(Paragraph(link_text, styles['Normal']))
+                                    else:
+                                        row.append(Paragraph('-', styles['Normal']))
+                                    continue
                         
-                        if isinstance(value, bool):
-                            value = 'Sí' if value else 'No'
-                        elif value is None or value == '-':
-                            value = '-'
-                        else:
-                            value = str(value).lower() if campo['field'] in ['correo', 'sitioweb', 'email_secundario', 'email_terciario', 'contacto_principal_email', 'contacto_secundario_email'] else str(value)
+                                if isinstance(value, bool):
+                                    value = 'Sí' if value else 'No'
+                                elif value is None or value == '-':
+                                    value = '-'
+                                else:
+                                    value = str(value).lower() if campo['field'] in CAMPOS_EN_MINUSCULAS else str(value)
                         
-                        row.append(Paragraph(normalize_text(value), styles['Normal']))
-                    data_contacto.append(row)
+                                row.append(Paragraph(normalize_text(value), styles['Normal']))
+                            yield row
                 
-                num_cols = len(headers_contacto)
-                if num_cols <= 4:
-                    col_widths_contacto = [ancho_disponible * 0.20] + [ancho_disponible * 0.80 / (num_cols - 1)] * (num_cols - 1)
-                else:
-                    col_width = ancho_disponible / num_cols
-                    col_widths_contacto = [col_width] * num_cols
+                    num_cols = len(headers_contacto)
+                    if num_cols <= 4:
+                        col_widths_contacto = [ancho_disponible * 0.20] + [ancho_disponible * 0.80 / (num_cols - 1)] * (num_cols - 1)
+                    else:
+                        col_width = ancho_disponible / num_cols
+                        col_widths_contacto = [col_width] * num_cols
                 
-                table_contacto = Table(data_contacto, colWidths=col_widths_contacto, repeatRows=1)
-                table_contacto.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#222A59')),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, 0), 9),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-                    ('TOPPADDING', (0, 0), (-1, 0), 8),
-                    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F3F4F6')]),
-                    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                    ('FONTSIZE', (0, 1), (-1, -1), 8),
-                    ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#6B7280')),
-                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                    ('TOPPADDING', (0, 1), (-1, -1), 6),
-                    ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
-                ]))
-                story.append(table_contacto)
+                    # Tablas acotadas: evita el particionado superlineal de una tabla enorme
+                    yield from tablas_por_bloques(headers_contacto, filas_contacto(), col_widths_contacto, [
+                        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#222A59')),
+                        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                        ('FONTSIZE', (0, 0), (-1, 0), 9),
+                        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+                        ('TOPPADDING', (0, 0), (-1, 0), 8),
+                        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F3F4F6')]),
+                        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+                        ('FONTSIZE', (0, 1), (-1, -1), 8),
+                        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#6B7280')),
+                        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+                        ('TOPPADDING', (0, 1), (-1, -1), 6),
+                        ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
+                    ])
                 
-                if i + max_cols - 1 < len(campos_contacto):
-                    story.append(Spacer(1, 0.3*cm))
+                    if i + max_cols - 1 < len(campos_contacto):
+                        yield Spacer(1, 0.3*cm)
         
-        story.append(Spacer(1, 0.5*cm))
-    
-    # SECCIÓN 3: COMERCIAL
-    if secciones['comercial']:
-        # Nueva página para la sección comercial
-        story.append(PageBreak())
-        story.append(Paragraph("Información Comercial y Clasificación", title_style))
-        story.append(Spacer(1, 0.3*cm))
+            yield Spacer(1, 0.5*cm)
+    
+        # SECCIÓN 3: COMERCIAL
+        if secciones['comercial']:
+            # Nueva página para la sección comercial
+            yield PageBreak()
+            yield Paragraph("Información Comercial y Clasificación", title_style)
+            yield Spacer(1, 0.3*cm)
         
-        campos_comercial = secciones['comercial']
+            campos_comercial = secciones['comercial']
         
-        if usar_formato_compacto:
-            # Formato compacto
-            max_cols = 8  # Máximo de columnas por tabla (incluyendo "Razón Social")
+            if usar_formato_compacto:
+                # Formato compacto
+                max_cols = 8  # Máximo de columnas por tabla (incluyendo "Razón Social")
             
-            for i in range(0, len(campos_comercial), max_cols - 1):
-                grupo_campos = campos_comercial[i:i + max_cols - 1]
-                headers_comercial = ['Razón Social'] + [campo['label'] for campo in grupo_campos]
-                data_comercial = [headers_comercial]
-                
-                for tipo, empresa in todas_empresas:
-                    row = [Paragraph(normalize_text(empresa.razon_social), styles['Normal'])]
-                    for campo in grupo_campos:
-                        value = get_field_value(empresa, campo['field'])
+                for i in range(0, len(campos_comercial), max_cols - 1):
+                    grupo_campos = campos_comercial[i:i + max_cols - 1]
+                    headers_comercial = ['Razón Social'] + [campo['label'] for campo in grupo_campos]
+                    def filas_comercial():
+                        for tipo, empresa, valores in filas_empresas():
+                            row = [Paragraph(normalize_text(empresa.razon_social), styles['Normal'])]
+                            for campo in grupo_campos:
+                                value = valores[campo['indice']]
                         
-                        # Manejar geolocalización como enlace de Google Maps
-                        if campo['field'] == 'geolocalizacion':
-                            link_text = format_geolocalizacion_as_link(value)
-                            if link_text != '-':
-                                row.append(Paragraph(link_text, styles['Normal']))
-                            else:
-                                row.append(Paragraph('-', styles['Normal']))
-                            continue
+                                # Manejar geolocalización como enlace de Google Maps
+                                if campo['field'] == 'geolocalizacion':
+                                    link_text = format_geolocalizacion_as_link(value)
+                                    if link_text != '-':
+                                        row.append(Paragraph(link_text, styles['Normal']))
+                                    else:
+                                        row.append(Paragraph('-', styles['Normal']))
+                                    continue
                         
-                        if isinstance(value, bool):
-                            value = 'Sí' if value else 'No'
-                        elif value is None or value == '-':
-                            value = '-'
-                        elif campo['field'] == 'exporta':
-                            value = 'Sí' if value == 'Sí' else 'No'
-                        else:
-                            value = str(value)
+                                if isinstance(value, bool):
+                                    value = 'Sí' if value else 'No'
+                                elif value is None or value == '-':
+                                    value = '-'
+                                elif campo['field'] == 'exporta':
+                                    value = 'Sí' if value == 'Sí' else 'No'
+                                else:
+                                    value = str(value)
                         
-                        # Truncar valores muy largos
-                        if len(value) > 30:
-                            value = value[:27] + '...'
+                                # Truncar valores muy largos
+                                if len(value) > 30:
+                                    value = value[:27] + '...'
                         
-                        row.append(Paragraph(normalize_text(value), styles['Normal']))
-                    data_comercial.append(row)
+                                row.append(Paragraph(normalize_text(value), styles['Normal']))
+                            yield row
                 
-                num_cols = len(headers_comercial)
-                col_widths_comercial = [ancho_disponible * 0.20] + [ancho_disponible * 0.80 / (num_cols - 1)] * (num_cols - 1)
+                    num_cols = len(headers_comercial)
+                    col_widths_comercial = [ancho_disponible * 0.20] + [ancho_disponible * 0.80 / (num_cols - 1)] * (num_cols - 1)
                 
-                table_comercial = Table(data_comercial, colWidths=col_widths_comercial, repeatRows=1)
-                table_comercial.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#222A59')),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, 0), 8),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
-                    ('TOPPADDING', (0, 0), (-1, 0), 6),
-                    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F3F4F6')]),
-                    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                    ('FONTSIZE', (0, 1), (-1, -1), 7),
-                    ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#6B7280')),
-                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                    ('TOPPADDING', (0, 1), (-1, -1), 4),
-                    ('BOTTOMPADDING', (0, 1), (-1, -1), 4),
-                ]))
-                story.append(table_comercial)
+                    # Tablas acotadas: evita el particionado superlineal de una tabla enorme
+                    yield from tablas_por_bloques(headers_comercial, filas_comercial(), col_widths_comercial, [
+                        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#222A59')),
+                        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                        ('FONTSIZE', (0, 0), (-1, 0), 8),
+                        ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
+                        ('TOPPADDING', (0, 0), (-1, 0), 6),
+                        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F3F4F6')]),
+                        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+                        ('FONTSIZE', (0, 1), (-1, -1), 7),
+                        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#6B7280')),
+                        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+                        ('TOPPADDING', (0, 1), (-1, -1), 4),
+                        ('BOTTOMPADDING', (0, 1), (-1, -1), 4),
+                    ])
                 
-                if i + max_cols - 1 < len(campos_comercial):
-                    story.append(Spacer(1, 0.2*cm))
-        else:
-            # Formato detallado
-            max_cols = 6  # Incluyendo la columna "Razón Social"
+                    if i + max_cols - 1 < len(campos_comercial):
+                        yield Spacer(1, 0.2*cm)
+            else:
+                # Formato detallado
+                max_cols = 6  # Incluyendo la columna "Razón Social"
             
-            for i in range(0, len(campos_comercial), max_cols - 1):
-                grupo_campos = campos_comercial[i:i + max_cols - 1]
-                headers_comercial = ['Razón Social'] + [campo['label'] for campo in grupo_campos]
-                data_comercial = [headers_comercial]
-                
-                for tipo, empresa in todas_empresas:
-                    row = [Paragraph(normalize_text(empresa.razon_social), styles['Normal'])]
-                    for campo in grupo_campos:
-                        value = get_field_value(empresa, campo['field'])
+                for i in range(0, len(campos_comercial), max_cols - 1):
+                    grupo_campos = campos_comercial[i:i + max_cols - 1]
+                    headers_comercial = ['Razón Social'] + [campo['label'] for campo in grupo_campos]
+                    def filas_comercial():
+                        for tipo, empresa, valores in filas_empresas():
+                            row = [Paragraph(normalize_text(empresa.razon_social), styles['Normal'])]
+                            for campo in grupo_campos:
+                                value = valores[campo['indice']]
                         
-                        # Manejar geolocalización como enlace de Google Maps
-                        if campo['field'] == 'geolocalizacion':
-                            link_text = format_geolocalizacion_as_link(value)
-                            if link_text != '-':
-                                row.append(Paragraph(link_text, styles['Normal']))
-                            else:
-                                row.append(Paragraph('-', styles['Normal']))
-                            continue
+                                # Manejar geolocalización como enlace de Google Maps
+                                if campo['field'] == 'geolocalizacion':
+                                    link_text = format_geolocalizacion_as_link(value)
+                                    if link_text != '-':
+                                        row.append(Paragraph(link_text, styles['Normal']))
+                                    else:
+                                        row.append(Paragraph('-', styles['Normal']))
+                                    continue
                         
-                        if isinstance(value, bool):
-                            value = 'Sí' if value else 'No'
-                        elif value is None or value == '-':
-                            value = '-'
-                        elif campo['field'] == 'exporta':
-                            value = 'Sí' if value == 'Sí' else 'No'
-                        else:
-                            value = str(value)
+                                if isinstance(value, bool):
+                                    value = 'Sí' if value else 'No'
+                                elif value is None or value == '-':
+                                    value = '-'
+                                elif campo['field'] == 'exporta':
+                                    value = 'Sí' if value == 'Sí' else 'No'
+                                else:
+                                    value = str(value)
                         
-                        row.append(Paragraph(normalize_text(value), styles['Normal']))
-                    data_comercial.append(row)
+                                row.append(Paragraph(normalize_text(value), styles['Normal']))
+                            yield row
                 
-                num_cols = len(headers_comercial)
-                if num_cols <= 4:
-                    col_widths_comercial = [ancho_disponible * 0.20] + [ancho_disponible * 0.80 / (num_cols - 1)] * (num_cols - 1)
-                else:
-                    col_width = ancho_disponible / num_cols
-                    col_widths_comercial = [col_width] * num_cols
+                    num_cols = len(headers_comercial)
+                    if num_cols <= 4:
+                        col_widths_comercial = [ancho_disponible * 0.20] + [ancho_disponible * 0.80 / (num_cols - 1)] * (num_cols - 1)
+                    else:
+                        col_width = ancho_disponible / num_cols
+                        col_widths_comercial = [col_width] * num_cols
                 
-                table_comercial = Table(data_comercial, colWidths=col_widths_comercial, repeatRows=1)
-                table_comercial.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#222A59')),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, 0), 9),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-                    ('TOPPADDING', (0, 0), (-1, 0), 8),
-                    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F3F4F6')]),
-                    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                    ('FONTSIZE', (0, 1), (-1, -1), 8),
-                    ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#6B7280')),
-                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                    ('TOPPADDING', (0, 1), (-1, -1), 6),
-                    ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
-                ]))
-                story.append(table_comercial)
+                    # Tablas acotadas: evita el particionado superlineal de una tabla enorme
+                    yield from tablas_por_bloques(headers_comercial, filas_comercial(), col_widths_comercial, [
+                        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#222A59')),
+                        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                        ('FONTSIZE', (0, 0), (-1, 0), 9),
+                        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+                        ('TOPPADDING', (0, 0), (-1, 0), 8),
+                        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F3F4F6')]),
+                        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+                        ('FONTSIZE', (0, 1), (-1, -1), 8),
+                        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#6B7280')),
+                        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+                        ('TOPPADDING', (0, 1), (-1, -1), 6),
+                        ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
+                    ])
                 
-                if i + max_cols - 1 < len(campos_comercial):
-                    story.append(Spacer(1, 0.3*cm))
-    
-    # Footer (el footer visual se agrega en la función callback)
-    # Mantener el footer de texto solo si no hay imagen de footer
-    if not header_footer_exists:
-        story.append(Spacer(1, 0.3*cm))
-        footer_text = Paragraph(
-            "Dirección de Intercambio Comercial Internacional y Regional - "
-            "San Martín 320, San Fernando del Valle de Catamarca - "
-            "Tel: (0383) 4437390",
-            footer_style
-        )
-        story.append(footer_text)
+                    if i + max_cols - 1 < len(campos_comercial):
+                        yield Spacer(1, 0.3*cm)
+    
+        # Footer (el footer visual se agrega en la función callback)
+        # Mantener el footer de texto solo si no hay imagen de footer
+        if not header_footer_exists:
+            yield Spacer(1, 0.3*cm)
+            footer_text = Paragraph(
+                "Dirección de Intercambio Comercial Internacional y Regional - "
+                "San Martín 320, San Fernando del Valle de Catamarca - "
+                "Tel: (0383) 4437390",
+                footer_style
+            )
+            yield footer_text
     
     # Resetear contadores antes de construir
     max_page_seen['value'] = 0
     footer_added['value'] = False
     total_pages_info['value'] = None
     
-    # Construir PDF con header solo en primera página, marca de agua en todas, footer solo en última
-    doc.build(story, onFirstPage=on_first_page, onLaterPages=on_later_pages)
-    
-    # Obtener PDF
-    pdf = buffer.getvalue()
-    buffer.close()
+    # Construir PDF consumiendo la historia a demanda, con header solo en primera página,
+    # marca de agua en todas y footer solo en la última
+    doc.build(HistoriaPorBloques(historia()), onFirstPage=on_first_page, onLaterPages=on_later_pages,
+              canvasmaker=CanvasPaginasComprimidas)
     
-    # Crear respuesta HTTP
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="empresas_exportacion_{datetime.now().strftime("%Y%m%d_%H%M")}.pdf"'
-    response.write(pdf)
-    
-    return response
+    return respuesta_pdf(archivo, f'empresas_exportacion_{datetime.now().strftime("%Y%m%d_%H%M")}.pdf')
+
+
+def generate_empresas_seleccionadas_csv(empresas_ids, campos_seleccionados):
+    """
+    Genera un CSV con empresas específicas y los mismos campos que el PDF de seleccionadas
+    """
+    from django.http import FileResponse
+    from .extraccion import PlanExtraccion, escribir_csv
+    
+    todas_empresas = obtener_empresas_seleccionadas(empresas_ids)
+    plan = PlanExtraccion(campos_seleccionados)
+    
+    # UTF-8 con BOM para que Excel reconozca los acentos al abrirlo
+    archivo = tempfile.TemporaryFile(suffix='.csv')
+    texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+    escribir_csv(texto, plan, todas_empresas)
+    texto.flush()
+    texto.detach()
+    archivo.seek(0)
+    
+    filename = f'empresas_exportacion_{datetime.now().strftime("%Y%m%d_%H%M")}.csv'
+    return FileResponse(archivo, as_attachment=True, filename=filename, content_type='text/csv; charset=utf-8')
 
 
 def calcular_puntajes_matriz(empresa):
@@ -139,6 +139,7 @@ def export_empresas_pdf(request):
     Exportar empresas a PDF
     """
     from .utils import generate_empresas_pdf
+    from .pdf_cache import obtener_pdf
     
     # Obtener filtros
     tipo = request.GET.get('tipo', 'producto')
@@ -160,18 +161,20 @@ def export_empresas_pdf(request):
         empresas = Empresaproducto.objects.select_related(
             'departamento', 'municipio', 'localidad', 
             'id_rubro', 'tipo_empresa'
-        ).prefetch_related('clasificaciones_exportador').all()
+        ).all()
     elif tipo == 'servicio':
         empresas = Empresaservicio.objects.select_related(
             'departamento', 'municipio', 'localidad',
             'id_rubro', 'tipo_empresa'
-        ).prefetch_related('clasificaciones_exportador').all()
+        ).all()
     else:
         empresas = EmpresaMixta.objects.select_related(
             'departamento', 'municipio', 'localidad',
             'id_rubro', 'tipo_empresa'
-        ).prefetch_related('clasificaciones_exportador').all()
+        ).all()
     
-    # Generar PDF
-    pdf_response = generate_empresas_pdf(empresas, campos, tipo)
+    # Generar PDF (o reutilizar el cacheado si los datos no cambiaron)
+    pdf_response = obtener_pdf(
+        'empresas', {'tipo': tipo, 'campos': campos}, lambda: generate_empresas_pdf(empresas, campos, tipo)
+    )
     return pdf_response
\ No newline at end of file
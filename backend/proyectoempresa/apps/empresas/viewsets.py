@@ -4,9 +4,9 @@ from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q
+from django.db.models import Q, Prefetch
 from django.utils import timezone
-import time
+from django.conf import settings
 import logging
 from .models import (
     TipoEmpresa,
@@ -25,6 +25,10 @@ from .models import (
     PosicionArancelaria,
     PosicionArancelariaMixta,
     MatrizClasificacionExportador,
+    ExportacionPDF,
+    CampanaNotificacion,
+    DestinatarioCampana,
+    ImportacionEmpresas,
 )
 from .serializers import (
     TipoEmpresaSerializer,
@@ -47,8 +51,14 @@ from .serializers import (
     PosicionArancelariaSerializer,
     PosicionArancelariaMixtaSerializer,
     MatrizClasificacionExportadorSerializer,
+    ExportacionPDFSerializer,
+    CampanaNotificacionSerializer,
+    ImportacionEmpresasSerializer,
+    ImportacionEmpresasDetalleSerializer,
 )
-from apps.core.permissions import CanManageEmpresas, IsOwnerOrAdmin, CanManageOwnEmpresaProducts
+from apps.core.permissions import CanManageEmpresas, CanImportData, IsOwnerOrAdmin, CanManageOwnEmpresaProducts
+from apps.core.idempotencia import IdempotenciaMixin
+from .exportaciones import FILTROS_APROBADAS
 
 
 class TipoEmpresaViewSet(viewsets.ReadOnlyModelViewSet):
@@ -102,7 +112,7 @@ class OtrorubroViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [permissions.AllowAny]
 
 
-class EmpresaproductoViewSet(viewsets.ModelViewSet):
+class EmpresaproductoViewSet(IdempotenciaMixin, viewsets.ModelViewSet):
     """ViewSet para empresas de producto"""
 
     queryset = Empresaproducto.objects.select_related(
@@ -227,7 +237,7 @@ class EmpresaproductoViewSet(viewsets.ModelViewSet):
         )
 
 
-class EmpresaservicioViewSet(viewsets.ModelViewSet):
+class EmpresaservicioViewSet(IdempotenciaMixin, viewsets.ModelViewSet):
     """ViewSet para empresas de servicio"""
 
     queryset = Empresaservicio.objects.select_related(
@@ -327,7 +337,7 @@ class EmpresaservicioViewSet(viewsets.ModelViewSet):
         serializer.save(actualizado_por=self.request.user)
 
 
-class EmpresaMixtaViewSet(viewsets.ModelViewSet):
+class EmpresaMixtaViewSet(IdempotenciaMixin, viewsets.ModelViewSet):
     """ViewSet para empresas mixtas"""
 
     queryset = EmpresaMixta.objects.select_related(
@@ -431,7 +441,7 @@ class EmpresaMixtaViewSet(viewsets.ModelViewSet):
         serializer.save(actualizado_por=self.request.user)
 
 
-class ProductoEmpresaViewSet(viewsets.ModelViewSet):
+class ProductoEmpresaViewSet(IdempotenciaMixin, viewsets.ModelViewSet):
     """ViewSet para productos de empresa"""
 
     queryset = ProductoEmpresa.objects.select_related("empresa", "empresa__id_usuario").all()
@@ -467,7 +477,7 @@ class ProductoEmpresaViewSet(viewsets.ModelViewSet):
         serializer.save()
 
 
-class ServicioEmpresaViewSet(viewsets.ModelViewSet):
+class ServicioEmpresaViewSet(IdempotenciaMixin, viewsets.ModelViewSet):
     """ViewSet para servicios de empresa"""
 
     queryset = ServicioEmpresa.objects.select_related("empresa", "empresa__id_usuario").all()
@@ -501,7 +511,7 @@ class ServicioEmpresaViewSet(viewsets.ModelViewSet):
         serializer.save()
 
 
-class ProductoEmpresaMixtaViewSet(viewsets.ModelViewSet):
+class ProductoEmpresaMixtaViewSet(IdempotenciaMixin, viewsets.ModelViewSet):
     """ViewSet para productos de empresa mixta"""
 
     queryset = ProductoEmpresaMixta.objects.select_related("empresa", "empresa__id_usuario").all()
@@ -535,7 +545,7 @@ class ProductoEmpresaMixtaViewSet(viewsets.ModelViewSet):
         serializer.save()
 
 
-class ServicioEmpresaMixtaViewSet(viewsets.ModelViewSet):
+class ServicioEmpresaMixtaViewSet(IdempotenciaMixin, viewsets.ModelViewSet):
     """ViewSet para servicios de empresa mixta"""
 
     queryset = ServicioEmpresaMixta.objects.select_related("empresa", "empresa__id_usuario").all()
@@ -569,7 +579,7 @@ class ServicioEmpresaMixtaViewSet(viewsets.ModelViewSet):
         serializer.save()
 
 
-class PosicionArancelariaViewSet(viewsets.ModelViewSet):
+class PosicionArancelariaViewSet(IdempotenciaMixin, viewsets.ModelViewSet):
     """ViewSet para posiciones arancelarias"""
 
     queryset = PosicionArancelaria.objects.select_related(
@@ -587,7 +597,7 @@ class PosicionArancelariaViewSet(viewsets.ModelViewSet):
     ordering = ["codigo_arancelario"]
 
 
-class PosicionArancelariaMixtaViewSet(viewsets.ModelViewSet):
+class PosicionArancelariaMixtaViewSet(IdempotenciaMixin, viewsets.ModelViewSet):
     """ViewSet para posiciones arancelarias de productos mixtos"""
 
     queryset = PosicionArancelariaMixta.objects.select_related(
@@ -605,7 +615,7 @@ class PosicionArancelariaMixtaViewSet(viewsets.ModelViewSet):
     ordering = ["-es_principal", "codigo_arancelario"]
 
 
-class MatrizClasificacionExportadorViewSet(viewsets.ModelViewSet):
+class MatrizClasificacionExportadorViewSet(IdempotenciaMixin, viewsets.ModelViewSet):
     """ViewSet para matriz de clasificación de exportador"""
 
     queryset = MatrizClasificacionExportador.objects.select_related(
@@ -871,7 +881,7 @@ class EmpresaPagination(PageNumberPagination):
 # VIEWSET UNIFICADO PARA EMPRESA (REEMPLAZA LOS PROXY MODELS)
 # ============================================================================
 
-class EmpresaViewSet(viewsets.ModelViewSet):
+class EmpresaViewSet(IdempotenciaMixin, viewsets.ModelViewSet):
     """ViewSet unificado para todas las empresas (reemplaza EmpresaproductoViewSet, EmpresaservicioViewSet, EmpresaMixtaViewSet)"""
     
     queryset = Empresa.objects.select_related(
@@ -1234,12 +1244,37 @@ class EmpresaViewSet(viewsets.ModelViewSet):
                 ).count(),
             }
         )
-    
+
+    @action(detail=False, methods=['get'], url_path='buscar-catalogos', permission_classes=[permissions.IsAuthenticated])
+    def buscar_catalogos(self, request):
+        """
+        Empresas cuyo catálogo o brochure PDF contiene el texto buscado (?q=),
+        ordenadas por relevancia. Usa el texto ya indexado por indexar_catalogos.
+        """
+        from .catalogos_texto import buscar_empresas
+
+        consulta = request.query_params.get('q', '').strip()
+        if len(consulta) < 3:
+            return Response(
+                {'error': 'El parámetro q debe tener al menos 3 caracteres'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        empresas = buscar_empresas(self.get_queryset(), consulta)
+        pagina = self.paginate_queryset(empresas)
+        if pagina is not None:
+            serializer = EmpresaListSerializer(pagina, many=True, context=self.get_serializer_context())
+            return self.get_paginated_response(serializer.data)
+        serializer = EmpresaListSerializer(empresas, many=True, context=self.get_serializer_context())
+        return Response(serializer.data)
+
     @action(detail=False, methods=['post'], permission_classes=[permissions.IsAuthenticated, CanManageEmpresas])
     def notificar(self, request):
         """
         Notificar empresas con sus credenciales de acceso.
-        Soporta notificación individual, múltiple o masiva.
+        Soporta notificación individual, múltiple o masiva: crea una campaña en
+        segundo plano y devuelve su id para consultar el progreso en
+        /campanas-notificacion/<id>/.
         """
         logger = logging.getLogger(__name__)
         
@@ -1268,11 +1303,11 @@ class EmpresaViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Filtrar solo empresas con email válido
-        empresas_validas = []
-        for empresa in empresas:
-            if empresa.id_usuario and empresa.id_usuario.email:
-                empresas_validas.append(empresa)
+        # Filtrar solo empresas con email (el formato se valida al crear la campaña)
+        empresas_validas = [
+            empresa for empresa in empresas
+            if empresa.id_usuario and empresa.id_usuario.email
+        ]
         
         if not empresas_validas:
             return Response(
@@ -1280,99 +1315,200 @@ class EmpresaViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Advertencia si hay muchas empresas (límite de Gmail)
-        total_empresas = len(empresas_validas)
-        if total_empresas > 500:
-            logger.warning(f"⚠️ Se intentará notificar {total_empresas} empresas. Esto puede exceder el límite de Gmail (500/día para cuentas gratuitas)")
-        
-        # Importar función de servicio
-        from apps.registro.services import enviar_email_notificacion_empresa
-        
-        # Envío en lotes con delays
-        enviados = 0
-        fallidos = 0
-        errores = []
-        lote_size = 10
-        delay_entre_lotes = 2  # segundos
-        delay_entre_emails = 0.5  # segundos
+        # El envío lo hace el worker procesar_campanas respetando la cuota SMTP
+        from .campanas import crear_campana
+        campana = crear_campana(request.user, empresas_validas)
         
-        # Dividir en lotes
-        lotes = [empresas_validas[i:i + lote_size] for i in range(0, len(empresas_validas), lote_size)]
+        limite_diario = getattr(settings, 'NOTIFICACIONES_EMAILS_POR_DIA', 500)
+        if campana.total > limite_diario:
+            logger.warning(f"⚠️ La campaña {campana.id} tiene {campana.total} empresas: supera la cuota de {limite_diario} emails/día y tardará más de un día")
         
-        logger.info(f"📧 Iniciando notificación de {total_empresas} empresas en {len(lotes)} lotes")
-        
-        for lote_idx, lote in enumerate(lotes):
-            logger.info(f"📦 Procesando lote {lote_idx + 1}/{len(lotes)} ({len(lote)} empresas)")
-            
-            for empresa in lote:
-                try:
-                    # Validar que el email del usuario sea válido antes de intentar enviar
-                    if not empresa.id_usuario or not empresa.id_usuario.email:
-                        fallidos += 1
-                        errores.append({
-                            'empresa_id': empresa.id,
-                            'razon_social': empresa.razon_social,
-                            'error': 'Usuario sin email válido'
-                        })
-                        logger.warning(f"⚠️ Empresa {empresa.id} ({empresa.razon_social}) no tiene email válido")
-                        continue
-                    
-                    # Validar formato básico del email
-                    email = empresa.id_usuario.email.strip()
-                    if '@' not in email or '.' not in email.split('@')[-1]:
-                        fallidos += 1
-                        errores.append({
-                            'empresa_id': empresa.id,
-                            'razon_social': empresa.razon_social,
-                            'error': f'Email con formato inválido: {email}'
-                        })
-                        logger.warning(f"⚠️ Email con formato inválido para empresa {empresa.id}: {email}")
-                        continue
-                    
-                    resultado = enviar_email_notificacion_empresa(empresa)
-                    if resultado:
-                        # Actualizar fecha de última notificación
-                        empresa.ultima_notificacion_credenciales = timezone.now()
-                        empresa.save(update_fields=['ultima_notificacion_credenciales'])
-                        enviados += 1
-                        logger.info(f"✅ Email enviado a {empresa.razon_social} ({empresa.id_usuario.email})")
-                    else:
-                        fallidos += 1
-                        errores.append({
-                            'empresa_id': empresa.id,
-                            'razon_social': empresa.razon_social,
-                            'error': 'Error al enviar email (resultado False)'
-                        })
-                        logger.warning(f"⚠️ Error al enviar email a {empresa.razon_social}")
-                    
-                    # Delay entre emails dentro del mismo lote
-                    if delay_entre_emails > 0:
-                        time.sleep(delay_entre_emails)
-                        
-                except Exception as e:
-                    fallidos += 1
-                    error_msg = str(e)
-                    # Detectar errores de dirección no encontrada
-                    if '550' in error_msg or '5.1.1' in error_msg or 'does not exist' in error_msg.lower() or 'address not found' in error_msg.lower():
-                        error_msg = f'Dirección de email no existe o no es válida: {empresa.id_usuario.email if empresa.id_usuario else "N/A"}'
-                    
-                    errores.append({
-                        'empresa_id': empresa.id,
-                        'razon_social': empresa.razon_social,
-                        'error': error_msg
-                    })
-                    logger.error(f"❌ Error al notificar empresa {empresa.id} ({empresa.razon_social}): {error_msg}", exc_info=False)  # exc_info=False para evitar logs muy largos
-            
-            # Delay entre lotes (excepto después del último lote)
-            if lote_idx < len(lotes) - 1 and delay_entre_lotes > 0:
-                logger.info(f"⏳ Esperando {delay_entre_lotes} segundos antes del siguiente lote...")
-                time.sleep(delay_entre_lotes)
-        
-        logger.info(f"✅ Notificación completada: {enviados} enviados, {fallidos} fallidos")
-        
-        return Response({
-            'enviados': enviados,
-            'fallidos': fallidos,
-            'total': total_empresas,
-            'errores': errores if errores else None
-        }, status=status.HTTP_200_OK)
+        serializer = CampanaNotificacionSerializer(campana, context={'request': request})
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
+
+class ExportacionPDFViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Exportaciones PDF en segundo plano.
+    POST crea el trabajo y devuelve su id; el cliente consulta estado/progreso
+    y descarga el archivo cuando el worker (procesar_exportaciones) lo termina.
+    """
+
+    serializer_class = ExportacionPDFSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = None
+
+    def get_queryset(self):
+        """Cada usuario ve solo sus exportaciones (los superusuarios ven todas)"""
+        queryset = ExportacionPDF.objects.select_related('usuario')
+        if not self.request.user.is_superuser:
+            queryset = queryset.filter(usuario=self.request.user)
+        return queryset
+
+    def _construir_parametros(self, tipo, data):
+        """Validar y normalizar los parámetros según el tipo de exportación"""
+        campos = data.get('campos', [])
+        if isinstance(campos, str):
+            campos = [campos]
+
+        if tipo == 'aprobadas':
+            parametros = {filtro: data.get(filtro, '') for filtro in FILTROS_APROBADAS}
+            parametros['campos'] = campos
+            return parametros
+
+        if tipo == 'seleccionadas':
+            empresas_ids = data.get('empresas_ids', [])
+            if not empresas_ids:
+                raise ValueError('No se proporcionaron IDs de empresas')
+            if not campos:
+                raise ValueError('No se seleccionaron campos para exportar')
+            try:
+                empresas_ids = [int(id) for id in empresas_ids]
+            except (TypeError, ValueError):
+                raise ValueError('Los IDs de empresas deben ser números enteros')
+            return {'empresas_ids': empresas_ids, 'campos': campos}
+
+        if tipo == 'empresas':
+            tipo_empresa = data.get('tipo_empresa', 'producto')
+            if tipo_empresa not in ('producto', 'servicio', 'mixta'):
+                raise ValueError('tipo_empresa debe ser producto, servicio o mixta')
+            return {'tipo': tipo_empresa}
+
+        raise ValueError(f'Tipo de exportación no válido: {tipo}')
+
+    def create(self, request, *args, **kwargs):
+        """Encolar una nueva exportación PDF"""
+        from .exportaciones import crear_exportacion, LimiteExportacionesError
+
+        tipo = request.data.get('tipo', '')
+        try:
+            parametros = self._construir_parametros(tipo, request.data)
+            exportacion = crear_exportacion(request.user, tipo, parametros)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except LimiteExportacionesError as e:
+            return Response({'error': str(e)}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+
+        serializer = self.get_serializer(exportacion)
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['get'])
+    def descargar(self, request, pk=None):
+        """Descargar el PDF de una exportación completada"""
+        from django.http import FileResponse
+
+        exportacion = self.get_object()
+        if exportacion.estado != 'completada' or not exportacion.archivo:
+            return Response(
+                {'error': 'La exportación todavía no está disponible', 'estado': exportacion.estado},
+                status=status.HTTP_409_CONFLICT
+            )
+        try:
+            archivo = exportacion.archivo.open('rb')
+        except FileNotFoundError:
+            return Response(
+                {'error': 'El archivo de la exportación ya no existe'},
+                status=status.HTTP_410_GONE
+            )
+        return FileResponse(
+            archivo,
+            as_attachment=True,
+            filename=exportacion.nombre_archivo or f'exportacion_{exportacion.id}.pdf',
+            content_type='application/pdf'
+        )
+
+
+class CampanaNotificacionViewSet(IdempotenciaMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Campañas de notificación de credenciales.
+    Se crean con EmpresaViewSet.notificar; aquí se consulta su progreso y se cancelan.
+    """
+
+    serializer_class = CampanaNotificacionSerializer
+    permission_classes = [permissions.IsAuthenticated, CanManageEmpresas]
+
+    def get_queryset(self):
+        return CampanaNotificacion.objects.select_related('creado_por').prefetch_related(
+            Prefetch(
+                'destinatarios',
+                queryset=DestinatarioCampana.objects.filter(estado='fallido').select_related('empresa'),
+                to_attr='destinatarios_fallidos'
+            )
+        )
+
+    @action(detail=True, methods=['post'])
+    def cancelar(self, request, pk=None):
+        """Cancelar una campaña pendiente o en proceso (los emails ya enviados no se revierten)"""
+        from .campanas import cancelar_campana
+
+        campana = self.get_object()
+        if not cancelar_campana(campana):
+            return Response(
+                {'error': 'La campaña ya finalizó', 'estado': campana.estado},
+                status=status.HTTP_409_CONFLICT
+            )
+        return Response(self.get_serializer(campana).data)
+
+
+class ImportacionEmpresasViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Importación masiva de empresas desde CSV o XLSX.
+    POST (multipart: archivo, simulacion, actualizar_existentes) encola la importación;
+    el worker procesar_importaciones la procesa. Una simulación completada se
+    confirma con POST confirmar/ para cargar los datos.
+    """
+
+    permission_classes = [permissions.IsAuthenticated, CanImportData]
+
+    def get_queryset(self):
+        """Cada usuario ve solo sus importaciones (los superusuarios ven todas)"""
+        queryset = ImportacionEmpresas.objects.select_related('usuario')
+        if self.action == 'list':
+            queryset = queryset.defer('errores')
+        if not self.request.user.is_superuser:
+            queryset = queryset.filter(usuario=self.request.user)
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return ImportacionEmpresasSerializer
+        return ImportacionEmpresasDetalleSerializer
+
+    @staticmethod
+    def _booleano(valor, default):
+        if valor in (None, ''):
+            return default
+        return str(valor).strip().lower() in ('true', '1', 'si', 'sí')
+
+    def create(self, request, *args, **kwargs):
+        """Encolar una importación (por defecto como simulación)"""
+        from .importacion import crear_importacion, ArchivoInvalido
+
+        archivo = request.FILES.get('archivo')
+        if not archivo:
+            return Response({'error': 'No se envió ningún archivo'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            importacion = crear_importacion(
+                request.user,
+                archivo,
+                simulacion=self._booleano(request.data.get('simulacion'), True),
+                actualizar_existentes=self._booleano(request.data.get('actualizar_existentes'), False),
+            )
+        except ArchivoInvalido as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = self.get_serializer(importacion)
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['post'])
+    def confirmar(self, request, pk=None):
+        """Cargar los datos de una simulación completada (se vuelve a validar el archivo)"""
+        from .importacion import confirmar_importacion
+
+        importacion = self.get_object()
+        if not confirmar_importacion(importacion):
+            return Response(
+                {'error': 'Solo se puede confirmar una simulación completada', 'estado': importacion.estado},
+                status=status.HTTP_409_CONFLICT
+            )
+        return Response(self.get_serializer(importacion).data, status=status.HTTP_202_ACCEPTED)
@@ -0,0 +1,146 @@
+"""
+Nomenclador geográfico en memoria.
+
+Carga una vez por proceso provincias, departamentos, municipios y localidades
+(solo id, nombre y jerarquía; no la geometría) e indexa los ids y los nombres
+normalizados (sin tildes, en minúsculas). Así las solicitudes, serializers e
+importaciones resuelven un valor de texto libre o un id sin consultar la base.
+
+Los cambios en las tablas de geografía (signals, o invalidar_nomenclador tras
+una carga masiva) incrementan una versión en la caché compartida; cada proceso
+la compara cada VERIFICACION_SEGUNDOS y recarga si cambió.
+"""
+import logging
+import threading
+import time
+import unicodedata
+from collections import namedtuple
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CLAVE_VERSION = 'geografia:nomenclador:version'
+VERIFICACION_SEGUNDOS = 5
+
+Lugar = namedtuple('Lugar', ['id', 'nombre', 'provincia_id', 'departamento_id', 'municipio_id'])
+
+NIVELES = ('provincia', 'departamento', 'municipio', 'localidad')
+
+
+def normalizar_nombre(texto):
+    """Nombre sin tildes, en minúsculas y con espacios simples ('Fray Mamerto Esquiú' -> 'fray mamerto esquiu')"""
+    texto = unicodedata.normalize('NFKD', str(texto or ''))
+    texto = ''.join(caracter for caracter in texto if not unicodedata.combining(caracter))
+    return ' '.join(texto.lower().split())
+
+
+class Nomenclador:
+    """Índices por id, por nombre normalizado y por jerarquía de cada nivel geográfico"""
+
+    def __init__(self, provincias=(), departamentos=(), municipios=(), localidades=()):
+        self._por_id = {}
+        self._por_nombre = {}
+        for nivel, lugares in zip(NIVELES, (provincias, departamentos, municipios, localidades)):
+            por_id = {}
+            por_nombre = {}
+            for lugar in lugares:
+                por_id[lugar.id] = lugar
+                por_nombre.setdefault(normalizar_nombre(lugar.nombre), []).append(lugar)
+            self._por_id[nivel] = por_id
+            self._por_nombre[nivel] = por_nombre
+
+    @classmethod
+    def desde_base(cls):
+        """Cargar el nomenclador desde las tablas de apps.geografia (cuatro consultas)"""
+        from .models import Provincia, Departamento, Municipio, Localidad
+
+        provincias = [
+            Lugar(id, nombre, id, None, None)
+            for id, nombre in Provincia.objects.values_list('id', 'nombre')
+        ]
+        departamentos = [
+            Lugar(id, nombre, provincia_id, id, None)
+            for id, nombre, provincia_id in Departamento.objects.values_list('id', 'nombre', 'provincia_id')
+        ]
+        municipios = [
+            Lugar(id, nombre, provincia_id, departamento_id, id)
+            for id, nombre, provincia_id, departamento_id in Municipio.objects.values_list(
+                'id', 'nombre', 'provincia_id', 'departamento_id'
+            )
+        ]
+        localidades = [
+            Lugar(*fila)
+            for fila in Localidad.objects.values_list('id', 'nombre', 'provincia_id', 'departamento_id', 'municipio_id')
+        ]
+        return cls(provincias, departamentos, municipios, localidades)
+
+    def obtener(self, nivel, id):
+        """Lugar con ese id, o None"""
+        return self._por_id[nivel].get(str(id).strip()) if id not in (None, '') else None
+
+    def resolver(self, nivel, valor, departamento_id=None):
+        """
+        Lugar para un valor de texto libre: primero como id, después como nombre
+        normalizado. Con `departamento_id` se prefieren los lugares de ese departamento.
+        """
+        if valor in (None, ''):
+            return None
+        lugar = self.obtener(nivel, valor)
+        if lugar:
+            return lugar
+        candidatos = self._por_nombre[nivel].get(normalizar_nombre(valor), [])
+        if departamento_id is not None:
+            candidatos = [c for c in candidatos if c.departamento_id == str(departamento_id)]
+        return candidatos[0] if candidatos else None
+
+    def nombres(self, nivel, ids):
+        """{id: nombre} para los ids conocidos del nivel (resolución en lote)"""
+        por_id = self._por_id[nivel]
+        return {id: por_id[str(id)].nombre for id in ids if id not in (None, '') and str(id) in por_id}
+
+    def hijos(self, nivel, padre_id):
+        """Lugares del nivel que pertenecen al departamento (o provincia) `padre_id`"""
+        campo = 'provincia_id' if nivel == 'departamento' else 'departamento_id'
+        return [lugar for lugar in self._por_id[nivel].values() if getattr(lugar, campo) == str(padre_id)]
+
+
+_lock = threading.Lock()
+_estado = {'nomenclador': None, 'version': None, 'verificado': 0.0}
+
+
+def _version_compartida():
+    try:
+        return cache.get(CLAVE_VERSION, 0)
+    except Exception as e:
+        # Sin caché compartida cada proceso conserva su copia hasta reiniciar
+        logger.warning(f"⚠️ No se pudo leer la versión del nomenclador: {str(e)}")
+        return _estado['version']
+
+
+def obtener_nomenclador():
+    """Nomenclador del proceso; se recarga si otro proceso invalidó la versión"""
+    ahora = time.monotonic()
+    if _estado['nomenclador'] is not None and ahora - _estado['verificado'] < VERIFICACION_SEGUNDOS:
+        return _estado['nomenclador']
+
+    with _lock:
+        version = _version_compartida()
+        if _estado['nomenclador'] is None or version != _estado['version']:
+            inicio = time.perf_counter()
+            _estado['nomenclador'] = Nomenclador.desde_base()
+            _estado['version'] = version
+            logger.info(f"🗺️ Nomenclador geográfico cargado en {time.perf_counter() - inicio:.2f}s")
+        _estado['verificado'] = ahora
+        return _estado['nomenclador']
+
+
+def invalidar_nomenclador(**kwargs):
+    """Descartar el nomenclador en este proceso y en los demás (vía la versión en caché)"""
+    _estado['nomenclador'] = None
+    try:
+        cache.incr(CLAVE_VERSION)
+    except ValueError:
+        cache.set(CLAVE_VERSION, 1, None)
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudo invalidar la versión del nomenclador: {str(e)}")
@@ -1,2 +1,10 @@
-# Signals para la app geografia (si se necesitan en el futuro)
+# Signals para la app geografia
+from django.db.models.signals import post_save, post_delete
 
+from .models import Provincia, Departamento, Municipio, Localidad
+from .nomenclador import invalidar_nomenclador
+
+# Cualquier cambio en las tablas de geografía invalida el nomenclador en memoria
+for modelo in (Provincia, Departamento, Municipio, Localidad):
+    post_save.connect(invalidar_nomenclador, sender=modelo, dispatch_uid=f'nomenclador_save_{modelo.__name__}')
+    post_delete.connect(invalidar_nomenclador, sender=modelo, dispatch_uid=f'nomenclador_delete_{modelo.__name__}')
@@ -1,6 +1,6 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.utils.html import format_html
-from .models import SolicitudRegistro, DocumentoSolicitud, NotificacionRegistro
+from .models import SolicitudRegistro, DocumentoSolicitud, NotificacionRegistro, EmailSalida, EmailSuprimido
 
 @admin.register(SolicitudRegistro)
 class SolicitudRegistroAdmin(admin.ModelAdmin):
@@ -45,97 +45,26 @@ class SolicitudRegistroAdmin(admin.ModelAdmin):
     
     actions = ['aprobar_solicitudes', 'rechazar_solicitudes']
     
-    def aprobar_solicitudes(self, request, queryset):
-        from .views import crear_empresa_desde_solicitud
-        from .services import enviar_email_aprobacion
-        from django.utils import timezone
-        
-        for solicitud in queryset:
-            if solicitud.estado == 'pendiente':
-                solicitud.estado = 'aprobada'
-                solicitud.fecha_aprobacion = timezone.now()
-                solicitud.aprobado_por = request.user
-                solicitud.save()
-                
-                # Crear empresa
-                empresa = crear_empresa_desde_solicitud(solicitud)
-                solicitud.empresa_creada = empresa
-                solicitud.save()
-                
-                # Enviar email
-                try:
-                    enviar_email_aprobacion(solicitud)
-                except Exception as e:
-                    import logging
-                    logger = logging.getLogger(__name__)
-                    logger.warning(f"Error enviando email de aprobación: {str(e)}")
+    def _procesar_lote(self, request, queryset, operacion):
+        from .aprobacion import procesar_lote
         
-        self.message_user(request, f'{queryset.count()} solicitudes aprobadas.')
+        ids = list(queryset.filter(estado='pendiente').values_list('id', flat=True))
+        resultados = procesar_lote(operacion, ids, request.user)
+        procesadas = sum(1 for resultado in resultados if resultado['resultado'] in ('aprobada', 'rechazada'))
+        return procesadas, [resultado for resultado in resultados if resultado['resultado'] not in ('aprobada', 'rechazada')]
+    
+    def aprobar_solicitudes(self, request, queryset):
+        procesadas, otras = self._procesar_lote(request, queryset, 'aprobar')
+        self.message_user(request, f'{procesadas} solicitudes aprobadas.')
+        for resultado in otras:
+            self.message_user(request, f"Solicitud {resultado['id']}: {resultado.get('mensaje', resultado['resultado'])}", messages.WARNING)
     aprobar_solicitudes.short_description = 'Aprobar solicitudes seleccionadas'
     
     def rechazar_solicitudes(self, request, queryset):
-        from .services import enviar_email_rechazo
-        from django.utils import timezone
-        from django.db import transaction
-        from apps.empresas.models import Empresa
-        import logging
-        
-        logger = logging.getLogger(__name__)
-        
-        for solicitud in queryset:
-            if solicitud.estado == 'pendiente':
-                usuario_a_eliminar = solicitud.usuario_creado
-                
-                try:
-                    with transaction.atomic():
-                        # Guardar el rechazo
-                        solicitud.estado = 'rechazada'
-                        solicitud.aprobado_por = request.user
-                        solicitud.save()
-                        
-                        # Eliminar el usuario asociado si existe
-                        if usuario_a_eliminar:
-                            # Verificar que el usuario no esté asociado a una empresa aprobada
-                            empresa_asociada = Empresa.objects.filter(id_usuario=usuario_a_eliminar).first()
-                            
-                            if empresa_asociada:
-                                logger.warning(
-                                    f"Usuario {usuario_a_eliminar.email} tiene empresa asociada (ID: {empresa_asociada.id}), "
-                                    f"no se eliminará el usuario al rechazar solicitud {solicitud.id}"
-                                )
-                            else:
-                                # Verificar que no tenga otras solicitudes aprobadas
-                                otras_solicitudes = SolicitudRegistro.objects.filter(
-                                    usuario_creado=usuario_a_eliminar,
-                                    estado='aprobada'
-                                ).exclude(id=solicitud.id).exists()
-                                
-                                if otras_solicitudes:
-                                    logger.warning(
-                                        f"Usuario {usuario_a_eliminar.email} tiene otras solicitudes aprobadas, "
-                                        f"no se eliminará el usuario al rechazar solicitud {solicitud.id}"
-                                    )
-                                else:
-                                    # Eliminar el usuario
-                                    email_usuario = usuario_a_eliminar.email
-                                    usuario_a_eliminar.delete()
-                                    logger.info(f"✅ Usuario {email_usuario} eliminado al rechazar solicitud {solicitud.id}")
-                        
-                        # Desvincular el usuario de la solicitud
-                        solicitud.usuario_creado = None
-                        solicitud.save()
-                
-                except Exception as e:
-                    logger.error(f"❌ Error al rechazar solicitud {solicitud.id}: {str(e)}", exc_info=True)
-                    continue
-                
-                # Enviar email
-                try:
-                    enviar_email_rechazo(solicitud)
-                except Exception as e:
-                    logger.warning(f"Error enviando email de rechazo: {str(e)}")
-        
-        self.message_user(request, f'{queryset.count()} solicitudes rechazadas.')
+        procesadas, otras = self._procesar_lote(request, queryset, 'rechazar')
+        self.message_user(request, f'{procesadas} solicitudes rechazadas.')
+        for resultado in otras:
+            self.message_user(request, f"Solicitud {resultado['id']}: {resultado.get('mensaje', resultado['resultado'])}", messages.WARNING)
     rechazar_solicitudes.short_description = 'Rechazar solicitudes seleccionadas'
 
 @admin.register(DocumentoSolicitud)
@@ -149,6 +78,35 @@ class DocumentoSolicitudAdmin(admin.ModelAdmin):
 class NotificacionRegistroAdmin(admin.ModelAdmin):
     list_display = ['solicitud', 'tipo', 'asunto', 'email_enviado', 'fecha_envio']
     list_filter = ['tipo', 'email_enviado', 'fecha_envio']
+    list_select_related = ['solicitud']
     search_fields = ['solicitud__razon_social', 'asunto']
     ordering = ['-fecha_envio']
-    readonly_fields = ['fecha_envio', 'error_envio']
\ No newline at end of file
+    readonly_fields = ['fecha_envio', 'error_envio', 'template', 'vista_previa']
+    exclude = ['contexto']
+
+    def vista_previa(self, obj):
+        """HTML del email renderizado a partir del template y el contexto guardados"""
+        if not obj.pk or not (obj.template or obj.contexto):
+            return '-'
+        return format_html(
+            '<iframe srcdoc="{}" style="width: 100%; height: 600px; border: 1px solid #ccc;"></iframe>',
+            obj.renderizar_html()
+        )
+    vista_previa.short_description = 'Vista previa'
+
+@admin.register(EmailSalida)
+class EmailSalidaAdmin(admin.ModelAdmin):
+    list_display = ['id', 'tipo', 'solicitud', 'usuario', 'estado', 'intentos', 'proximo_intento', 'fecha_envio']
+    list_filter = ['tipo', 'estado', 'fecha_creacion']
+    search_fields = ['solicitud__razon_social', 'usuario__email']
+    ordering = ['-fecha_creacion']
+    readonly_fields = ['fecha_creacion', 'fecha_intento', 'fecha_envio']
+    exclude = ['parametros']  # puede contener el token de recuperación
+
+@admin.register(EmailSuprimido)
+class EmailSuprimidoAdmin(admin.ModelAdmin):
+    list_display = ['email', 'motivo', 'rebotes', 'ultimo_rebote', 'fecha_creacion']
+    list_filter = ['motivo', 'ultimo_rebote']
+    search_fields = ['email']
+    ordering = ['-ultimo_rebote']
+    readonly_fields = ['fecha_creacion', 'ultimo_rebote', 'rebotes']
@@ -2,15 +2,17 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .viewsets import (
     SolicitudRegistroViewSet, DocumentoSolicitudViewSet,
-    NotificacionRegistroViewSet
+    NotificacionRegistroViewSet, EmailSuprimidoViewSet, CuitDisponibleView
 )
 
 router = DefaultRouter()
 router.register(r'solicitudes', SolicitudRegistroViewSet, basename='solicitud')
 router.register(r'documentos', DocumentoSolicitudViewSet, basename='documento')
 router.register(r'notificaciones', NotificacionRegistroViewSet, basename='notificacion')
+router.register(r'emails-suprimidos', EmailSuprimidoViewSet, basename='email-suprimido')
 
 urlpatterns = [
+    path('cuit-disponible/', CuitDisponibleView.as_view(), name='cuit-disponible'),
     path('', include(router.urls)),
 ]
 
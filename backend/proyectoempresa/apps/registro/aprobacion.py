@@ -0,0 +1,168 @@
+"""
+Aprobación y rechazo de solicitudes de registro, individuales o en lote.
+
+aprobar_solicitud y rechazar_solicitud hacen el trabajo de una solicitud y se
+llaman dentro de una transacción; el email no se envía en el momento, queda en
+la bandeja de salida (worker procesar_emails).
+
+procesar_lote recorre una lista de ids en tramos de REGISTRO_LOTE_TAMANO, cada
+tramo en su propia transacción. Las filas se bloquean con skip_locked: si otro
+operador está procesando una solicitud, esta se informa como 'bloqueada' en
+lugar de esperar. Cada solicitud corre en un savepoint, así un error no
+revierte las demás del tramo.
+"""
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import SolicitudRegistro
+
+logger = logging.getLogger(__name__)
+
+
+class SolicitudNoProcesable(Exception):
+    """La solicitud no está en un estado que permita la operación"""
+
+
+def aprobar_solicitud(solicitud, usuario, observaciones=None):
+    """
+    Crear la empresa de la solicitud, marcarla aprobada y encolar el email.
+    Llamar dentro de una transacción. Devuelve la empresa creada.
+    Con `observaciones` None se conservan las observaciones del administrador.
+    """
+    from .views import crear_empresa_desde_solicitud
+    from .bandeja_salida import encolar_email
+
+    if solicitud.estado == 'rechazada':
+        raise SolicitudNoProcesable('No se puede aprobar una solicitud rechazada')
+
+    empresa = crear_empresa_desde_solicitud(solicitud, aprobado_por=usuario)
+
+    solicitud.estado = 'aprobada'
+    solicitud.fecha_aprobacion = timezone.now()
+    solicitud.aprobado_por = usuario
+    if observaciones is not None:
+        solicitud.observaciones_admin = observaciones
+    solicitud.empresa_creada = empresa
+    solicitud.save()
+
+    # El email de aprobación sale de la bandeja de salida (worker procesar_emails)
+    encolar_email('aprobacion', solicitud=solicitud)
+    logger.info(f"✅ Solicitud ID={solicitud.id} aprobada y empresa ID={empresa.id} vinculada")
+    return empresa
+
+
+def _eliminar_usuario_rechazado(solicitud, usuario_a_eliminar):
+    """Eliminar el usuario de una solicitud rechazada si no tiene empresa ni otras solicitudes aprobadas"""
+    from apps.empresas.models import Empresa
+
+    empresa_asociada = Empresa.objects.filter(id_usuario=usuario_a_eliminar).first()
+    if empresa_asociada:
+        logger.warning(
+            f"Usuario {usuario_a_eliminar.email} tiene empresa asociada (ID: {empresa_asociada.id}), "
+            f"no se eliminará el usuario al rechazar solicitud {solicitud.id}"
+        )
+        return
+
+    otras_solicitudes = SolicitudRegistro.objects.filter(
+        usuario_creado=usuario_a_eliminar,
+        estado='aprobada'
+    ).exclude(id=solicitud.id).exists()
+    if otras_solicitudes:
+        logger.warning(
+            f"Usuario {usuario_a_eliminar.email} tiene otras solicitudes aprobadas, "
+            f"no se eliminará el usuario al rechazar solicitud {solicitud.id}"
+        )
+        return
+
+    email_usuario = usuario_a_eliminar.email
+    usuario_a_eliminar.delete()
+    logger.info(f"✅ Usuario {email_usuario} eliminado al rechazar solicitud {solicitud.id}")
+
+
+def rechazar_solicitud(solicitud, usuario, observaciones=None):
+    """
+    Marcar la solicitud rechazada, eliminar el usuario asociado (si no tiene
+    empresa) y encolar el email. Llamar dentro de una transacción.
+    """
+    from .bandeja_salida import encolar_email
+
+    if solicitud.estado != 'pendiente':
+        raise SolicitudNoProcesable('Solo se pueden rechazar solicitudes pendientes')
+
+    usuario_a_eliminar = solicitud.usuario_creado
+
+    solicitud.estado = 'rechazada'
+    if observaciones is not None:
+        solicitud.observaciones_admin = observaciones
+    solicitud.aprobado_por = usuario
+    # Desvincular el usuario antes de eliminarlo
+    solicitud.usuario_creado = None
+    solicitud.save()
+
+    if usuario_a_eliminar:
+        _eliminar_usuario_rechazado(solicitud, usuario_a_eliminar)
+
+    # El email de rechazo sale de la bandeja de salida (worker procesar_emails)
+    encolar_email('rechazo', solicitud=solicitud)
+    logger.info(f"🚫 Solicitud ID={solicitud.id} rechazada")
+
+
+def _procesar_solicitud(operacion, solicitud, usuario, observaciones):
+    """Resultado de aprobar o rechazar una solicitud ya bloqueada"""
+    if operacion == 'aprobar' and solicitud.estado == 'aprobada' and solicitud.empresa_creada_id:
+        return {'id': solicitud.id, 'resultado': 'omitida',
+                'mensaje': 'La solicitud ya fue aprobada anteriormente', 'empresa_id': solicitud.empresa_creada_id}
+    try:
+        with transaction.atomic():
+            if operacion == 'aprobar':
+                empresa = aprobar_solicitud(solicitud, usuario, observaciones)
+                return {'id': solicitud.id, 'resultado': 'aprobada', 'empresa_id': empresa.id}
+            rechazar_solicitud(solicitud, usuario, observaciones)
+            return {'id': solicitud.id, 'resultado': 'rechazada'}
+    except (SolicitudNoProcesable, ValueError) as e:
+        return {'id': solicitud.id, 'resultado': 'error', 'mensaje': str(e)}
+    except Exception as e:
+        logger.error(f"❌ Error al {operacion} la solicitud {solicitud.id}: {str(e)}", exc_info=True)
+        return {'id': solicitud.id, 'resultado': 'error', 'mensaje': f'Error al {operacion} la solicitud: {str(e)}'}
+
+
+def procesar_lote(operacion, ids, usuario, observaciones=None):
+    """
+    Aprobar o rechazar (`operacion`) las solicitudes `ids`. Devuelve un resultado
+    por id, en el orden recibido: aprobada, rechazada, omitida, bloqueada,
+    no_encontrada o error.
+    """
+    if operacion not in ('aprobar', 'rechazar'):
+        raise ValueError(f'Operación desconocida: {operacion}')
+
+    tamano = max(1, getattr(settings, 'REGISTRO_LOTE_TAMANO', 50))
+    ids = list(dict.fromkeys(ids))
+    resultados = {}
+
+    for inicio in range(0, len(ids), tamano):
+        tramo = ids[inicio:inicio + tamano]
+        with transaction.atomic():
+            solicitudes = list(
+                SolicitudRegistro.objects.select_for_update(skip_locked=True, of=('self',))
+                .filter(pk__in=tramo)
+                .order_by('id')
+            )
+            for solicitud in solicitudes:
+                resultados[solicitud.id] = _procesar_solicitud(operacion, solicitud, usuario, observaciones)
+
+        faltantes = [id for id in tramo if id not in resultados]
+        if faltantes:
+            # Las que existen pero no se pudieron bloquear las tiene otro operador
+            existentes = set(SolicitudRegistro.objects.filter(pk__in=faltantes).values_list('id', flat=True))
+            for id in faltantes:
+                if id in existentes:
+                    resultados[id] = {'id': id, 'resultado': 'bloqueada',
+                                      'mensaje': 'La solicitud está siendo procesada por otro usuario'}
+                else:
+                    resultados[id] = {'id': id, 'resultado': 'no_encontrada', 'mensaje': 'Solicitud no encontrada'}
+
+    logger.info(f"📋 Lote '{operacion}' de {len(ids)} solicitudes procesado por {usuario}")
+    return [resultados[id] for id in ids]
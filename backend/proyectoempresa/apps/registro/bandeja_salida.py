@@ -0,0 +1,204 @@
+"""
+Bandeja de salida de emails transaccionales del registro.
+
+Las vistas no envían los emails de confirmación, aprobación, rechazo y
+contraseña: llaman a encolar_email dentro de la transacción del evento, así
+un rollback descarta también el email y la respuesta no espera al servidor
+SMTP. El comando procesar_emails renderiza y envía los pendientes por una
+misma conexión (enviar_emails_en_lote) y reintenta los fallidos con espera
+exponencial. Cuando hay solicitud, el resultado queda en su
+NotificacionRegistro (template y contexto comprimido, ver notificaciones.py).
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import EmailSalida, NotificacionRegistro
+
+logger = logging.getLogger(__name__)
+
+# Tipo de NotificacionRegistro de los emails asociados a una solicitud
+TIPOS_CON_NOTIFICACION = {'confirmacion', 'aprobacion', 'rechazo'}
+
+# Error registrado en los emails que quedaron 'enviando' por un worker caído
+ERROR_INTERRUMPIDO = 'Envío interrumpido: el worker no registró el resultado'
+
+
+def encolar_email(tipo, solicitud=None, usuario=None, parametros=None):
+    """
+    Agregar un email a la bandeja de salida.
+    Llamar dentro de la transacción del evento que lo origina: si se revierte,
+    el email tampoco se envía.
+    """
+    notificacion = None
+    if solicitud is not None and tipo in TIPOS_CON_NOTIFICACION:
+        notificacion = NotificacionRegistro.objects.create(
+            solicitud=solicitud,
+            tipo=tipo,
+            asunto=dict(EmailSalida.TIPO_CHOICES)[tipo],
+            email_enviado=False,
+        )
+    email = EmailSalida.objects.create(
+        tipo=tipo,
+        solicitud=solicitud,
+        usuario=usuario,
+        notificacion=notificacion,
+        parametros=parametros or {},
+    )
+    logger.info(f"📥 Email '{tipo}' encolado (ID={email.id})")
+    return email
+
+
+def _datos_email(email):
+    """Asunto, destinatarios, template y contexto de un email de la bandeja"""
+    from . import services
+
+    fecha = email.fecha_creacion
+    if email.tipo == 'confirmacion':
+        return services._datos_email_confirmacion(email.solicitud, fecha=fecha)
+    if email.tipo == 'aprobacion':
+        return services._datos_email_aprobacion(email.solicitud, fecha=fecha)
+    if email.tipo == 'rechazo':
+        return services._datos_email_rechazo(email.solicitud, fecha=fecha)
+    if email.tipo == 'recuperacion_password':
+        return services._datos_email_recuperacion_password(email.usuario, email.parametros.get('token'), fecha=fecha)
+    if email.tipo == 'cambio_password':
+        from apps.empresas.models import Empresa
+        empresa = Empresa.objects.filter(id_usuario=email.usuario).first()
+        return services._datos_email_cambio_password(email.usuario, empresa, fecha=fecha)
+    raise ValueError(f'Tipo de email desconocido: {email.tipo}')
+
+
+def espera_reintento(intentos):
+    """Espera antes del siguiente intento: base * 2^(intentos-1), con tope"""
+    base = getattr(settings, 'EMAILS_REINTENTO_BASE_SEGUNDOS', 60)
+    maximo = getattr(settings, 'EMAILS_REINTENTO_MAX_SEGUNDOS', 3600)
+    return timedelta(seconds=min(base * 2 ** max(intentos - 1, 0), maximo))
+
+
+def reclamar_emails(cantidad):
+    """
+    Tomar hasta `cantidad` emails pendientes cuyo próximo intento ya venció y marcarlos
+    'enviando'. skip_locked permite correr varios workers sin enviar dos veces.
+    """
+    ahora = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            EmailSalida.objects.select_for_update(skip_locked=True, of=('self',))
+            .filter(estado='pendiente', proximo_intento__lte=ahora)
+            .select_related('solicitud', 'usuario', 'notificacion')
+            .order_by('proximo_intento', 'id')[:cantidad]
+        )
+        if not emails:
+            return []
+        EmailSalida.objects.filter(pk__in=[email.pk for email in emails]).update(
+            estado='enviando', intentos=F('intentos') + 1, fecha_intento=ahora
+        )
+
+    for email in emails:
+        email.estado = 'enviando'
+        email.intentos += 1
+        email.fecha_intento = ahora
+    return emails
+
+
+def _registrar_resultado(email, datos, error, definitivo=False):
+    """
+    Actualizar el email y su NotificacionRegistro según el resultado del envío.
+    `datos` es (asunto, destinatarios, template, contexto), o None si no se pudo armar.
+    Un error `definitivo` (o de dirección inexistente) no se reintenta.
+    """
+    from .notificaciones import comprimir_contexto
+    from .services import ERROR_SUPRIMIDO, es_direccion_inexistente
+
+    ahora = timezone.now()
+    max_intentos = getattr(settings, 'EMAILS_MAX_INTENTOS', 6)
+
+    if error is None:
+        email.estado = 'enviado'
+        email.fecha_envio = ahora
+        email.ultimo_error = None
+        # El token de recuperación no se conserva una vez enviado
+        email.parametros = {}
+    elif definitivo or error == ERROR_SUPRIMIDO or es_direccion_inexistente(error) or email.intentos >= max_intentos:
+        email.estado = 'error'
+        email.ultimo_error = error
+    else:
+        email.estado = 'pendiente'
+        email.ultimo_error = error
+        email.proximo_intento = ahora + espera_reintento(email.intentos)
+
+    email.save(update_fields=['estado', 'fecha_envio', 'ultimo_error', 'parametros', 'proximo_intento'])
+
+    if email.notificacion_id and email.estado != 'pendiente':
+        asunto, _, template, contexto = datos or (email.notificacion.asunto, None, '', {})
+        NotificacionRegistro.objects.filter(pk=email.notificacion_id).update(
+            asunto=asunto,
+            template=template,
+            contexto=comprimir_contexto(contexto) if template else None,
+            email_enviado=email.estado == 'enviado',
+            fecha_envio=ahora,
+            error_envio=email.ultimo_error,
+        )
+
+    if email.estado == 'enviado':
+        logger.info(f"✅ Email '{email.tipo}' enviado (ID={email.id})")
+    elif email.estado == 'error':
+        logger.error(f"❌ Email '{email.tipo}' descartado tras {email.intentos} intentos (ID={email.id}): {error}")
+    else:
+        logger.warning(f"⚠️ Email '{email.tipo}' falló (ID={email.id}), reintento {email.proximo_intento:%H:%M:%S}: {error}")
+
+
+def enviar_emails(emails):
+    """Renderizar y enviar emails reclamados por una misma conexión SMTP"""
+    from .services import _construir_email, enviar_emails_en_lote
+
+    mensajes = []
+    datos_por_email = {}
+    errores_render = {}
+    for email in emails:
+        try:
+            datos = _datos_email(email)
+            mensaje = _construir_email(*datos)
+            datos_por_email[email.pk] = datos
+            if mensaje is None:
+                errores_render[email.pk] = 'No hay destinatarios válidos'
+        except Exception as e:
+            logger.error(f"❌ Error al renderizar el email {email.id}: {e}", exc_info=True)
+            mensaje = None
+            errores_render[email.pk] = str(e)
+        mensajes.append(mensaje)
+
+    a_enviar = [mensaje for mensaje in mensajes if mensaje is not None]
+    resultados = iter(enviar_emails_en_lote(a_enviar))
+
+    for email, mensaje in zip(emails, mensajes):
+        if mensaje is None:
+            # Un email que no se puede armar no mejora reintentando
+            _registrar_resultado(email, datos_por_email.get(email.pk), errores_render[email.pk], definitivo=True)
+        else:
+            _registrar_resultado(email, datos_por_email[email.pk], next(resultados))
+    return emails
+
+
+def liberar_emails_abandonados():
+    """
+    Recuperar los emails que quedaron 'enviando' por un worker caído.
+    El intento interrumpido cuenta como fallido (intentos ya se incrementó al reclamarlo):
+    vuelven a 'pendiente' con la espera exponencial y tras EMAILS_MAX_INTENTOS quedan
+    en 'error', así un email que hace caer al worker no se reencola para siempre.
+    """
+    limite = timezone.now() - timedelta(minutes=getattr(settings, 'EMAILS_TIMEOUT_MINUTOS', 10))
+    with transaction.atomic():
+        abandonados = list(
+            EmailSalida.objects.select_for_update(skip_locked=True, of=('self',))
+            .filter(estado='enviando', fecha_intento__lt=limite)
+            .select_related('notificacion')
+        )
+        for email in abandonados:
+            _registrar_resultado(email, None, ERROR_INTERRUMPIDO)
+    return len(abandonados)
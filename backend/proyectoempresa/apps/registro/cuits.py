@@ -0,0 +1,167 @@
+"""
+Conjunto de CUITs registrados en Redis para la consulta pública cuit-disponible.
+
+El formulario de registro consulta si un CUIT ya está registrado mientras se
+completa; cada consulta iba a la base. Los CUITs de las empresas (incluidas las
+eliminadas lógicamente, porque cuit_cuil es único) y de las solicitudes
+aprobadas se guardan en un set de Redis: la consulta es un SISMEMBER.
+
+El set es eventualmente consistente (un CUIT confirmado durante una
+reconstrucción puede faltar hasta que vence), así que solo responde la consulta
+pública: la validación que rechaza registros duplicados usa cuit_registrado_db.
+
+Los signals agregan y quitan CUITs al crear, aprobar o eliminar (después del
+commit). Si el set no existe (Redis reiniciado, vencimiento de
+CUITS_REGISTRADOS_TTL_SEGUNDOS) se reconstruye desde la base. Sin Redis (caché
+de otro tipo o caída) la consulta se hace contra la base.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+CLAVE = 'registro:cuits_registrados'
+# Miembro que mantiene el set existente aunque no haya CUITs registrados
+CENTINELA = '-'
+
+
+def _cliente():
+    """Cliente Redis de la caché default, o None si la caché no es Redis"""
+    from django.core.cache.backends.redis import RedisCache
+
+    cache = caches['default']
+    if not isinstance(cache, RedisCache):
+        return None
+    return cache._cache.get_client(write=True)
+
+
+def _ttl():
+    return getattr(settings, 'CUITS_REGISTRADOS_TTL_SEGUNDOS', 86400)
+
+
+def cuits_registrados_db():
+    """CUITs normalizados de empresas y solicitudes aprobadas"""
+    from apps.empresas.models import Empresa
+    from .models import SolicitudRegistro
+
+    cuits = set(Empresa.all_objects.values_list('cuit_cuil', flat=True))
+    cuits.update(
+        SolicitudRegistro.objects.filter(estado='aprobada').exclude(cuit_normalizado='')
+        .values_list('cuit_normalizado', flat=True)
+    )
+    return cuits
+
+
+def cuit_registrado_db(cuit):
+    """Consulta indexada (Empresa.cuit_cuil y SolicitudRegistro.cuit_normalizado)"""
+    from apps.empresas.models import Empresa
+    from .models import SolicitudRegistro
+
+    return (
+        Empresa.all_objects.filter(cuit_cuil=cuit).exists()
+        or SolicitudRegistro.objects.filter(cuit_normalizado=cuit, estado='aprobada').exists()
+    )
+
+
+def reconstruir(cliente):
+    """Cargar el set desde la base (en una clave temporal y RENAME, sin dejarlo a medias)"""
+    temporal = f'{CLAVE}:reconstruccion'
+    cuits = cuits_registrados_db()
+    cuits.add(CENTINELA)
+    pipeline = cliente.pipeline()
+    pipeline.delete(temporal)
+    lista = list(cuits)
+    for inicio in range(0, len(lista), 1000):
+        pipeline.sadd(temporal, *lista[inicio:inicio + 1000])
+    pipeline.expire(temporal, _ttl())
+    pipeline.rename(temporal, CLAVE)
+    pipeline.execute()
+    logger.info(f"🔄 Set de CUITs registrados reconstruido ({len(cuits) - 1} CUITs)")
+
+
+def cuit_registrado(cuit):
+    """
+    True si el CUIT (normalizado) ya pertenece a una empresa o solicitud aprobada,
+    según el set de Redis (solo para la consulta pública cuit-disponible)
+    """
+    try:
+        cliente = _cliente()
+        if cliente is not None:
+            if not cliente.exists(CLAVE):
+                # Un solo proceso reconstruye; los demás consultan la base mientras tanto
+                if not cliente.set(f'{CLAVE}:lock', 1, nx=True, ex=60):
+                    return cuit_registrado_db(cuit)
+                try:
+                    reconstruir(cliente)
+                finally:
+                    cliente.delete(f'{CLAVE}:lock')
+            return bool(cliente.sismember(CLAVE, cuit))
+    except Exception as e:
+        logger.warning(f"⚠️ Set de CUITs no disponible, se consulta la base: {str(e)}")
+    return cuit_registrado_db(cuit)
+
+
+def _actualizar(cuit, agregar):
+    def aplicar():
+        try:
+            cliente = _cliente()
+            # Si el set no existe no se crea con un solo CUIT: se reconstruye en la próxima consulta
+            if cliente is None or not cliente.exists(CLAVE):
+                return
+            if agregar:
+                cliente.sadd(CLAVE, cuit)
+            elif not cuit_registrado_db(cuit):
+                cliente.srem(CLAVE, cuit)
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo actualizar el set de CUITs ({cuit}): {str(e)}")
+
+    if cuit:
+        transaction.on_commit(aplicar)
+
+
+def agregar_cuit(cuit):
+    _actualizar(cuit, agregar=True)
+
+
+def quitar_cuit(cuit):
+    _actualizar(cuit, agregar=False)
+
+
+def agregar_cuits(cuits):
+    """Agregar muchos CUITs de una vez (importaciones masivas, que no emiten signals)"""
+    cuits = [cuit for cuit in cuits if cuit]
+
+    def aplicar():
+        try:
+            cliente = _cliente()
+            if cliente is None or not cliente.exists(CLAVE):
+                return
+            for inicio in range(0, len(cuits), 1000):
+                cliente.sadd(CLAVE, *cuits[inicio:inicio + 1000])
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo actualizar el set de CUITs ({len(cuits)} CUITs): {str(e)}")
+
+    if cuits:
+        transaction.on_commit(aplicar)
+
+
+def empresa_guardada(sender, instance, raw=False, **kwargs):
+    if not raw:
+        agregar_cuit(instance.cuit_cuil)
+
+
+def empresa_eliminada(sender, instance, **kwargs):
+    quitar_cuit(instance.cuit_cuil)
+
+
+def solicitud_guardada(sender, instance, raw=False, **kwargs):
+    if not raw and instance.estado == 'aprobada':
+        agregar_cuit(instance.cuit_normalizado)
+
+
+def solicitud_eliminada(sender, instance, **kwargs):
+    if instance.estado == 'aprobada':
+        quitar_cuit(instance.cuit_normalizado)
@@ -0,0 +1,63 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.registro.bandeja_salida import reclamar_emails, enviar_emails, liberar_emails_abandonados
+from apps.registro.notificaciones import purgar_notificaciones_vencidas
+
+
+class Command(BaseCommand):
+    help = (
+        'Worker que envía la bandeja de salida de emails del registro (confirmación, aprobación, '
+        'rechazo y contraseña), con reintentos y espera exponencial. También aplica la retención '
+        'de las notificaciones (NOTIFICACIONES_REGISTRO_RETENCION_DIAS)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=2.0,
+            help='Segundos de espera cuando no hay emails pendientes (default: 2)',
+        )
+        parser.add_argument(
+            '--una-vez',
+            action='store_true',
+            help='Enviar los emails pendientes y terminar',
+        )
+
+    def handle(self, *args, **options):
+        intervalo = options['intervalo']
+        una_vez = options['una_vez']
+        tamano_lote = getattr(settings, 'EMAIL_LOTE_TAMANO', 50)
+
+        self.stdout.write(self.style.SUCCESS('📧 Worker de emails del registro iniciado'))
+
+        while True:
+            liberados = liberar_emails_abandonados()
+            if liberados:
+                self.stdout.write(self.style.WARNING(f'⚠️ {liberados} emails abandonados recuperados (reencolados o descartados)'))
+
+            purgadas = purgar_notificaciones_vencidas()
+            if purgadas:
+                self.stdout.write(f'🗑️ Contenido de {purgadas} notificaciones vencidas eliminado')
+
+            enviados = 0
+            fallidos = 0
+            while True:
+                emails = reclamar_emails(tamano_lote)
+                if not emails:
+                    break
+                for email in enviar_emails(emails):
+                    if email.estado == 'enviado':
+                        enviados += 1
+                    else:
+                        fallidos += 1
+                        self.stdout.write(self.style.ERROR(f'❌ Email {email.id} ({email.tipo}): {email.ultimo_error}'))
+
+            if una_vez:
+                self.stdout.write(self.style.SUCCESS(f'Emails enviados: {enviados}, fallidos: {fallidos}'))
+                return
+
+            time.sleep(intervalo)
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.registro.rebotes import procesar_rebote, procesar_buzon_rebotes
+
+
+class Command(BaseCommand):
+    help = (
+        'Agrega a la lista de supresión las direcciones de los mensajes de rebote (DSN), '
+        'leídos de archivos .eml o del buzón IMAP configurado en REBOTES_IMAP_HOST'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'archivos',
+            nargs='*',
+            help='Archivos .eml con mensajes de rebote',
+        )
+        parser.add_argument(
+            '--imap',
+            action='store_true',
+            help='Leer los mensajes no leídos del buzón REBOTES_IMAP_HOST',
+        )
+
+    def handle(self, *args, **options):
+        if not options['archivos'] and not options['imap']:
+            raise CommandError('Indique archivos .eml o --imap')
+
+        suprimidas = []
+        for ruta in options['archivos']:
+            with open(ruta, 'rb') as archivo:
+                direcciones = procesar_rebote(archivo.read())
+            if not direcciones:
+                self.stdout.write(self.style.WARNING(f'⚠️ {ruta}: no es un rebote permanente'))
+            suprimidas.extend(direcciones)
+
+        if options['imap']:
+            if not getattr(settings, 'REBOTES_IMAP_HOST', ''):
+                raise CommandError('REBOTES_IMAP_HOST no está configurado')
+            suprimidas.extend(procesar_buzon_rebotes())
+
+        for direccion in suprimidas:
+            self.stdout.write(f'🚫 {direccion}')
+        self.stdout.write(self.style.SUCCESS(f'Direcciones suprimidas: {len(suprimidas)}'))
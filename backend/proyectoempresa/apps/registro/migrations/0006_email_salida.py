@@ -0,0 +1,42 @@
+# Generated by Django 5.2.1 on 2026-10-19 17:39
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registro', '0005_solicitudregistro_add_apellido_contacto'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailSalida',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('confirmacion', 'Confirmación de Registro'), ('aprobacion', 'Aprobación de Solicitud'), ('rechazo', 'Rechazo de Solicitud'), ('recuperacion_password', 'Recuperación de Contraseña'), ('cambio_password', 'Cambio de Contraseña')], max_length=30, verbose_name='Tipo de Email')),
+                ('parametros', models.JSONField(blank=True, default=dict, help_text='Datos extra para renderizar el email (p. ej. token de recuperación)', verbose_name='Parámetros')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('enviando', 'Enviando'), ('enviado', 'Enviado'), ('error', 'Error')], default='pendiente', max_length=20, verbose_name='Estado')),
+                ('intentos', models.PositiveSmallIntegerField(default=0, verbose_name='Intentos')),
+                ('proximo_intento', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Próximo Intento')),
+                ('ultimo_error', models.TextField(blank=True, null=True, verbose_name='Último Error')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('fecha_intento', models.DateTimeField(blank=True, null=True, verbose_name='Fecha del Último Intento')),
+                ('fecha_envio', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de Envío')),
+                ('notificacion', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='emails_salida', to='registro.notificacionregistro', verbose_name='Notificación')),
+                ('solicitud', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='emails_salida', to='registro.solicitudregistro', verbose_name='Solicitud')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='emails_salida', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Email en Bandeja de Salida',
+                'verbose_name_plural': 'Bandeja de Salida de Emails',
+                'db_table': 'email_salida',
+                'ordering': ['-fecha_creacion'],
+                'indexes': [models.Index(fields=['estado', 'proximo_intento'], name='email_salid_estado_868a13_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.1 on 2026-10-19 17:43
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registro', '0006_email_salida'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailSuprimido',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(max_length=254, unique=True, verbose_name='Email')),
+                ('motivo', models.CharField(choices=[('smtp', 'Rechazo SMTP'), ('rebote', 'Mensaje de rebote'), ('manual', 'Carga manual')], default='smtp', max_length=20, verbose_name='Motivo')),
+                ('detalle', models.TextField(blank=True, null=True, verbose_name='Detalle del Error')),
+                ('rebotes', models.PositiveIntegerField(default=1, verbose_name='Cantidad de Rebotes')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('ultimo_rebote', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Último Rebote')),
+            ],
+            options={
+                'verbose_name': 'Email Suprimido',
+                'verbose_name_plural': 'Emails Suprimidos',
+                'db_table': 'email_suprimido',
+                'ordering': ['-ultimo_rebote'],
+            },
+        ),
+    ]
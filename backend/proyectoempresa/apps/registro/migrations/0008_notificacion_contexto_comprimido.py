@@ -0,0 +1,66 @@
+# Generated by Django 5.2.1 on 2026-10-19 17:46
+
+import json
+import re
+import zlib
+
+from django.db import migrations, models
+
+LOGO_URL = 'https://portal.catamarca.gob.ar/img/Ctca-Gobierno-blanco-Header.png'
+PATRON_DATA_URI = re.compile(r'data:image/[a-z+]+;base64,[A-Za-z0-9+/=\s]+')
+
+
+def comprimir_mensajes(apps, schema_editor):
+    """
+    Mover el HTML guardado en `mensaje` al contexto comprimido como {'html': ...}.
+    Las imágenes base64 embebidas se reemplazan por la URL del logo.
+    """
+    NotificacionRegistro = apps.get_model('registro', 'NotificacionRegistro')
+    pendientes = NotificacionRegistro.objects.filter(mensaje__contains='<').only('id', 'mensaje')
+    lote = []
+    for notificacion in pendientes.iterator(chunk_size=500):
+        html = PATRON_DATA_URI.sub(LOGO_URL, notificacion.mensaje)
+        notificacion.contexto = zlib.compress(json.dumps({'html': html}, ensure_ascii=False).encode('utf-8'), 9)
+        notificacion.mensaje = ''
+        lote.append(notificacion)
+        if len(lote) >= 500:
+            NotificacionRegistro.objects.bulk_update(lote, ['contexto', 'mensaje'])
+            lote = []
+    if lote:
+        NotificacionRegistro.objects.bulk_update(lote, ['contexto', 'mensaje'])
+
+
+def descomprimir_mensajes(apps, schema_editor):
+    """Devolver a `mensaje` el HTML de las notificaciones migradas"""
+    NotificacionRegistro = apps.get_model('registro', 'NotificacionRegistro')
+    migradas = NotificacionRegistro.objects.filter(template='', contexto__isnull=False)
+    for notificacion in migradas.iterator(chunk_size=500):
+        contexto = json.loads(zlib.decompress(bytes(notificacion.contexto)).decode('utf-8'))
+        if 'html' in contexto:
+            NotificacionRegistro.objects.filter(pk=notificacion.pk).update(mensaje=contexto['html'], contexto=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registro', '0007_email_suprimido'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificacionregistro',
+            name='contexto',
+            field=models.BinaryField(blank=True, help_text='Contexto del template como JSON comprimido (ver apps.registro.notificaciones)', null=True, verbose_name='Contexto'),
+        ),
+        migrations.AddField(
+            model_name='notificacionregistro',
+            name='template',
+            field=models.CharField(blank=True, default='', help_text='Template del email; el HTML se renderiza al consultarlo', max_length=100, verbose_name='Template'),
+        ),
+        migrations.AlterField(
+            model_name='notificacionregistro',
+            name='mensaje',
+            field=models.TextField(blank=True, default='', verbose_name='Mensaje'),
+        ),
+        migrations.RunPython(comprimir_mensajes, descomprimir_mensajes),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.1 on 2026-10-19 18:02
+
+import apps.core.almacenamiento
+import apps.registro.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registro', '0008_notificacion_contexto_comprimido'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='documentosolicitud',
+            name='archivo',
+            field=models.FileField(storage=apps.core.almacenamiento.storage_deduplicado, upload_to='solicitudes/documentos/', verbose_name='Archivo'),
+        ),
+        migrations.AlterField(
+            model_name='solicitudregistro',
+            name='catalogo_pdf',
+            field=models.FileField(blank=True, help_text='Subir catálogo o brochure en formato PDF', null=True, storage=apps.core.almacenamiento.storage_deduplicado, upload_to=apps.registro.models.generar_nombre_catalogo_solicitud, verbose_name='Catálogo en PDF'),
+        ),
+    ]
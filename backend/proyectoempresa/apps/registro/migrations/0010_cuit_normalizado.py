@@ -0,0 +1,31 @@
+# Generated by Django 5.2.1 on 2026-10-19 18:13
+
+import re
+
+from django.db import migrations, models
+
+
+def completar_cuit_normalizado(apps, schema_editor):
+    """Completar el CUIT normalizado de las solicitudes existentes"""
+    SolicitudRegistro = apps.get_model('registro', 'SolicitudRegistro')
+    solicitudes = []
+    for solicitud in SolicitudRegistro.objects.only('id', 'cuit_cuil').iterator():
+        solicitud.cuit_normalizado = re.sub(r'\D', '', solicitud.cuit_cuil or '')[:11]
+        solicitudes.append(solicitud)
+    SolicitudRegistro.objects.bulk_update(solicitudes, ['cuit_normalizado'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registro', '0009_almacenamiento_deduplicado'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='solicitudregistro',
+            name='cuit_normalizado',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=11, verbose_name='CUIT/CUIL Normalizado'),
+        ),
+        migrations.RunPython(completar_cuit_normalizado, migrations.RunPython.noop),
+    ]
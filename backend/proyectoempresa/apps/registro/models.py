@@ -1,6 +1,9 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 from apps.core.models import TimestampedModel
+from apps.core.almacenamiento import storage_deduplicado
+from apps.core.validators import normalizar_cuit
 from apps.empresas.models import Empresa
 import re
 from datetime import datetime
@@ -64,6 +67,15 @@ class SolicitudRegistro(TimestampedModel):
         verbose_name="CUIT/CUIL",
         help_text="Ingrese el CUIT/CUIL"
     )
+    # Solo dígitos, para buscar sin normalizar en cada consulta (se completa en save)
+    cuit_normalizado = models.CharField(
+        max_length=11,
+        blank=True,
+        default='',
+        editable=False,
+        db_index=True,
+        verbose_name="CUIT/CUIL Normalizado"
+    )
     direccion = models.CharField(max_length=255, verbose_name="Dirección")
     codigo_postal = models.CharField(max_length=10, blank=True, null=True, verbose_name="Código Postal")
     direccion_comercial = models.CharField(max_length=255, blank=True, null=True, verbose_name="Dirección Comercial")
@@ -174,6 +186,7 @@ class SolicitudRegistro(TimestampedModel):
     brochure_url = models.CharField(max_length=255, blank=True, null=True, verbose_name="URL del Brochure")
     catalogo_pdf = models.FileField(
         upload_to=generar_nombre_catalogo_solicitud,
+        storage=storage_deduplicado,
         blank=True,
         null=True,
         verbose_name="Catálogo en PDF",
@@ -287,6 +300,10 @@ class SolicitudRegistro(TimestampedModel):
         if not self.token_confirmacion:
             import uuid
             self.token_confirmacion = str(uuid.uuid4())
+        self.cuit_normalizado = normalizar_cuit(self.cuit_cuil)[:11]
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'cuit_cuil' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'cuit_normalizado'}
         super().save(*args, **kwargs)
 
 class DocumentoSolicitud(models.Model):
@@ -315,6 +332,7 @@ class DocumentoSolicitud(models.Model):
     nombre_archivo = models.CharField(max_length=255, verbose_name="Nombre del Archivo")
     archivo = models.FileField(
         upload_to='solicitudes/documentos/',
+        storage=storage_deduplicado,
         verbose_name="Archivo"
     )
     descripcion = models.TextField(
@@ -356,7 +374,20 @@ class NotificacionRegistro(models.Model):
         verbose_name="Tipo de Notificación"
     )
     asunto = models.CharField(max_length=200, verbose_name="Asunto")
-    mensaje = models.TextField(verbose_name="Mensaje")
+    mensaje = models.TextField(blank=True, default='', verbose_name="Mensaje")
+    template = models.CharField(
+        max_length=100,
+        blank=True,
+        default='',
+        verbose_name="Template",
+        help_text="Template del email; el HTML se renderiza al consultarlo"
+    )
+    contexto = models.BinaryField(
+        blank=True,
+        null=True,
+        verbose_name="Contexto",
+        help_text="Contexto del template como JSON comprimido (ver apps.registro.notificaciones)"
+    )
     email_enviado = models.BooleanField(default=False, verbose_name="Email Enviado")
     fecha_envio = models.DateTimeField(blank=True, null=True, verbose_name="Fecha de Envío")
     error_envio = models.TextField(blank=True, null=True, verbose_name="Error de Envío")
@@ -368,4 +399,120 @@ class NotificacionRegistro(models.Model):
         ordering = ['-fecha_envio']
     
     def __str__(self):
-        return f"{self.get_tipo_display()} - {self.solicitud.razon_social}"
\ No newline at end of file
+        return f"{self.get_tipo_display()} - {self.solicitud.razon_social}"
+
+    def guardar_contexto(self, template, contexto):
+        """Asignar el template y el contexto comprimido del email (sin guardar)"""
+        from .notificaciones import comprimir_contexto
+        self.template = template
+        self.contexto = comprimir_contexto(contexto)
+
+    def renderizar_html(self):
+        """HTML del email, renderizado a partir del template y el contexto guardados"""
+        from .notificaciones import renderizar_notificacion
+        return renderizar_notificacion(self)
+
+class EmailSalida(models.Model):
+    """
+    Email transaccional en la bandeja de salida.
+    Se crea en la misma transacción que el evento que lo origina (aprobación,
+    rechazo, recuperación de contraseña, ...) y lo envía el comando
+    procesar_emails, con reintentos y espera exponencial (ver bandeja_salida.py).
+    """
+    TIPO_CHOICES = [
+        ('confirmacion', 'Confirmación de Registro'),
+        ('aprobacion', 'Aprobación de Solicitud'),
+        ('rechazo', 'Rechazo de Solicitud'),
+        ('recuperacion_password', 'Recuperación de Contraseña'),
+        ('cambio_password', 'Cambio de Contraseña'),
+    ]
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('enviando', 'Enviando'),
+        ('enviado', 'Enviado'),
+        ('error', 'Error'),
+    ]
+
+    tipo = models.CharField(max_length=30, choices=TIPO_CHOICES, verbose_name="Tipo de Email")
+    solicitud = models.ForeignKey(
+        SolicitudRegistro,
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='emails_salida',
+        verbose_name="Solicitud"
+    )
+    usuario = models.ForeignKey(
+        'core.Usuario',
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='emails_salida',
+        verbose_name="Usuario"
+    )
+    notificacion = models.ForeignKey(
+        NotificacionRegistro,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='emails_salida',
+        verbose_name="Notificación"
+    )
+    parametros = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name="Parámetros",
+        help_text="Datos extra para renderizar el email (p. ej. token de recuperación)"
+    )
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='pendiente', verbose_name="Estado")
+    intentos = models.PositiveSmallIntegerField(default=0, verbose_name="Intentos")
+    proximo_intento = models.DateTimeField(default=timezone.now, verbose_name="Próximo Intento")
+    ultimo_error = models.TextField(blank=True, null=True, verbose_name="Último Error")
+    fecha_creacion = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Creación")
+    fecha_intento = models.DateTimeField(blank=True, null=True, verbose_name="Fecha del Último Intento")
+    fecha_envio = models.DateTimeField(blank=True, null=True, verbose_name="Fecha de Envío")
+
+    class Meta:
+        db_table = 'email_salida'
+        verbose_name = 'Email en Bandeja de Salida'
+        verbose_name_plural = 'Bandeja de Salida de Emails'
+        ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['estado', 'proximo_intento']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} - {self.get_estado_display()}"
+
+
+class EmailSuprimido(models.Model):
+    """
+    Dirección a la que no se envían más emails porque el servidor respondió que
+    no existe (5.1.1) o porque llegó un rebote. Se consulta antes de encolar
+    campañas y de cada envío en lote; un administrador puede quitarla si se corrigió.
+    """
+    MOTIVO_CHOICES = [
+        ('smtp', 'Rechazo SMTP'),
+        ('rebote', 'Mensaje de rebote'),
+        ('manual', 'Carga manual'),
+    ]
+
+    email = models.EmailField(unique=True, verbose_name="Email")
+    motivo = models.CharField(max_length=20, choices=MOTIVO_CHOICES, default='smtp', verbose_name="Motivo")
+    detalle = models.TextField(blank=True, null=True, verbose_name="Detalle del Error")
+    rebotes = models.PositiveIntegerField(default=1, verbose_name="Cantidad de Rebotes")
+    fecha_creacion = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Creación")
+    ultimo_rebote = models.DateTimeField(default=timezone.now, verbose_name="Último Rebote")
+
+    class Meta:
+        db_table = 'email_suprimido'
+        verbose_name = 'Email Suprimido'
+        verbose_name_plural = 'Emails Suprimidos'
+        ordering = ['-ultimo_rebote']
+
+    def __str__(self):
+        return f"{self.email} ({self.get_motivo_display()})"
+
+    def save(self, *args, **kwargs):
+        self.email = self.email.strip().lower()
+        super().save(*args, **kwargs)
@@ -0,0 +1,93 @@
+"""
+Almacenamiento compacto del contenido de las NotificacionRegistro.
+
+En lugar del HTML renderizado de cada email se guarda el template y su
+contexto como JSON comprimido con zlib; el HTML se vuelve a renderizar al
+consultarlo. Del contexto se descartan los objetos del modelo (solicitud,
+empresa) y el logo, que el template recibe al renderizar. Pasada la retención
+(NOTIFICACIONES_REGISTRO_RETENCION_DIAS) se borra el contenido y se conservan
+tipo, asunto, fecha y resultado del envío.
+"""
+import json
+import zlib
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+# Claves del contexto que no se guardan (se agregan al renderizar)
+CLAVES_EXCLUIDAS = {'logo_url', 'logo_base64'}
+
+
+def _a_json(valor):
+    """Valor del contexto apto para JSON; None si no se puede guardar"""
+    if isinstance(valor, datetime):
+        return {'__datetime__': valor.isoformat()}
+    if isinstance(valor, date):
+        return {'__date__': valor.isoformat()}
+    if isinstance(valor, Decimal):
+        return str(valor)
+    if valor is None or isinstance(valor, (str, int, float, bool)):
+        return valor
+    if isinstance(valor, (list, tuple)):
+        return [_a_json(item) for item in valor]
+    if isinstance(valor, dict):
+        return {str(clave): _a_json(item) for clave, item in valor.items()}
+    # Instancias de modelos y otros objetos: el template recibe sus datos ya extraídos
+    return None
+
+
+def _desde_json(objeto):
+    if '__datetime__' in objeto:
+        return parse_datetime(objeto['__datetime__'])
+    if '__date__' in objeto:
+        return parse_date(objeto['__date__'])
+    return objeto
+
+
+def comprimir_contexto(contexto):
+    """JSON comprimido del contexto de un email (sin modelos ni logo)"""
+    datos = {
+        clave: _a_json(valor)
+        for clave, valor in contexto.items()
+        if clave not in CLAVES_EXCLUIDAS and _a_json(valor) is not None
+    }
+    return zlib.compress(json.dumps(datos, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), 9)
+
+
+def descomprimir_contexto(contenido):
+    """Contexto guardado por comprimir_contexto ({} si no hay)"""
+    if not contenido:
+        return {}
+    return json.loads(zlib.decompress(bytes(contenido)).decode('utf-8'), object_hook=_desde_json)
+
+
+def renderizar_notificacion(notificacion):
+    """
+    HTML del email de una notificación, renderizado a partir del template y el
+    contexto guardados. Las notificaciones migradas sin template guardan el HTML
+    original en el contexto ('html'); las que no son emails devuelven el mensaje.
+    """
+    from .services import LOGO_URL
+
+    contexto = descomprimir_contexto(notificacion.contexto)
+    if notificacion.template:
+        contexto.update({'logo_url': LOGO_URL, 'logo_base64': None})
+        return render_to_string(notificacion.template, contexto)
+    return contexto.get('html', notificacion.mensaje)
+
+
+def purgar_notificaciones_vencidas():
+    """Borrar el contenido de las notificaciones más antiguas que la retención configurada"""
+    from .models import NotificacionRegistro
+
+    dias = getattr(settings, 'NOTIFICACIONES_REGISTRO_RETENCION_DIAS', 180)
+    if not dias:
+        return 0
+    limite = timezone.now() - timedelta(days=dias)
+    return NotificacionRegistro.objects.filter(
+        fecha_envio__lt=limite, contexto__isnull=False
+    ).update(contexto=None, template='', mensaje='')
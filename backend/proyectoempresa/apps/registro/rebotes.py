@@ -0,0 +1,93 @@
+"""
+Lectura de mensajes de rebote (DSN, RFC 3464).
+
+Cuando el servidor acepta el email y la entrega falla después, el aviso llega
+como un mensaje multipart/report al buzón del remitente. Se toman las
+direcciones con Action: failed y Status 5.x.x (fallo permanente) y se agregan a
+la lista de supresión; los fallos temporales (4.x.x) se ignoran.
+"""
+import email
+import imaplib
+import logging
+from email import policy
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _campos_dsn(parte):
+    """Bloques de campos de una parte message/delivery-status"""
+    contenido = parte.get_payload()
+    if isinstance(contenido, list):
+        # El parser de email entrega cada bloque de campos como un sub-mensaje
+        return [dict((clave.lower(), str(valor)) for clave, valor in bloque.items()) for bloque in contenido]
+    bloques = []
+    for texto in str(contenido).split('\n\n'):
+        campos = {}
+        for linea in texto.splitlines():
+            if ':' in linea:
+                clave, valor = linea.split(':', 1)
+                campos[clave.strip().lower()] = valor.strip()
+        if campos:
+            bloques.append(campos)
+    return bloques
+
+
+def direcciones_rebotadas(contenido):
+    """
+    Direcciones con fallo permanente en un mensaje de rebote (bytes o str).
+    Devuelve una lista de (email, detalle); vacía si no es un rebote.
+    """
+    if isinstance(contenido, bytes):
+        mensaje = email.message_from_bytes(contenido, policy=policy.compat32)
+    else:
+        mensaje = email.message_from_string(contenido, policy=policy.compat32)
+
+    rebotadas = []
+    for parte in mensaje.walk():
+        if parte.get_content_type() != 'message/delivery-status':
+            continue
+        for campos in _campos_dsn(parte):
+            destinatario = campos.get('final-recipient') or campos.get('original-recipient')
+            estado = campos.get('status', '')
+            if not destinatario or campos.get('action', '').lower() != 'failed' or not estado.startswith('5'):
+                continue
+            # Formato "rfc822; usuario@dominio"
+            direccion = destinatario.split(';', 1)[-1].strip().strip('<>')
+            detalle = campos.get('diagnostic-code') or f'Status {estado}'
+            rebotadas.append((direccion.lower(), detalle))
+    return rebotadas
+
+
+def procesar_rebote(contenido):
+    """Suprimir las direcciones de un mensaje de rebote; devuelve las suprimidas"""
+    from .services import suprimir_email
+
+    rebotadas = direcciones_rebotadas(contenido)
+    for direccion, detalle in rebotadas:
+        suprimir_email(direccion, detalle, motivo='rebote')
+    return [direccion for direccion, _ in rebotadas]
+
+
+def procesar_buzon_rebotes():
+    """
+    Leer los mensajes no leídos del buzón REBOTES_IMAP_* y procesar los rebotes.
+    Los mensajes procesados quedan marcados como leídos. Devuelve las direcciones suprimidas.
+    """
+    host = getattr(settings, 'REBOTES_IMAP_HOST', '')
+    if not host:
+        raise ValueError('REBOTES_IMAP_HOST no está configurado')
+
+    suprimidas = []
+    with imaplib.IMAP4_SSL(host) as imap:
+        imap.login(settings.REBOTES_IMAP_USUARIO, settings.REBOTES_IMAP_PASSWORD)
+        imap.select(getattr(settings, 'REBOTES_IMAP_CARPETA', 'INBOX'))
+        _, datos = imap.search(None, 'UNSEEN')
+        for numero in datos[0].split():
+            _, partes = imap.fetch(numero, '(RFC822)')
+            for parte in partes:
+                if isinstance(parte, tuple):
+                    suprimidas.extend(procesar_rebote(parte[1]))
+        logger.info(f"📬 Buzón de rebotes procesado: {len(suprimidas)} direcciones suprimidas")
+    return suprimidas
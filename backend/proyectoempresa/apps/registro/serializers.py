@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import SolicitudRegistro, DocumentoSolicitud, NotificacionRegistro
+from .models import SolicitudRegistro, DocumentoSolicitud, NotificacionRegistro, EmailSuprimido
 from django.contrib.auth import get_user_model
 from apps.core.models import RolUsuario
 import logging
@@ -22,29 +22,119 @@ class NotificacionRegistroSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = NotificacionRegistro
-        fields = ['id', 'solicitud', 'tipo', 'asunto', 'mensaje', 'email_enviado', 'fecha_envio', 'error_envio']
-        read_only_fields = ['id', 'fecha_envio']
+        fields = ['id', 'solicitud', 'tipo', 'asunto', 'mensaje', 'template', 'email_enviado', 'fecha_envio', 'error_envio']
+        read_only_fields = ['id', 'template', 'fecha_envio']
 
 
-class SolicitudRegistroListSerializer(serializers.ModelSerializer):
+class EmailSuprimidoSerializer(serializers.ModelSerializer):
+    """Serializer para la lista de supresión de emails"""
+    motivo_display = serializers.CharField(source='get_motivo_display', read_only=True)
+
+    class Meta:
+        model = EmailSuprimido
+        fields = ['id', 'email', 'motivo', 'motivo_display', 'detalle', 'rebotes', 'fecha_creacion', 'ultimo_rebote']
+        read_only_fields = ['id', 'rebotes', 'fecha_creacion', 'ultimo_rebote']
+        extra_kwargs = {'motivo': {'default': 'manual'}}
+
+    def validate_email(self, value):
+        value = value.strip().lower()
+        if EmailSuprimido.objects.filter(email=value).exists():
+            raise serializers.ValidationError('La dirección ya está suprimida')
+        return value
+
+
+# Nivel geográfico de cada campo de SolicitudRegistro (guardan un ID o un nombre)
+CAMPOS_GEOGRAFIA = {'departamento': 'departamento', 'municipio': 'municipio', 'localidad': 'localidad'}
+
+
+def nombres_geografia(solicitudes):
+    """
+    Nombres de departamento, municipio y localidad de varias solicitudes, resueltos
+    en lote: {nivel: {valor: nombre}}. Se usa el nomenclador en memoria; los valores
+    que no están en él (p. ej. cargados hace instantes en otro proceso) se buscan
+    con un in_bulk por nivel.
+    """
+    from apps.geografia.models import Departamento, Municipio, Localidad
+    from apps.geografia.nomenclador import obtener_nomenclador
+
+    modelos = {'departamento': Departamento, 'municipio': Municipio, 'localidad': Localidad}
+    nomenclador = obtener_nomenclador()
+    nombres = {}
+    for campo, nivel in CAMPOS_GEOGRAFIA.items():
+        valores = {getattr(solicitud, campo) for solicitud in solicitudes if getattr(solicitud, campo)}
+        nombres[nivel] = {}
+        faltantes = []
+        for valor in valores:
+            lugar = nomenclador.resolver(nivel, valor)
+            if lugar:
+                nombres[nivel][valor] = lugar.nombre
+            else:
+                faltantes.append(valor)
+        if faltantes:
+            for id, lugar in modelos[nivel].objects.only('id', 'nombre').in_bulk(faltantes).items():
+                nombres[nivel][id] = lugar.nombre
+    return nombres
+
+
+class SolicitudRegistroGeografiaListSerializer(serializers.ListSerializer):
+    """
+    Lista de solicitudes que resuelve una sola vez los nombres geográficos de toda
+    la página y los deja en el contexto ('nombres_geografia') para cada fila.
+    """
+
+    def to_representation(self, data):
+        solicitudes = list(data.all() if hasattr(data, 'all') else data)
+        self.context['nombres_geografia'] = nombres_geografia(solicitudes)
+        return super().to_representation(solicitudes)
+
+
+class NombresGeografiaMixin(serializers.Serializer):
+    """Campos departamento_nombre, municipio_nombre y localidad_nombre de una solicitud"""
+    departamento_nombre = serializers.SerializerMethodField()
+    municipio_nombre = serializers.SerializerMethodField()
+    localidad_nombre = serializers.SerializerMethodField()
+
+    def _nombre_lugar(self, nivel, valor):
+        """Nombre del lugar (el valor tal cual si no se encuentra)"""
+        if not valor:
+            return None
+        nombres = self.context.get('nombres_geografia')
+        if nombres is None:
+            # Serialización individual: se resuelve solo esta solicitud
+            nombres = nombres_geografia([self.instance]) if isinstance(self.instance, SolicitudRegistro) else {}
+        return nombres.get(nivel, {}).get(valor, valor)
+
+    def get_departamento_nombre(self, obj):
+        """Obtener nombre del departamento"""
+        return self._nombre_lugar('departamento', obj.departamento)
+    
+    def get_municipio_nombre(self, obj):
+        """Obtener nombre del municipio"""
+        return self._nombre_lugar('municipio', obj.municipio)
+    
+    def get_localidad_nombre(self, obj):
+        """Obtener nombre de la localidad"""
+        return self._nombre_lugar('localidad', obj.localidad)
+
+
+class SolicitudRegistroListSerializer(NombresGeografiaMixin, serializers.ModelSerializer):
     """Serializer simplificado para listas de solicitudes"""
     
     class Meta:
         model = SolicitudRegistro
         fields = [
             'id', 'razon_social', 'cuit_cuil', 'estado', 'tipo_empresa',
-            'rubro_principal', 'correo',
+            'rubro_principal', 'correo', 'departamento', 'departamento_nombre',
+            'municipio', 'municipio_nombre', 'localidad', 'localidad_nombre',
             'fecha_creacion', 'email_confirmado', 'fecha_confirmacion'
         ]
+        list_serializer_class = SolicitudRegistroGeografiaListSerializer
 
 
-class SolicitudRegistroSerializer(serializers.ModelSerializer):
+class SolicitudRegistroSerializer(NombresGeografiaMixin, serializers.ModelSerializer):
     """Serializer completo para solicitudes de registro"""
     documentos = DocumentoSolicitudSerializer(many=True, read_only=True)
     notificaciones = NotificacionRegistroSerializer(many=True, read_only=True)
-    departamento_nombre = serializers.SerializerMethodField()
-    municipio_nombre = serializers.SerializerMethodField()
-    localidad_nombre = serializers.SerializerMethodField()
     
     class Meta:
         model = SolicitudRegistro
@@ -54,39 +144,7 @@ class SolicitudRegistroSerializer(serializers.ModelSerializer):
             'email_confirmado', 'fecha_confirmacion',
             'fecha_aprobacion', 'aprobado_por', 'empresa_creada'
         ]
-    def get_departamento_nombre(self, obj):
-        """Obtener nombre del departamento"""
-        if obj.departamento:
-            try:
-                from apps.geografia.models import Departamento
-                depto = Departamento.objects.get(id=obj.departamento)
-                return depto.nombre
-            except Departamento.DoesNotExist:
-                return obj.departamento
-        return None
-    
-    def get_municipio_nombre(self, obj):
-        """Obtener nombre del municipio"""
-        if obj.municipio:
-            try:
-                from apps.geografia.models import Municipio
-                municipio = Municipio.objects.get(id=obj.municipio)
-                return municipio.nombre
-            except Municipio.DoesNotExist:
-                return obj.municipio
-        return None
-    
-    def get_localidad_nombre(self, obj):
-        """Obtener nombre de la localidad"""
-        if obj.localidad:
-            try:
-                from apps.geografia.models import Localidad
-                localidad = Localidad.objects.get(id=obj.localidad)
-                return localidad.nombre
-            except Localidad.DoesNotExist:
-                return obj.localidad
-        return None
-        
+        list_serializer_class = SolicitudRegistroGeografiaListSerializer
 
 
 class SolicitudRegistroCreateSerializer(serializers.ModelSerializer):
@@ -197,25 +255,26 @@ class SolicitudRegistroCreateSerializer(serializers.ModelSerializer):
     
     def validate_cuit_cuil(self, value):
         """Validar y limpiar CUIT/CUIL"""
+        from apps.core.validators import normalizar_cuit, cuit_verificador_valido
+        from .cuits import cuit_registrado_db
+
         if not value:
             raise serializers.ValidationError("El CUIT/CUIL es requerido")
         
-        # Limpiar CUIT/CUIL (remover guiones y espacios)
-        cuit_limpio = value.replace('-', '').replace(' ', '').strip()
+        cuit_limpio = normalizar_cuit(value)
         
-        # Verificar que tenga 11 dígitos
-        if not cuit_limpio.isdigit() or len(cuit_limpio) != 11:
+        # Verificar que tenga 11 dígitos y un dígito verificador válido
+        if len(cuit_limpio) != 11:
             raise serializers.ValidationError("El CUIT/CUIL debe tener exactamente 11 dígitos")
+        if not cuit_verificador_valido(cuit_limpio):
+            raise serializers.ValidationError("El dígito verificador del CUIT/CUIL no es válido")
         
-        # Verificar que no exista otra solicitud aprobada con el mismo CUIT
-        from .models import SolicitudRegistro
-        solicitud_existente = SolicitudRegistro.objects.filter(
-            cuit_cuil=cuit_limpio,
-            estado='aprobada'
-        ).exclude(id=self.instance.id if self.instance else None).first()
-        
-        if solicitud_existente:
-            raise serializers.ValidationError("Ya existe una solicitud aprobada con este CUIT/CUIL")
+        # Verificar que no esté registrado (empresa o solicitud aprobada), salvo que no cambie.
+        # Se consulta la base (índices de cuit_cuil y cuit_normalizado): el set de Redis es
+        # eventualmente consistente y solo responde la consulta pública cuit-disponible
+        sin_cambios = self.instance is not None and self.instance.cuit_normalizado == cuit_limpio
+        if not sin_cambios and cuit_registrado_db(cuit_limpio):
+            raise serializers.ValidationError("Ya existe una empresa registrada con este CUIT/CUIL")
         
         return cuit_limpio
     
@@ -1,25 +1,210 @@
 """
 Servicio centralizado para envío de emails del sistema de registro
 """
-from django.core.mail import send_mail
+from django.core.mail import send_mail, get_connection, EmailMultiAlternatives
 from django.conf import settings
 from django.utils import timezone
 from django.template.loader import render_to_string
 from .models import SolicitudRegistro, NotificacionRegistro
 import logging
 import os
-import base64
-from io import BytesIO
+import re
+import smtplib
+import socket
 
 logger = logging.getLogger(__name__)
 
-# Intentar importar PIL para optimización de imágenes
-try:
-    from PIL import Image as PILImage
-    PIL_AVAILABLE = True
-except ImportError:
-    PIL_AVAILABLE = False
-    logger.warning("⚠️ PIL/Pillow no está disponible. El logo no se optimizará automáticamente.")
+
+LOGO_URL = 'https://portal.catamarca.gob.ar/img/Ctca-Gobierno-blanco-Header.png'
+
+# Errores SMTP que cortan la conexión: se reconecta y se reintenta el mensaje
+ERRORES_CONEXION_SMTP = (smtplib.SMTPServerDisconnected, ConnectionError, socket.timeout)
+
+
+# Código extendido de estado SMTP (RFC 3463): clase.tema.detalle
+CODIGO_EXTENDIDO = re.compile(r'(?<![\d.])([245])\.(\d{1,3})\.(\d{1,3})(?![\d.])')
+
+# Códigos extendidos de buzón inexistente: 5.1.1 usuario desconocido,
+# 5.1.10 dirección nula (RFC 7505) y 5.2.1 buzón deshabilitado
+CODIGOS_DIRECCION_INEXISTENTE = {('5', '1', '1'), ('5', '1', '10'), ('5', '2', '1')}
+
+# Textos de buzón inexistente para servidores que no informan código extendido
+TEXTOS_DIRECCION_INEXISTENTE = ('user unknown', 'no such user')
+
+
+def es_direccion_inexistente(error_msg: str):
+    """
+    Error SMTP de dirección que no existe: reintentar no sirve y se suprime.
+    Un 550 solo no alcanza: también lo usan la cuota diaria (5.4.5) o el rechazo
+    del remitente (5.7.1), que no dicen nada del destinatario.
+    """
+    codigos = CODIGO_EXTENDIDO.findall(error_msg)
+    if codigos:
+        return any(codigo in CODIGOS_DIRECCION_INEXISTENTE for codigo in codigos)
+    error_msg = error_msg.lower()
+    return any(texto in error_msg for texto in TEXTOS_DIRECCION_INEXISTENTE)
+
+
+# Error devuelto para los mensajes cuyos destinatarios están todos suprimidos
+ERROR_SUPRIMIDO = 'Dirección suprimida por rebotes anteriores'
+
+
+def emails_suprimidos(emails):
+    """Subconjunto de `emails` (en minúsculas) que está en la lista de supresión, en una consulta"""
+    from .models import EmailSuprimido
+
+    normalizados = {email.strip().lower() for email in emails if email}
+    if not normalizados:
+        return set()
+    return set(EmailSuprimido.objects.filter(email__in=normalizados).values_list('email', flat=True))
+
+
+def suprimir_email(email: str, detalle: str = None, motivo: str = 'smtp'):
+    """Agregar (o actualizar) una dirección en la lista de supresión"""
+    from django.db.models import F
+    from .models import EmailSuprimido
+
+    email = email.strip().lower()
+    actualizados = EmailSuprimido.objects.filter(email=email).update(
+        rebotes=F('rebotes') + 1, ultimo_rebote=timezone.now(), detalle=detalle
+    )
+    if not actualizados:
+        EmailSuprimido.objects.get_or_create(email=email, defaults={'motivo': motivo, 'detalle': detalle})
+    logger.warning(f"🚫 Dirección suprimida: {email} ({detalle})")
+
+
+def _suprimir_rechazados(mensaje, error):
+    """Suprimir las direcciones que el servidor rechazó por inexistentes"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        for email, (codigo, respuesta) in error.recipients.items():
+            respuesta = respuesta.decode(errors='replace') if isinstance(respuesta, bytes) else str(respuesta)
+            if es_direccion_inexistente(f'{codigo} {respuesta}'):
+                suprimir_email(email, f'{codigo} {respuesta}')
+    elif es_direccion_inexistente(str(error)) and len(mensaje.recipients()) == 1:
+        suprimir_email(mensaje.recipients()[0], str(error))
+
+
+def _quitar_suprimidos(mensajes):
+    """
+    Quitar de cada mensaje los destinatarios suprimidos (una consulta para todo el lote).
+    Devuelve, por mensaje, None o un error si no le quedó ningún destinatario.
+    """
+    suprimidos = emails_suprimidos([email for mensaje in mensajes for email in mensaje.recipients()])
+    errores = [None] * len(mensajes)
+    if not suprimidos:
+        return errores
+    for indice, mensaje in enumerate(mensajes):
+        mensaje.to = [email for email in mensaje.to if email.strip().lower() not in suprimidos]
+        mensaje.cc = [email for email in mensaje.cc if email.strip().lower() not in suprimidos]
+        mensaje.bcc = [email for email in mensaje.bcc if email.strip().lower() not in suprimidos]
+        if not mensaje.recipients():
+            errores[indice] = ERROR_SUPRIMIDO
+    return errores
+
+
+def _renderizar_email(asunto: str, template_html: str, contexto: dict):
+    """Renderizar un email y devolver (texto plano, HTML)"""
+    contexto.setdefault('logo_url', LOGO_URL)
+    contexto.setdefault('logo_base64', None)
+    mensaje_html = render_to_string(template_html, contexto)
+
+    mensaje_texto = f"{asunto}\n\n"
+    if 'mensaje' in contexto:
+        mensaje_texto += str(contexto['mensaje'])
+    return mensaje_texto, mensaje_html
+
+
+def _construir_email(asunto: str, destinatarios: list, template_html: str, contexto: dict):
+    """Armar un EmailMultiAlternatives listo para enviar (None si no hay destinatarios válidos)"""
+    destinatarios = [email for email in destinatarios if email and email.strip()]
+    if not destinatarios:
+        return None
+    mensaje_texto, mensaje_html = _renderizar_email(asunto, template_html, contexto)
+    email = EmailMultiAlternatives(
+        subject=asunto,
+        body=mensaje_texto,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=destinatarios,
+    )
+    email.attach_alternative(mensaje_html, 'text/html')
+    return email
+
+
+def _cerrar_conexion(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+def _enviar_con_reconexion(connection, mensaje):
+    """
+    Enviar un mensaje por una conexión ya abierta. Si el servidor cortó la
+    conexión se reabre y se reintenta una vez. Devuelve None o el error.
+    """
+    for intento in range(2):
+        try:
+            if connection.send_messages([mensaje]):
+                return None
+            return 'El servidor SMTP no aceptó el mensaje'
+        except ERRORES_CONEXION_SMTP as e:
+            if intento:
+                return str(e)
+            logger.warning(f"⚠️ Conexión SMTP perdida ({e}); reconectando...")
+            _cerrar_conexion(connection)
+            try:
+                connection.open()
+            except Exception as error_apertura:
+                return str(error_apertura)
+        except smtplib.SMTPException as e:
+            # Rechazos del destinatario o del mensaje: la conexión sigue sirviendo
+            _suprimir_rechazados(mensaje, e)
+            return str(e)
+
+
+def enviar_emails_en_lote(mensajes: list, tamano_lote: int = None):
+    """
+    Enviar muchos emails reutilizando la conexión SMTP.
+
+    En lugar de abrir una sesión SMTP/TLS por mensaje (send_mail), se abre una
+    conexión por lote de `tamano_lote` mensajes (EMAIL_LOTE_TAMANO) y se envían
+    todos por ella; entre lotes se renueva la sesión, ya que los servidores
+    limitan los mensajes por sesión. Si la conexión se corta se reconecta y se
+    reintenta el mensaje. Las direcciones de la lista de supresión (EmailSuprimido)
+    no se envían, y las que el servidor rechaza por inexistentes se agregan.
+
+    Args:
+        mensajes: Lista de EmailMessage (ver _construir_email)
+        tamano_lote: Mensajes por conexión
+
+    Returns:
+        Lista con None (enviado) o el texto del error, en el orden de `mensajes`
+    """
+    tamano_lote = tamano_lote or getattr(settings, 'EMAIL_LOTE_TAMANO', 50)
+    errores = _quitar_suprimidos(mensajes)
+
+    for inicio in range(0, len(mensajes), tamano_lote):
+        fin = min(inicio + tamano_lote, len(mensajes))
+        if all(errores[inicio:fin]):
+            continue
+        connection = get_connection(fail_silently=False)
+        try:
+            connection.open()
+        except Exception as e:
+            logger.error(f"❌ No se pudo abrir la conexión SMTP: {e}")
+            errores[inicio:fin] = [error or str(e) for error in errores[inicio:fin]]
+            continue
+
+        try:
+            for indice in range(inicio, fin):
+                if errores[indice] is None:
+                    errores[indice] = _enviar_con_reconexion(connection, mensajes[indice])
+        finally:
+            _cerrar_conexion(connection)
+
+    enviados = errores.count(None)
+    logger.info(f"📧 Envío en lote: {enviados} enviados, {len(mensajes) - enviados} con error")
+    return errores
 
 
 def _enviar_email(
@@ -47,8 +232,10 @@ def _enviar_email(
         logger.warning("No se proporcionaron destinatarios para el email")
         return False
     
-    # Filtrar emails vacíos o None
+    # Filtrar emails vacíos o None y direcciones suprimidas por rebotes
     destinatarios = [email for email in destinatarios if email and email.strip()]
+    suprimidos = emails_suprimidos(destinatarios)
+    destinatarios = [email for email in destinatarios if email.strip().lower() not in suprimidos]
     
     if not destinatarios:
         logger.warning("No hay destinatarios válidos después de filtrar")
@@ -57,7 +244,7 @@ def _enviar_email(
     try:
         # Usar URL del logo del gobierno de Catamarca (compatible con todos los clientes de email)
         # Gmail, Outlook y otros no soportan imágenes base64, así que usamos URL externa
-        logo_url = 'https://portal.catamarca.gob.ar/img/Ctca-Gobierno-blanco-Header.png'
+        logo_url = LOGO_URL
         
         # Agregar URL del logo al contexto si no está presente
         if 'logo_url' not in contexto:
@@ -76,8 +263,8 @@ def _enviar_email(
         else:
             logger.warning("⚠️ logo_base64 NO está presente en contexto o está vacío")
         
-        # Renderizar template HTML
-        mensaje_html = render_to_string(template_html, contexto)
+        # Renderizar template HTML y versión de texto plano
+        mensaje_texto, mensaje_html = _renderizar_email(asunto, template_html, contexto)
         
         # Verificar si el logo está en el HTML renderizado
         if 'logo_base64' in contexto and contexto['logo_base64']:
@@ -86,11 +273,6 @@ def _enviar_email(
             else:
                 logger.warning("⚠️ Logo base64 NO encontrado en HTML renderizado - puede ser un problema del template")
         
-        # Crear versión de texto plano básica
-        mensaje_texto = f"{asunto}\n\n"
-        if 'mensaje' in contexto:
-            mensaje_texto += str(contexto['mensaje'])
-        
         # Enviar email
         # Usar fail_silently=True para evitar que Django propague errores de SMTP
         # Nota: Gmail puede enviar mensajes de error (bounces) al remitente cuando
@@ -112,8 +294,10 @@ def _enviar_email(
             # Aunque usamos fail_silently=True, algunos errores pueden seguir lanzándose
             error_msg = str(smtp_error)
             # Detectar errores de dirección no encontrada
-            if '550' in error_msg or '5.1.1' in error_msg or 'does not exist' in error_msg.lower() or 'address not found' in error_msg.lower():
+            if es_direccion_inexistente(error_msg):
                 logger.warning(f"⚠️ Dirección de email no válida: {destinatarios}. Error: {error_msg}")
+                if len(destinatarios) == 1:
+                    suprimir_email(destinatarios[0], error_msg)
                 # No re-lanzar el error para evitar que se propague y cause más problemas
                 return False
             else:
@@ -121,16 +305,17 @@ def _enviar_email(
                 logger.error(f"❌ Error SMTP al enviar email a {destinatarios}: {error_msg}")
                 return False
         
-        # Registrar notificación en BD si hay solicitud
+        # Registrar notificación en BD si hay solicitud (template y contexto, no el HTML)
         if solicitud and tipo_notificacion:
-            NotificacionRegistro.objects.create(
+            notificacion = NotificacionRegistro(
                 solicitud=solicitud,
                 tipo=tipo_notificacion,
                 asunto=asunto,
-                mensaje=mensaje_html,
                 email_enviado=True,
                 fecha_envio=timezone.now()
             )
+            notificacion.guardar_contexto(template_html, contexto)
+            notificacion.save()
         
         logger.info(f"✅ Email enviado exitosamente: {asunto} a {destinatarios}")
         return True
@@ -141,26 +326,22 @@ def _enviar_email(
         
         # Registrar error en BD si hay solicitud
         if solicitud and tipo_notificacion:
-            NotificacionRegistro.objects.create(
+            notificacion = NotificacionRegistro(
                 solicitud=solicitud,
                 tipo=tipo_notificacion,
                 asunto=asunto,
-                mensaje=mensaje_html if 'mensaje_html' in locals() else '',
                 email_enviado=False,
                 fecha_envio=timezone.now(),
                 error_envio=error_msg
             )
+            notificacion.guardar_contexto(template_html, contexto)
+            notificacion.save()
         
         return False
 
 
-def enviar_email_confirmacion_registro(solicitud: SolicitudRegistro):
-    """
-    Enviar email de confirmación cuando se registra una empresa
-    
-    Args:
-        solicitud: Instancia de SolicitudRegistro
-    """
+def _datos_email_confirmacion(solicitud: SolicitudRegistro, fecha=None):
+    """Asunto, destinatarios, template y contexto del email de confirmación de registro"""
     asunto = 'Confirmación de Registro - Sistema de Gestión de Empresas Exportadoras'
     
     contexto = {
@@ -179,6 +360,18 @@ def enviar_email_confirmacion_registro(solicitud: SolicitudRegistro):
     if solicitud.email_contacto and solicitud.email_contacto != solicitud.correo:
         destinatarios.append(solicitud.email_contacto)
     
+    return asunto, destinatarios, 'registro/emails/confirmacion_registro.html', contexto
+
+
+def enviar_email_confirmacion_registro(solicitud: SolicitudRegistro):
+    """
+    Enviar email de confirmación cuando se registra una empresa
+    
+    Args:
+        solicitud: Instancia de SolicitudRegistro
+    """
+    asunto, destinatarios, template_html, contexto = _datos_email_confirmacion(solicitud)
+    
     if not destinatarios:
         logger.warning(f"⚠️ No hay destinatarios válidos para solicitud {solicitud.id}")
         return False
@@ -188,20 +381,15 @@ def enviar_email_confirmacion_registro(solicitud: SolicitudRegistro):
     return _enviar_email(
         asunto=asunto,
         destinatarios=destinatarios,
-        template_html='registro/emails/confirmacion_registro.html',
+        template_html=template_html,
         contexto=contexto,
         tipo_notificacion='confirmacion',
         solicitud=solicitud
     )
 
 
-def enviar_email_aprobacion(solicitud: SolicitudRegistro):
-    """
-    Enviar email cuando una solicitud es aprobada
-    
-    Args:
-        solicitud: Instancia de SolicitudRegistro
-    """
+def _datos_email_aprobacion(solicitud: SolicitudRegistro, fecha=None):
+    """Asunto, destinatarios, template y contexto del email de aprobación"""
     asunto = 'Solicitud Aprobada - Sistema de Gestión de Empresas Exportadoras'
     
     # Obtener credenciales
@@ -223,10 +411,21 @@ def enviar_email_aprobacion(solicitud: SolicitudRegistro):
     if solicitud.email_contacto and solicitud.email_contacto != solicitud.correo:
         destinatarios.append(solicitud.email_contacto)
     
+    return asunto, destinatarios, 'registro/emails/aprobacion.html', contexto
+
+
+def enviar_email_aprobacion(solicitud: SolicitudRegistro):
+    """
+    Enviar email cuando una solicitud es aprobada
+    
+    Args:
+        solicitud: Instancia de SolicitudRegistro
+    """
+    asunto, destinatarios, template_html, contexto = _datos_email_aprobacion(solicitud)
     return _enviar_email(
         asunto=asunto,
         destinatarios=destinatarios,
-        template_html='registro/emails/aprobacion.html',
+        template_html=template_html,
         contexto=contexto,
         tipo_notificacion='aprobacion',
         solicitud=solicitud
@@ -240,13 +439,26 @@ def enviar_email_notificacion_empresa(empresa):
     Args:
         empresa: Instancia de Empresa
     """
-    asunto = 'Credenciales de Acceso - Sistema de Gestión de Empresas Exportadoras'
-    
     # Obtener credenciales del usuario asociado
     if not empresa.id_usuario:
         logger.warning(f"⚠️ Empresa {empresa.id} no tiene usuario asociado")
         return False
     
+    asunto, destinatarios, template_html, contexto = _datos_notificacion_empresa(empresa)
+    return _enviar_email(
+        asunto=asunto,
+        destinatarios=destinatarios,
+        template_html=template_html,
+        contexto=contexto,
+        tipo_notificacion='notificacion_empresa',
+        solicitud=None,
+        empresa=empresa
+    )
+
+
+def _datos_notificacion_empresa(empresa):
+    """Asunto, destinatarios, template y contexto del email de credenciales de una empresa"""
+    asunto = 'Credenciales de Acceso - Sistema de Gestión de Empresas Exportadoras'
     usuario = empresa.id_usuario
     email_login = usuario.email
     cuit_cuil = empresa.cuit_cuil
@@ -266,30 +478,49 @@ def enviar_email_notificacion_empresa(empresa):
     if empresa.correo and empresa.correo != email_login:
         destinatarios.append(empresa.correo)
     
-    return _enviar_email(
-        asunto=asunto,
-        destinatarios=destinatarios,
-        template_html='registro/emails/notificacion_empresa.html',
-        contexto=contexto,
-        tipo_notificacion='notificacion_empresa',
-        solicitud=None,
-        empresa=empresa
-    )
+    return asunto, destinatarios, 'registro/emails/notificacion_empresa.html', contexto
 
 
-def enviar_email_rechazo(solicitud: SolicitudRegistro):
+def enviar_emails_notificacion_empresas(empresas):
     """
-    Enviar email cuando una solicitud es rechazada
+    Enviar el email de credenciales a varias empresas por una misma conexión SMTP
+    (ver enviar_emails_en_lote). Las empresas deben tener id_usuario cargado.
     
-    Args:
-        solicitud: Instancia de SolicitudRegistro
+    Returns:
+        Lista de errores (None si se envió) en el mismo orden que `empresas`
     """
+    errores = [None] * len(empresas)
+    mensajes = []
+    posiciones = []
+    for posicion, empresa in enumerate(empresas):
+        if not empresa.id_usuario:
+            errores[posicion] = 'La empresa no tiene usuario asociado'
+            continue
+        try:
+            mensaje = _construir_email(*_datos_notificacion_empresa(empresa))
+        except Exception as e:
+            logger.error(f"❌ Error al preparar el email de la empresa {empresa.id}: {e}")
+            errores[posicion] = str(e)
+            continue
+        if mensaje is None:
+            errores[posicion] = 'No hay destinatarios válidos'
+            continue
+        mensajes.append(mensaje)
+        posiciones.append(posicion)
+
+    for posicion, error in zip(posiciones, enviar_emails_en_lote(mensajes)):
+        errores[posicion] = error
+    return errores
+
+
+def _datos_email_rechazo(solicitud: SolicitudRegistro, fecha=None):
+    """Asunto, destinatarios, template y contexto del email de rechazo"""
     asunto = 'Solicitud Rechazada - Sistema de Gestión de Empresas Exportadoras'
     
     contexto = {
         'solicitud': solicitud,
         'razon_social': solicitud.razon_social,
-        'fecha_rechazo': timezone.now(),
+        'fecha_rechazo': fecha or timezone.now(),
         'observaciones': solicitud.observaciones_admin,
         'site_url': settings.SITE_URL,
         'contacto_url': f"{settings.SITE_URL}/contacto",
@@ -299,24 +530,29 @@ def enviar_email_rechazo(solicitud: SolicitudRegistro):
     if solicitud.email_contacto and solicitud.email_contacto != solicitud.correo:
         destinatarios.append(solicitud.email_contacto)
     
+    return asunto, destinatarios, 'registro/emails/rechazo.html', contexto
+
+
+def enviar_email_rechazo(solicitud: SolicitudRegistro):
+    """
+    Enviar email cuando una solicitud es rechazada
+    
+    Args:
+        solicitud: Instancia de SolicitudRegistro
+    """
+    asunto, destinatarios, template_html, contexto = _datos_email_rechazo(solicitud)
     return _enviar_email(
         asunto=asunto,
         destinatarios=destinatarios,
-        template_html='registro/emails/rechazo.html',
+        template_html=template_html,
         contexto=contexto,
         tipo_notificacion='rechazo',
         solicitud=solicitud
     )
 
 
-def enviar_email_recuperacion_password(usuario, token):
-    """
-    Enviar email con enlace para recuperar contraseña
-    
-    Args:
-        usuario: Instancia de Usuario
-        token: Token único para recuperar contraseña
-    """
+def _datos_email_recuperacion_password(usuario, token, fecha=None):
+    """Asunto, destinatarios, template y contexto del email de recuperación de contraseña"""
     asunto = 'Recuperar Contraseña - Sistema de Gestión de Empresas Exportadoras'
     
     # Construir URL de recuperación
@@ -328,11 +564,10 @@ def enviar_email_recuperacion_password(usuario, token):
         'token': token,
         'reset_url': reset_url,
         'site_url': settings.SITE_URL,
-        'fecha_solicitud': timezone.now(),
+        'fecha_solicitud': fecha or timezone.now(),
     }
     
     # Obtener empresa si existe
-    empresa = None
     try:
         from apps.empresas.models import Empresa
         empresa = Empresa.objects.filter(id_usuario=usuario).first()
@@ -342,33 +577,37 @@ def enviar_email_recuperacion_password(usuario, token):
     except Exception:
         pass
     
-    destinatarios = [usuario.email]
+    return asunto, [usuario.email], 'registro/emails/recuperacion_password.html', contexto
+
+
+def enviar_email_recuperacion_password(usuario, token):
+    """
+    Enviar email con enlace para recuperar contraseña
     
+    Args:
+        usuario: Instancia de Usuario
+        token: Token único para recuperar contraseña
+    """
+    asunto, destinatarios, template_html, contexto = _datos_email_recuperacion_password(usuario, token)
     return _enviar_email(
         asunto=asunto,
         destinatarios=destinatarios,
-        template_html='registro/emails/recuperacion_password.html',
+        template_html=template_html,
         contexto=contexto,
         tipo_notificacion=None,
         solicitud=None,
-        empresa=empresa
+        empresa=contexto.get('empresa')
     )
 
 
-def enviar_email_cambio_password(usuario, empresa=None):
-    """
-    Enviar email cuando una empresa cambia su contraseña por primera vez
-    
-    Args:
-        usuario: Instancia de Usuario
-        empresa: Instancia de Empresa (opcional)
-    """
+def _datos_email_cambio_password(usuario, empresa=None, fecha=None):
+    """Asunto, destinatarios, template y contexto del email de cambio de contraseña"""
     asunto = 'Contraseña actualizada exitosamente - Sistema de Gestión de Empresas Exportadoras'
     
     contexto = {
         'usuario': usuario,
         'nombre': usuario.nombre or usuario.email,
-        'fecha_cambio': timezone.now(),
+        'fecha_cambio': fecha or timezone.now(),
         'site_url': settings.SITE_URL,
         'login_url': f"{settings.SITE_URL}/login",
     }
@@ -377,16 +616,23 @@ def enviar_email_cambio_password(usuario, empresa=None):
         contexto['razon_social'] = empresa.razon_social
         contexto['empresa'] = empresa
     
-    destinatarios = [usuario.email]
+    return asunto, [usuario.email], 'registro/emails/cambio_password.html', contexto
+
+
+def enviar_email_cambio_password(usuario, empresa=None):
+    """
+    Enviar email cuando una empresa cambia su contraseña por primera vez
     
+    Args:
+        usuario: Instancia de Usuario
+        empresa: Instancia de Empresa (opcional)
+    """
+    asunto, destinatarios, template_html, contexto = _datos_email_cambio_password(usuario, empresa)
     return _enviar_email(
         asunto=asunto,
         destinatarios=destinatarios,
-        template_html='registro/emails/cambio_password.html',
+        template_html=template_html,
         contexto=contexto,
         tipo_notificacion=None,  # No hay solicitud asociada
         solicitud=None
     )
-
-
-
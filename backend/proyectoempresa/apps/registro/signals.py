@@ -1,2 +1,17 @@
 # Signals para el registro de empresas
-# Por ahora está vacío, se puede expandir en el futuro
+from django.db.models.signals import post_save, post_delete
+
+from apps.empresas.catalogos_texto import encolar_si_cambio
+from apps.empresas.models import Empresa, Empresaproducto, Empresaservicio, EmpresaMixta
+from .cuits import empresa_guardada, empresa_eliminada, solicitud_guardada, solicitud_eliminada
+from .models import SolicitudRegistro
+
+# Texto del catálogo PDF para la búsqueda en catálogos (worker indexar_catalogos)
+post_save.connect(encolar_si_cambio, sender=SolicitudRegistro, dispatch_uid='catalogo_texto_SolicitudRegistro')
+
+# Set de CUITs registrados para la consulta cuit-disponible (ver cuits.py)
+post_save.connect(solicitud_guardada, sender=SolicitudRegistro, dispatch_uid='cuits_registrados_save_SolicitudRegistro')
+post_delete.connect(solicitud_eliminada, sender=SolicitudRegistro, dispatch_uid='cuits_registrados_delete_SolicitudRegistro')
+for modelo in (Empresa, Empresaproducto, Empresaservicio, EmpresaMixta):
+    post_save.connect(empresa_guardada, sender=modelo, dispatch_uid=f'cuits_registrados_save_{modelo.__name__}')
+    post_delete.connect(empresa_eliminada, sender=modelo, dispatch_uid=f'cuits_registrados_delete_{modelo.__name__}')
@@ -7,10 +7,31 @@ from django.core.mail import send_mail
 from django.conf import settings
 from django.utils import timezone
 from django.template.loader import render_to_string
+from django.db import transaction
+from apps.core.validators import normalizar_cuit
+from apps.empresas.models import Empresa
 from .models import SolicitudRegistro, DocumentoSolicitud, NotificacionRegistro
 from .forms import SolicitudRegistroForm, DocumentoSolicitudForm, RegistroUsuarioForm
+import json
+import logging
 import uuid
 
+logger = logging.getLogger(__name__)
+
+# Campos de Empresa (nombre y columna de las FK) que acepta crear_empresa_desde_solicitud
+CAMPOS_EMPRESA = frozenset(
+    nombre
+    for campo in Empresa._meta.concrete_fields
+    for nombre in (campo.name, campo.attname)
+)
+
+# Puntajes de la matriz de clasificación calculados al aprobar
+CAMPOS_MATRIZ = [
+    'experiencia_exportadora', 'volumen_produccion', 'presencia_digital', 'posicion_arancelaria',
+    'participacion_internacionalizacion', 'estructura_interna', 'interes_exportador',
+    'certificaciones_nacionales', 'certificaciones_internacionales',
+]
+
 def registro_empresa(request):
     """
     Vista para registro público de empresas
@@ -18,18 +39,15 @@ def registro_empresa(request):
     if request.method == 'POST':
         form = SolicitudRegistroForm(request.POST)
         if form.is_valid():
+            from django.db import transaction
+            from .bandeja_salida import encolar_email
+            
             solicitud = form.save(commit=False)
             solicitud.token_confirmacion = str(uuid.uuid4())
-            solicitud.save()
-            
-            # Enviar email de confirmación
-            try:
-                from .services import enviar_email_confirmacion_registro
-                enviar_email_confirmacion_registro(solicitud)
-            except Exception as e:
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.warning(f"Error enviando email de confirmación: {str(e)}")
+            with transaction.atomic():
+                solicitud.save()
+                # El email de confirmación lo envía el worker procesar_emails
+                encolar_email('confirmacion', solicitud=solicitud)
             
             messages.success(
                 request, 
@@ -126,88 +144,29 @@ def detalle_solicitud(request, solicitud_id):
         accion = request.POST.get('accion')
         observaciones = request.POST.get('observaciones', '')
         
+        from .aprobacion import aprobar_solicitud, rechazar_solicitud, SolicitudNoProcesable
+        
         if accion == 'aprobar':
-            solicitud.estado = 'aprobada'
-            solicitud.fecha_aprobacion = timezone.now()
-            solicitud.aprobado_por = request.user
-            solicitud.observaciones_admin = observaciones
-            solicitud.save()
-            
-            # Crear empresa
-            empresa = crear_empresa_desde_solicitud(solicitud)
-            solicitud.empresa_creada = empresa
-            solicitud.save()
-            
-            # Enviar email de aprobación
             try:
-                from .services import enviar_email_aprobacion
-                enviar_email_aprobacion(solicitud)
-            except Exception as e:
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.warning(f"Error enviando email de aprobación: {str(e)}")
+                # Empresa, solicitud y email de aprobación en una sola transacción
+                with transaction.atomic():
+                    aprobar_solicitud(solicitud, request.user, observaciones)
+            except SolicitudNoProcesable as e:
+                messages.error(request, str(e))
+                return redirect('registro:detalle_solicitud', solicitud.id)
             
             messages.success(request, 'Solicitud aprobada correctamente.')
         elif accion == 'rechazar':
-            from django.db import transaction
-            from apps.empresas.models import Empresa
-            import logging
-            logger = logging.getLogger(__name__)
-            
-            usuario_a_eliminar = solicitud.usuario_creado
-            
             try:
+                # Rechazo, eliminación del usuario y email en una sola transacción
                 with transaction.atomic():
-                    # Guardar el rechazo
-                    solicitud.estado = 'rechazada'
-                    solicitud.observaciones_admin = observaciones
-                    solicitud.aprobado_por = request.user
-                    solicitud.save()
-                    
-                    # Eliminar el usuario asociado si existe
-                    if usuario_a_eliminar:
-                        # Verificar que el usuario no esté asociado a una empresa aprobada
-                        empresa_asociada = Empresa.objects.filter(id_usuario=usuario_a_eliminar).first()
-                        
-                        if empresa_asociada:
-                            logger.warning(
-                                f"Usuario {usuario_a_eliminar.email} tiene empresa asociada (ID: {empresa_asociada.id}), "
-                                f"no se eliminará el usuario al rechazar solicitud {solicitud.id}"
-                            )
-                        else:
-                            # Verificar que no tenga otras solicitudes aprobadas
-                            otras_solicitudes = SolicitudRegistro.objects.filter(
-                                usuario_creado=usuario_a_eliminar,
-                                estado='aprobada'
-                            ).exclude(id=solicitud.id).exists()
-                            
-                            if otras_solicitudes:
-                                logger.warning(
-                                    f"Usuario {usuario_a_eliminar.email} tiene otras solicitudes aprobadas, "
-                                    f"no se eliminará el usuario al rechazar solicitud {solicitud.id}"
-                                )
-                            else:
-                                # Eliminar el usuario
-                                email_usuario = usuario_a_eliminar.email
-                                usuario_a_eliminar.delete()
-                                logger.info(f"✅ Usuario {email_usuario} eliminado al rechazar solicitud {solicitud.id}")
-                    
-                    # Desvincular el usuario de la solicitud
-                    solicitud.usuario_creado = None
-                    solicitud.save()
+                    rechazar_solicitud(solicitud, request.user, observaciones)
             
             except Exception as e:
                 logger.error(f"❌ Error al rechazar solicitud {solicitud.id}: {str(e)}", exc_info=True)
                 messages.error(request, f'Error al rechazar la solicitud: {str(e)}')
                 return redirect('registro:detalle_solicitud', solicitud.id)
             
-            # Enviar email de rechazo
-            try:
-                from .services import enviar_email_rechazo
-                enviar_email_rechazo(solicitud)
-            except Exception as e:
-                logger.warning(f"Error enviando email de rechazo: {str(e)}")
-            
             messages.success(request, 'Solicitud rechazada.')
         
         return redirect('registro:detalle_solicitud', solicitud.id)
@@ -285,212 +244,302 @@ def enviar_email_rechazo(solicitud):
     """
     from .services import enviar_email_rechazo as enviar_email_rechazo_service
     return enviar_email_rechazo_service(solicitud)
+def _obtener_rubro(nombre, descripcion, tipo=None):
+    """Rubro por nombre; se crea si no existe"""
+    from apps.empresas.models import Rubro
 
-def crear_empresa_desde_solicitud(solicitud):
-    from apps.empresas.models import Empresa, Rubro, TipoEmpresa
-    from apps.geografia.models import Departamento, Municipio, Localidad
-    import logging
-    
-    logger = logging.getLogger(__name__)
+    rubro = Rubro.objects.filter(nombre=nombre).first()
+    if rubro:
+        return rubro
+    defaults = {'nombre': nombre, 'descripcion': descripcion or ''}
+    if tipo:
+        defaults['tipo'] = tipo
+    try:
+        with transaction.atomic():
+            return Rubro.objects.create(**defaults)
+    except Exception as e:
+        logger.error(f"Error al crear rubro: {str(e)}", exc_info=True)
+        # Si falla la creación, usar cualquier rubro activo como fallback
+        rubro = Rubro.objects.filter(activo=True).first()
+        if not rubro:
+            raise ValueError(f"No se pudo crear ni encontrar un rubro válido: {str(e)}")
+        return rubro
+
+
+def _datos_productos(solicitud, modelo_producto, modelo_posicion, etiqueta):
+    """
+    Productos de la solicitud (sin guardar) y sus posiciones arancelarias
+    como pares (índice del producto, PosicionArancelaria sin producto).
+    """
+    productos = []
+    posiciones = []
+    for idx, producto_data in enumerate(solicitud.productos or []):
+        posicion_aran = (producto_data.get('posicion_arancelaria') or '').strip()
+        logger.info(
+            f"📦 [{etiqueta} {idx + 1}] Nombre: {producto_data.get('nombre', 'sin nombre')}, "
+            f"Posición Arancelaria: {posicion_aran or 'VACÍO'}"
+        )
+        productos.append(modelo_producto(
+            nombre_producto=producto_data.get('nombre', ''),
+            descripcion=producto_data.get('descripcion', ''),
+            capacidad_productiva=float(producto_data.get('capacidad_productiva', 0)) if producto_data.get('capacidad_productiva') else None,
+            unidad_medida=producto_data.get('unidad_medida', 'kg'),
+            periodo_capacidad=producto_data.get('periodo_capacidad', 'mensual'),
+        ))
+
+        if not posicion_aran:
+            logger.warning(f"⚠️  [{etiqueta} {idx + 1}] NO tiene posición arancelaria - se guardó sin ella")
+        elif len(posicion_aran) > modelo_posicion._meta.get_field('codigo_arancelario').max_length:
+            # Una posición inválida no impide crear el producto
+            logger.error(f"❌ [{etiqueta} {idx + 1}] Posición arancelaria inválida: {posicion_aran}")
+        else:
+            posiciones.append((idx, modelo_posicion(
+                codigo_arancelario=posicion_aran,
+                descripcion_arancelaria=(producto_data.get('descripcion_arancelaria') or '')[:300],
+            )))
+    return productos, posiciones
+
+
+def _datos_servicios(solicitud, modelo_servicio):
+    """Servicios de la solicitud (sin guardar); servicios_ofrecidos puede ser un dict o una lista"""
+    servicios_data = solicitud.servicios_ofrecidos
+    if isinstance(servicios_data, dict):
+        return [modelo_servicio(
+            nombre_servicio=servicios_data.get('nombre', 'Servicios'),
+            descripcion=servicios_data.get('descripcion', '') or solicitud.descripcion_actividad or '',
+            tipo_servicio=servicios_data.get('tipo_servicio', 'otro'),
+            sector_atendido=servicios_data.get('sector_atendido', 'otro'),
+        )]
+    if isinstance(servicios_data, list):
+        return [
+            modelo_servicio(
+                nombre_servicio=servicio_data.get('nombre', ''),
+                descripcion=servicio_data.get('descripcion', ''),
+                tipo_servicio=servicio_data.get('tipo_servicio', 'otro'),
+                sector_atendido=servicio_data.get('sector_atendido', 'otro'),
+            )
+            for servicio_data in servicios_data
+        ]
+    return []
+
+
+def _crear_productos(empresa, productos, posiciones):
+    """Insertar productos y posiciones arancelarias con bulk_create (dos consultas)"""
+    if not productos:
+        return
+    for producto in productos:
+        producto.empresa = empresa
+    productos = productos[0].__class__.objects.bulk_create(productos)
+    for idx, posicion in posiciones:
+        posicion.producto = productos[idx]
+    if posiciones:
+        posiciones[0][1].__class__.objects.bulk_create([posicion for _, posicion in posiciones])
+    logger.info(f"✅ {len(productos)} productos y {len(posiciones)} posiciones arancelarias creados para empresa ID={empresa.id}")
+
+
+def _datos_contacto(contacto, prefijo):
+    """Campos de Empresa para un contacto secundario/terciario de la solicitud"""
+    return {
+        f'{prefijo}_nombre': contacto.get('nombre', '')[:50] if contacto.get('nombre') else None,
+        f'{prefijo}_apellido': contacto.get('apellido', '')[:50] if contacto.get('apellido') else None,
+        f'{prefijo}_cargo': contacto.get('cargo', '')[:100] if contacto.get('cargo') else None,
+        f'{prefijo}_telefono': contacto.get('telefono', '')[:20] if contacto.get('telefono') else None,
+        f'{prefijo}_email': contacto.get('email', '') if contacto.get('email') else None,
+    }
+
+
+def _normalizar_geolocalizacion(geo_raw):
+    """Geolocalización como "lat,lng" (puede venir como string o como objeto)"""
+    if not geo_raw:
+        return None
+    if isinstance(geo_raw, dict):
+        lat = geo_raw.get('lat') or geo_raw.get('latitude')
+        lng = geo_raw.get('lng') or geo_raw.get('lon') or geo_raw.get('longitude')
+        try:
+            return f"{float(lat)},{float(lng)}"
+        except Exception:
+            return None
+    if isinstance(geo_raw, str):
+        return geo_raw.strip() or None
+    try:
+        return str(geo_raw)
+    except Exception:
+        return None
+
+
+def crear_empresa_desde_solicitud(solicitud, aprobado_por=None):
+    """
+    Crear la empresa, su usuario, productos, posiciones arancelarias, servicios
+    y matriz de clasificación a partir de una solicitud, en una única transacción.
+
+    La ubicación se resuelve con el nomenclador geográfico (sin consultas), el
+    rubro una vez, y los productos, posiciones y servicios se insertan con
+    bulk_create: la cantidad de consultas no depende de la cantidad de productos.
+
+    Args:
+        solicitud: SolicitudRegistro a aprobar
+        aprobado_por: Usuario que aprueba (por defecto solicitud.aprobado_por)
+    """
+    from apps.empresas.models import (
+        TipoEmpresa, SubRubro, ProductoEmpresa, PosicionArancelaria, ServicioEmpresa,
+        ProductoEmpresaMixta, ServicioEmpresaMixta, PosicionArancelariaMixta,
+    )
+    from apps.geografia.nomenclador import obtener_nomenclador
+
+    # Normalizar CUIT
+    cuit_normalizado = solicitud.cuit_normalizado or normalizar_cuit(solicitud.cuit_cuil)
 
-        # Normalizar CUIT
-    cuit_normalizado = str(solicitud.cuit_cuil).replace('-', '').replace(' ', '').strip()
-    
     # Verificar si ya existe una empresa con este CUIT
     empresa_existente = Empresa.objects.filter(cuit_cuil=cuit_normalizado).first()
-    
     if empresa_existente:
         # Si la empresa ya existe, verificar si esta solicitud ya la creó
         if solicitud.empresa_creada_id == empresa_existente.id:
             logger.info(f"✅ La solicitud ID={solicitud.id} ya creó la empresa ID={empresa_existente.id}. Retornando empresa existente.")
             return empresa_existente
-        else:
-            # El CUIT ya existe en otra empresa diferente
-            raise ValueError(f"❌ Ya existe otra empresa registrada con el CUIT {cuit_normalizado}")
-    
-    # ✅ BUSCAR departamento directamente (modelos nuevos)
-    departamento = None
-    try:
-        departamento_valor = solicitud.departamento.strip()
-        
-        # Si es un ID numérico, buscar por ID
-        if departamento_valor.isdigit():
-            departamento = Departamento.objects.filter(id=departamento_valor).first()
-        
-        # Si no, buscar por nombre
-        if not departamento:
-            departamento = Departamento.objects.filter(nombre__iexact=departamento_valor).first()
-        
-        if not departamento:
-            raise ValueError(f"El departamento '{departamento_valor}' no existe en el sistema.")
-        
-        logger.info(f"Departamento encontrado: {departamento.nombre} (ID: {departamento.id})")
-    except ValueError:
-        raise
-    except Exception as e:
-        logger.error(f"Error al buscar departamento: {str(e)}", exc_info=True)
-        raise ValueError(f"Error al buscar el departamento: {str(e)}")
-    
-    # ✅ BUSCAR municipio directamente
-    municipio = None
-    if solicitud.municipio:
-        try:
-            municipio_valor = solicitud.municipio.strip()
-            
-            if municipio_valor.isdigit():
-                municipio = Municipio.objects.filter(id=municipio_valor).first()
-            
-            if not municipio:
-                municipio = Municipio.objects.filter(
-                    nombre__iexact=municipio_valor,
-                    departamento=departamento
-                ).first()
-            
-            if municipio:
-                logger.info(f"Municipio encontrado: {municipio.nombre}")
-        except Exception as e:
-            logger.warning(f"Error al buscar municipio: {str(e)}")
-            municipio = None
-    
-    # ✅ BUSCAR localidad directamente
-    localidad = None
-    if solicitud.localidad:
-        try:
-            localidad_valor = solicitud.localidad.strip()
-            logger.info(f"🔍 Buscando localidad: '{localidad_valor}' (tipo: {type(localidad_valor)})")
-        
-            # Buscar directamente por ID (puede contener letras y números)
-            localidad = Localidad.objects.filter(id=localidad_valor).first()
-            logger.info(f"Búsqueda por ID: {localidad}")
-        
-            # Si no se encontró por ID, intentar por nombre
-            if not localidad:
-                localidad = Localidad.objects.filter(
-                    nombre__iexact=localidad_valor,
-                    departamento=departamento
-                ).first()
-                logger.info(f"Búsqueda por nombre: {localidad}")
-        
-            if localidad:
-                logger.info(f"✅ Localidad encontrada: {localidad.nombre} (ID: {localidad.id})")
-            else:
-                logger.warning(f"❌ No se encontró localidad con valor: '{localidad_valor}'")
-        except Exception as e:
-            logger.warning(f"Error al buscar localidad: {str(e)}")
-            # No sobreescribir localidad aquí; si hubo error se queda como None
-    else:
-        logger.info("ℹ️ La solicitud no tiene localidad asignada")
-    
-    # Obtener o crear rubro
-    # Para empresas mixtas, usar el rubro de productos como principal
-    # Para empresas de producto o servicio únicos, usar rubro_principal
-    rubro = None
-    if solicitud.tipo_empresa == 'mixta' and solicitud.rubro_producto:
-        # Buscar rubro de productos para empresas mixtas
-        try:
-            rubro = Rubro.objects.get(nombre=solicitud.rubro_producto)
-        except Rubro.DoesNotExist:
-            # Si no existe, crear uno nuevo
-            try:
-                rubro = Rubro.objects.create(
-                    nombre=solicitud.rubro_producto,
-                    descripcion=solicitud.descripcion_actividad or '',
-                    tipo='mixto'
-                )
-            except Exception as e:
-                logger.error(f"Error al crear rubro: {str(e)}", exc_info=True)
-                # Si falla la creación, intentar obtener cualquier rubro existente como fallback
-                rubro = Rubro.objects.filter(activo=True).first()
-                if not rubro:
-                    raise ValueError(f"No se pudo crear ni encontrar un rubro válido: {str(e)}")
-    else:
-        # Para empresas de producto o servicio únicos, usar rubro_principal
-        try:
-            rubro = Rubro.objects.get(nombre=solicitud.rubro_principal)
-        except Rubro.DoesNotExist:
-            # Si no existe, crear uno nuevo
-            try:
-                rubro = Rubro.objects.create(
-        nombre=solicitud.rubro_principal,
-                    descripcion=solicitud.descripcion_actividad or ''
-                )
-            except Exception as e:
-                logger.error(f"Error al crear rubro: {str(e)}", exc_info=True)
-                # Si falla la creación, intentar obtener cualquier rubro existente como fallback
-                rubro = Rubro.objects.filter(activo=True).first()
-                if not rubro:
-                    raise ValueError(f"No se pudo crear ni encontrar un rubro válido: {str(e)}")
-    
-    if not rubro:
-        raise ValueError("No se pudo obtener o crear un rubro para la empresa")
-    
-    from apps.empresas.models import SubRubro
+        # El CUIT ya existe en otra empresa diferente
+        raise ValueError(f"❌ Ya existe otra empresa registrada con el CUIT {cuit_normalizado}")
 
-    id_subrubro = None
-    id_subrubro_producto = None
-    id_subrubro_servicio = None
+    # Ubicación: por ID o por nombre (sin tildes ni mayúsculas) en el nomenclador en memoria
+    nomenclador = obtener_nomenclador()
+    departamento = nomenclador.resolver('departamento', solicitud.departamento)
+    if not departamento:
+        raise ValueError(f"El departamento '{(solicitud.departamento or '').strip()}' no existe en el sistema.")
+    municipio = nomenclador.resolver('municipio', solicitud.municipio, departamento.id)
+    localidad = nomenclador.resolver('localidad', solicitud.localidad, departamento.id)
+    if solicitud.localidad and not localidad:
+        logger.warning(f"❌ No se encontró localidad con valor: '{solicitud.localidad}'")
 
-    if solicitud.tipo_empresa == 'mixta':
-        # Para empresas mixtas, buscar subrubros de productos y servicios
-        if solicitud.sub_rubro_producto:
-            try:
-                # Buscar subrubro de productos por nombre dentro del rubro
+    tipo_empresa_value = solicitud.tipo_empresa or 'producto'
+
+    with transaction.atomic():
+        # Rubro: para empresas mixtas el principal es el de productos
+        if tipo_empresa_value == 'mixta' and solicitud.rubro_producto:
+            rubro = _obtener_rubro(solicitud.rubro_producto, solicitud.descripcion_actividad, tipo='mixto')
+        else:
+            rubro = _obtener_rubro(solicitud.rubro_principal, solicitud.descripcion_actividad)
+
+        id_subrubro = None
+        id_subrubro_producto = None
+        id_subrubro_servicio = None
+        if tipo_empresa_value == 'mixta':
+            if solicitud.sub_rubro_producto:
                 id_subrubro_producto = SubRubro.objects.filter(
-                    rubro=rubro,
-                    nombre__iexact=solicitud.sub_rubro_producto,
-                    activo=True
+                    rubro=rubro, nombre__iexact=solicitud.sub_rubro_producto, activo=True
                 ).first()
                 if not id_subrubro_producto:
                     logger.warning(f"Subrubro de productos '{solicitud.sub_rubro_producto}' no encontrado en rubro '{rubro.nombre}'")
-            except Exception as e:
-                logger.error(f"Error al buscar subrubro de productos: {str(e)}")
-    
-        if solicitud.sub_rubro_servicio:
-            try:
-                # Para servicios, necesitamos el rubro de servicios
-                # Si la solicitud tiene rubro_servicio, buscar ese rubro primero
-                rubro_servicio = None
-                if solicitud.rubro_servicio:
-                    try:
-                        rubro_servicio = Rubro.objects.get(nombre=solicitud.rubro_servicio)
-                    except Rubro.DoesNotExist:
-                        logger.warning(f"Rubro de servicios '{solicitud.rubro_servicio}' no encontrado")
-            
-                if rubro_servicio:
-                    id_subrubro_servicio = SubRubro.objects.filter(
-                        rubro=rubro_servicio,
-                        nombre__iexact=solicitud.sub_rubro_servicio,
-                        activo=True
-                    ).first()
-                    if not id_subrubro_servicio:
-                        logger.warning(f"Subrubro de servicios '{solicitud.sub_rubro_servicio}' no encontrado en rubro '{rubro_servicio.nombre}'")
-            except Exception as e:
-                logger.error(f"Error al buscar subrubro de servicios: {str(e)}")
-    else:
-    # Para empresas de producto o servicio único
-        if solicitud.sub_rubro:
-            try:
-                id_subrubro = SubRubro.objects.filter(
-                    rubro=rubro,
-                    nombre__iexact=solicitud.sub_rubro,
-                    activo=True
+            if solicitud.sub_rubro_servicio and solicitud.rubro_servicio:
+                # El subrubro de servicios pertenece al rubro de servicios de la solicitud
+                id_subrubro_servicio = SubRubro.objects.filter(
+                    rubro__nombre=solicitud.rubro_servicio, nombre__iexact=solicitud.sub_rubro_servicio, activo=True
                 ).first()
-                if not id_subrubro:
-                    logger.warning(f"Subrubro '{solicitud.sub_rubro}' no encontrado en rubro '{rubro.nombre}'")
-            except Exception as e:
-                logger.error(f"Error al buscar subrubro: {str(e)}")
-    
-    # Obtener o crear tipo de empresa
-    tipo_empresa_nombre = solicitud.tipo_empresa.title() if solicitud.tipo_empresa else 'Producto'
-    tipo_empresa, _ = TipoEmpresa.objects.get_or_create(
-        nombre=tipo_empresa_nombre
-    )
-    
-    # Crear usuario para la empresa
-    from django.contrib.auth import get_user_model
+                if not id_subrubro_servicio:
+                    logger.warning(f"Subrubro de servicios '{solicitud.sub_rubro_servicio}' no encontrado en rubro '{solicitud.rubro_servicio}'")
+        elif solicitud.sub_rubro:
+            id_subrubro = SubRubro.objects.filter(rubro=rubro, nombre__iexact=solicitud.sub_rubro, activo=True).first()
+            if not id_subrubro:
+                logger.warning(f"Subrubro '{solicitud.sub_rubro}' no encontrado en rubro '{rubro.nombre}'")
+
+        # Obtener o crear tipo de empresa
+        tipo_empresa, _ = TipoEmpresa.objects.get_or_create(nombre=tipo_empresa_value.title())
+
+        usuario_empresa = _crear_o_actualizar_usuario_empresa(solicitud)
+
+        exporta_value = 'Sí' if solicitud.exporta == 'si' else ('No, solo ventas nacionales' if solicitud.exporta == 'no' else 'No, solo ventas locales')
+        aprobado_por = aprobado_por or solicitud.aprobado_por
+
+        empresa_kwargs = {
+            'razon_social': solicitud.razon_social,
+            'nombre_fantasia': solicitud.nombre_fantasia,
+            'tipo_sociedad': solicitud.tipo_sociedad,
+            'cuit_cuil': cuit_normalizado,
+            'direccion': solicitud.direccion,
+            'codigo_postal': solicitud.codigo_postal,
+            'direccion_comercial': getattr(solicitud, 'direccion_comercial', None) or None,
+            'codigo_postal_comercial': getattr(solicitud, 'codigo_postal_comercial', None) or None,
+            'departamento_id': departamento.id,
+            'municipio_id': municipio.id if municipio else None,
+            'localidad_id': localidad.id if localidad else None,
+            'telefono': solicitud.telefono,
+            'correo': solicitud.correo,
+            'sitioweb': solicitud.sitioweb,
+            'exporta': exporta_value[:50],
+            'destinoexporta': solicitud.destino_exportacion[:200] if solicitud.destino_exportacion else None,
+            'importa': solicitud.importa == 'si',
+            'interes_exportar': getattr(solicitud, 'interes_exportar', None),
+            'certificadopyme': solicitud.certificado_pyme == 'si',
+            'certificaciones': solicitud.certificaciones[:500] if solicitud.certificaciones else None,
+            'promo2idiomas': solicitud.material_promocional_idiomas == 'si',
+            'idiomas_trabaja': (solicitud.idiomas_trabajo[:100] if solicitud.idiomas_trabajo else None),
+            'contacto_principal_nombre': (solicitud.nombre_contacto[:50] if solicitud.nombre_contacto else ''),
+            'contacto_principal_apellido': (solicitud.apellido_contacto[:50] if solicitud.apellido_contacto else ''),
+            'contacto_principal_cargo': (solicitud.cargo_contacto[:100] if solicitud.cargo_contacto else ''),
+            'contacto_principal_telefono': (solicitud.telefono_contacto[:20] if solicitud.telefono_contacto else ''),
+            'contacto_principal_email': (solicitud.email_contacto or solicitud.correo),
+            'id_usuario': usuario_empresa,
+            'id_rubro': rubro,
+            'id_subrubro': id_subrubro,
+            'id_subrubro_producto': id_subrubro_producto,
+            'id_subrubro_servicio': id_subrubro_servicio,
+            'tipo_empresa': tipo_empresa,
+            'tipo_empresa_valor': tipo_empresa_value,
+            'actividades_promocion_internacional': solicitud.actividades_promocion or None,
+            'geolocalizacion': _normalizar_geolocalizacion(solicitud.geolocalizacion),
+            'creado_por': aprobado_por or usuario_empresa,
+            'actualizado_por': aprobado_por or usuario_empresa,
+        }
+
+        # Contactos secundario (índice 0) y terciario (índice 1)
+        contactos = solicitud.contactos_secundarios if isinstance(solicitud.contactos_secundarios, list) else []
+        for prefijo, contacto in zip(['contacto_secundario', 'contacto_terciario'], contactos):
+            if isinstance(contacto, dict):
+                empresa_kwargs.update(_datos_contacto(contacto, prefijo))
+
+        # Redes sociales hacia el campo redes_sociales de la empresa
+        social = {
+            red: getattr(solicitud, red)
+            for red in ['instagram', 'facebook', 'linkedin']
+            if getattr(solicitud, red, None)
+        }
+        if social:
+            empresa_kwargs['redes_sociales'] = json.dumps(social, ensure_ascii=False)
+
+        if solicitud.catalogo_pdf:
+            empresa_kwargs['brochure'] = solicitud.catalogo_pdf
+
+        # Solo campos que existen en Empresa (calculados al importar el módulo)
+        empresa = Empresa.objects.create(**{
+            clave: valor for clave, valor in empresa_kwargs.items() if clave in CAMPOS_EMPRESA
+        })
+
+        if tipo_empresa_value == 'producto':
+            _crear_productos(empresa, *_datos_productos(solicitud, ProductoEmpresa, PosicionArancelaria, 'Producto'))
+        elif tipo_empresa_value == 'servicio':
+            servicios = _datos_servicios(solicitud, ServicioEmpresa)
+        else:
+            _crear_productos(empresa, *_datos_productos(solicitud, ProductoEmpresaMixta, PosicionArancelariaMixta, 'Producto Mixta'))
+            servicios = _datos_servicios(solicitud, ServicioEmpresaMixta)
+
+        if tipo_empresa_value != 'producto' and servicios:
+            for servicio in servicios:
+                servicio.empresa = empresa
+            servicios[0].__class__.objects.bulk_create(servicios)
+
+        # bulk_create no emite post_save: invalidar una vez la caché de PDF
+        # (se aplica al confirmar la transacción de la aprobación)
+        from apps.empresas.pdf_cache import invalidar_version_datos
+        invalidar_version_datos()
+
+        _crear_matriz_clasificacion(empresa)
+
+    logger.info(f"✅ Empresa creada: ID={empresa.id}, Razón Social={empresa.razon_social}, Departamento={departamento.nombre}")
+    return empresa
+
+
+def obtener_rol_empresa():
+    """Rol de los usuarios de empresas (se crea con sus permisos si no existe)"""
     from apps.core.models import RolUsuario
-    User = get_user_model()
-    
+
     rol_empresa, _ = RolUsuario.objects.get_or_create(
         nombre='Empresa',
         defaults={
@@ -506,420 +555,52 @@ def crear_empresa_desde_solicitud(solicitud):
             'puede_acceder_admin': False,
         }
     )
-    
-    # Verificar si ya existe un usuario con este email
-    usuario_empresa = None
-    try:
-        usuario_empresa = User.objects.get(email=solicitud.correo)
-        usuario_empresa.nombre = solicitud.nombre_contacto
-        usuario_empresa.apellido = solicitud.apellido_contacto
-        usuario_empresa.rol = rol_empresa
-        usuario_empresa.telefono = solicitud.telefono_contacto
-        usuario_empresa.departamento = solicitud.departamento
-        usuario_empresa.municipio = solicitud.municipio
-        usuario_empresa.localidad = solicitud.localidad
-        usuario_empresa.is_active = True
-        # Marcar que debe cambiar la contraseña (es empresa con CUIT como password)
-        usuario_empresa.debe_cambiar_password = True
+    return rol_empresa
+
+
+def _crear_o_actualizar_usuario_empresa(solicitud):
+    """Usuario de la empresa (rol Empresa); si ya existe uno con el email se actualiza"""
+    from django.contrib.auth import get_user_model
+    User = get_user_model()
+
+    rol_empresa = obtener_rol_empresa()
+    datos = {
+        'nombre': solicitud.nombre_contacto,
+        'apellido': solicitud.apellido_contacto,
+        'rol': rol_empresa,
+        'telefono': solicitud.telefono_contacto,
+        'departamento': solicitud.departamento,
+        'municipio': solicitud.municipio,
+        'localidad': solicitud.localidad,
+        'is_active': True,
+        # Debe cambiar la contraseña (es empresa con CUIT como password)
+        'debe_cambiar_password': True,
+    }
+    usuario_empresa = User.objects.filter(email=solicitud.correo).first()
+    if usuario_empresa:
+        for campo, valor in datos.items():
+            setattr(usuario_empresa, campo, valor)
         usuario_empresa.save()
         logger.info(f"Usuario existente actualizado: {usuario_empresa.email}")
-    except User.DoesNotExist:
-        usuario_empresa = User.objects.create_user(
-            email=solicitud.correo,
-            password=solicitud.cuit_cuil,
-            nombre=solicitud.nombre_contacto,
-            apellido=solicitud.apellido_contacto,
-            rol=rol_empresa,
-            telefono=solicitud.telefono_contacto,
-            departamento=solicitud.departamento,
-            municipio=solicitud.municipio,
-            localidad=solicitud.localidad,
-            is_active=True,
-            debe_cambiar_password=True  # Marcar que debe cambiar la contraseña
-        )
+    else:
+        usuario_empresa = User.objects.create_user(email=solicitud.correo, password=solicitud.cuit_cuil, **datos)
         logger.info(f"Nuevo usuario creado: {usuario_empresa.email}")
-    
-    # Preparar datos comunes para la empresa
-    exporta_value = 'Sí' if solicitud.exporta == 'si' else ('No, solo ventas nacionales' if solicitud.exporta == 'no' else 'No, solo ventas locales')
-    if len(exporta_value) > 50:
-        exporta_value = exporta_value[:50]
-    
-    # Normalizar CUIT para que coincida con el formato de la solicitud (sin guiones ni espacios)
-    cuit_normalizado = str(solicitud.cuit_cuil).replace('-', '').replace(' ', '').strip()
-    
-    empresa_kwargs = {
-        'razon_social': solicitud.razon_social,
-        'nombre_fantasia': solicitud.nombre_fantasia,
-        'tipo_sociedad': solicitud.tipo_sociedad,
-        'cuit_cuil': cuit_normalizado,
-        'direccion': solicitud.direccion,
-        'codigo_postal': solicitud.codigo_postal,
-        'direccion_comercial': getattr(solicitud, 'direccion_comercial', None) or None,
-        'codigo_postal_comercial': getattr(solicitud, 'codigo_postal_comercial', None) or None,
-        'departamento': departamento,  
-        'municipio': municipio,  
-        'localidad': localidad,  
-        'telefono': solicitud.telefono,
-        'correo': solicitud.correo,
-        'sitioweb': solicitud.sitioweb,
-        'exporta': exporta_value,
-        'destinoexporta': solicitud.destino_exportacion[:200] if solicitud.destino_exportacion else None,
-        'importa': True if solicitud.importa == 'si' else False,
-        'interes_exportar': solicitud.interes_exportar if hasattr(solicitud, 'interes_exportar') else None,
-        'certificadopyme': True if solicitud.certificado_pyme == 'si' else False,
-        'certificaciones': solicitud.certificaciones[:500] if solicitud.certificaciones else None,
-        'promo2idiomas': True if solicitud.material_promocional_idiomas == 'si' else False,
-        'idiomas_trabaja': (solicitud.idiomas_trabajo[:100] if solicitud.idiomas_trabajo else None),
-        'contacto_principal_nombre': (solicitud.nombre_contacto[:50] if solicitud.nombre_contacto else ''),
-        'contacto_principal_apellido': (solicitud.apellido_contacto[:50] if solicitud.apellido_contacto else ''),
-        'contacto_principal_cargo': (solicitud.cargo_contacto[:100] if solicitud.cargo_contacto else ''),
-        'contacto_principal_telefono': (solicitud.telefono_contacto[:20] if solicitud.telefono_contacto else ''),
-        'contacto_principal_email': (solicitud.email_contacto or solicitud.correo),
-        'contacto_secundario_nombre': None,
-        'contacto_secundario_apellido': None,
-        'contacto_secundario_cargo': None,
-        'contacto_secundario_telefono': None,
-        'contacto_secundario_email': None,
-        'contacto_terciario_nombre': None,
-        'contacto_terciario_apellido': None,
-        'contacto_terciario_cargo': None,
-        'contacto_terciario_telefono': None,
-        'contacto_terciario_email': None,
-        'id_usuario': usuario_empresa,
-        'id_rubro': rubro,
-        'id_subrubro': id_subrubro,
-        'id_subrubro_producto': id_subrubro_producto,
-        'id_subrubro_servicio': id_subrubro_servicio,
-        'tipo_empresa': tipo_empresa,
-        # Registrar y mapear actividades de promoción desde la solicitud
-        'actividades_promocion_internacional': solicitud.actividades_promocion if solicitud.actividades_promocion else None,
-        # Mapear geolocalizacion (puede venir como string "lat,lng" o como objeto)
-        'geolocalizacion': None,
-    }
+    return usuario_empresa
 
-    try:
-        if solicitud.contactos_secundarios and isinstance(solicitud.contactos_secundarios, list):
-            # Contacto secundario (índice 0)
-            if len(solicitud.contactos_secundarios) > 0:
-                contacto_sec = solicitud.contactos_secundarios[0]
-                empresa_kwargs['contacto_secundario_nombre'] = contacto_sec.get('nombre', '')[:50] if contacto_sec.get('nombre') else None
-                empresa_kwargs['contacto_secundario_apellido'] = contacto_sec.get('apellido', '')[:50] if contacto_sec.get('apellido') else None
-                empresa_kwargs['contacto_secundario_cargo'] = contacto_sec.get('cargo', '')[:100] if contacto_sec.get('cargo') else None
-                empresa_kwargs['contacto_secundario_telefono'] = contacto_sec.get('telefono', '')[:20] if contacto_sec.get('telefono') else None
-                empresa_kwargs['contacto_secundario_email'] = contacto_sec.get('email', '') if contacto_sec.get('email') else None
-                logger.info(f"[Registro->Empresa] Contacto secundario mapeado: {contacto_sec.get('nombre', 'N/A')} {contacto_sec.get('apellido', '')}")
-        
-            # Contacto terciario (índice 1)
-            if len(solicitud.contactos_secundarios) > 1:
-                contacto_ter = solicitud.contactos_secundarios[1]
-                empresa_kwargs['contacto_terciario_nombre'] = contacto_ter.get('nombre', '')[:50] if contacto_ter.get('nombre') else None
-                empresa_kwargs['contacto_terciario_apellido'] = contacto_ter.get('apellido', '')[:50] if contacto_ter.get('apellido') else None
-                empresa_kwargs['contacto_terciario_cargo'] = contacto_ter.get('cargo', '')[:100] if contacto_ter.get('cargo') else None
-                empresa_kwargs['contacto_terciario_telefono'] = contacto_ter.get('telefono', '')[:20] if contacto_ter.get('telefono') else None
-                empresa_kwargs['contacto_terciario_email'] = contacto_ter.get('email', '') if contacto_ter.get('email') else None
-                logger.info(f"[Registro->Empresa] Contacto terciario mapeado: {contacto_ter.get('nombre', 'N/A')} {contacto_ter.get('apellido', '')}")
-        else:
-            logger.info(f"[Registro->Empresa] No hay contactos secundarios en la solicitud ID={solicitud.id}")
-    except Exception as e:
-        logger.error(f"[Registro->Empresa] Error al mapear contactos secundarios: {str(e)}", exc_info=True)
-    # Loguear detalle de actividades para debugging
-    try:
-        logger.info(f"[Registro->Empresa] Solicitud ID={solicitud.id} actividades_promocion (raw): {repr(solicitud.actividades_promocion)}")
-        logger.info(f"[Registro->Empresa] Tipo de datos: {type(solicitud.actividades_promocion)}")
-        if solicitud.actividades_promocion:
-            logger.info(f"[Registro->Empresa] Cantidad de actividades: {len(solicitud.actividades_promocion)}")
-    except Exception:
-        logger.exception("Error al loguear actividades_promocion de la solicitud")
 
-    # Log y normalización de geolocalizacion
-    try:
-        geo_raw = solicitud.geolocalizacion
-        logger.info(f"[Registro->Empresa] Solicitud ID={solicitud.id} geolocalizacion (raw): {repr(geo_raw)} (tipo: {type(geo_raw)})")
-        geo_value = None
-        if geo_raw:
-            # Si es tipo dict con lat/lng
-            if isinstance(geo_raw, dict):
-                lat = geo_raw.get('lat') or geo_raw.get('latitude')
-                lng = geo_raw.get('lng') or geo_raw.get('lon') or geo_raw.get('longitude')
-                try:
-                    geo_value = f"{float(lat)},{float(lng)}"
-                except Exception:
-                    geo_value = None
-            elif isinstance(geo_raw, str):
-                # Normalizar espacios y comas
-                geo_value = geo_raw.strip()
-            else:
-                # Otros tipos: intentar convertir a string
-                try:
-                    geo_value = str(geo_raw)
-                except Exception:
-                    geo_value = None
-
-        if geo_value:
-            empresa_kwargs['geolocalizacion'] = geo_value
-            logger.info(f"[Registro->Empresa] Geolocalizacion normalizada para empresa: {geo_value}")
-        else:
-            logger.info(f"[Registro->Empresa] No se encontró geolocalizacion válida en la solicitud ID={solicitud.id}")
-    except Exception:
-        logger.exception("Error al procesar geolocalizacion de la solicitud")
+def _crear_matriz_clasificacion(empresa):
+    """Matriz de clasificación con los puntajes calculados para la empresa"""
+    from apps.empresas.models import MatrizClasificacionExportador
+    from apps.empresas.utils import calcular_puntajes_matriz
 
-    # Mapear redes sociales desde la solicitud hacia el campo redes_sociales de la empresa
     try:
-        social = {}
-        if getattr(solicitud, 'instagram', None):
-            social['instagram'] = solicitud.instagram
-        if getattr(solicitud, 'facebook', None):
-            social['facebook'] = solicitud.facebook
-        if getattr(solicitud, 'linkedin', None):
-            social['linkedin'] = solicitud.linkedin
-        if social:
-            import json
-            empresa_kwargs['redes_sociales'] = json.dumps(social, ensure_ascii=False)
-            logger.info(f"[Registro->Empresa] Redes sociales mapeadas: {social}")
-    except Exception:
-        logger.exception("Error al mapear redes sociales desde la solicitud")
-    
-    if solicitud.catalogo_pdf:
-        empresa_kwargs['brochure'] = solicitud.catalogo_pdf
-    
-    tipo_empresa_value = solicitud.tipo_empresa or 'producto'
-    empresa_kwargs['tipo_empresa_valor'] = tipo_empresa_value
-    
-    solicitud.refresh_from_db()
-    if solicitud.aprobado_por:
-        empresa_kwargs['creado_por'] = solicitud.aprobado_por
-        empresa_kwargs['actualizado_por'] = solicitud.aprobado_por
-    else:
-        empresa_kwargs['creado_por'] = usuario_empresa
-        empresa_kwargs['actualizado_por'] = usuario_empresa
-    
-    empresa = None
-    
-    if tipo_empresa_value == 'producto':
-        # Filtrar claves que no existan en la tabla para evitar errores si las migraciones no se aplicaron
-        from django.core.exceptions import FieldDoesNotExist
-        def column_exists(model, field_name):
-            """Return True if model has the given field name (including FK _id)."""
-            try:
-                model._meta.get_field(field_name)
-                return True
-            except Exception:
-                # try FK column form
-                try:
-                    model._meta.get_field(f"{field_name}_id")
-                    return True
-                except Exception:
-                    return False
-
-        filtered_kwargs = {}
-        for k, v in empresa_kwargs.items():
-            if isinstance(k, str) and column_exists(Empresa, k):
-                filtered_kwargs[k] = v
-        empresa = Empresa.objects.create(**filtered_kwargs)
-
-        from apps.empresas.models import ProductoEmpresa, PosicionArancelaria
-        
-        if solicitud.productos:
-            for idx, producto_data in enumerate(solicitud.productos):
-                # ✅ VALIDAR que tenga posición arancelaria
-                posicion_aran = producto_data.get('posicion_arancelaria', '').strip()
-            
-            logger.info(
-                f"📦 [Producto {idx + 1}] Nombre: {producto_data.get('nombre', 'sin nombre')}, "
-                f"Posición Arancelaria: {posicion_aran or 'VACÍO'}"
-            )
-            
-            # Crear producto
-            producto = ProductoEmpresa.objects.create(
+        # Un error en la matriz no debe revertir la aprobación
+        with transaction.atomic():
+            puntajes = calcular_puntajes_matriz(empresa).get('puntajes', {})
+            _, created = MatrizClasificacionExportador.objects.update_or_create(
                 empresa=empresa,
-                nombre_producto=producto_data.get('nombre', ''),
-                descripcion=producto_data.get('descripcion', ''),
-                capacidad_productiva=float(producto_data.get('capacidad_productiva', 0)) if producto_data.get('capacidad_productiva') else None,
-                unidad_medida=producto_data.get('unidad_medida', 'kg'),
-                periodo_capacidad=producto_data.get('periodo_capacidad', 'mensual'),
+                defaults={campo: puntajes.get(campo, 0) for campo in CAMPOS_MATRIZ},
             )
-            
-            # ✅ SIEMPRE intentar crear la posición arancelaria (con validación)
-            if posicion_aran:
-                try:
-                    PosicionArancelaria.objects.create(
-                        producto=producto,
-                        codigo_arancelario=posicion_aran,
-                        descripcion_arancelaria=producto_data.get('descripcion_arancelaria', ''),
-                    )
-                    logger.info(
-                        f"✅ [Producto {idx + 1}] Posición arancelaria {posicion_aran} creada exitosamente"
-                    )
-                except Exception as e:
-                    logger.error(
-                        f"❌ [Producto {idx + 1}] Error creando posición arancelaria: {str(e)}",
-                        exc_info=True
-                    )
-                    # NO eliminar el producto, solo registrar el error
-            else:
-                logger.warning(
-                    f"⚠️  [Producto {idx + 1}] NO tiene posición arancelaria - se guardó sin ella"
-                )
-                
-    elif tipo_empresa_value == 'servicio':
-        # Filtrar claves por columnas existentes antes de crear
-
-        from django.core.exceptions import FieldDoesNotExist
-        def column_exists(model, field_name):
-            try:
-                model._meta.get_field(field_name)
-                return True
-            except Exception:
-                try:
-                    model._meta.get_field(f"{field_name}_id")
-                    return True
-                except Exception:
-                    return False
-
-        filtered_kwargs = {}
-        for k, v in empresa_kwargs.items():
-            if isinstance(k, str) and column_exists(Empresa, k):
-                filtered_kwargs[k] = v
-        empresa = Empresa.objects.create(**filtered_kwargs)
-        from apps.empresas.models import ServicioEmpresa
-        if solicitud.servicios_ofrecidos:
-            servicios_data = solicitud.servicios_ofrecidos
-            if isinstance(servicios_data, dict):
-                ServicioEmpresa.objects.create(
-                    empresa=empresa,
-                    nombre_servicio=servicios_data.get('nombre', 'Servicios'),
-                    descripcion=servicios_data.get('descripcion', '') or solicitud.descripcion_actividad or '',
-                    tipo_servicio=servicios_data.get('tipo_servicio', 'otro'),
-                    sector_atendido=servicios_data.get('sector_atendido', 'otro'),
-                )
-            elif isinstance(servicios_data, list):
-                for servicio_data in servicios_data:
-                    ServicioEmpresa.objects.create(
-                        empresa=empresa,
-                        nombre_servicio=servicio_data.get('nombre', ''),
-                        descripcion=servicio_data.get('descripcion', ''),
-                        tipo_servicio=servicio_data.get('tipo_servicio', 'otro'),
-                        sector_atendido=servicio_data.get('sector_atendido', 'otro'),
-                    )
-                    
-    else:  # mixta
-        # Filtrar claves por columnas existentes antes de crear
-        from django.core.exceptions import FieldDoesNotExist
-        def column_exists(model, field_name):
-            try:
-                model._meta.get_field(field_name)
-                return True
-            except Exception:
-                try:
-                    model._meta.get_field(f"{field_name}_id")
-                    return True
-                except Exception:
-                    return False
-
-        filtered_kwargs = {}
-        for k, v in empresa_kwargs.items():
-            if isinstance(k, str) and column_exists(Empresa, k):
-                filtered_kwargs[k] = v
-    
-        empresa = Empresa.objects.create(**filtered_kwargs)
-    
-        # ✅ IMPORTAR ANTES de usar las clases
-        from apps.empresas.models import ProductoEmpresaMixta, ServicioEmpresaMixta, PosicionArancelariaMixta
-    
-        # PRODUCTOS
-        if solicitud.productos:
-            for idx, producto_data in enumerate(solicitud.productos):
-                # ✅ VALIDAR que tenga posición arancelaria
-                posicion_aran = producto_data.get('posicion_arancelaria', '').strip()
-            
-                logger.info(
-                    f"📦 [Producto Mixta {idx + 1}] Nombre: {producto_data.get('nombre', 'sin nombre')}, "
-                    f"Posición Arancelaria: {posicion_aran or 'VACÍO'}"
-                )
-            
-                # Crear producto
-                producto = ProductoEmpresaMixta.objects.create(
-                    empresa=empresa,
-                    nombre_producto=producto_data.get('nombre', ''),
-                    descripcion=producto_data.get('descripcion', ''),
-                    capacidad_productiva=float(producto_data.get('capacidad_productiva', 0)) if producto_data.get('capacidad_productiva') else None,
-                    unidad_medida=producto_data.get('unidad_medida', 'kg'),
-                    periodo_capacidad=producto_data.get('periodo_capacidad', 'mensual'),
-                )
-            
-                # ✅ SIEMPRE intentar crear la posición arancelaria (con validación)
-                if posicion_aran:
-                    try:
-                        PosicionArancelariaMixta.objects.create(
-                            producto=producto,
-                            codigo_arancelario=posicion_aran,
-                            descripcion_arancelaria=producto_data.get('descripcion_arancelaria', ''),
-                        )
-                        logger.info(
-                            f"✅ [Producto Mixta {idx + 1}] Posición arancelaria {posicion_aran} creada exitosamente"
-                        )
-                    except Exception as e:
-                        logger.error(
-                            f"❌ [Producto Mixta {idx + 1}] Error creando posición arancelaria: {str(e)}",
-                            exc_info=True
-                        )
-                        # NO eliminar el producto, solo registrar el error
-                else:
-                    logger.warning(
-                        f"⚠️  [Producto Mixta {idx + 1}] NO tiene posición arancelaria - se guardó sin ella"
-                    )
-    
-        # SERVICIOS
-        if solicitud.servicios_ofrecidos:
-            servicios_data = solicitud.servicios_ofrecidos
-            if isinstance(servicios_data, dict):
-                ServicioEmpresaMixta.objects.create(
-                    empresa=empresa,
-                    nombre_servicio=servicios_data.get('nombre', 'Servicios'),
-                    descripcion=servicios_data.get('descripcion', '') or solicitud.descripcion_actividad or '',
-                    tipo_servicio=servicios_data.get('tipo_servicio', 'otro'),
-                    sector_atendido=servicios_data.get('sector_atendido', 'otro'),
-                )
-            elif isinstance(servicios_data, list):
-                for servicio_data in servicios_data:
-                    ServicioEmpresaMixta.objects.create(
-                        empresa=empresa,
-                        nombre_servicio=servicio_data.get('nombre', ''),
-                        descripcion=servicio_data.get('descripcion', ''),
-                        tipo_servicio=servicio_data.get('tipo_servicio', 'otro'),
-                        sector_atendido=servicio_data.get('sector_atendido', 'otro'),
-                    )
-    
-    # Crear matriz de clasificación
-    from apps.empresas.models import MatrizClasificacionExportador
-    from apps.empresas.utils import calcular_puntajes_matriz
-    
-    try:
-        resultado = calcular_puntajes_matriz(empresa)
-        puntajes = resultado.get('puntajes', {})
-        
-        matriz_kwargs = {
-            'experiencia_exportadora': puntajes.get('experiencia_exportadora', 0),
-            'volumen_produccion': puntajes.get('volumen_produccion', 0),
-            'presencia_digital': puntajes.get('presencia_digital', 0),
-            'posicion_arancelaria': puntajes.get('posicion_arancelaria', 0),
-            'participacion_internacionalizacion': puntajes.get('participacion_internacionalizacion', 0),
-            'estructura_interna': puntajes.get('estructura_interna', 0),
-            'interes_exportador': puntajes.get('interes_exportador', 0),
-            'certificaciones_nacionales': puntajes.get('certificaciones_nacionales', 0),
-            'certificaciones_internacionales': puntajes.get('certificaciones_internacionales', 0),
-        }
-        
-        matriz_kwargs['empresa'] = empresa
-        
-        matriz, created = MatrizClasificacionExportador.objects.update_or_create(
-            empresa=empresa,
-            defaults=matriz_kwargs
-        )
-        
         logger.info(f"Matriz de clasificación {'creada' if created else 'actualizada'} para empresa ID={empresa.id}")
     except Exception as e:
         logger.error(f"Error al crear matriz de clasificación: {str(e)}", exc_info=True)
-    
-    logger.info(f"✅ Empresa creada: ID={empresa.id}, Razón Social={empresa.razon_social}, Departamento={departamento.nombre}")
-    return empresa
\ No newline at end of file
@@ -1,21 +1,25 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.throttling import ScopedRateThrottle
+from rest_framework.views import APIView
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
-from .models import SolicitudRegistro, DocumentoSolicitud, NotificacionRegistro
+from .models import SolicitudRegistro, DocumentoSolicitud, NotificacionRegistro, EmailSuprimido
 from .serializers import (
     SolicitudRegistroSerializer, SolicitudRegistroListSerializer,
     SolicitudRegistroCreateSerializer, DocumentoSolicitudSerializer,
-    NotificacionRegistroSerializer, SolicitudRegistroUpdateSerializer
+    NotificacionRegistroSerializer, SolicitudRegistroUpdateSerializer,
+    EmailSuprimidoSerializer
 )
 from apps.core.permissions import IsPublicRegistration, CanManageUsers
+from apps.core.idempotencia import IdempotenciaMixin
 import uuid
 
 
-class SolicitudRegistroViewSet(viewsets.ModelViewSet):
+class SolicitudRegistroViewSet(IdempotenciaMixin, viewsets.ModelViewSet):
     """ViewSet para solicitudes de registro"""
     queryset = SolicitudRegistro.objects.prefetch_related('documentos', 'notificaciones').all()
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
@@ -75,22 +79,20 @@ class SolicitudRegistroViewSet(viewsets.ModelViewSet):
         import logging
         logger = logging.getLogger(__name__)
         
+        from django.db import transaction
+        from .bandeja_salida import encolar_email
+        
         try:
             logger.info("Iniciando creación de solicitud de registro")
-            solicitud = serializer.save(
-                token_confirmacion=str(uuid.uuid4()),
-                estado='pendiente'  # Estado pendiente hasta que admin apruebe
-            )
+            with transaction.atomic():
+                solicitud = serializer.save(
+                    token_confirmacion=str(uuid.uuid4()),
+                    estado='pendiente'  # Estado pendiente hasta que admin apruebe
+                )
+                # El email de confirmación lo envía el worker procesar_emails
+                encolar_email('confirmacion', solicitud=solicitud)
             logger.info(f"Solicitud creada exitosamente: ID={solicitud.id}, Razón Social={solicitud.razon_social}, Usuario={solicitud.usuario_creado.email if solicitud.usuario_creado else 'No creado'}")
             # El usuario ya fue creado en el serializer.create()
-            
-            # Enviar email de confirmación
-            try:
-                from .services import enviar_email_confirmacion_registro
-                enviar_email_confirmacion_registro(solicitud)
-            except Exception as email_error:
-                logger.warning(f"⚠️ Error enviando email de confirmación: {str(email_error)}")
-                # No fallar la creación si el email falla
         except Exception as e:
             logger.error(f"Error al crear solicitud de registro: {str(e)}", exc_info=True)
             raise
@@ -123,35 +125,19 @@ class SolicitudRegistroViewSet(viewsets.ModelViewSet):
         observaciones = request.data.get('observaciones', '')
     
         try:
-            # Crear empresa (fuera de transacción primero para detectar errores)
-            from .views import crear_empresa_desde_solicitud
-            empresa = crear_empresa_desde_solicitud(solicitud)
-        
-            # Si llegamos aquí, la empresa fue creada exitosamente
-            # Ahora actualizar la solicitud en una transacción separada
+            from .aprobacion import aprobar_solicitud
+
+            # Empresa, productos, servicios, solicitud y email en una sola transacción:
+            # si algo falla no queda una empresa a medio crear
             with transaction.atomic():
-                solicitud.estado = 'aprobada'
-                solicitud.fecha_aprobacion = timezone.now()
-                solicitud.aprobado_por = request.user
-                solicitud.observaciones_admin = observaciones
-                solicitud.empresa_creada = empresa
-                solicitud.save()
-        
-            logger.info(f"✅ Solicitud ID={solicitud.id} aprobada y empresa ID={empresa.id} vinculada")
-        
-            # Intentar enviar email (no crítico)
-            try:
-                from .services import enviar_email_aprobacion
-                enviar_email_aprobacion(solicitud)
-            except Exception as email_error:
-                logger.warning(f"⚠️ Error enviando email: {str(email_error)}")
-        
+                empresa = aprobar_solicitud(solicitud, request.user, observaciones)
+
             return Response({
             'status': 'success',
             'message': 'Solicitud aprobada exitosamente',
             'empresa_id': empresa.id
             })
-        
+
         except ValueError as e:
             logger.error(f"❌ Error de validación: {str(e)}")
             return Response(
@@ -161,32 +147,6 @@ class SolicitudRegistroViewSet(viewsets.ModelViewSet):
         except Exception as e:
             error_message = str(e)
             logger.error(f"❌ Error inesperado: {error_message}", exc_info=True)
-        
-            # Verificar si la empresa se creó a pesar del error
-            from apps.empresas.models import Empresa
-            cuit_normalizado = str(solicitud.cuit_cuil).replace('-', '').replace(' ', '').strip()
-            empresa_creada = Empresa.objects.filter(cuit_cuil=cuit_normalizado).first()
-            
-            if empresa_creada:
-                # La empresa existe, actualizar la solicitud
-                logger.info(f"✅ Empresa encontrada después del error, vinculando a solicitud")
-                try:
-                    with transaction.atomic():
-                        solicitud.estado = 'aprobada'
-                        solicitud.fecha_aprobacion = timezone.now()
-                        solicitud.aprobado_por = request.user
-                        solicitud.observaciones_admin = observaciones
-                        solicitud.empresa_creada = empresa_creada
-                        solicitud.save()
-                    
-                    return Response({
-                        'status': 'success',
-                        'message': 'Solicitud aprobada exitosamente',
-                        'empresa_id': empresa_creada.id
-                    })
-                except Exception as update_error:
-                    logger.error(f"❌ Error actualizando solicitud: {str(update_error)}")
-            
             return Response(
                 {'error': f'Error al aprobar la solicitud: {error_message}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -209,49 +169,12 @@ class SolicitudRegistroViewSet(viewsets.ModelViewSet):
         
         observaciones = request.data.get('observaciones', '')
         
-        # Guardar referencia al usuario antes de eliminarlo
-        usuario_a_eliminar = solicitud.usuario_creado
-        
         try:
+            from .aprobacion import rechazar_solicitud
+
+            # Rechazo, eliminación del usuario y email en una sola transacción
             with transaction.atomic():
-                # Guardar el rechazo primero (operación principal)
-                solicitud.estado = 'rechazada'
-                solicitud.observaciones_admin = observaciones
-                solicitud.aprobado_por = request.user
-                solicitud.save()
-                
-                # Eliminar el usuario asociado si existe
-                if usuario_a_eliminar:
-                    # Verificar que el usuario no esté asociado a una empresa aprobada
-                    from apps.empresas.models import Empresa
-                    empresa_asociada = Empresa.objects.filter(id_usuario=usuario_a_eliminar).first()
-                    
-                    if empresa_asociada:
-                        logger.warning(
-                            f"Usuario {usuario_a_eliminar.email} tiene empresa asociada (ID: {empresa_asociada.id}), "
-                            f"no se eliminará el usuario al rechazar solicitud {solicitud.id}"
-                        )
-                    else:
-                        # Verificar que no tenga otras solicitudes aprobadas
-                        otras_solicitudes = SolicitudRegistro.objects.filter(
-                            usuario_creado=usuario_a_eliminar,
-                            estado='aprobada'
-                        ).exclude(id=solicitud.id).exists()
-                        
-                        if otras_solicitudes:
-                            logger.warning(
-                                f"Usuario {usuario_a_eliminar.email} tiene otras solicitudes aprobadas, "
-                                f"no se eliminará el usuario al rechazar solicitud {solicitud.id}"
-                            )
-                        else:
-                            # Eliminar el usuario
-                            email_usuario = usuario_a_eliminar.email
-                            usuario_a_eliminar.delete()
-                            logger.info(f"✅ Usuario {email_usuario} eliminado al rechazar solicitud {solicitud.id}")
-                
-                # Desvincular el usuario de la solicitud
-                solicitud.usuario_creado = None
-                solicitud.save()
+                rechazar_solicitud(solicitud, request.user, observaciones)
         
         except Exception as e:
             logger.error(f"❌ Error al rechazar solicitud {solicitud.id}: {str(e)}", exc_info=True)
@@ -260,25 +183,55 @@ class SolicitudRegistroViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
         
-        # Intentar enviar email (no crítico si falla)
-        email_error = None
-        try:
-            from .services import enviar_email_rechazo
-            enviar_email_rechazo(solicitud)
-        except Exception as e:
-            # Registrar el error pero no fallar la operación
-            logger.warning(f'Error al enviar email de rechazo para solicitud {solicitud.id}: {str(e)}')
-            email_error = str(e)
-        
-        # Retornar éxito siempre, con advertencia si el email falló
-        response_data = {
+        return Response({
             'status': 'success',
             'message': 'Solicitud rechazada correctamente'
-        }
-        if email_error:
-            response_data['warning'] = f'La solicitud fue rechazada pero hubo un problema al enviar el email: {email_error}'
-        
-        return Response(response_data)
+        })
+    
+    def _procesar_lote(self, request, operacion):
+        """Validar la lista de ids y aprobar o rechazar las solicitudes en tramos"""
+        from django.conf import settings
+        from .aprobacion import procesar_lote
+
+        ids = request.data.get('ids')
+        if not isinstance(ids, list) or not ids:
+            return Response(
+                {'error': 'Debe enviar una lista de IDs de solicitudes'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            ids = [int(id) for id in ids]
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'Los IDs de solicitudes deben ser números enteros'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        maximo = getattr(settings, 'REGISTRO_LOTE_MAX', 1000)
+        if len(ids) > maximo:
+            return Response(
+                {'error': f'No se pueden procesar más de {maximo} solicitudes por lote'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        resultados = procesar_lote(operacion, ids, request.user, request.data.get('observaciones', ''))
+        resumen = {}
+        for resultado in resultados:
+            resumen[resultado['resultado']] = resumen.get(resultado['resultado'], 0) + 1
+        return Response({
+            'status': 'success',
+            'resumen': resumen,
+            'resultados': resultados,
+        })
+
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAuthenticated, CanManageUsers])
+    def aprobar_lote(self, request):
+        """Aprobar varias solicitudes: {"ids": [...], "observaciones": "..."} -> resultado por id"""
+        return self._procesar_lote(request, 'aprobar')
+
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAuthenticated, CanManageUsers])
+    def rechazar_lote(self, request):
+        """Rechazar varias solicitudes: {"ids": [...], "observaciones": "..."} -> resultado por id"""
+        return self._procesar_lote(request, 'rechazar')
     
     @action(detail=True, methods=['post'], permission_classes=[permissions.AllowAny])
     def confirmar_email(self, request, pk=None):
@@ -710,88 +663,65 @@ class SolicitudRegistroViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated], url_path='empresas_aprobadas/exportar_pdf')
     def exportar_empresas_aprobadas_pdf(self, request):
         """Exportar empresas aprobadas a PDF con identidad visual institucional"""
-        from apps.empresas.models import Empresa
         from apps.empresas.utils import generate_empresas_aprobadas_pdf
-        from django.db.models import Q
-        
-        # Obtener parámetros de filtro
-        search = request.query_params.get('search', '')
-        tipo_empresa = request.query_params.get('tipo_empresa', '')
-        exporta = request.query_params.get('exporta', '')
-        departamento = request.query_params.get('departamento', '')
-        rubro = request.query_params.get('rubro', '')
-        categoria_matriz = request.query_params.get('categoria_matriz', '')
+        from apps.empresas.exportaciones import filtrar_empresas_aprobadas, CAMPOS_APROBADAS_DEFAULT
+        from apps.empresas.pdf_cache import obtener_pdf
         
         # Obtener campos seleccionados (si vienen en los parámetros)
         campos_seleccionados = request.query_params.getlist('campos', [])
         # Si no se especifican campos, usar los predeterminados
         if not campos_seleccionados:
-            campos_seleccionados = ['exporta', 'importa', 'certificadopyme']
+            campos_seleccionados = CAMPOS_APROBADAS_DEFAULT
         
-        # Obtener todas las empresas usando el modelo unificado
-        empresas = Empresa.objects.select_related(
-            'tipo_empresa', 'id_rubro', 'departamento', 'municipio', 'localidad', 'id_usuario'
-        ).prefetch_related('productos_empresa', 'servicios_empresa', 'productos_mixta', 'servicios_mixta')
-        
-        # Aplicar filtros
-        if search:
-            empresas = empresas.filter(
-                Q(razon_social__icontains=search) |
-                Q(cuit_cuil__icontains=search) |
-                Q(correo__icontains=search) |
-                Q(nombre_fantasia__icontains=search)
-            )
-        
-        if tipo_empresa:
-            empresas = empresas.filter(tipo_empresa_valor=tipo_empresa)
-        
-        if exporta:
-            if exporta == 'si' or exporta == 'exportadoras':
-                empresas = empresas.filter(exporta='Sí')
-            elif exporta == 'no':
-                empresas = empresas.filter(exporta__in=['No, solo ventas nacionales', 'No, solo ventas locales'])
-            elif exporta == 'potenciales':
-                # Filtrar por categoría de matriz
-                from apps.empresas.models import MatrizClasificacionExportador
-                empresas_ids = MatrizClasificacionExportador.objects.filter(
-                    categoria='potencial_exportadora'
-                ).values_list('empresa_id', flat=True)
-                empresas = empresas.filter(id__in=empresas_ids)
-        
-        if departamento:
-            empresas = empresas.filter(departamento__nombre__icontains=departamento)
-        
-        if rubro:
-            empresas = empresas.filter(id_rubro__nombre__icontains=rubro)
-        
-        if categoria_matriz:
-            from apps.empresas.models import MatrizClasificacionExportador
-            empresas_ids = MatrizClasificacionExportador.objects.filter(
-                categoria=categoria_matriz
-            ).values_list('empresa_id', flat=True)
-            empresas = empresas.filter(id__in=empresas_ids)
+        # Aplicar los mismos filtros que usan las exportaciones en segundo plano
+        # (para listados grandes usar POST /api/empresas/exportaciones/)
+        empresas = filtrar_empresas_aprobadas(request.query_params)
         
         # Separar empresas por tipo para la función de generación de PDF
         empresas_producto = empresas.filter(tipo_empresa_valor='producto')
         empresas_servicio = empresas.filter(tipo_empresa_valor='servicio')
         empresas_mixta = empresas.filter(tipo_empresa_valor='mixta')
         
-        # Generar PDF
-        pdf_response = generate_empresas_aprobadas_pdf(
-            empresas_producto,
-            empresas_servicio,
-            empresas_mixta,
-            campos_seleccionados
+        # Generar PDF (o reutilizar el cacheado si los filtros y los datos no cambiaron)
+        pdf_response = obtener_pdf(
+            'aprobadas',
+            {**request.query_params.dict(), 'campos': campos_seleccionados},
+            lambda: generate_empresas_aprobadas_pdf(
+                empresas_producto,
+                empresas_servicio,
+                empresas_mixta,
+                campos_seleccionados
+            )
         )
         # Devolver HttpResponse directamente - DRF permite devolver HttpResponse
         # sin pasar por la negociación de contenido cuando es un HttpResponse
         return pdf_response
     
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated], url_path='empresas_aprobadas/exportar_xlsx')
+    def exportar_empresas_aprobadas_xlsx(self, request):
+        """Exportar empresas aprobadas a Excel: una hoja por tipo más productos y servicios"""
+        from apps.empresas.exportacion_xlsx import generate_empresas_xlsx
+        from apps.empresas.exportaciones import filtrar_empresas_aprobadas
+        from apps.empresas.extraccion import CAMPOS_EXPORTACION
+        
+        # Mismos campos que el PDF de seleccionadas; sin campos se exportan todos
+        campos_seleccionados = request.query_params.getlist('campos', []) or list(CAMPOS_EXPORTACION)
+        empresas = filtrar_empresas_aprobadas(request.query_params)
+        
+        try:
+            return generate_empresas_xlsx(empresas, campos_seleccionados)
+        except Exception as e:
+            return Response(
+                {'error': f'Error al generar Excel: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+    
     @action(detail=False, methods=['post'], permission_classes=[permissions.IsAuthenticated], url_path='exportar_empresas_seleccionadas_pdf')
     def exportar_empresas_seleccionadas_pdf(self, request):
         """Exportar empresas específicas a PDF con campos seleccionados"""
         from apps.empresas.models import Empresa
         from apps.empresas.utils import generate_empresas_seleccionadas_pdf
+        from apps.empresas.pdf_cache import obtener_pdf
         
         # Obtener IDs de empresas y campos seleccionados del body
         empresas_ids = request.data.get('empresas_ids', [])
@@ -813,8 +743,12 @@ class SolicitudRegistroViewSet(viewsets.ModelViewSet):
             # Convertir IDs a enteros
             empresas_ids = [int(id) for id in empresas_ids]
             
-            # Generar PDF
-            pdf_response = generate_empresas_seleccionadas_pdf(empresas_ids, campos_seleccionados)
+            # Generar PDF (o reutilizar el cacheado para la misma selección)
+            pdf_response = obtener_pdf(
+                'seleccionadas',
+                {'empresas_ids': empresas_ids, 'campos': campos_seleccionados},
+                lambda: generate_empresas_seleccionadas_pdf(empresas_ids, campos_seleccionados)
+            )
             return pdf_response
         except ValueError as e:
             return Response(
@@ -827,6 +761,40 @@ class SolicitudRegistroViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAuthenticated], url_path='exportar_empresas_seleccionadas_csv')
+    def exportar_empresas_seleccionadas_csv(self, request):
+        """Exportar empresas específicas a CSV con los mismos campos que el PDF"""
+        from apps.empresas.utils import generate_empresas_seleccionadas_csv
+        
+        empresas_ids = request.data.get('empresas_ids', [])
+        campos_seleccionados = request.data.get('campos', [])
+        
+        if not empresas_ids:
+            return Response(
+                {'error': 'No se proporcionaron IDs de empresas'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if not campos_seleccionados:
+            return Response(
+                {'error': 'No se seleccionaron campos para exportar'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            empresas_ids = [int(id) for id in empresas_ids]
+            return generate_empresas_seleccionadas_csv(empresas_ids, campos_seleccionados)
+        except ValueError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except Exception as e:
+            return Response(
+                {'error': f'Error al generar CSV: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+    
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def mi_perfil(self, request):
         """Obtener la solicitud del usuario actual"""
@@ -857,7 +825,7 @@ class SolicitudRegistroViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class DocumentoSolicitudViewSet(viewsets.ModelViewSet):
+class DocumentoSolicitudViewSet(IdempotenciaMixin, viewsets.ModelViewSet):
     """ViewSet para documentos de solicitud"""
     queryset = DocumentoSolicitud.objects.select_related('solicitud').all()
     serializer_class = DocumentoSolicitudSerializer
@@ -874,3 +842,76 @@ class NotificacionRegistroViewSet(viewsets.ReadOnlyModelViewSet):
     filterset_fields = ['solicitud', 'tipo', 'email_enviado']
     ordering = ['-fecha_creacion']
 
+    @action(detail=True, methods=['get'])
+    def html(self, request, pk=None):
+        """HTML del email, renderizado a partir del template y el contexto guardados"""
+        from django.http import HttpResponse
+
+        notificacion = self.get_object()
+        if not (notificacion.template or notificacion.contexto):
+            return Response(
+                {'error': 'La notificación no tiene contenido (no es un email o venció su retención)'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return HttpResponse(notificacion.renderizar_html(), content_type='text/html; charset=utf-8')
+
+
+class EmailSuprimidoViewSet(IdempotenciaMixin, viewsets.ModelViewSet):
+    """
+    ViewSet para revisar la lista de supresión de emails.
+    Quitar una dirección (DELETE o limpiar) vuelve a habilitar los envíos a ella.
+    """
+    queryset = EmailSuprimido.objects.all()
+    serializer_class = EmailSuprimidoSerializer
+    permission_classes = [permissions.IsAuthenticated, CanManageUsers]
+    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filterset_fields = ['motivo']
+    search_fields = ['email', 'detalle']
+    ordering_fields = ['email', 'rebotes', 'ultimo_rebote']
+    ordering = ['-ultimo_rebote']
+    http_method_names = ['get', 'post', 'delete', 'head', 'options']
+
+    @action(detail=False, methods=['post'])
+    def limpiar(self, request):
+        """Quitar de la lista de supresión los emails indicados, o todos los de un motivo"""
+        emails = request.data.get('emails')
+        motivo = request.data.get('motivo')
+
+        if emails:
+            if not isinstance(emails, list):
+                return Response({'error': 'emails debe ser una lista'}, status=status.HTTP_400_BAD_REQUEST)
+            queryset = EmailSuprimido.objects.filter(email__in=[str(email).strip().lower() for email in emails])
+        elif motivo:
+            if motivo not in dict(EmailSuprimido.MOTIVO_CHOICES):
+                return Response({'error': f'Motivo inválido: {motivo}'}, status=status.HTTP_400_BAD_REQUEST)
+            queryset = EmailSuprimido.objects.filter(motivo=motivo)
+        else:
+            return Response({'error': 'Debe indicar emails o motivo'}, status=status.HTTP_400_BAD_REQUEST)
+
+        eliminados, _ = queryset.delete()
+        return Response({'eliminados': eliminados})
+
+
+class CuitDisponibleView(APIView):
+    """
+    Consulta pública del formulario de registro: ¿el CUIT ya está registrado?
+    GET ?cuit=20-12345678-6 -> {'cuit', 'valido', 'disponible'}. Se resuelve con
+    el set de CUITs en Redis (ver cuits.py) y está limitada por IP (scope cuit_disponible).
+    """
+    permission_classes = [permissions.AllowAny]
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'cuit_disponible'
+
+    def get(self, request):
+        from apps.core.validators import normalizar_cuit, cuit_verificador_valido
+        from .cuits import cuit_registrado
+
+        cuit = normalizar_cuit(request.query_params.get('cuit', ''))
+        if len(cuit) != 11:
+            return Response(
+                {'error': 'El CUIT/CUIL debe tener exactamente 11 dígitos'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not cuit_verificador_valido(cuit):
+            return Response({'cuit': cuit, 'valido': False, 'disponible': False})
+        return Response({'cuit': cuit, 'valido': True, 'disponible': not cuit_registrado(cuit)})
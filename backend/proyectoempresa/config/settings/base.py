@@ -120,6 +120,37 @@ STATICFILES_DIRS = [
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Subidas en partes (ver apps.core.subidas): tamaño máximo del archivo y de cada parte,
+# directorio de los temporales (mismo disco que MEDIA_ROOT para moverlos sin copiar)
+# y horas sin actividad tras las cuales el comando limpiar_subidas las elimina
+SUBIDAS_TAMANO_MAX = int(os.getenv('SUBIDAS_TAMANO_MAX', 100 * 1024 * 1024))
+SUBIDAS_TAMANO_PARTE_MAX = int(os.getenv('SUBIDAS_TAMANO_PARTE_MAX', 10 * 1024 * 1024))
+SUBIDAS_DIRECTORIO = os.getenv('SUBIDAS_DIRECTORIO', str(MEDIA_ROOT / '.subidas'))
+SUBIDAS_RETENCION_HORAS = int(os.getenv('SUBIDAS_RETENCION_HORAS', 24))
+# Miniaturas y WebP de logos y avatares (ver apps.core.imagenes, worker procesar_imagenes):
+# lado máximo en píxeles de cada tamaño, reintentos, minutos tras los que un trabajo
+# 'procesando' vuelve a la cola y días que se conservan los trabajos finalizados
+IMAGENES_DERIVADAS_TAMANOS = {'miniatura': 64, 'pequena': 160, 'mediana': 480}
+IMAGENES_MAX_INTENTOS = int(os.getenv('IMAGENES_MAX_INTENTOS', 3))
+IMAGENES_TIMEOUT_MINUTOS = int(os.getenv('IMAGENES_TIMEOUT_MINUTOS', 10))
+IMAGENES_RETENCION_DIAS = int(os.getenv('IMAGENES_RETENCION_DIAS', 7))
+# Texto de los catálogos PDF para la búsqueda (ver apps.empresas.catalogos_texto, worker
+# indexar_catalogos): páginas y caracteres que se extraen (to_tsvector admite hasta 1 MB),
+# reintentos y minutos tras los que un catálogo 'procesando' vuelve a la cola
+CATALOGOS_TEXTO_MAX_PAGINAS = int(os.getenv('CATALOGOS_TEXTO_MAX_PAGINAS', 300))
+CATALOGOS_TEXTO_MAX_CARACTERES = int(os.getenv('CATALOGOS_TEXTO_MAX_CARACTERES', 500_000))
+CATALOGOS_TEXTO_MAX_INTENTOS = int(os.getenv('CATALOGOS_TEXTO_MAX_INTENTOS', 3))
+CATALOGOS_TEXTO_TIMEOUT_MINUTOS = int(os.getenv('CATALOGOS_TEXTO_TIMEOUT_MINUTOS', 15))
+# Importación masiva de empresas desde CSV/XLSX (ver apps.empresas.importacion, worker
+# procesar_importaciones): tamaño máximo del archivo, filas, filas validadas por lote,
+# errores por fila que se guardan en el reporte, minutos tras los que una importación
+# 'procesando' se da por abandonada y días que se conservan los archivos
+IMPORTACION_MAX_MB = int(os.getenv('IMPORTACION_MAX_MB', 20))
+IMPORTACION_MAX_FILAS = int(os.getenv('IMPORTACION_MAX_FILAS', 100_000))
+IMPORTACION_TAMANO_LOTE = int(os.getenv('IMPORTACION_TAMANO_LOTE', 2000))
+IMPORTACION_MAX_ERRORES = int(os.getenv('IMPORTACION_MAX_ERRORES', 1000))
+IMPORTACION_TIMEOUT_MINUTOS = int(os.getenv('IMPORTACION_TIMEOUT_MINUTOS', 30))
+IMPORTACION_RETENCION_DIAS = int(os.getenv('IMPORTACION_RETENCION_DIAS', 7))
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -142,6 +173,10 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_THROTTLE_RATES': {
+        # Consulta pública de CUIT del formulario de registro (por IP)
+        'cuit_disponible': os.getenv('CUIT_DISPONIBLE_THROTTLE', '30/minute'),
+    },
 }
 
 # Simple JWT
@@ -176,6 +211,10 @@ if DEBUG:
 else:
     CORS_ALLOW_CREDENTIALS = True
 
+# El frontend puede enviar Idempotency-Key en los reintentos (ver apps.core.idempotencia)
+from corsheaders.defaults import default_headers
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+
 # DRF Spectacular (API Documentation)
 SPECTACULAR_SETTINGS = {
     'TITLE': 'BD Empresa Exportadora API',
@@ -196,6 +235,16 @@ CACHES = {
     }
 }
 
+# Idempotency-Key: segundos que se guarda la primera respuesta, vencimiento del lock
+# entre duplicados concurrentes y espera máxima de un duplicado antes de responder 409
+IDEMPOTENCIA_TTL_SEGUNDOS = int(os.getenv('IDEMPOTENCIA_TTL_SEGUNDOS', 86400))
+IDEMPOTENCIA_LOCK_SEGUNDOS = int(os.getenv('IDEMPOTENCIA_LOCK_SEGUNDOS', 60))
+IDEMPOTENCIA_ESPERA_SEGUNDOS = int(os.getenv('IDEMPOTENCIA_ESPERA_SEGUNDOS', 10))
+
+# Set de CUITs registrados en Redis (ver apps.registro.cuits): se reconstruye desde la
+# base al vencer, por si algún cambio no llegó a reflejarse
+CUITS_REGISTRADOS_TTL_SEGUNDOS = int(os.getenv('CUITS_REGISTRADOS_TTL_SEGUNDOS', 86400))
+
 # Security settings
 SECURE_BROWSER_XSS_FILTER = True
 SECURE_CONTENT_TYPE_NOSNIFF = True
@@ -241,7 +290,50 @@ EMAIL_USE_SSL = os.getenv('EMAIL_USE_SSL', 'False').lower() == 'true'
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'noreply@empresa-exportadora.com')
+# Mensajes por conexión SMTP en los envíos en lote (se reconecta entre lotes)
+EMAIL_LOTE_TAMANO = int(os.getenv('EMAIL_LOTE_TAMANO', 50))
+# Bandeja de salida de emails del registro (ver comando procesar_emails)
+# Intentos antes de dar un email por fallido
+EMAILS_MAX_INTENTOS = int(os.getenv('EMAILS_MAX_INTENTOS', 6))
+# Espera antes del primer reintento; se duplica en cada intento hasta el máximo
+EMAILS_REINTENTO_BASE_SEGUNDOS = int(os.getenv('EMAILS_REINTENTO_BASE_SEGUNDOS', 60))
+EMAILS_REINTENTO_MAX_SEGUNDOS = int(os.getenv('EMAILS_REINTENTO_MAX_SEGUNDOS', 3600))
+# Minutos tras los cuales un email 'enviando' se considera abandonado y se reencola
+EMAILS_TIMEOUT_MINUTOS = int(os.getenv('EMAILS_TIMEOUT_MINUTOS', 10))
+# Días que se conserva el contenido (template y contexto) de las notificaciones del registro (0 = siempre)
+NOTIFICACIONES_REGISTRO_RETENCION_DIAS = int(os.getenv('NOTIFICACIONES_REGISTRO_RETENCION_DIAS', 180))
+# Buzón IMAP donde llegan los rebotes (ver comando procesar_rebotes); vacío = deshabilitado
+REBOTES_IMAP_HOST = os.getenv('REBOTES_IMAP_HOST', '')
+REBOTES_IMAP_USUARIO = os.getenv('REBOTES_IMAP_USUARIO', EMAIL_HOST_USER)
+REBOTES_IMAP_PASSWORD = os.getenv('REBOTES_IMAP_PASSWORD', EMAIL_HOST_PASSWORD)
+REBOTES_IMAP_CARPETA = os.getenv('REBOTES_IMAP_CARPETA', 'INBOX')
+# Aprobación/rechazo de solicitudes en lote: solicitudes por transacción y máximo por pedido
+REGISTRO_LOTE_TAMANO = int(os.getenv('REGISTRO_LOTE_TAMANO', 50))
+REGISTRO_LOTE_MAX = int(os.getenv('REGISTRO_LOTE_MAX', 1000))
 SERVER_EMAIL = DEFAULT_FROM_EMAIL  # Para errores del servidor
 
 # URL del sitio para enlaces en emails
-SITE_URL = os.getenv('SITE_URL', 'http://localhost:3000')
\ No newline at end of file
+SITE_URL = os.getenv('SITE_URL', 'http://localhost:3000')
+# Exportaciones PDF en segundo plano (ver comando procesar_exportaciones)
+# Máximo de exportaciones pendientes/en proceso simultáneas por usuario
+EXPORTACIONES_PDF_MAX_POR_USUARIO = int(os.getenv('EXPORTACIONES_PDF_MAX_POR_USUARIO', 2))
+# Horas que se conservan los archivos generados antes de eliminarlos
+EXPORTACIONES_PDF_RETENCION_HORAS = int(os.getenv('EXPORTACIONES_PDF_RETENCION_HORAS', 24))
+# Minutos sin latidos del worker tras los cuales una exportación 'procesando' se considera abandonada
+EXPORTACIONES_PDF_TIMEOUT_MINUTOS = int(os.getenv('EXPORTACIONES_PDF_TIMEOUT_MINUTOS', 30))
+# Procesos del worker de exportaciones para renderizar en paralelo los PDF grandes
+# (0 = los núcleos disponibles, hasta 4)
+EXPORTACIONES_PDF_PROCESOS = int(os.getenv('EXPORTACIONES_PDF_PROCESOS', 0))
+# Cantidad mínima de empresas a partir de la cual se renderiza en paralelo
+EXPORTACIONES_PDF_PARALELO_MIN_EMPRESAS = int(os.getenv('EXPORTACIONES_PDF_PARALELO_MIN_EMPRESAS', 1000))
+# Tamaño máximo (MB) de la caché de PDF generados; se eliminan los menos usados (0 = sin caché)
+EXPORTACIONES_PDF_CACHE_MAX_MB = int(os.getenv('EXPORTACIONES_PDF_CACHE_MAX_MB', 500))
+# Campañas de notificación de credenciales (ver comando procesar_campanas)
+# Cuota diaria del servidor SMTP (Gmail: 500/día en cuentas gratuitas)
+NOTIFICACIONES_EMAILS_POR_DIA = int(os.getenv('NOTIFICACIONES_EMAILS_POR_DIA', 500))
+# Emails que se pueden enviar seguidos antes de pasar al ritmo de la cuota
+NOTIFICACIONES_RAFAGA = int(os.getenv('NOTIFICACIONES_RAFAGA', 10))
+# Minutos tras los cuales un destinatario 'enviando' se considera abandonado y se reencola
+NOTIFICACIONES_TIMEOUT_MINUTOS = int(os.getenv('NOTIFICACIONES_TIMEOUT_MINUTOS', 10))
+# Intentos por destinatario antes de darlo por fallido
+NOTIFICACIONES_MAX_INTENTOS = int(os.getenv('NOTIFICACIONES_MAX_INTENTOS', 3))
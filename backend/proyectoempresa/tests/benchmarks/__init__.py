@@ -0,0 +1 @@
+# Benchmarks de rendimiento (se ejecutan con RUN_BENCHMARKS=1)
@@ -0,0 +1,75 @@
+"""
+Benchmark del envío de emails en lote contra un servidor SMTP local (aiosmtpd).
+
+Compara mensajes por segundo entre send_mail por mensaje (una sesión SMTP por
+email, como _enviar_email) y enviar_emails_en_lote (una sesión por lote). El
+servidor local no usa TLS ni tiene latencia de red, así que la diferencia real
+contra Gmail (handshake TLS + autenticación por sesión) es bastante mayor.
+Solo corre con RUN_BENCHMARKS=1 y aiosmtpd instalado:
+
+    RUN_BENCHMARKS=1 python -m pytest tests/benchmarks/test_envio_emails.py -s
+"""
+import os
+import socket
+import time
+import unittest
+
+from django.core.mail import send_mail, EmailMessage
+from django.test import SimpleTestCase, override_settings
+
+from apps.registro.services import enviar_emails_en_lote
+
+MENSAJES = 300
+
+
+@unittest.skipUnless(os.getenv('RUN_BENCHMARKS'), 'Benchmark: usar RUN_BENCHMARKS=1')
+class EnvioEmailsBenchmark(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        try:
+            from aiosmtpd.controller import Controller
+            from aiosmtpd.handlers import Sink
+        except ImportError:
+            raise unittest.SkipTest('aiosmtpd no está instalado')
+        super().setUpClass()
+        with socket.socket() as libre:
+            libre.bind(('127.0.0.1', 0))
+            puerto = libre.getsockname()[1]
+        cls.servidor = Controller(Sink(), hostname='127.0.0.1', port=puerto)
+        cls.servidor.start()
+        cls.configuracion = override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1',
+            EMAIL_PORT=puerto,
+            EMAIL_USE_TLS=False,
+            EMAIL_USE_SSL=False,
+            EMAIL_HOST_USER='',
+            EMAIL_HOST_PASSWORD='',
+        )
+        cls.configuracion.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.configuracion.disable()
+        cls.servidor.stop()
+        super().tearDownClass()
+
+    def _medir(self, enviar):
+        inicio = time.perf_counter()
+        enviar()
+        return MENSAJES / (time.perf_counter() - inicio)
+
+    def test_lote_supera_envio_individual(self):
+        destinatarios = [f'empresa{i}@example.com' for i in range(MENSAJES)]
+
+        individual = self._medir(lambda: [
+            send_mail('Credenciales', 'Cuerpo', 'noreply@example.com', [email]) for email in destinatarios
+        ])
+        errores = []
+        lote = self._medir(lambda: errores.extend(enviar_emails_en_lote([
+            EmailMessage('Credenciales', 'Cuerpo', 'noreply@example.com', [email]) for email in destinatarios
+        ])))
+
+        print(f'\nsend_mail por mensaje: {individual:.0f} msg/s - en lote: {lote:.0f} msg/s ({lote / individual:.1f}x)')
+        self.assertEqual(errores, [None] * MENSAJES)
+        self.assertGreater(lote, individual)
@@ -0,0 +1,74 @@
+"""
+Microbenchmark de la extracción de celdas para las exportaciones.
+
+Mide cuántas celdas por segundo resuelve PlanExtraccion con todos los campos
+de CAMPOS_EXPORTACION sobre empresas ya cargadas (con prefetch), y verifica
+que la extracción no haga consultas. Solo corre con RUN_BENCHMARKS=1:
+
+    RUN_BENCHMARKS=1 python -m pytest tests/benchmarks/test_extraccion.py -s
+"""
+import os
+import time
+import unittest
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from apps.geografia.models import Provincia, Departamento
+from apps.empresas.models import TipoEmpresa, Rubro, Empresa
+from apps.empresas.extraccion import PlanExtraccion, CAMPOS_EXPORTACION
+
+User = get_user_model()
+
+EMPRESAS = 2000
+# Piso conservador: la cadena de if/elif anterior resolvía del orden de 10^4 celdas/s
+CELDAS_POR_SEGUNDO_MINIMO = 50000
+
+
+@unittest.skipUnless(os.getenv('RUN_BENCHMARKS'), 'Benchmark: usar RUN_BENCHMARKS=1')
+class ExtraccionBenchmark(TestCase):
+    def setUp(self):
+        usuario = User.objects.create_user(email='bench-extraccion@example.com', nombre='Bench', apellido='Extracción')
+        provincia = Provincia.objects.create(id='10', nombre='Catamarca')
+        departamento = Departamento.objects.create(id='10049', nombre='Capital', provincia=provincia)
+        rubro = Rubro.objects.create(nombre='Alimentos', tipo='producto')
+        tipo = TipoEmpresa.objects.create(nombre='Producto')
+        Empresa.objects.bulk_create([
+            Empresa(
+                razon_social=f'Empresa Sintética {i:05d} SRL',
+                cuit_cuil=f'30{i:09d}',
+                direccion=f'Calle {i}',
+                departamento=departamento,
+                correo=f'empresa{i}@example.com',
+                id_rubro=rubro,
+                tipo_empresa=tipo,
+                tipo_empresa_valor='producto',
+                actividades_promocion_internacional={
+                    'ferias': [{'nombre': 'SIAL'}],
+                    'rondas': [{'nombre': 'Ronda NOA'}],
+                    'misiones': [],
+                },
+                id_usuario=usuario,
+            )
+            for i in range(EMPRESAS)
+        ], batch_size=1000)
+
+    def test_celdas_por_segundo(self):
+        empresas = list(Empresa.objects.select_related(
+            'tipo_empresa', 'id_rubro', 'departamento__provincia', 'municipio', 'localidad'
+        ).prefetch_related('clasificaciones_exportador'))
+        plan = PlanExtraccion(list(CAMPOS_EXPORTACION))
+
+        with CaptureQueriesContext(connection) as consultas:
+            inicio = time.perf_counter()
+            for empresa in empresas:
+                plan.textos(empresa)
+            duracion = time.perf_counter() - inicio
+
+        celdas = len(empresas) * len(plan.columnas)
+        celdas_por_segundo = celdas / duracion
+        print(f"\n{celdas} celdas en {duracion:.3f}s: {celdas_por_segundo:,.0f} celdas/s")
+
+        self.assertEqual(len(consultas), 0)
+        self.assertGreater(celdas_por_segundo, CELDAS_POR_SEGUNDO_MINIMO)
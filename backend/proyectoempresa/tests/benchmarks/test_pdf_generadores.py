@@ -0,0 +1,48 @@
+"""
+Benchmarks de los generadores PDF con pytest-benchmark.
+
+Cada generador corre con 10, 100, 1.000 y 5.000 empresas sintéticas. Además del
+tiempo que registra pytest-benchmark se guardan (extra_info) páginas por
+segundo, pico de RSS, consultas y tamaño, y se comparan contra
+tests/benchmarks/baseline_pdf.json (ver apps/empresas/benchmark_pdf.py).
+Solo corre con RUN_BENCHMARKS=1:
+
+    RUN_BENCHMARKS=1 python -m pytest tests/benchmarks/test_pdf_generadores.py --benchmark-only
+
+Para regenerar la baseline: python manage.py benchmark_pdf --guardar-baseline
+"""
+import os
+
+import pytest
+
+from apps.empresas.benchmark_pdf import (
+    TAMANOS_BENCHMARK,
+    GENERADORES_BENCHMARK,
+    crear_empresas_sinteticas,
+    medir_generador,
+    comparar_con_baseline,
+    cargar_baseline,
+)
+
+pytestmark = [
+    pytest.mark.skipif(not os.getenv('RUN_BENCHMARKS'), reason='Benchmark: usar RUN_BENCHMARKS=1'),
+    pytest.mark.django_db,
+]
+
+BASELINE = cargar_baseline()
+
+
+@pytest.mark.parametrize('cantidad', TAMANOS_BENCHMARK)
+@pytest.mark.parametrize('generador', GENERADORES_BENCHMARK)
+def test_generador_pdf(benchmark, generador, cantidad):
+    ids = crear_empresas_sinteticas(cantidad)
+
+    # Los tamaños grandes tardan minutos: una sola ronda
+    rondas = 3 if cantidad <= 100 else 1
+    metricas = benchmark.pedantic(medir_generador, args=(generador, ids), rounds=rondas, iterations=1)
+    benchmark.extra_info.update(metricas)
+
+    referencia = BASELINE.get(generador, {}).get(str(cantidad))
+    if not referencia:
+        pytest.skip(f'Sin baseline para {generador} x{cantidad}')
+    assert comparar_con_baseline(metricas, referencia) == []
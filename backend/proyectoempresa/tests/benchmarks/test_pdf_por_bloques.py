@@ -0,0 +1,90 @@
+"""
+Benchmark del renderizado PDF por bloques.
+
+Verifica que generate_empresas_aprobadas_pdf escale de forma casi lineal en tiempo
+y que la memoria pico crezca de forma muy sublineal entre 100 y 10.000 empresas.
+Lo único que sigue creciendo es lo que ReportLab retiene por página hasta save()
+(streams ya comprimidos y diccionarios de página), unos cientos de bytes por empresa.
+Es lento, por eso solo corre con RUN_BENCHMARKS=1:
+
+    RUN_BENCHMARKS=1 python -m pytest tests/benchmarks/test_pdf_por_bloques.py -s
+"""
+import os
+import time
+import tracemalloc
+import unittest
+
+from django.test import TransactionTestCase
+from django.contrib.auth import get_user_model
+from apps.geografia.models import Provincia, Departamento
+from apps.empresas.models import TipoEmpresa, Rubro, Empresa
+from apps.empresas.utils import generate_empresas_aprobadas_pdf
+
+User = get_user_model()
+
+TAMANOS = [100, 1000, 10000]
+
+
+@unittest.skipUnless(os.getenv('RUN_BENCHMARKS'), 'Benchmark: usar RUN_BENCHMARKS=1')
+class PDFPorBloquesBenchmark(TransactionTestCase):
+    def setUp(self):
+        self.usuario = User.objects.create_user(email='bench@example.com', nombre='Bench', apellido='PDF')
+        provincia = Provincia.objects.create(id='10', nombre='Catamarca')
+        self.departamento = Departamento.objects.create(id='10049', nombre='Capital', provincia=provincia)
+        self.rubro = Rubro.objects.create(nombre='Alimentos', tipo='producto')
+        self.tipo = TipoEmpresa.objects.create(nombre='Producto')
+        self.creadas = 0
+
+    def _completar_empresas(self, cantidad):
+        """Agregar empresas sintéticas hasta llegar a `cantidad`"""
+        nuevas = []
+        for i in range(self.creadas, cantidad):
+            nuevas.append(Empresa(
+                razon_social=f'Empresa Sintética {i:05d} SRL',
+                nombre_fantasia=f'Fantasía {i}',
+                cuit_cuil=f'30{i:09d}',
+                direccion=f'Calle {i} - San Fernando del Valle de Catamarca',
+                departamento=self.departamento,
+                telefono='3834000000',
+                correo=f'empresa{i}@example.com',
+                id_rubro=self.rubro,
+                tipo_empresa=self.tipo,
+                tipo_empresa_valor=['producto', 'servicio', 'mixta'][i % 3],
+                exporta='Sí' if i % 2 else 'No, solo ventas nacionales',
+                id_usuario=self.usuario,
+            ))
+        Empresa.objects.bulk_create(nuevas, batch_size=1000)
+        self.creadas = cantidad
+
+    def _medir(self):
+        empresas = Empresa.objects.select_related('tipo_empresa', 'id_rubro', 'departamento')
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        response = generate_empresas_aprobadas_pdf(
+            empresas.filter(tipo_empresa_valor='producto'),
+            empresas.filter(tipo_empresa_valor='servicio'),
+            empresas.filter(tipo_empresa_valor='mixta'),
+            procesos=1,  # el render en paralelo retiene las páginas al unirlas (ver pdf_paralelo)
+        )
+        segundos = time.perf_counter() - inicio
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        response.file_to_stream.close()
+        return segundos, pico
+
+    def test_escalado_lineal_y_memoria_acotada(self):
+        resultados = {}
+        for cantidad in TAMANOS:
+            self._completar_empresas(cantidad)
+            segundos, pico = self._medir()
+            resultados[cantidad] = (segundos, pico)
+            print(f"\n{cantidad:>6} empresas: {segundos:6.2f}s "
+                  f"({segundos / cantidad * 1000:.2f} ms/empresa), pico {pico / 1024 / 1024:.1f} MB")
+
+        base, mayor = TAMANOS[1], TAMANOS[-1]
+        ms_base = resultados[base][0] / base
+        ms_mayor = resultados[mayor][0] / mayor
+        # Casi lineal: el costo por empresa no debe crecer más de 50% al multiplicar por 10
+        self.assertLess(ms_mayor, ms_base * 1.5)
+        # Memoria acotada: multiplicar por 10 las empresas no debe triplicar el pico
+        self.assertLess(resultados[mayor][1], resultados[base][1] * 3)
@@ -0,0 +1,94 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from apps.core.models import ArchivoContenido
+from apps.registro.models import SolicitudRegistro, DocumentoSolicitud
+
+
+class AlmacenamientoDeduplicadoTest(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media)
+        self.override.enable()
+        self.solicitud = self._solicitud(1)
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media, ignore_errors=True)
+
+    def _solicitud(self, i):
+        return SolicitudRegistro.objects.create(
+            razon_social=f'Empresa {i}',
+            cuit_cuil=f'3071234{i:04d}',
+            direccion='Calle 123',
+            departamento='Capital',
+            telefono='3834000000',
+            correo=f'empresa{i}@example.com',
+            nombre_contacto='Ana',
+            tipo_empresa='producto',
+            rubro_principal='Alimentos',
+        )
+
+    def _archivos(self):
+        return sorted(
+            os.path.relpath(os.path.join(raiz, nombre), self.media)
+            for raiz, _, nombres in os.walk(self.media) for nombre in nombres
+        )
+
+    def test_contenido_repetido_se_guarda_una_vez_y_se_cuentan_referencias(self):
+        otra = self._solicitud(2)
+        self.solicitud.catalogo_pdf.save('catalogo.pdf', ContentFile(b'%PDF mismo contenido'))
+        otra.catalogo_pdf.save('otro-nombre.PDF', ContentFile(b'%PDF mismo contenido'))
+
+        self.assertEqual(self.solicitud.catalogo_pdf.name, otra.catalogo_pdf.name)
+        self.assertEqual(self._archivos(), [self.solicitud.catalogo_pdf.name])
+        self.assertEqual(ArchivoContenido.objects.get().referencias, 2)
+
+        # Borrar una referencia no elimina el archivo compartido
+        nombre = otra.catalogo_pdf.name
+        otra.catalogo_pdf.delete()
+        self.assertTrue(os.path.exists(os.path.join(self.media, nombre)))
+        self.solicitud.catalogo_pdf.delete()
+        self.assertFalse(os.path.exists(os.path.join(self.media, nombre)))
+        self.assertFalse(ArchivoContenido.objects.exists())
+
+    def _documentos_existentes(self):
+        for nombre in ('solicitudes/documentos/a.pdf', 'solicitudes/documentos/b.pdf'):
+            os.makedirs(os.path.join(self.media, 'solicitudes/documentos'), exist_ok=True)
+            with open(os.path.join(self.media, nombre), 'wb') as archivo:
+                archivo.write(b'%PDF certificado')
+            DocumentoSolicitud.objects.create(
+                solicitud=self.solicitud, tipo_documento='certificado', nombre_archivo=nombre, archivo=nombre
+            )
+
+    def test_comando_deduplica_archivos_existentes(self):
+        self._documentos_existentes()
+
+        # Los originales se borran al confirmar la transacción de cada fila
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('deduplicar_archivos', stdout=open(os.devnull, 'w'))
+
+        nombres = set(DocumentoSolicitud.objects.values_list('archivo', flat=True))
+        self.assertEqual(len(nombres), 1)
+        self.assertEqual(self._archivos(), list(nombres))
+        self.assertEqual(ArchivoContenido.objects.get().referencias, 2)
+
+    def test_comando_no_pierde_el_original_si_falla_la_fila(self):
+        self._documentos_existentes()
+
+        with mock.patch(
+            'apps.core.management.commands.deduplicar_archivos.referencias_en_uso', side_effect=RuntimeError
+        ):
+            with self.assertRaises(RuntimeError):
+                call_command('deduplicar_archivos', stdout=open(os.devnull, 'w'))
+
+        documento = DocumentoSolicitud.objects.order_by('id').first()
+        self.assertEqual(documento.archivo.name, 'solicitudes/documentos/a.pdf')
+        self.assertTrue(os.path.exists(os.path.join(self.media, documento.archivo.name)))
+        self.assertFalse(ArchivoContenido.objects.exists())
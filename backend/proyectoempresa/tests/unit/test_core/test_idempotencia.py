@@ -0,0 +1,99 @@
+import json
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.test.client import encode_multipart
+from rest_framework import permissions, viewsets
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+from apps.core.idempotencia import IdempotenciaMixin, _liberar_lock
+
+
+class ContadorViewSet(IdempotenciaMixin, viewsets.ViewSet):
+    permission_classes = [permissions.AllowAny]
+    ejecuciones = 0
+
+    def create(self, request):
+        ContadorViewSet.ejecuciones += 1
+        datos = {nombre: valor for nombre, valor in request.data.items() if nombre not in request.FILES}
+        archivos = {nombre: archivo.read().decode() for nombre, archivo in request.FILES.items()}
+        return Response({'ejecucion': ContadorViewSet.ejecuciones, 'datos': datos, 'archivos': archivos}, status=201)
+
+
+class IdempotenciaMixinTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        ContadorViewSet.ejecuciones = 0
+        self.vista = ContadorViewSet.as_view({'post': 'create'})
+        self.factory = APIRequestFactory()
+
+    def _post(self, datos, clave=None, **extra):
+        headers = {'HTTP_IDEMPOTENCY_KEY': clave} if clave else {}
+        respuesta = self.vista(self.factory.post('/api/contador/', datos, format='json', **headers, **extra))
+        if hasattr(respuesta, 'render'):
+            respuesta.render()
+        return respuesta
+
+    def _post_multipart(self, contenido, boundary, clave='subida-1'):
+        cuerpo = encode_multipart(boundary, {
+            'nombre': 'catalogo', 'archivo': SimpleUploadedFile('catalogo.txt', contenido),
+        })
+        respuesta = self.vista(self.factory.generic(
+            'POST', '/api/contador/', cuerpo,
+            content_type=f'multipart/form-data; boundary={boundary}', HTTP_IDEMPOTENCY_KEY=clave
+        ))
+        if hasattr(respuesta, 'render'):
+            respuesta.render()
+        return respuesta
+
+    def test_reintento_reproduce_la_primera_respuesta(self):
+        primera = self._post({'razon_social': 'Dulces SRL'}, clave='abc-123')
+        reintento = self._post({'razon_social': 'Dulces SRL'}, clave='abc-123')
+
+        self.assertEqual(ContadorViewSet.ejecuciones, 1)
+        self.assertEqual(reintento.status_code, 201)
+        self.assertEqual(json.loads(reintento.content), json.loads(primera.content))
+        self.assertEqual(reintento['Idempotent-Replayed'], 'true')
+
+    def test_misma_clave_con_otro_contenido_devuelve_422(self):
+        self._post({'razon_social': 'Dulces SRL'}, clave='abc-123')
+        respuesta = self._post({'razon_social': 'Otra SRL'}, clave='abc-123')
+
+        self.assertEqual(respuesta.status_code, 422)
+        self.assertEqual(ContadorViewSet.ejecuciones, 1)
+
+    def test_sin_clave_se_ejecuta_cada_vez(self):
+        self._post({'razon_social': 'Dulces SRL'})
+        self._post({'razon_social': 'Dulces SRL'})
+
+        self.assertEqual(ContadorViewSet.ejecuciones, 2)
+
+    def test_anonimos_de_distinta_ip_no_comparten_respuestas(self):
+        self._post({'razon_social': 'Dulces SRL'}, clave='abc-123', REMOTE_ADDR='10.0.0.1')
+        respuesta = self._post({'razon_social': 'Dulces SRL'}, clave='abc-123', REMOTE_ADDR='10.0.0.2')
+
+        self.assertEqual(ContadorViewSet.ejecuciones, 2)
+        self.assertFalse(respuesta.has_header('Idempotent-Replayed'))
+
+    def test_multipart_usa_el_contenido_de_los_archivos(self):
+        primera = self._post_multipart(b'contenido A', 'limite-1')
+        # Mismo archivo con otro boundary (cada reintento del navegador genera uno nuevo)
+        reintento = self._post_multipart(b'contenido A', 'limite-2')
+        # Otro archivo del mismo tamaño
+        distinto = self._post_multipart(b'contenido B', 'limite-1')
+
+        self.assertEqual(json.loads(primera.content)['archivos'], {'archivo': 'contenido A'})
+        self.assertEqual(reintento['Idempotent-Replayed'], 'true')
+        self.assertEqual(distinto.status_code, 422)
+        self.assertEqual(ContadorViewSet.ejecuciones, 1)
+
+    def test_no_libera_el_lock_de_otro_pedido(self):
+        # El lock del primer pedido venció y lo tomó un segundo
+        cache.set('idempotencia:prueba:lock', 'token-segundo')
+        _liberar_lock('idempotencia:prueba:lock', 'token-primero')
+        self.assertEqual(cache.get('idempotencia:prueba:lock'), 'token-segundo')
+
+        _liberar_lock('idempotencia:prueba:lock', 'token-segundo')
+        self.assertIsNone(cache.get('idempotencia:prueba:lock'))
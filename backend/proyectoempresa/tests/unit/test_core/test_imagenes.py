@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from apps.core.imagenes import reclamar_trabajos, ejecutar_trabajo
+from apps.core.models import TrabajoImagen
+from apps.core.serializers import UsuarioSerializer
+
+User = get_user_model()
+
+
+def _imagen(formato='PNG', modo='RGBA', tamano=(800, 600)):
+    buffer = BytesIO()
+    Image.new(modo, tamano, (200, 30, 30, 128) if modo == 'RGBA' else (200, 30, 30)).save(buffer, format=formato)
+    return ContentFile(buffer.getvalue())
+
+
+@override_settings(IMAGENES_DERIVADAS_TAMANOS={'miniatura': 64, 'mediana': 480})
+class ImagenesDerivadasTest(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media)
+        self.override.enable()
+        self.usuario = User.objects.create_user(email='avatar@example.com', nombre='Ana', apellido='Test')
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media, ignore_errors=True)
+
+    def _procesar(self):
+        return [ejecutar_trabajo(trabajo) for trabajo in reclamar_trabajos(10)]
+
+    def test_cambiar_avatar_encola_y_el_worker_genera_los_derivados(self):
+        self.usuario.avatar.save('foto.png', _imagen())
+        self.usuario.save()
+        self.assertEqual(TrabajoImagen.objects.filter(estado='pendiente').count(), 1)
+        # Sin derivados todavía el serializer no expone URLs
+        self.assertEqual(UsuarioSerializer(self.usuario).data['avatar_urls'], {})
+
+        trabajos = self._procesar()
+        self.assertEqual([trabajo.estado for trabajo in trabajos], ['completado'])
+
+        self.usuario.refresh_from_db()
+        derivados = self.usuario.avatar_derivados
+        self.assertEqual(derivados['origen'], self.usuario.avatar.name)
+        # Con transparencia el formato alternativo es PNG
+        self.assertEqual(set(derivados['miniatura']), {'webp', 'png'})
+        with Image.open(os.path.join(self.media, derivados['miniatura']['webp'])) as miniatura:
+            self.assertEqual(miniatura.format, 'WEBP')
+            self.assertEqual(miniatura.size, (64, 48))
+
+        urls = UsuarioSerializer(self.usuario).data['avatar_urls']
+        self.assertTrue(urls['mediana']['webp'].endswith('/mediana.webp'))
+        # Guardar sin cambiar la imagen no vuelve a encolar
+        self.usuario.save()
+        self.assertFalse(TrabajoImagen.objects.filter(estado='pendiente').exists())
+
+    def test_imagen_corrupta_queda_en_error_sin_reintentos(self):
+        self.usuario.avatar.save('rota.jpg', ContentFile(b'no es una imagen'))
+        self.usuario.save()
+        trabajo, = self._procesar()
+        self.assertEqual(trabajo.estado, 'error')
+        self.assertEqual(trabajo.intentos, 1)
+
+    def test_backfill_encola_las_imagenes_existentes(self):
+        self.usuario.avatar.save('foto.jpg', _imagen('JPEG', 'RGB'))
+        TrabajoImagen.objects.all().delete()
+
+        call_command('generar_derivados_imagenes', procesar=True, stdout=StringIO())
+
+        self.usuario.refresh_from_db()
+        self.assertEqual(set(self.usuario.avatar_derivados['mediana']), {'webp', 'jpeg'})
+        self.assertEqual(TrabajoImagen.objects.get().estado, 'completado')
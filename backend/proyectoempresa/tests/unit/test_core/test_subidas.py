@@ -0,0 +1,135 @@
+import hashlib
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.core.models import RolUsuario, SubidaArchivo
+from apps.empresas.models import Empresa, Rubro, TipoEmpresa
+from apps.geografia.models import Departamento, Provincia
+from apps.registro.models import SolicitudRegistro
+
+User = get_user_model()
+
+
+class SubidaEnPartesTest(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media, SUBIDAS_DIRECTORIO=f'{self.media}/.subidas')
+        self.override.enable()
+        self.usuario = User.objects.create_user(email='empresa@example.com', nombre='Ana', apellido='Test')
+        self.solicitud = SolicitudRegistro.objects.create(
+            razon_social='Dulces del Valle SRL',
+            cuit_cuil='30712345678',
+            direccion='Calle 123',
+            departamento='Capital',
+            telefono='3834000000',
+            correo='dulces@example.com',
+            nombre_contacto='Ana',
+            tipo_empresa='producto',
+            rubro_principal='Alimentos',
+            usuario_creado=self.usuario,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+        self.contenido = b'%PDF-1.4 ' + bytes(range(256)) * 40
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media, ignore_errors=True)
+
+    def _parte(self, subida_id, inicio, datos):
+        return self.client.put(
+            f'/api/core/subidas/{subida_id}/parte/', datos, content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {inicio}-{inicio + len(datos) - 1}/{len(self.contenido)}',
+        )
+
+    def test_subida_reanudable_asigna_el_catalogo(self):
+        respuesta = self.client.post('/api/core/subidas/', {
+            'destino': 'solicitud_catalogo',
+            'objeto_id': self.solicitud.id,
+            'nombre_archivo': 'catalogo.pdf',
+            'tamano': len(self.contenido),
+            'sha256': hashlib.sha256(self.contenido).hexdigest(),
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+        subida_id = respuesta.data['id']
+        mitad = len(self.contenido) // 2
+
+        self.assertEqual(self._parte(subida_id, 0, self.contenido[:mitad]).data['recibido'], mitad)
+        # Una parte fuera de orden indica desde dónde retomar
+        fuera_de_orden = self._parte(subida_id, mitad + 10, self.contenido[mitad + 10:])
+        self.assertEqual(fuera_de_orden.status_code, 409)
+        self.assertEqual(fuera_de_orden.data['recibido'], mitad)
+        # Reenviar una parte ya recibida no la duplica
+        self.assertEqual(self._parte(subida_id, 0, self.contenido[:mitad]).data['recibido'], mitad)
+        self.assertEqual(self._parte(subida_id, mitad, self.contenido[mitad:]).data['recibido'], len(self.contenido))
+
+        respuesta = self.client.post(f'/api/core/subidas/{subida_id}/completar/')
+        self.assertEqual(respuesta.status_code, 200, respuesta.content)
+        self.solicitud.refresh_from_db()
+        with self.solicitud.catalogo_pdf.open('rb') as archivo:
+            self.assertEqual(archivo.read(), self.contenido)
+        self.assertEqual(self.solicitud.catalogo_pdf_nombre, 'catalogo.pdf')
+        self.assertEqual(SubidaArchivo.objects.get(pk=subida_id).estado, 'completada')
+
+    def test_sha256_distinto_reinicia_la_subida(self):
+        respuesta = self.client.post('/api/core/subidas/', {
+            'destino': 'solicitud_catalogo',
+            'objeto_id': self.solicitud.id,
+            'nombre_archivo': 'catalogo.pdf',
+            'tamano': len(self.contenido),
+            'sha256': '0' * 64,
+        }, format='json')
+        subida_id = respuesta.data['id']
+        self._parte(subida_id, 0, self.contenido)
+
+        respuesta = self.client.post(f'/api/core/subidas/{subida_id}/completar/')
+
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(respuesta.data['recibido'], 0)
+        self.solicitud.refresh_from_db()
+        self.assertFalse(self.solicitud.catalogo_pdf)
+
+    def test_solo_el_propietario_o_un_administrador(self):
+        otro = User.objects.create_user(email='otro@example.com', nombre='Otro', apellido='Test')
+        self.client.force_authenticate(otro)
+        respuesta = self.client.post('/api/core/subidas/', {
+            'destino': 'solicitud_catalogo',
+            'objeto_id': self.solicitud.id,
+            'nombre_archivo': 'catalogo.pdf',
+            'tamano': 10,
+            'sha256': '0' * 64,
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 403)
+
+    def test_empresa_no_sube_archivos_a_otra_empresa(self):
+        rol = RolUsuario.objects.create(nombre='Empresa', descripcion='Empresa', puede_editar_empresas=True)
+        provincia = Provincia.objects.create(id='10', nombre='Catamarca')
+        datos = dict(
+            direccion='Calle 123',
+            departamento=Departamento.objects.create(id='10049', nombre='Capital', provincia=provincia),
+            id_rubro=Rubro.objects.create(nombre='Alimentos', tipo='producto'),
+            tipo_empresa=TipoEmpresa.objects.create(nombre='Producto'),
+            tipo_empresa_valor='producto',
+        )
+        usuario_a = User.objects.create_user(email='a@example.com', nombre='A', apellido='Test', rol=rol)
+        usuario_b = User.objects.create_user(email='b@example.com', nombre='B', apellido='Test', rol=rol)
+        Empresa.objects.create(razon_social='Empresa A', cuit_cuil='20111111112', id_usuario=usuario_a, **datos)
+        empresa_b = Empresa.objects.create(razon_social='Empresa B', cuit_cuil='20222222223', id_usuario=usuario_b, **datos)
+
+        def iniciar(usuario, destino):
+            self.client.force_authenticate(usuario)
+            return self.client.post('/api/core/subidas/', {
+                'destino': destino,
+                'objeto_id': empresa_b.id,
+                'nombre_archivo': 'brochure.pdf',
+                'tamano': 10,
+                'sha256': '0' * 64,
+            }, format='json')
+
+        self.assertEqual(iniciar(usuario_a, 'empresa_brochure').status_code, 403)
+        self.assertEqual(iniciar(usuario_a, 'empresa_certificaciones').status_code, 403)
+        self.assertEqual(iniciar(usuario_b, 'empresa_brochure').status_code, 201)
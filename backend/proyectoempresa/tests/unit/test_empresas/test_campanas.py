@@ -0,0 +1,110 @@
+from datetime import timedelta
+
+from django.core import mail
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from apps.geografia.models import Provincia, Departamento
+from apps.empresas.models import TipoEmpresa, Rubro, Empresa, CampanaNotificacion, DestinatarioCampana
+from apps.empresas.campanas import (
+    TokenBucket, crear_campana, reclamar_siguiente_destinatario, enviar_destinatario,
+    liberar_destinatarios_abandonados, finalizar_campanas,
+)
+
+User = get_user_model()
+
+
+class TokenBucketTest(TestCase):
+    def test_rafaga_y_recarga(self):
+        ahora = [0.0]
+        esperas = []
+
+        def dormir(segundos):
+            esperas.append(segundos)
+            ahora[0] += segundos
+
+        bucket = TokenBucket(capacidad=2, tasa=0.5, reloj=lambda: ahora[0], dormir=dormir)
+        bucket.consumir()
+        bucket.consumir()
+        self.assertEqual(esperas, [])
+
+        # Sin tokens: se espera 1 / tasa = 2 segundos
+        bucket.consumir()
+        self.assertAlmostEqual(sum(esperas), 2.0)
+
+
+class CampanaNotificacionTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(email='admin@example.com', nombre='Admin', apellido='Test')
+        provincia = Provincia.objects.create(id='10', nombre='Catamarca')
+        departamento = Departamento.objects.create(id='10049', nombre='Capital', provincia=provincia)
+        datos = dict(
+            direccion='Calle 123',
+            departamento=departamento,
+            id_rubro=Rubro.objects.create(nombre='Alimentos', tipo='producto'),
+            tipo_empresa=TipoEmpresa.objects.create(nombre='Producto'),
+            tipo_empresa_valor='producto',
+        )
+        self.empresas = [
+            Empresa.objects.create(
+                razon_social=f'Empresa {i}', cuit_cuil=f'2012345678{i}',
+                id_usuario=User.objects.create_user(email=email, nombre='Test', apellido='User'),
+                **datos
+            )
+            for i, email in enumerate(['uno@example.com', 'dos@example.com', 'invalido@localhost'])
+        ]
+
+    def _procesar(self):
+        while True:
+            destinatario = reclamar_siguiente_destinatario()
+            if destinatario is None:
+                break
+            enviar_destinatario(destinatario)
+        finalizar_campanas()
+
+    def test_campana_envia_y_registra_progreso(self):
+        campana = crear_campana(self.admin, Empresa.objects.select_related('id_usuario'))
+        self.assertEqual((campana.total, campana.fallidos), (3, 1))
+        self.assertEqual(len(mail.outbox), 0)
+
+        self._procesar()
+
+        campana.refresh_from_db()
+        self.assertEqual(campana.estado, 'completada')
+        self.assertEqual((campana.enviados, campana.fallidos, campana.pendientes), (2, 1, 0))
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertIsNotNone(Empresa.objects.get(pk=self.empresas[0].pk).ultima_notificacion_credenciales)
+
+    def test_reanuda_tras_caida_sin_reenviar(self):
+        campana = crear_campana(self.admin, Empresa.objects.select_related('id_usuario'))
+        enviar_destinatario(reclamar_siguiente_destinatario())
+        # El worker cae con el segundo destinatario a medio enviar
+        interrumpido = reclamar_siguiente_destinatario()
+        DestinatarioCampana.objects.filter(pk=interrumpido.pk).update(
+            fecha_intento=timezone.now() - timedelta(hours=1)
+        )
+
+        self.assertEqual(liberar_destinatarios_abandonados(), 1)
+        self._procesar()
+
+        campana.refresh_from_db()
+        self.assertEqual((campana.estado, campana.enviados), ('completada', 2))
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(DestinatarioCampana.objects.get(pk=interrumpido.pk).intentos, 2)
+        self.assertFalse(CampanaNotificacion.objects.filter(estado='procesando').exists())
+
+    def test_omite_direcciones_suprimidas(self):
+        from apps.registro.models import EmailSuprimido
+
+        EmailSuprimido.objects.create(email='DOS@example.com')
+        campana = crear_campana(self.admin, Empresa.objects.select_related('id_usuario'))
+        self.assertEqual((campana.total, campana.fallidos, campana.omitidos, campana.pendientes), (3, 1, 1, 1))
+
+        self._procesar()
+
+        campana.refresh_from_db()
+        self.assertEqual((campana.estado, campana.enviados), ('completada', 1))
+        self.assertEqual([mensaje.to for mensaje in mail.outbox], [['uno@example.com']])
+        # Solo el usuario que recibió el email queda con el CUIT como contraseña inicial
+        self.assertTrue(User.objects.get(email='uno@example.com').check_password('20123456780'))
+        self.assertFalse(User.objects.get(email='dos@example.com').has_usable_password())
@@ -0,0 +1,80 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from reportlab.pdfgen import canvas
+from rest_framework.test import APIClient
+
+from apps.empresas.catalogos_texto import reclamar_textos, ejecutar_texto
+from apps.empresas.models import TextoCatalogo
+from apps.geografia.models import Provincia, Departamento
+from apps.registro.aprobacion import procesar_lote
+from apps.registro.models import SolicitudRegistro
+
+User = get_user_model()
+
+
+def _pdf(*lineas):
+    buffer = BytesIO()
+    documento = canvas.Canvas(buffer)
+    for i, linea in enumerate(lineas):
+        documento.drawString(72, 720 - i * 20, linea)
+    documento.save()
+    return ContentFile(buffer.getvalue())
+
+
+class CatalogosTextoTest(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media)
+        self.override.enable()
+        provincia = Provincia.objects.create(id='10', nombre='Catamarca')
+        Departamento.objects.create(id='10049', nombre='Capital', provincia=provincia)
+        self.admin = User.objects.create_superuser(email='admin@example.com', password='x', nombre='Admin', apellido='Test')
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media, ignore_errors=True)
+
+    def _solicitud(self, i, catalogo):
+        solicitud = SolicitudRegistro.objects.create(
+            razon_social=f'Empresa {i}',
+            cuit_cuil=f'3071234{i:04d}',
+            direccion='Calle 123',
+            departamento='Capital',
+            telefono='3834000000',
+            correo=f'empresa{i}@example.com',
+            nombre_contacto='Ana',
+            tipo_empresa='producto',
+            rubro_principal='Alimentos',
+        )
+        solicitud.catalogo_pdf.save(f'catalogo{i}.pdf', catalogo)
+        return solicitud
+
+    def test_el_texto_se_extrae_una_vez_y_la_busqueda_devuelve_la_empresa(self):
+        olivas = self._solicitud(1, _pdf('Aceite de oliva extra virgen', 'Aceitunas de mesa'))
+        self._solicitud(2, _pdf('Nueces y pasas de uva'))
+        # La solicitud no crea un texto nuevo al aprobarla: el brochure es el mismo archivo
+        procesar_lote('aprobar', [olivas.id], self.admin)
+        self.assertEqual(TextoCatalogo.objects.count(), 2)
+
+        textos = [ejecutar_texto(texto) for texto in reclamar_textos(10)]
+        self.assertEqual({texto.estado for texto in textos}, {'completado'})
+        self.assertIn('oliva', TextoCatalogo.objects.get(archivo=olivas.catalogo_pdf.name).texto)
+
+        cliente = APIClient()
+        cliente.force_authenticate(self.admin)
+        respuesta = cliente.get('/api/empresas/buscar-catalogos/', {'q': 'oliva'})
+        self.assertEqual(respuesta.status_code, 200)
+        olivas.refresh_from_db()
+        self.assertEqual([empresa['id'] for empresa in respuesta.data['results']], [olivas.empresa_creada_id])
+
+        self.assertEqual(cliente.get('/api/empresas/buscar-catalogos/', {'q': 'ol'}).status_code, 400)
+
+    def test_pdf_ilegible_queda_en_error(self):
+        self._solicitud(3, ContentFile(b'%PDF-1.4 roto'))
+        texto, = [ejecutar_texto(texto) for texto in reclamar_textos(10)]
+        self.assertEqual(texto.estado, 'error')
@@ -0,0 +1,71 @@
+from decimal import Decimal
+
+from openpyxl import load_workbook
+
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from apps.geografia.models import Provincia, Departamento
+from apps.empresas.models import (
+    TipoEmpresa, Rubro, Empresa, ProductoEmpresa, PosicionArancelaria, ServicioEmpresaMixta,
+)
+from apps.empresas.exportacion_xlsx import generate_empresas_xlsx
+
+User = get_user_model()
+
+
+class ExportacionXLSXTest(TestCase):
+    def setUp(self):
+        usuario = User.objects.create_user(email='xlsx@example.com', nombre='Test', apellido='User')
+        provincia = Provincia.objects.create(id='10', nombre='Catamarca')
+        departamento = Departamento.objects.create(id='10049', nombre='Capital', provincia=provincia)
+        datos = dict(
+            direccion='Calle 123',
+            departamento=departamento,
+            id_rubro=Rubro.objects.create(nombre='Alimentos', tipo='producto'),
+            tipo_empresa=TipoEmpresa.objects.create(nombre='Producto'),
+            id_usuario=usuario,
+        )
+        self.producto = Empresa.objects.create(
+            razon_social='Dulces SA', cuit_cuil='20123456789', tipo_empresa_valor='producto', **datos
+        )
+        self.mixta = Empresa.objects.create(
+            razon_social='Mixta SRL', cuit_cuil='20987654321', tipo_empresa_valor='mixta', **datos
+        )
+        dulce = ProductoEmpresa.objects.create(
+            empresa=self.producto, nombre_producto='Dulce de membrillo', descripcion='Artesanal',
+            capacidad_productiva=Decimal('150.50'), es_principal=True
+        )
+        PosicionArancelaria.objects.create(producto=dulce, codigo_arancelario='2007.99.00')
+        ServicioEmpresaMixta.objects.create(
+            empresa=self.mixta, nombre_servicio='Logística', descripcion='Transporte'
+        )
+
+    def _libro(self, empresas, campos):
+        response = generate_empresas_xlsx(empresas, campos)
+        libro = load_workbook(response.file_to_stream, read_only=True)
+        hojas = {hoja.title: [list(fila) for fila in hoja.iter_rows(values_only=True)] for hoja in libro.worksheets}
+        response.file_to_stream.close()
+        return hojas
+
+    def test_hojas_por_tipo_y_relacionadas(self):
+        hojas = self._libro(Empresa.objects.all(), ['razon_social', 'departamento'])
+
+        self.assertEqual(list(hojas), [
+            'Empresas Producto', 'Empresas Servicio', 'Empresas Mixtas', 'Productos', 'Servicios',
+        ])
+        self.assertEqual(hojas['Empresas Producto'], [
+            ['ID Empresa', 'Razón Social', 'Departamento'],
+            [self.producto.id, 'Dulces SA', 'Capital'],
+        ])
+        self.assertEqual(len(hojas['Empresas Servicio']), 1)  # solo encabezado
+        self.assertEqual(hojas['Productos'][1], [
+            self.producto.id, 'Dulces SA', 'Dulce de membrillo', 'Artesanal', 150.5, 'kg', 'mensual', 'Sí', '2007.99.00',
+        ])
+        self.assertEqual(hojas['Servicios'][1][:3], [self.mixta.id, 'Mixta SRL', 'Logística'])
+
+    def test_respeta_el_filtro(self):
+        hojas = self._libro(Empresa.objects.filter(tipo_empresa_valor='mixta'), ['razon_social'])
+
+        self.assertEqual(len(hojas['Empresas Producto']), 1)
+        self.assertEqual(len(hojas['Productos']), 1)
+        self.assertEqual(len(hojas['Servicios']), 2)
@@ -0,0 +1,77 @@
+import tempfile
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from apps.geografia.models import Provincia, Departamento
+from apps.empresas.models import TipoEmpresa, Rubro, Empresa, ExportacionPDF
+from apps.empresas.exportaciones import (
+    crear_exportacion, reclamar_siguiente_exportacion, ejecutar_exportacion, LimiteExportacionesError,
+    liberar_exportaciones_abandonadas
+)
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), EXPORTACIONES_PDF_MAX_POR_USUARIO=1)
+class ExportacionPDFTest(TestCase):
+    def setUp(self):
+        self.usuario = User.objects.create_user(
+            email='export@example.com',
+            nombre='Test',
+            apellido='User'
+        )
+        provincia = Provincia.objects.create(id='10', nombre='Catamarca')
+        departamento = Departamento.objects.create(id='10049', nombre='Capital', provincia=provincia)
+        self.empresa = Empresa.objects.create(
+            razon_social='Empresa Exportable',
+            cuit_cuil='20123456789',
+            direccion='Calle 123',
+            departamento=departamento,
+            id_rubro=Rubro.objects.create(nombre='Alimentos', tipo='producto'),
+            tipo_empresa=TipoEmpresa.objects.create(nombre='Producto'),
+            tipo_empresa_valor='producto',
+            id_usuario=self.usuario
+        )
+
+    def test_limite_por_usuario(self):
+        crear_exportacion(self.usuario, 'empresas', {'tipo': 'producto'})
+        with self.assertRaises(LimiteExportacionesError):
+            crear_exportacion(self.usuario, 'empresas', {'tipo': 'producto'})
+
+    def test_worker_genera_pdf(self):
+        exportacion = crear_exportacion(
+            self.usuario, 'seleccionadas',
+            {'empresas_ids': [self.empresa.id], 'campos': ['razon_social', 'cuit_cuil']}
+        )
+        reclamada = reclamar_siguiente_exportacion()
+        self.assertEqual(reclamada.id, exportacion.id)
+        self.assertEqual(reclamada.estado, 'procesando')
+
+        ejecutar_exportacion(reclamada)
+        exportacion.refresh_from_db()
+        self.assertEqual(exportacion.estado, 'completada', exportacion.error)
+        self.assertEqual(exportacion.progreso, 100)
+        with exportacion.archivo.open('rb') as archivo:
+            self.assertTrue(archivo.read(5).startswith(b'%PDF'))
+        self.assertIsNone(reclamar_siguiente_exportacion())
+
+    @override_settings(EXPORTACIONES_PDF_TIMEOUT_MINUTOS=30)
+    def test_liberar_abandonadas_segun_latido(self):
+        crear_exportacion(self.usuario, 'empresas', {'tipo': 'producto'})
+        reclamada = reclamar_siguiente_exportacion()
+        hace_una_hora = timezone.now() - timedelta(hours=1)
+
+        # Empezó hace una hora pero el worker sigue dando latidos
+        ExportacionPDF.objects.filter(pk=reclamada.pk).update(fecha_inicio=hace_una_hora)
+        self.assertEqual(liberar_exportaciones_abandonadas(), 0)
+
+        ExportacionPDF.objects.filter(pk=reclamada.pk).update(fecha_latido=hace_una_hora)
+        self.assertEqual(liberar_exportaciones_abandonadas(), 1)
+
+        # El worker que termina tarde no pisa el estado ni deja el archivo
+        ejecutar_exportacion(reclamada)
+        reclamada.refresh_from_db()
+        self.assertEqual(reclamada.estado, 'error')
+        self.assertFalse(reclamada.archivo)
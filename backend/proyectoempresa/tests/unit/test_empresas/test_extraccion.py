@@ -0,0 +1,145 @@
+import io
+from unittest import mock
+
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from apps.geografia.models import Provincia, Departamento
+from apps.empresas.models import TipoEmpresa, Rubro, Empresa, MatrizClasificacionExportador
+from apps.empresas.extraccion import PlanExtraccion, CAMPOS_EXPORTACION, escribir_csv, prefetch_matrices
+from apps.empresas.utils import (
+    generate_empresas_seleccionadas_pdf, generate_empresas_pdf, generate_empresas_aprobadas_pdf,
+    ids_empresas_seleccionadas, iterar_empresas_seleccionadas
+)
+
+User = get_user_model()
+
+
+class PlanExtraccionTest(TestCase):
+    def setUp(self):
+        usuario = User.objects.create_user(email='extraccion@example.com', nombre='Test', apellido='User')
+        provincia = Provincia.objects.create(id='10', nombre='Catamarca')
+        departamento = Departamento.objects.create(id='10049', nombre='Capital', provincia=provincia)
+        self.datos_base = dict(
+            direccion='Calle 123',
+            departamento=departamento,
+            id_rubro=Rubro.objects.create(nombre='Alimentos', tipo='producto'),
+            tipo_empresa=TipoEmpresa.objects.create(nombre='Producto'),
+            id_usuario=usuario
+        )
+        self.empresa = Empresa.objects.create(
+            razon_social='Empresa Test',
+            cuit_cuil='20123456789',
+            tipo_empresa_valor='producto',
+            correo='Contacto@Example.com',
+            actividades_promocion_internacional={
+                'ferias': [{'nombre': 'SIAL'}, {'nombre': 'Anuga'}],
+                'rondas': [],
+            },
+            **self.datos_base
+        )
+        self.matriz = MatrizClasificacionExportador.objects.create(empresa=self.empresa)
+
+    def _empresa_prefetch(self):
+        return Empresa.objects.select_related(
+            'tipo_empresa', 'id_rubro', 'departamento__provincia', 'municipio', 'localidad'
+        ).prefetch_related(prefetch_matrices()).get(pk=self.empresa.pk)
+
+    def test_valores_sin_consultas_extra(self):
+        plan = PlanExtraccion([
+            'razon_social', 'rubro_principal', 'categoria_matriz', 'provincia',
+            'ferias', 'rondas', 'fecha_creacion', 'municipio', 'correo', 'campo_inexistente',
+        ])
+        empresa = self._empresa_prefetch()
+
+        with self.assertNumQueries(0):
+            valores = plan.valores(empresa)
+
+        self.assertEqual(valores[:6], [
+            'Empresa Test', 'Alimentos', self.matriz.get_categoria_display(), 'Catamarca', 'SIAL, Anuga', '-',
+        ])
+        self.assertEqual(valores[6], self.empresa.fecha_creacion.strftime('%d/%m/%Y'))
+        self.assertEqual(valores[7:], ['-', 'Contacto@Example.com', '-'])
+
+        # Las columnas quedan agrupadas por sección con su índice en la fila
+        self.assertEqual([c['indice'] for c in plan.secciones['contacto']], [8])
+        self.assertEqual(plan.secciones['basica'][-1]['label'], 'Campo Inexistente')
+
+    def test_csv_usa_el_mismo_plan(self):
+        plan = PlanExtraccion(['razon_social', 'cuit_cuil', 'ferias'])
+        salida = io.StringIO()
+
+        filas = escribir_csv(salida, plan, [('Producto', self._empresa_prefetch())])
+
+        self.assertEqual(filas, 1)
+        self.assertEqual(salida.getvalue().splitlines(), [
+            'Tipo,Razón Social,CUIT/CUIL,Ferias',
+            'Producto,Empresa Test,20123456789,"SIAL, Anuga"',
+        ])
+
+    def test_seleccionadas_cantidad_fija_de_consultas(self):
+        campos = ['razon_social', 'cuit_cuil', 'correo', 'exporta']
+        ids = [self.empresa.id]
+
+        def generar(ids):
+            # IDs + (empresas + matrices) por cada tabla: basica, contacto y comercial
+            with self.assertNumQueries(1 + 3 * 2):
+                response = generate_empresas_seleccionadas_pdf(ids, campos)
+            response.file_to_stream.close()
+
+        generar(ids)
+        for i, tipo in enumerate(['producto', 'servicio', 'mixta', 'mixta', 'servicio']):
+            empresa = Empresa.objects.create(
+                razon_social=f'Otra {i}', cuit_cuil=f'2710000000{i}', tipo_empresa_valor=tipo, **self.datos_base
+            )
+            MatrizClasificacionExportador.objects.create(empresa=empresa)
+            ids.append(empresa.id)
+        generar(ids)
+
+        # Las empresas se recorren por bloques en el orden del reporte: tipo y razón social
+        with mock.patch('apps.empresas.utils.CHUNK_SIZE_QUERYSET', 2):
+            with self.assertNumQueries(1 + 3 * 2):  # IDs + 3 bloques de (empresas + matrices)
+                orden = [(tipo, empresa.razon_social) for tipo, empresa in iterar_empresas_seleccionadas(
+                    ids_empresas_seleccionadas(ids)
+                )]
+        self.assertEqual(orden, [
+            ('Mixta', 'Otra 2'), ('Mixta', 'Otra 3'), ('Producto', 'Empresa Test'),
+            ('Producto', 'Otra 0'), ('Servicio', 'Otra 1'), ('Servicio', 'Otra 4'),
+        ])
+
+    def _crear_otras(self, cantidad):
+        for i in range(cantidad):
+            empresa = Empresa.objects.create(
+                razon_social=f'Otra {i}', cuit_cuil=f'2710000000{i}', tipo_empresa_valor='producto', **self.datos_base
+            )
+            MatrizClasificacionExportador.objects.create(empresa=empresa)
+
+    def test_pdf_empresas_sin_consulta_de_matriz_por_fila(self):
+        empresas = Empresa.objects.filter(tipo_empresa_valor='producto').select_related(
+            'departamento', 'id_rubro', 'tipo_empresa'
+        )
+
+        def generar():
+            # empresas + matrices, sin importar la cantidad de filas
+            with self.assertNumQueries(2):
+                response = generate_empresas_pdf(empresas, [], 'producto')
+            response.file_to_stream.close()
+
+        generar()
+        self._crear_otras(4)
+        generar()
+
+    def test_pdf_aprobadas_sin_consulta_de_matriz_por_fila(self):
+        def generar():
+            empresas = Empresa.objects.select_related('tipo_empresa', 'id_rubro', 'departamento')
+            # 3 count() de la planificación + (empresas + matrices) por sección con filas
+            with self.assertNumQueries(3 + 3 * 2):
+                response = generate_empresas_aprobadas_pdf(
+                    empresas.filter(tipo_empresa_valor='producto'),
+                    empresas.filter(tipo_empresa_valor='servicio'),
+                    empresas.filter(tipo_empresa_valor='mixta'),
+                )
+            response.file_to_stream.close()
+
+        generar()
+        self._crear_otras(4)
+        generar()
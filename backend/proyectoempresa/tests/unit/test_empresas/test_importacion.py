@@ -0,0 +1,173 @@
+import shutil
+import tempfile
+import unittest
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from openpyxl import Workbook
+from rest_framework.test import APIClient
+
+from apps.core.models import RolUsuario
+from apps.empresas.importacion import reclamar_siguiente_importacion, ejecutar_importacion
+from apps.empresas.models import Empresa, ImportacionEmpresas, Rubro, TipoEmpresa
+from apps.geografia.models import Provincia, Departamento, Municipio
+
+User = get_user_model()
+
+ENCABEZADOS = (
+    'cuit_cuil;razon_social;direccion;departamento;municipio;rubro;tipo_empresa;'
+    'contacto_principal_nombre;contacto_principal_cargo;contacto_principal_telefono;'
+    'contacto_principal_email;exporta;importa'
+)
+
+
+def _csv(*filas):
+    contenido = '\n'.join([ENCABEZADOS, *filas]).encode('utf-8')
+    return SimpleUploadedFile('empresas.csv', contenido, content_type='text/csv')
+
+
+class ImportacionMixin:
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media)
+        self.override.enable()
+        provincia = Provincia.objects.create(id='10', nombre='Catamarca')
+        self.capital = Departamento.objects.create(id='10049', nombre='Capital', provincia=provincia)
+        Departamento.objects.create(id='10007', nombre='Belén', provincia=provincia)
+        Municipio.objects.create(id='100049', nombre='San Fernando del Valle de Catamarca', provincia=provincia, departamento=self.capital)
+        self.rubro = Rubro.objects.create(nombre='Alimentos')
+        self.admin = User.objects.create_superuser(email='admin@example.com', password='x', nombre='Admin', apellido='Test')
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(self.admin)
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media, ignore_errors=True)
+
+    def _procesar(self):
+        importacion = reclamar_siguiente_importacion()
+        return ejecutar_importacion(importacion)
+
+
+class ImportacionEmpresasTest(ImportacionMixin, TestCase):
+    def test_simulacion_y_confirmacion(self):
+        usuario = User.objects.create_user(email='existente@example.com', password='x', nombre='Eva', apellido='Paz')
+        Empresa.objects.create(
+            razon_social='Existente', cuit_cuil='20123456786', direccion='Calle 1', departamento=self.capital,
+            contacto_principal_nombre='Eva', contacto_principal_cargo='Dueña', contacto_principal_telefono='3834000000',
+            contacto_principal_email='existente@example.com', id_usuario=usuario, id_rubro=self.rubro,
+            tipo_empresa=TipoEmpresa.objects.create(nombre='Producto'), tipo_empresa_valor='producto',
+        )
+        archivo = _csv(
+            '30-71234567-1;Olivos SA;Ruta 38;capital;San Fernando del Valle de Catamarca;alimentos;Mixta;Ana;Gerente;(383) 412-3456;ana@example.com;Sí;no',
+            '20123456786;Existente Renombrada;Calle 1;Capital;;Alimentos;producto;Eva;Dueña;3834000000;existente@example.com;;',
+            '30712345679;CUIT Inválido;Calle 2;Capital;;Alimentos;producto;Juan;Socio;3834000000;juan@example.com;;',
+            '30712345671;Repetida;Calle 3;Belén;;Minería;servicio;Luis;Socio;3834000000;luis@example.com;Tal vez;',
+        )
+
+        respuesta = self.cliente.post('/api/empresas/importaciones/', {'archivo': archivo}, format='multipart')
+        self.assertEqual(respuesta.status_code, 202)
+        self.assertTrue(respuesta.data['simulacion'])
+
+        importacion = self._procesar()
+        self.assertEqual(importacion.estado, 'completada')
+        self.assertEqual(
+            (importacion.total_filas, importacion.validas, importacion.creadas, importacion.omitidas, importacion.con_errores),
+            (4, 2, 1, 1, 2)
+        )
+        self.assertEqual(Empresa.objects.count(), 1)
+        errores = {error['fila']: error['errores'] for error in importacion.errores}
+        self.assertEqual(set(errores[4]), {'cuit_cuil'})
+        self.assertEqual(set(errores[5]), {'cuit_cuil', 'rubro_principal', 'exporta'})
+
+        respuesta = self.cliente.post(f'/api/empresas/importaciones/{importacion.id}/confirmar/')
+        self.assertEqual(respuesta.status_code, 202)
+        importacion = self._procesar()
+        self.assertEqual((importacion.creadas, importacion.actualizadas, importacion.omitidas), (1, 0, 1))
+
+        empresa = Empresa.objects.get(cuit_cuil='30712345671')
+        self.assertEqual(empresa.tipo_empresa_valor, 'mixta')
+        self.assertEqual(empresa.municipio_id, '100049')
+        self.assertEqual(empresa.contacto_principal_telefono, '3834123456')
+        self.assertEqual((empresa.exporta, empresa.importa), ('Sí', False))
+        self.assertFalse(empresa.id_usuario.has_usable_password())
+        self.assertEqual(empresa.id_usuario.rol.nombre, 'Empresa')
+        self.assertEqual(Empresa.objects.get(cuit_cuil='20123456786').razon_social, 'Existente')
+
+        respuesta = self.cliente.post(f'/api/empresas/importaciones/{importacion.id}/confirmar/')
+        self.assertEqual(respuesta.status_code, 409)
+
+    def test_xlsx_con_encabezados_de_la_exportacion_actualiza_existentes(self):
+        libro = Workbook()
+        hoja = libro.active
+        hoja.append([
+            'CUIT/CUIL', 'Razón Social', 'Dirección', 'Departamento', 'Rubro Principal', 'Tipo de Empresa',
+            'Contacto Principal - Nombre', 'Contacto Principal - Cargo', 'Contacto Principal - Teléfono',
+            'Contacto Principal - Email', 'Fecha de Registro',
+        ])
+        hoja.append([30712345671, 'Olivos SA', 'Ruta 38', 'Capital', 'Alimentos', 'Solo Productos',
+                     'Ana', 'Gerente', 3834123456, 'ana@example.com', '01/01/2024'])
+        buffer = BytesIO()
+        libro.save(buffer)
+        contenido = buffer.getvalue()
+
+        def importar(**datos):
+            archivo = SimpleUploadedFile('empresas.xlsx', contenido)
+            datos = {'archivo': archivo, 'simulacion': 'false', **datos}
+            self.cliente.post('/api/empresas/importaciones/', datos, format='multipart')
+            return self._procesar()
+
+        self.assertEqual(importar().creadas, 1)
+        Empresa.objects.filter(cuit_cuil='30712345671').update(razon_social='Cambiada')
+        self.assertEqual(importar().omitidas, 1)
+        self.assertEqual(importar(actualizar_existentes='true').actualizadas, 1)
+        self.assertEqual(Empresa.objects.get(cuit_cuil='30712345671').razon_social, 'Olivos SA')
+        self.assertEqual(User.objects.filter(email='ana@example.com').count(), 1)
+
+    def test_requiere_permiso_de_importacion(self):
+        rol = RolUsuario.objects.create(nombre='Consulta', descripcion='Solo lectura')
+        usuario = User.objects.create_user(email='consulta@example.com', password='x', nombre='C', apellido='C', rol=rol)
+        self.cliente.force_authenticate(usuario)
+        respuesta = self.cliente.post('/api/empresas/importaciones/', {'archivo': _csv()}, format='multipart')
+        self.assertEqual(respuesta.status_code, 403)
+
+        rol.puede_importar_datos = True
+        rol.save()
+        respuesta = self.cliente.post(
+            '/api/empresas/importaciones/', {'archivo': SimpleUploadedFile('empresas.txt', b'x')}, format='multipart'
+        )
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(ImportacionEmpresas.objects.count(), 0)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'CargaCopy usa COPY de PostgreSQL')
+class ImportacionCopyTest(ImportacionMixin, TransactionTestCase):
+    """Carga con COPY + INSERT ... ON CONFLICT: cada importación en su propia transacción"""
+
+    def _importar(self, *filas, **datos):
+        datos = {'archivo': _csv(*filas), 'simulacion': 'false', **datos}
+        respuesta = self.cliente.post('/api/empresas/importaciones/', datos, format='multipart')
+        self.assertEqual(respuesta.status_code, 202)
+        importacion = self._procesar()
+        self.assertEqual(importacion.estado, 'completada')
+        return importacion.creadas, importacion.actualizadas, importacion.omitidas
+
+    def test_creadas_actualizadas_y_omitidas(self):
+        olivos = '30712345671;Olivos SA;Ruta 38;Capital;;Alimentos;producto;Ana;Gerente;3834123456;ana@example.com;;'
+        nogales = '20123456786;Nogales SRL;Calle 1;Belén;;Alimentos;servicio;Eva;Dueña;3834000000;eva@example.com;;'
+
+        self.assertEqual(self._importar(olivos), (1, 0, 0))
+        self.assertEqual(self._importar(olivos.replace('Olivos SA', 'Olivos Renombrada'), nogales), (1, 0, 1))
+        self.assertEqual(Empresa.objects.get(cuit_cuil='30712345671').razon_social, 'Olivos SA')
+
+        self.assertEqual(
+            self._importar(olivos.replace('Olivos SA', 'Olivos Renombrada'), nogales, actualizar_existentes='true'),
+            (0, 2, 0)
+        )
+        self.assertEqual(Empresa.objects.get(cuit_cuil='30712345671').razon_social, 'Olivos Renombrada')
+        self.assertEqual(Empresa.objects.get(cuit_cuil='20123456786').departamento_id, '10007')
+        self.assertEqual(Empresa.objects.count(), 2)
+        self.assertEqual(User.objects.filter(email__in=['ana@example.com', 'eva@example.com']).count(), 2)
@@ -0,0 +1,115 @@
+import tempfile
+
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from apps.geografia.models import Provincia, Departamento
+from apps.empresas.models import TipoEmpresa, Rubro, Empresa, PDFCache
+from apps.empresas.pdf_cache import obtener_pdf, desalojar, invalidar_version_datos, version_datos
+from apps.empresas.utils import generate_empresas_seleccionadas_pdf
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), EXPORTACIONES_PDF_CACHE_MAX_MB=100)
+class PDFCacheTest(TestCase):
+    def setUp(self):
+        usuario = User.objects.create_user(email='cache@example.com', nombre='Test', apellido='User')
+        provincia = Provincia.objects.create(id='10', nombre='Catamarca')
+        self.departamento = departamento = Departamento.objects.create(id='10049', nombre='Capital', provincia=provincia)
+        self.rubro = Rubro.objects.create(nombre='Alimentos', tipo='producto')
+        self.empresas = [
+            Empresa.objects.create(
+                razon_social=f'Empresa {i}',
+                cuit_cuil=f'2012345678{i}',
+                direccion='Calle 123',
+                departamento=departamento,
+                id_rubro=self.rubro,
+                tipo_empresa=TipoEmpresa.objects.create(nombre=f'Producto {i}'),
+                tipo_empresa_valor='producto',
+                id_usuario=usuario
+            )
+            for i in range(2)
+        ]
+        self.generados = 0
+
+    def _pedir(self, empresas_ids, campos=('razon_social', 'cuit_cuil')):
+        def generar():
+            self.generados += 1
+            return generate_empresas_seleccionadas_pdf(list(empresas_ids), list(campos))
+
+        response = obtener_pdf('seleccionadas', {'empresas_ids': empresas_ids, 'campos': list(campos)}, generar)
+        contenido = b''.join(response.streaming_content)
+        response.file_to_stream.close()
+        return contenido
+
+    def test_pedido_repetido_usa_cache(self):
+        ids = [empresa.id for empresa in self.empresas]
+        primero = self._pedir(ids)
+        # Mismos IDs en otro orden y repetidos: misma clave
+        segundo = self._pedir(list(reversed(ids)) + ids[:1])
+
+        self.assertTrue(primero.startswith(b'%PDF'))
+        self.assertEqual(primero, segundo)
+        self.assertEqual(self.generados, 1)
+        self.assertEqual(PDFCache.objects.get().accesos, 1)
+
+    def test_cambio_de_datos_invalida(self):
+        ids = [self.empresas[0].id]
+        self._pedir(ids)
+
+        # Cambio en la empresa (fecha_actualizacion) y en un catálogo (signals)
+        self.empresas[0].razon_social = 'Empresa Renombrada'
+        self.empresas[0].save()
+        self._pedir(ids)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.rubro.nombre = 'Bebidas'
+            self.rubro.save()
+        self._pedir(ids)
+
+        self.assertEqual(self.generados, 3)
+
+    def test_update_masivo_y_geografia_invalidan(self):
+        ids = [self.empresas[0].id]
+        self._pedir(ids)
+
+        # update() no toca fecha_actualizacion: quien lo usa invalida explícitamente
+        with self.captureOnCommitCallbacks(execute=True):
+            Empresa.objects.filter(pk=self.empresas[0].pk).update(razon_social='Empresa Fusionada')
+            invalidar_version_datos()
+        self._pedir(ids)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.departamento.nombre = 'Capital Renombrada'
+            self.departamento.save()
+        self._pedir(ids)
+
+        self.assertEqual(self.generados, 3)
+
+    def test_version_cambia_al_confirmar_y_no_depende_de_la_cache(self):
+        inicial = version_datos()
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                invalidar_version_datos()
+                # Dentro de la transacción del cambio la versión todavía no se ve
+                self.assertEqual(version_datos(), inicial)
+        nueva = version_datos()
+        self.assertNotEqual(nueva, inicial)
+
+        # Vaciar la caché no vuelve a una versión anterior
+        cache.clear()
+        self.assertEqual(version_datos(), nueva)
+
+    def test_desalojo_lru(self):
+        self._pedir([self.empresas[0].id])
+        self._pedir([self.empresas[1].id])
+        self._pedir([self.empresas[0].id])  # la primera pasa a ser la más reciente
+
+        entradas = list(PDFCache.objects.order_by('ultimo_acceso'))
+        self.assertEqual(len(entradas), 2)
+        eliminadas = desalojar(max_bytes=entradas[1].tamano)
+
+        self.assertEqual(eliminadas, 1)
+        restante = PDFCache.objects.get()
+        self.assertEqual(restante.pk, entradas[1].pk)
+        self.assertEqual(restante.accesos, 1)
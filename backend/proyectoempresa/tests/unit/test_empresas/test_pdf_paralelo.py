@@ -0,0 +1,153 @@
+import io
+import unittest
+
+from pypdf import PdfReader
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.contrib.auth import get_user_model
+from apps.geografia.models import Provincia, Departamento
+from apps.empresas.models import TipoEmpresa, Rubro, Empresa
+from apps.empresas.pdf_paralelo import renderizar_partes, unir_pdfs, eliminar_archivos
+from apps.empresas.utils import (
+    planificar_partes_aprobadas, renderizar_parte_aprobadas, combinar_partes, generate_empresas_aprobadas_pdf
+)
+
+User = get_user_model()
+
+
+class EmpresasAprobadasMixin:
+    def setUp(self):
+        usuario = User.objects.create_user(email='paralelo@example.com', nombre='Test', apellido='User')
+        provincia = Provincia.objects.create(id='10', nombre='Catamarca')
+        departamento = Departamento.objects.create(id='10049', nombre='Capital', provincia=provincia)
+        rubro = Rubro.objects.create(nombre='Alimentos', tipo='producto')
+        tipo = TipoEmpresa.objects.create(nombre='Producto')
+        for i, valor in enumerate(['producto', 'producto', 'mixta']):
+            Empresa.objects.create(
+                razon_social=f'Empresa {i}',
+                cuit_cuil=f'2012345678{i}',
+                direccion='Calle 123',
+                departamento=departamento,
+                id_rubro=rubro,
+                tipo_empresa=tipo,
+                tipo_empresa_valor=valor,
+                id_usuario=usuario
+            )
+
+    def _empresas_por_tipo(self):
+        empresas = Empresa.objects.select_related('tipo_empresa', 'id_rubro', 'departamento')
+        return [
+            ('Mixta', empresas.filter(tipo_empresa_valor='mixta')),
+            ('Producto', empresas.filter(tipo_empresa_valor='producto')),
+            ('Servicio', empresas.filter(tipo_empresa_valor='servicio')),
+        ]
+
+
+class PDFParaleloTest(EmpresasAprobadasMixin, TestCase):
+    def _ids(self, *razones_sociales):
+        return [Empresa.objects.get(razon_social=razon_social).id for razon_social in razones_sociales]
+
+    def test_planificacion_por_rangos(self):
+        partes = planificar_partes_aprobadas(self._empresas_por_tipo(), filas_por_parte=2)
+        # 3 empresas en rangos de 2 -> 2 partes por cada una de las 3 secciones
+        self.assertEqual(len(partes), 6)
+        self.assertEqual([parte['filas'] for parte in partes], [2, 1] * 3)
+        # La primera parte combina la mixta con la primera empresa de producto
+        rangos = partes[0]['segmentos'][0]['rangos']
+        self.assertEqual([(tipo, ids) for tipo, _, ids in rangos],
+                         [('Mixta', self._ids('Empresa 2')), ('Producto', self._ids('Empresa 0'))])
+        self.assertTrue(partes[0]['inicio_documento'])
+        self.assertTrue(partes[-1]['fin_documento'])
+        self.assertEqual(sum(parte['segmentos'][0]['inicio_seccion'] for parte in partes), 3)
+
+        # En un solo proceso cada sección queda en un segmento con los rangos contiguos unidos
+        unica = combinar_partes(partes)
+        self.assertEqual([segmento['seccion'] for segmento in unica['segmentos']], ['basico', 'contacto', 'comercial'])
+        self.assertEqual([(tipo, ids) for tipo, _, ids in unica['segmentos'][0]['rangos']],
+                         [('Mixta', self._ids('Empresa 2')), ('Producto', self._ids('Empresa 0', 'Empresa 1'))])
+
+    def test_rangos_fijos_ante_cambios_durante_el_render(self):
+        partes = planificar_partes_aprobadas(self._empresas_por_tipo(), filas_por_parte=2)
+        # Una empresa eliminada y otra nueva después de planificar no desplazan los rangos
+        Empresa.objects.filter(razon_social='Empresa 0').delete()
+        Empresa.objects.create(**{
+            **Empresa.objects.values('direccion', 'departamento_id', 'id_rubro_id', 'tipo_empresa_id', 'id_usuario_id').first(),
+            'razon_social': 'Empresa 00', 'cuit_cuil': '20999999990', 'tipo_empresa_valor': 'producto',
+        })
+        rutas = renderizar_partes(renderizar_parte_aprobadas, partes[:2], procesos=1)
+        try:
+            textos = [' '.join(pagina.extract_text() for pagina in PdfReader(ruta).pages) for ruta in rutas]
+        finally:
+            eliminar_archivos(rutas)
+
+        self.assertIn('Empresa 2', textos[0])
+        self.assertNotIn('Empresa 0', ' '.join(textos))
+        self.assertIn('Empresa 1', textos[1])
+        self.assertNotIn('Empresa 2', textos[1])
+
+    def test_union_de_partes(self):
+        partes = planificar_partes_aprobadas(self._empresas_por_tipo(), filas_por_parte=2)
+        rutas = renderizar_partes(renderizar_parte_aprobadas, partes, procesos=1)
+        destino = io.BytesIO()
+        try:
+            paginas = unir_pdfs(rutas, destino)
+        finally:
+            eliminar_archivos(rutas)
+
+        reader = PdfReader(destino)
+        self.assertEqual(paginas, len(partes))
+        self.assertEqual(len(reader.pages), len(partes))
+        self.assertIn('Reporte de Empresas Aprobadas', reader.pages[0].extract_text())
+        self.assertNotIn('Página', reader.pages[0].extract_text())
+        self.assertIn('San Martín 320', reader.pages[-1].extract_text())
+
+    def test_campos_seleccionados_quitan_columnas(self):
+        empresas = {tipo.lower(): queryset for tipo, queryset in self._empresas_por_tipo()}
+
+        def texto(campos):
+            response = generate_empresas_aprobadas_pdf(
+                empresas['producto'], empresas['servicio'], empresas['mixta'], campos
+            )
+            contenido = b''.join(response.streaming_content)
+            response.file_to_stream.close()
+            return ' '.join(pagina.extract_text() for pagina in PdfReader(io.BytesIO(contenido)).pages)
+
+        completo = texto(None)
+        self.assertIn('Certif. MiPYME', completo)
+        self.assertIn('Importa', completo)
+        reducido = texto(['razon_social', 'exporta'])
+        self.assertIn('Destino Export.', reducido)
+        self.assertNotIn('Certif. MiPYME', reducido)
+        self.assertNotIn('Importa', reducido)
+
+
+class PDFParaleloProcesosTest(EmpresasAprobadasMixin, TransactionTestCase):
+    """El render en varios procesos debe dar el mismo documento que el serial"""
+
+    @classmethod
+    def setUpClass(cls):
+        # Se evalúa con la base de test ya creada: la NAME configurada no dice si es en memoria
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            raise unittest.SkipTest('Los procesos del pool no ven una base sqlite en memoria')
+        super().setUpClass()
+
+    def _generar(self, procesos):
+        empresas = {tipo.lower(): queryset for tipo, queryset in self._empresas_por_tipo()}
+        response = generate_empresas_aprobadas_pdf(
+            empresas['producto'], empresas['servicio'], empresas['mixta'],
+            ['razon_social', 'importa'], procesos=procesos
+        )
+        contenido = b''.join(response.streaming_content)
+        response.file_to_stream.close()
+        # La fecha de generación puede cambiar de minuto entre un render y otro
+        return [
+            '\n'.join(linea for linea in pagina.extract_text().splitlines() if not linea.startswith('Generado el'))
+            for pagina in PdfReader(io.BytesIO(contenido)).pages
+        ]
+
+    def test_procesos_igual_que_serial(self):
+        serial = self._generar(1)
+        paralelo = self._generar(2)
+        self.assertEqual(len(paralelo), len(serial))
+        self.assertEqual(paralelo, serial)
+        self.assertNotIn('Certif. MiPYME', ' '.join(paralelo))
@@ -0,0 +1,38 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.geografia.models import Provincia, Departamento, Localidad
+from apps.geografia.nomenclador import normalizar_nombre, obtener_nomenclador
+
+
+class NomencladorTest(TestCase):
+    def setUp(self):
+        provincia = Provincia.objects.create(id='10', nombre='Catamarca')
+        self.capital = Departamento.objects.create(id='10049', nombre='Capital', provincia=provincia)
+        self.valle = Departamento.objects.create(id='10070', nombre='Valle Viejo', provincia=provincia)
+        Localidad.objects.create(id='10049030', nombre='San Fernando del Valle de Catamarca', provincia=provincia, departamento=self.capital)
+        Localidad.objects.create(id='10070010', nombre='San Isidro', provincia=provincia, departamento=self.valle)
+        Localidad.objects.create(id='10049099', nombre='San Isidro', provincia=provincia, departamento=self.capital)
+
+    def test_resuelve_por_id_y_nombre_normalizado_sin_consultas(self):
+        nomenclador = obtener_nomenclador()
+        self.assertEqual(normalizar_nombre('  Fray Mamerto  ESQUIÚ '), 'fray mamerto esquiu')
+
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(nomenclador.resolver('departamento', '10049').nombre, 'Capital')
+            self.assertEqual(nomenclador.resolver('departamento', 'VALLE viejo').id, '10070')
+            self.assertEqual(nomenclador.resolver('localidad', 'san isidro', departamento_id='10070').id, '10070010')
+            self.assertIsNone(nomenclador.resolver('departamento', 'Ambato'))
+            self.assertEqual(
+                nomenclador.nombres('departamento', ['10049', '10070', '99999']),
+                {'10049': 'Capital', '10070': 'Valle Viejo'},
+            )
+        self.assertEqual(len(consultas), 0)
+
+    def test_se_invalida_al_cambiar_las_tablas(self):
+        obtener_nomenclador()
+        self.valle.nombre = 'Valle Viejo Norte'
+        self.valle.save()
+
+        self.assertEqual(obtener_nomenclador().resolver('departamento', '10070').nombre, 'Valle Viejo Norte')
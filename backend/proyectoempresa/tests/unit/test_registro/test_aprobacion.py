@@ -0,0 +1,61 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.empresas.models import ProductoEmpresa, PosicionArancelaria
+from apps.geografia.models import Provincia, Departamento
+from apps.geografia.nomenclador import obtener_nomenclador
+from apps.registro.models import SolicitudRegistro
+from apps.registro.views import crear_empresa_desde_solicitud
+
+User = get_user_model()
+
+
+class CrearEmpresaDesdeSolicitudTest(TestCase):
+    def setUp(self):
+        provincia = Provincia.objects.create(id='10', nombre='Catamarca')
+        Departamento.objects.create(id='10049', nombre='Capital', provincia=provincia)
+        self.admin = User.objects.create_user(email='admin@example.com', nombre='Admin', apellido='Test')
+        # El nomenclador se carga una vez por proceso, no en cada aprobación
+        obtener_nomenclador()
+
+    def _solicitud(self, productos):
+        return SolicitudRegistro.objects.create(
+            razon_social='Dulces del Valle SRL',
+            cuit_cuil='30712345678',
+            direccion='Calle 123',
+            departamento='Capital',
+            telefono='3834000000',
+            correo='dulces@example.com',
+            nombre_contacto='Ana',
+            tipo_empresa='producto',
+            rubro_principal='Alimentos',
+            productos=productos,
+        )
+
+    def test_productos_en_lote_con_consultas_constantes(self):
+        productos = [
+            {'nombre': f'Producto {i}', 'descripcion': 'Artesanal', 'posicion_arancelaria': f'2007.99.{i:02d}'}
+            for i in range(50)
+        ]
+        productos.append({'nombre': 'Sin posición', 'descripcion': 'Artesanal'})
+        solicitud = self._solicitud(productos)
+
+        with CaptureQueriesContext(connection) as consultas:
+            empresa = crear_empresa_desde_solicitud(solicitud, aprobado_por=self.admin)
+
+        self.assertEqual(ProductoEmpresa.objects.filter(empresa=empresa).count(), 51)
+        self.assertEqual(PosicionArancelaria.objects.filter(producto__empresa=empresa).count(), 50)
+        self.assertEqual(empresa.creado_por, self.admin)
+        # Sin contar los savepoints, la cantidad no depende de los productos
+        sentencias = [q['sql'] for q in consultas.captured_queries if 'SAVEPOINT' not in q['sql']]
+        self.assertLessEqual(len(sentencias), 20)
+
+    def test_error_no_deja_empresa_a_medio_crear(self):
+        solicitud = self._solicitud([{'nombre': 'Producto', 'descripcion': 'x', 'capacidad_productiva': 'mucha'}])
+
+        with self.assertRaises(ValueError):
+            crear_empresa_desde_solicitud(solicitud)
+
+        self.assertFalse(User.objects.filter(email='dulces@example.com').exists())
@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+from django.core import mail
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.registro.models import SolicitudRegistro, NotificacionRegistro, EmailSalida
+from apps.registro.bandeja_salida import encolar_email, reclamar_emails, enviar_emails, liberar_emails_abandonados
+
+
+class BandejaSalidaTest(TestCase):
+    def setUp(self):
+        self.solicitud = SolicitudRegistro.objects.create(
+            razon_social='Dulces del Valle SRL',
+            cuit_cuil='30712345678',
+            direccion='Calle 123',
+            departamento='Capital',
+            telefono='3834000000',
+            correo='dulces@example.com',
+            tipo_empresa='producto',
+            rubro_principal='Alimentos',
+        )
+
+    def _procesar(self):
+        return enviar_emails(reclamar_emails(50))
+
+    def test_rollback_descarta_el_email(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                encolar_email('aprobacion', solicitud=self.solicitud)
+                raise RuntimeError('falla el evento')
+
+        self.assertFalse(EmailSalida.objects.exists())
+        self.assertFalse(NotificacionRegistro.objects.exists())
+
+    def test_worker_envia_y_actualiza_notificacion(self):
+        encolar_email('aprobacion', solicitud=self.solicitud)
+        self.assertEqual(len(mail.outbox), 0)
+
+        self._procesar()
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['dulces@example.com'])
+        email = EmailSalida.objects.get()
+        self.assertEqual((email.estado, email.intentos), ('enviado', 1))
+        notificacion = NotificacionRegistro.objects.get()
+        self.assertTrue(notificacion.email_enviado)
+        self.assertIn('Dulces del Valle SRL', notificacion.renderizar_html())
+
+    @override_settings(
+        EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+        EMAIL_HOST='127.0.0.1', EMAIL_PORT=1, EMAIL_USE_TLS=False, EMAIL_TIMEOUT=1,
+        EMAILS_REINTENTO_BASE_SEGUNDOS=60, EMAILS_MAX_INTENTOS=2,
+    )
+    def test_reintenta_con_espera_exponencial(self):
+        encolar_email('rechazo', solicitud=self.solicitud)
+
+        self._procesar()
+        email = EmailSalida.objects.get()
+        self.assertEqual((email.estado, email.intentos), ('pendiente', 1))
+        self.assertGreater(email.proximo_intento, timezone.now() + timedelta(seconds=50))
+        self.assertEqual(self._procesar(), [])  # todavía no venció la espera
+
+        EmailSalida.objects.update(proximo_intento=timezone.now())
+        self._procesar()
+        email.refresh_from_db()
+        self.assertEqual((email.estado, email.intentos), ('error', 2))
+        self.assertFalse(NotificacionRegistro.objects.get().email_enviado)
+
+    @override_settings(EMAILS_MAX_INTENTOS=2, EMAILS_TIMEOUT_MINUTOS=10)
+    def test_abandonados_no_se_reencolan_para_siempre(self):
+        encolar_email('aprobacion', solicitud=self.solicitud)
+
+        def abandonar():
+            # El worker reclama el email y se cae antes de registrar el resultado
+            EmailSalida.objects.update(proximo_intento=timezone.now())
+            reclamar_emails(50)
+            EmailSalida.objects.update(fecha_intento=timezone.now() - timedelta(minutes=11))
+            self.assertEqual(liberar_emails_abandonados(), 1)
+            return EmailSalida.objects.get()
+
+        email = abandonar()
+        self.assertEqual((email.estado, email.intentos), ('pendiente', 1))
+        self.assertGreater(email.proximo_intento, timezone.now())
+
+        email = abandonar()
+        self.assertEqual((email.estado, email.intentos), ('error', 2))
+        self.assertFalse(NotificacionRegistro.objects.get().email_enviado)
+        self.assertEqual(liberar_emails_abandonados(), 0)
@@ -0,0 +1,67 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from apps.core.validators import normalizar_cuit, cuit_verificador_valido
+from apps.registro.models import SolicitudRegistro
+from apps.registro.serializers import SolicitudRegistroCreateSerializer
+
+
+class CuitDisponibleTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.cliente = APIClient()
+
+    def _solicitud(self, cuit, estado='pendiente'):
+        return SolicitudRegistro.objects.create(
+            razon_social='Empresa',
+            cuit_cuil=cuit,
+            direccion='Calle 123',
+            departamento='Capital',
+            telefono='3834000000',
+            correo='empresa@example.com',
+            nombre_contacto='Ana',
+            tipo_empresa='producto',
+            rubro_principal='Alimentos',
+            estado=estado,
+        )
+
+    def test_normalizacion_y_digito_verificador(self):
+        self.assertEqual(normalizar_cuit(' 20-12345678-6 '), '20123456786')
+        self.assertTrue(cuit_verificador_valido('20123456786'))
+        self.assertFalse(cuit_verificador_valido('20123456789'))
+        self.assertEqual(self._solicitud('20-12345678-6').cuit_normalizado, '20123456786')
+
+    def test_consulta_publica(self):
+        self._solicitud('20-12345678-6', estado='aprobada')
+
+        respuesta = self.cliente.get('/api/registro/cuit-disponible/', {'cuit': '20123456786'})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data, {'cuit': '20123456786', 'valido': True, 'disponible': False})
+
+        respuesta = self.cliente.get('/api/registro/cuit-disponible/', {'cuit': '27-00000000-6'})
+        self.assertTrue(respuesta.data['disponible'])
+        respuesta = self.cliente.get('/api/registro/cuit-disponible/', {'cuit': '20123456789'})
+        self.assertEqual(respuesta.data['valido'], False)
+        self.assertEqual(self.cliente.get('/api/registro/cuit-disponible/', {'cuit': '123'}).status_code, 400)
+
+    def test_consulta_limitada_por_ip(self):
+        from rest_framework.settings import api_settings
+        limite = int(api_settings.DEFAULT_THROTTLE_RATES['cuit_disponible'].split('/')[0])
+        for _ in range(limite):
+            self.cliente.get('/api/registro/cuit-disponible/', {'cuit': '20123456786'})
+        respuesta = self.cliente.get('/api/registro/cuit-disponible/', {'cuit': '20123456786'})
+        self.assertEqual(respuesta.status_code, 429)
+
+    def test_registro_duplicado_se_valida_contra_la_base(self):
+        self._solicitud('20-12345678-6', estado='aprobada')
+        serializer = SolicitudRegistroCreateSerializer()
+
+        # Aunque el set de Redis no tenga el CUIT todavía, el registro se rechaza
+        with mock.patch('apps.registro.cuits.cuit_registrado', return_value=False):
+            with self.assertRaisesMessage(ValidationError, 'Ya existe una empresa registrada'):
+                serializer.validate_cuit_cuil('20-12345678-6')
+            self.assertEqual(serializer.validate_cuit_cuil('27-00000000-6'), '27000000006')
@@ -0,0 +1,68 @@
+import smtplib
+
+from django.core.mail import EmailMessage
+from django.core.mail.backends.base import BaseEmailBackend
+from django.test import TestCase, override_settings
+
+from apps.registro.services import enviar_emails_en_lote
+
+
+class BackendInestable(BaseEmailBackend):
+    """Backend de prueba: corta la conexión una vez y rechaza ciertas direcciones"""
+    aperturas = 0
+    enviados = []
+    cortar_en = None
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.abierta = False
+
+    def open(self):
+        if self.abierta:
+            return False
+        BackendInestable.aperturas += 1
+        self.abierta = True
+        return True
+
+    def close(self):
+        self.abierta = False
+
+    def send_messages(self, email_messages):
+        for mensaje in email_messages:
+            if mensaje.to[0] == BackendInestable.cortar_en:
+                BackendInestable.cortar_en = None
+                self.abierta = False
+                raise smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+            if mensaje.to[0].startswith('rechazado'):
+                raise smtplib.SMTPRecipientsRefused({mensaje.to[0]: (550, b'5.1.1 User unknown')})
+            BackendInestable.enviados.append(mensaje.to[0])
+        return len(email_messages)
+
+
+@override_settings(EMAIL_BACKEND=f'{__name__}.BackendInestable')
+class EnvioEnLoteTest(TestCase):
+    def setUp(self):
+        BackendInestable.aperturas = 0
+        BackendInestable.enviados = []
+        BackendInestable.cortar_en = None
+
+    def _mensajes(self, *destinatarios):
+        return [EmailMessage('Asunto', 'Cuerpo', 'noreply@example.com', [email]) for email in destinatarios]
+
+    def test_una_conexion_por_lote(self):
+        errores = enviar_emails_en_lote(self._mensajes(*[f'empresa{i}@example.com' for i in range(5)]), tamano_lote=2)
+
+        self.assertEqual(errores, [None] * 5)
+        self.assertEqual(BackendInestable.aperturas, 3)
+
+    def test_reconecta_y_aisla_rechazos(self):
+        BackendInestable.cortar_en = 'b@example.com'
+        errores = enviar_emails_en_lote(
+            self._mensajes('a@example.com', 'b@example.com', 'rechazado@example.com', 'c@example.com')
+        )
+
+        self.assertEqual(BackendInestable.enviados, ['a@example.com', 'b@example.com', 'c@example.com'])
+        self.assertEqual(BackendInestable.aperturas, 2)
+        self.assertIsNone(errores[1])
+        self.assertIn('5.1.1', errores[2])
+        self.assertIsNone(errores[3])
@@ -0,0 +1,65 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from apps.geografia.models import Provincia, Departamento
+from apps.registro.aprobacion import procesar_lote
+from apps.registro.models import SolicitudRegistro, EmailSalida
+
+User = get_user_model()
+
+
+@override_settings(REGISTRO_LOTE_TAMANO=2)
+class ProcesarLoteTest(TestCase):
+    def setUp(self):
+        provincia = Provincia.objects.create(id='10', nombre='Catamarca')
+        Departamento.objects.create(id='10049', nombre='Capital', provincia=provincia)
+        self.admin = User.objects.create_user(email='admin@example.com', nombre='Admin', apellido='Test')
+
+    def _solicitud(self, i, estado='pendiente'):
+        return SolicitudRegistro.objects.create(
+            razon_social=f'Empresa {i}',
+            cuit_cuil=f'3071234{i:04d}',
+            direccion='Calle 123',
+            departamento='Capital',
+            telefono='3834000000',
+            correo=f'empresa{i}@example.com',
+            nombre_contacto='Ana',
+            tipo_empresa='producto',
+            rubro_principal='Alimentos',
+            estado=estado,
+        )
+
+    def test_aprobar_lote_devuelve_un_resultado_por_id(self):
+        pendientes = [self._solicitud(i) for i in range(3)]
+        rechazada = self._solicitud(3, estado='rechazada')
+        ids = [p.id for p in pendientes] + [rechazada.id, 999999]
+
+        resultados = procesar_lote('aprobar', ids, self.admin, 'Lote de prueba')
+
+        self.assertEqual([r['id'] for r in resultados], ids)
+        self.assertEqual(
+            [r['resultado'] for r in resultados],
+            ['aprobada', 'aprobada', 'aprobada', 'error', 'no_encontrada'],
+        )
+        for solicitud in pendientes:
+            solicitud.refresh_from_db()
+            self.assertEqual(solicitud.estado, 'aprobada')
+            self.assertEqual(solicitud.aprobado_por, self.admin)
+            self.assertIsNotNone(solicitud.empresa_creada_id)
+        # Los emails quedan en la bandeja de salida, no se envían durante el lote
+        self.assertEqual(EmailSalida.objects.filter(tipo='aprobacion', estado='pendiente').count(), 3)
+
+        # Repetir el lote no crea empresas de nuevo
+        resultados = procesar_lote('aprobar', ids[:3], self.admin)
+        self.assertEqual({r['resultado'] for r in resultados}, {'omitida'})
+
+    def test_rechazar_lote_solo_pendientes(self):
+        pendiente = self._solicitud(0)
+        aprobada = self._solicitud(1, estado='aprobada')
+
+        resultados = procesar_lote('rechazar', [pendiente.id, aprobada.id], self.admin)
+
+        self.assertEqual([r['resultado'] for r in resultados], ['rechazada', 'error'])
+        pendiente.refresh_from_db()
+        self.assertEqual(pendiente.estado, 'rechazada')
+        self.assertEqual(EmailSalida.objects.filter(tipo='rechazo').count(), 1)
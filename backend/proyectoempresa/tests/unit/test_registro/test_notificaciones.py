@@ -0,0 +1,53 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.registro.models import SolicitudRegistro, NotificacionRegistro
+from apps.registro.notificaciones import comprimir_contexto, descomprimir_contexto, purgar_notificaciones_vencidas
+from apps.registro.services import _datos_email_aprobacion
+
+
+class NotificacionCompactaTest(TestCase):
+    def setUp(self):
+        self.solicitud = SolicitudRegistro.objects.create(
+            razon_social='Dulces del Valle SRL',
+            cuit_cuil='30712345678',
+            direccion='Calle 123',
+            departamento='Capital',
+            telefono='3834000000',
+            correo='dulces@example.com',
+            tipo_empresa='producto',
+            rubro_principal='Alimentos',
+            fecha_aprobacion=timezone.now(),
+        )
+
+    def test_contexto_sin_modelos_y_con_fechas(self):
+        contexto = {'solicitud': self.solicitud, 'razon_social': 'Dulces', 'fecha': self.solicitud.fecha_aprobacion}
+
+        datos = descomprimir_contexto(comprimir_contexto(contexto))
+
+        self.assertEqual(datos, {'razon_social': 'Dulces', 'fecha': self.solicitud.fecha_aprobacion})
+
+    def test_renderiza_a_demanda_y_purga_vencidas(self):
+        asunto, _, template, contexto = _datos_email_aprobacion(self.solicitud)
+        notificacion = NotificacionRegistro(
+            solicitud=self.solicitud, tipo='aprobacion', asunto=asunto, email_enviado=True, fecha_envio=timezone.now()
+        )
+        notificacion.guardar_contexto(template, contexto)
+        notificacion.save()
+
+        notificacion.refresh_from_db()
+        self.assertEqual(notificacion.mensaje, '')
+        html = notificacion.renderizar_html()
+        self.assertIn('Dulces del Valle SRL', html)
+        self.assertLess(len(notificacion.contexto), len(html) // 10)
+
+        with override_settings(NOTIFICACIONES_REGISTRO_RETENCION_DIAS=30):
+            self.assertEqual(purgar_notificaciones_vencidas(), 0)
+            NotificacionRegistro.objects.filter(pk=notificacion.pk).update(fecha_envio=timezone.now() - timedelta(days=31))
+            self.assertEqual(purgar_notificaciones_vencidas(), 1)
+
+        notificacion.refresh_from_db()
+        self.assertIsNone(notificacion.contexto)
+        self.assertEqual((notificacion.asunto, notificacion.email_enviado), (asunto, True))
@@ -0,0 +1,64 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.geografia.models import Provincia, Departamento, Localidad
+from apps.geografia.nomenclador import obtener_nomenclador
+from apps.registro.models import SolicitudRegistro
+from apps.registro.serializers import SolicitudRegistroListSerializer, SolicitudRegistroSerializer
+
+
+class NombresGeografiaEnLoteTest(TestCase):
+    def setUp(self):
+        self.provincia = Provincia.objects.create(id='10', nombre='Catamarca')
+        capital = Departamento.objects.create(id='10049', nombre='Capital', provincia=self.provincia)
+        Departamento.objects.create(id='10070', nombre='Valle Viejo', provincia=self.provincia)
+        Localidad.objects.create(id='10049030', nombre='San Fernando del Valle de Catamarca', provincia=self.provincia, departamento=capital)
+        obtener_nomenclador()
+
+    def _solicitud(self, i, departamento, localidad=None):
+        return SolicitudRegistro.objects.create(
+            razon_social=f'Empresa {i}',
+            cuit_cuil=f'3071234{i:04d}',
+            direccion='Calle 123',
+            departamento=departamento,
+            localidad=localidad,
+            telefono='3834000000',
+            correo=f'empresa{i}@example.com',
+            nombre_contacto='Ana',
+            tipo_empresa='producto',
+            rubro_principal='Alimentos',
+        )
+
+    def test_una_pagina_no_consulta_por_fila(self):
+        for i in range(30):
+            self._solicitud(i, '10049' if i % 2 else 'Valle Viejo', localidad='10049030' if i % 3 else None)
+
+        with CaptureQueriesContext(connection) as consultas:
+            datos = SolicitudRegistroListSerializer(SolicitudRegistro.objects.order_by('id'), many=True).data
+
+        # Solo la consulta de las solicitudes: los nombres salen del nomenclador
+        self.assertEqual(len(consultas), 1)
+        self.assertEqual(datos[0]['departamento_nombre'], 'Valle Viejo')
+        self.assertEqual(datos[1]['departamento_nombre'], 'Capital')
+        self.assertEqual(datos[1]['localidad_nombre'], 'San Fernando del Valle de Catamarca')
+        self.assertIsNone(datos[0]['localidad_nombre'])
+
+    def test_ids_fuera_del_nomenclador_se_buscan_en_un_in_bulk(self):
+        # bulk_create no dispara signals: el nomenclador del proceso no los conoce
+        Departamento.objects.bulk_create([
+            Departamento(id=f'1009{i}', nombre=f'Nuevo {i}', provincia=self.provincia) for i in range(5)
+        ])
+        for i in range(10):
+            self._solicitud(i, f'1009{i % 5}')
+        self._solicitud(10, 'Texto libre')
+
+        with CaptureQueriesContext(connection) as consultas:
+            datos = SolicitudRegistroSerializer(
+                SolicitudRegistro.objects.prefetch_related('documentos', 'notificaciones').order_by('id'), many=True
+            ).data
+
+        # Solicitudes, dos prefetch y un único in_bulk de departamentos
+        self.assertEqual(len(consultas), 4)
+        self.assertEqual([fila['departamento_nombre'] for fila in datos[:5]], [f'Nuevo {i}' for i in range(5)])
+        self.assertEqual(datos[10]['departamento_nombre'], 'Texto libre')
@@ -0,0 +1,98 @@
+import smtplib
+
+from django.core.mail import EmailMessage
+from django.test import TestCase, override_settings
+
+from apps.registro.models import EmailSuprimido
+from apps.registro.rebotes import procesar_rebote
+from apps.registro.services import (
+    ERROR_SUPRIMIDO, enviar_emails_en_lote, emails_suprimidos, es_direccion_inexistente
+)
+
+from .test_envio_lote import BackendInestable
+
+REBOTE = b"""From: Mail Delivery Subsystem <mailer-daemon@googlemail.com>
+To: noreply@example.com
+Subject: Delivery Status Notification (Failure)
+MIME-Version: 1.0
+Content-Type: multipart/report; report-type=delivery-status; boundary="limite"
+
+--limite
+Content-Type: text/plain
+
+No se pudo entregar el mensaje.
+
+--limite
+Content-Type: message/delivery-status
+
+Reporting-MTA: dns; googlemail.com
+
+Final-Recipient: rfc822; Perdido@Example.com
+Action: failed
+Status: 5.1.1
+Diagnostic-Code: smtp; 550 5.1.1 The email account does not exist
+
+Final-Recipient: rfc822; lleno@example.com
+Action: delayed
+Status: 4.2.2
+
+--limite--
+"""
+
+
+class BackendSinCuota(BackendInestable):
+    """Backend de prueba: el servidor responde 550 por motivos que no son del destinatario"""
+
+    def send_messages(self, email_messages):
+        for mensaje in email_messages:
+            if mensaje.to[0].startswith('cuota'):
+                raise smtplib.SMTPDataError(550, b'5.4.5 Daily sending quota exceeded')
+            if mensaje.to[0].startswith('remitente'):
+                raise smtplib.SMTPRecipientsRefused({mensaje.to[0]: (550, b'5.7.1 Sender not authorized')})
+        return super().send_messages(email_messages)
+
+
+@override_settings(EMAIL_BACKEND=f'{__name__}.BackendInestable')
+class ListaSupresionTest(TestCase):
+    def setUp(self):
+        BackendInestable.aperturas = 0
+        BackendInestable.enviados = []
+        BackendInestable.cortar_en = None
+
+    def _mensajes(self, *destinatarios):
+        return [EmailMessage('Asunto', 'Cuerpo', 'noreply@example.com', [email]) for email in destinatarios]
+
+    def test_rechazo_suprime_y_no_se_vuelve_a_enviar(self):
+        errores = enviar_emails_en_lote(self._mensajes('rechazado@example.com', 'ok@example.com'))
+        self.assertIn('5.1.1', errores[0])
+        self.assertTrue(EmailSuprimido.objects.filter(email='rechazado@example.com', motivo='smtp').exists())
+
+        BackendInestable.aperturas = 0
+        errores = enviar_emails_en_lote(self._mensajes('Rechazado@example.com'))
+        self.assertEqual(errores, [ERROR_SUPRIMIDO])
+        # Un lote sin destinatarios enviables no abre conexión
+        self.assertEqual(BackendInestable.aperturas, 0)
+
+    def test_rebote_suprime_solo_fallos_permanentes(self):
+        self.assertEqual(procesar_rebote(REBOTE), ['perdido@example.com'])
+        self.assertEqual(emails_suprimidos(['perdido@example.com', 'lleno@example.com']), {'perdido@example.com'})
+
+        procesar_rebote(REBOTE)
+        self.assertEqual(EmailSuprimido.objects.get(email='perdido@example.com').rebotes, 2)
+
+    def test_clasificacion_de_errores_550(self):
+        self.assertTrue(es_direccion_inexistente('550 5.1.1 The email account does not exist'))
+        self.assertTrue(es_direccion_inexistente('550 5.2.1 The email account is disabled'))
+        self.assertTrue(es_direccion_inexistente('556 5.1.10 Recipient address has null MX'))
+        self.assertTrue(es_direccion_inexistente('550 User unknown'))
+        self.assertFalse(es_direccion_inexistente('550 5.4.5 Daily sending quota exceeded'))
+        self.assertFalse(es_direccion_inexistente('550 5.7.1 Sender not authorized'))
+        self.assertFalse(es_direccion_inexistente('550 Mailbox unavailable'))
+
+    @override_settings(EMAIL_BACKEND=f'{__name__}.BackendSinCuota')
+    def test_cuota_y_remitente_no_suprimen(self):
+        errores = enviar_emails_en_lote(self._mensajes('cuota@example.com', 'remitente@example.com'))
+
+        self.assertIn('5.4.5', errores[0])
+        self.assertIn('5.7.1', errores[1])
+        self.assertFalse(EmailSuprimido.objects.exists())